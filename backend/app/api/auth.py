@@ -3,10 +3,11 @@ Authentication API Endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.models.models import User
 from app.schemas.auth import (
@@ -14,6 +15,8 @@ from app.schemas.auth import (
     UserUpdate, PasswordChange
 )
 from app.services.auth_service import AuthService, auth_service
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -21,13 +24,13 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register new user
     """
     # Check if username exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,7 +38,7 @@ async def register(
         )
     
     # Check if email exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,7 +46,7 @@ async def register(
         )
     
     # Create user
-    hashed_password = auth_service.get_password_hash(user_data.password)
+    hashed_password = await auth_service.hash_password(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -53,8 +56,8 @@ async def register(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
@@ -62,12 +65,12 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login with username and password
     """
-    user = auth_service.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -94,7 +97,7 @@ async def login(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    current_user: User = Depends(auth_service.get_current_active_user)
+    current_user: Principal = Depends(auth_service.get_current_active_user)
 ):
     """
     Get current logged in user
@@ -105,56 +108,58 @@ async def get_current_user(
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_update: UserUpdate,
-    current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(auth_service.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update current user information
     """
+    user = await db.get(User, current_user.id)
     if user_update.email:
         # Check if email already exists
-        existing = db.query(User).filter(
+        existing = await db.scalar(select(User).where(
             User.email == user_update.email,
             User.id != current_user.id
-        ).first()
+        ))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already in use"
             )
-        current_user.email = user_update.email
+        user.email = user_update.email
     
     if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
+        user.full_name = user_update.full_name
     
     if user_update.password:
-        current_user.password_hash = auth_service.get_password_hash(user_update.password)
+        user.password_hash = await auth_service.hash_password(user_update.password)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(user)
     
-    return current_user
+    return user
 
 
 @router.post("/change-password")
 async def change_password(
     password_data: PasswordChange,
-    current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(auth_service.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Change user password
     """
     # Verify old password
-    if not auth_service.verify_password(password_data.old_password, current_user.password_hash):
+    user = await db.get(User, current_user.id)
+    if not await password_hasher.verify(password_data.old_password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
     
     # Update password
-    current_user.password_hash = auth_service.get_password_hash(password_data.new_password)
-    db.commit()
+    user.password_hash = await auth_service.hash_password(password_data.new_password)
+    await db.commit()
     
     return {"message": "Password changed successfully"}
 
@@ -164,12 +169,12 @@ async def list_users(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all users (Admin only)
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return users
 
 
@@ -177,12 +182,12 @@ async def list_users(
 async def delete_user(
     user_id: int,
     current_user: User = Depends(auth_service.require_role("super_admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete user (Super Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -195,7 +200,7 @@ async def delete_user(
             detail="Cannot delete yourself"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     
     return {"message": "User deleted successfully"}
@@ -1,23 +1,39 @@
 """
 Candidates API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import asyncio
-from sqlalchemy.orm import Session
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import func
+import mimetypes
+import orjson
 import os
 import shutil
-from typing import Optional
+import tempfile
+from typing import List, Literal, Optional, Tuple, Type, Union
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.models.models import Candidate, Document, Employee, User, CandidateStatus, DocumentType
+from app.core.exceptions import ValidationError
+from app.core.responses import Page, list_response, page_response
+from app.models.models import Candidate, Document, User, CandidateSkillCode, CandidateStatus, DocumentType
 from app.schemas.candidate import (
-    CandidateCreate, CandidateUpdate, CandidateResponse,
-    CandidateApprove, CandidateReject, DocumentUpload, OCRData
+    CandidateCreate, CandidateCreateResponse, CandidateUpdate, CandidateResponse, CandidateSummary, CandidateDetail,
+    CandidateApprove, CandidateBatchApprove, CandidateReject, DocumentUpload, DuplicateCandidate, OCRData,
+    FactoryShortlist, OnboardingResult, CANDIDATE_VIEWS
 )
-from app.schemas.base import PaginatedResponse
 from app.services.auth_service import auth_service
+from app.services.blob_store import blob_store
+from app.services.candidate_profile import PROFILE_FIELDS, apply_profile, profile_loads, with_skills
+from app.services.dedup_service import DedupRecord, dedup_service
+from app.services.derivative_service import derivative_service, file_url
+from app.services.id_allocator import id_allocator
+from app.services.matching_service import matching_engine
+from app.services.onboarding_service import onboarding_service
 from app.services.ocr_service import ocr_service
 
 import logging
@@ -27,35 +43,47 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _build_emergency_contact(candidate: "Candidate") -> Optional[str]:
-    """Build emergency contact string combining name and relation."""
-    parts = []
-    if getattr(candidate, "emergency_contact_name", None):
-        parts.append(candidate.emergency_contact_name)
-    if getattr(candidate, "emergency_contact_relation", None):
-        parts.append(f"({candidate.emergency_contact_relation})")
+_CANDIDATE_COLUMNS = frozenset(Candidate.__table__.columns.keys())
 
-    contact = " ".join(parts).strip()
-    return contact or None
 
+@lru_cache(maxsize=None)
+def _load_columns(schema: Type[BaseModel]) -> Tuple:
+    """Candidate columns needed to render ``schema`` (for load_only)"""
+    return tuple(getattr(Candidate, name) for name in schema.model_fields if name in _CANDIDATE_COLUMNS)
 
-def generate_rirekisho_id(db: Session) -> str:
-    """Generate next Rirekisho ID"""
-    # Get last candidate
-    last_candidate = db.query(Candidate).order_by(Candidate.id.desc()).first()
 
-    if last_candidate and hasattr(last_candidate, 'rirekisho_id') and last_candidate.rirekisho_id:
-        # Extract number from UNS-XXXX
-        last_num = int(last_candidate.rirekisho_id.split('-')[1])
-        next_num = last_num + 1
-    else:
-        next_num = getattr(settings, 'RIREKISHO_ID_START', 1)
+def _load_options(schema: Type[BaseModel]) -> list:
+    """load_only() for the columns plus one selectin query per child table rendered"""
+    return [load_only(*_load_columns(schema)), *profile_loads(schema.model_fields)]
 
-    prefix = getattr(settings, 'RIREKISHO_ID_PREFIX', 'UNS-')
-    return f"{prefix}{next_num}"
 
+def _split_profile(data: dict) -> dict:
+    """Pop the child-table groups (family, work history, qualifications, skills) from ``data``"""
+    return {name: data.pop(name) for name in PROFILE_FIELDS & data.keys()}
 
-@router.post("/", response_model=CandidateResponse, status_code=status.HTTP_201_CREATED)
+
+@lru_cache(maxsize=64)
+def _sparse_schema(names: Tuple[str, ...]) -> Type[BaseModel]:
+    """Response schema with only ``names`` (plus id), typed as in CandidateResponse"""
+    full = CandidateResponse.model_fields
+    return create_model(
+        "CandidateFields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (full[name].annotation, None) for name in ("id", *names)},
+    )
+
+
+def _list_schema(view: str, fields: Optional[str]) -> Type[BaseModel]:
+    if not fields:
+        return CANDIDATE_VIEWS[view]
+    names = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()} - {"id"}))
+    unknown = [name for name in names if name not in CandidateResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown candidate fields: {', '.join(unknown)}")
+    return _sparse_schema(names)
+
+
+@router.post("/", response_model=CandidateCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_candidate(
     candidate: CandidateCreate,
     current_user: User = Depends(auth_service.get_current_active_user),
@@ -63,36 +91,61 @@ async def create_candidate(
 ):
     """
     Create new candidate from rirekisho (履歴書)
-    """
-    # Generate Rirekisho ID
-    rirekisho_id = generate_rirekisho_id(db)
 
+    ``duplicates`` lists existing candidates that look like the same
+    person (same birth date or phone and a similar name); the candidate is
+    created regardless.
+    """
     # Create candidate with all rirekisho fields
-    new_candidate = Candidate(
-        rirekisho_id=rirekisho_id,
-        **candidate.model_dump(exclude_unset=True)
-    )
-
-    db.add(new_candidate)
+    data = candidate.model_dump(exclude_unset=True)
+    duplicates = dedup_service.find_duplicates(db, DedupRecord.from_values(
+        full_name_kanji=candidate.full_name_kanji, full_name_kana=candidate.full_name_kana,
+        full_name_roman=candidate.full_name_roman, date_of_birth=candidate.date_of_birth,
+        phone=candidate.phone, mobile=candidate.mobile,
+    ))
+    profile = _split_profile(data)
+
+    def build(rirekisho_id: str) -> Candidate:
+        new_candidate = Candidate(rirekisho_id=rirekisho_id, **data)
+        apply_profile(new_candidate, profile)
+        return new_candidate
+
+    # Rirekisho ID from the sequence (see id_allocator)
+    new_candidate = id_allocator.insert(db, "rirekisho_id", build)
     db.commit()
     db.refresh(new_candidate)
 
-    return new_candidate
+    response = CandidateCreateResponse.model_validate(new_candidate)
+    response.duplicates = [
+        DuplicateCandidate(candidate_id=pair.b.id, rirekisho_id=pair.b.rirekisho_id, name=pair.b.name,
+                           score=pair.score, reasons=pair.reasons)
+        for pair in duplicates
+    ]
+    if duplicates:
+        logger.warning(f"Candidate {new_candidate.rirekisho_id} may duplicate {', '.join(p.b.rirekisho_id for p in duplicates)}")
+    return response
 
 
-@router.get("/", response_model=PaginatedResponse)
+@router.get("/", response_model=Page[Union[CandidateSummary, CandidateDetail, CandidateResponse]])
 async def list_candidates(
     page: int = 1,
     page_size: int = 20,
     status_filter: Optional[CandidateStatus] = None,
     search: Optional[str] = None,
+    view: Literal["summary", "detail", "full"] = "summary",
+    fields: Optional[str] = Query(None, description="Comma-separated fields, overrides view (e.g. full_name_kanji,mobile)"),
+    skills: Optional[List[CandidateSkillCode]] = Query(None, description="Only candidates having all these skills"),
     current_user: User = Depends(auth_service.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     List all candidates with pagination
+
+    Only the columns of the requested view (summary, detail, full) or
+    ``fields`` are loaded from the database and returned.
     """
-    query = db.query(Candidate)
+    schema = _list_schema(view, fields)
+    query = db.query(Candidate).options(*_load_options(schema))
     
     # Apply filters
     if status_filter:
@@ -106,19 +159,53 @@ async def list_candidates(
             (Candidate.rirekisho_id.ilike(f"%{search}%"))
         )
     
+    if skills:
+        query = query.filter(with_skills(skills))
+
     # Get total count
     total = query.count()
     
     # Apply pagination
     candidates = query.offset((page - 1) * page_size).limit(page_size).all()
     
-    return {
-        "items": candidates,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    return page_response(schema, candidates, total=total, page=page, page_size=page_size)
+
+
+@router.get("/match", response_model=List[FactoryShortlist])
+async def match_candidates(
+    factory_id: Optional[List[str]] = Query(None, description="Factories to shortlist for (default: all)"),
+    limit: int = Query(10, ge=1, le=100, description="Candidates per factory"),
+    current_user: User = Depends(auth_service.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked candidate shortlists per factory opening
+
+    Pending and approved candidates are scored against each factory's
+    skills, JLPT and commute requirements (see matching_service).
+    """
+    try:
+        shortlists = await run_in_threadpool(matching_engine.match, db, factory_id, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown factory: {e.args[0]}")
+    return list_response(FactoryShortlist, shortlists)
+
+
+@router.post("/approve-batch", response_model=List[OnboardingResult])
+async def approve_candidates(
+    batch: CandidateBatchApprove,
+    current_user: User = Depends(auth_service.require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """
+    Approve an onboarding wave in one transaction; failures are reported per candidate
+    """
+    requests = [
+        (item.candidate_id, CandidateApprove(**item.model_dump(exclude={"candidate_id"})))
+        for item in batch.candidates
+    ]
+    results = onboarding_service.approve(db, requests, current_user.id)
+    return list_response(OnboardingResult, results)
 
 
 @router.get("/{candidate_id}", response_model=CandidateResponse)
@@ -130,7 +217,7 @@ async def get_candidate(
     """
     Get candidate by ID
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = db.query(Candidate).options(*profile_loads(PROFILE_FIELDS)).filter(Candidate.id == candidate_id).first()
     if not candidate:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -149,7 +236,7 @@ async def update_candidate(
     """
     Update candidate
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = db.query(Candidate).options(*profile_loads(PROFILE_FIELDS)).filter(Candidate.id == candidate_id).first()
     if not candidate:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,7 +244,9 @@ async def update_candidate(
         )
     
     # Update fields
-    for field, value in candidate_update.model_dump(exclude_unset=True).items():
+    data = candidate_update.model_dump(exclude_unset=True)
+    apply_profile(candidate, _split_profile(data))
+    for field, value in data.items():
         setattr(candidate, field, value)
     
     db.commit()
@@ -215,20 +304,24 @@ async def upload_document(
             detail=f"File type not allowed. Allowed types: {settings.ALLOWED_EXTENSIONS}"
         )
     
-    # Create upload directory if not exists
-    upload_dir = os.path.join(settings.UPLOAD_DIR, "candidates", str(candidate_id))
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save file
-    file_path = os.path.join(upload_dir, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save file once per content (sha256 path, see blob_store)
+    try:
+        blob = await blob_store.put_upload(file, settings.MAX_UPLOAD_SIZE)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=e.message)
+    file_path = blob.path
+    mime_type = file.content_type or mimetypes.guess_type(file.filename)[0]
+
+    # WebP thumbnail/preview rendered in the background (served by /api/files)
+    derivative_service.schedule(blob, mime_type)
+    if document_type == "photo":
+        candidate.photo_url = file_url(blob.sha256)
     
     # Process with OCR
     ocr_data = None
     if document_type in ["rirekisho", "zairyu_card"]:
         try:
-            ocr_result = ocr_service.process_document(file_path, document_type)
+            ocr_result = await ocr_service.process_document(file_path, document_type)
             ocr_data = OCRData(**ocr_result)
             
             # Auto-fill candidate data if rirekisho
@@ -253,14 +346,16 @@ async def upload_document(
             print(f"OCR processing error: {e}")
             ocr_data = OCRData(raw_text=f"Error processing: {str(e)}")
     
-    # Save document record
+    # Save document record (blob row first: documents.blob_sha256 references it)
+    blob_store.add_reference(db, blob, mime_type)
     document = Document(
         candidate_id=candidate_id,
         document_type=DocumentType[document_type.upper()],
         file_name=file.filename,
         file_path=file_path,
-        file_size=os.path.getsize(file_path),
-        mime_type=file.content_type,
+        file_size=blob.size,
+        mime_type=mime_type,
+        blob_sha256=blob.sha256,
         ocr_data=ocr_data.model_dump() if ocr_data else None,
         uploaded_by=current_user.id
     )
@@ -286,93 +381,17 @@ async def approve_candidate(
     db: Session = Depends(get_db)
 ):
     """
-    Approve candidate
+    Approve candidate (and promote to employee with its documents, one transaction)
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
-    if not candidate:
+    result, = onboarding_service.approve(db, [(candidate_id, approve_data)], current_user.id)
+    if not result.ok:
+        not_found = result.error == "Candidate not found"
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Candidate not found"
+            status_code=status.HTTP_404_NOT_FOUND if not_found else status.HTTP_400_BAD_REQUEST,
+            detail=result.error,
         )
-    
-    candidate.status = CandidateStatus.APPROVED
-    candidate.approved_by = current_user.id
-    candidate.approved_at = func.now()
-
-    if approve_data.promote_to_employee:
-        # Avoid creating duplicate employees for the same rirekisho_id
-        existing_employee = db.query(Employee).filter(Employee.rirekisho_id == candidate.rirekisho_id).first()
-
-        if not existing_employee:
-            employee_name = candidate.full_name_kanji or candidate.full_name_roman
-            if not employee_name:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Candidate name is required to create an employee",
-                )
-
-            last_employee = db.query(Employee).order_by(Employee.hakenmoto_id.desc()).first()
-            next_hakenmoto_id = (last_employee.hakenmoto_id + 1) if last_employee else 1
-
-            address_parts = [
-                candidate.current_address,
-                candidate.address_banchi,
-                candidate.building_name,
-            ]
-            candidate_address = " ".join([part for part in address_parts if part]) or candidate.registered_address
-
-            jikyu_value = approve_data.jikyu if approve_data.jikyu is not None else 0
-
-            new_employee = Employee(
-                hakenmoto_id=next_hakenmoto_id,
-                rirekisho_id=candidate.rirekisho_id,
-                factory_id=approve_data.factory_id,
-                hakensaki_shain_id=approve_data.hakensaki_shain_id,
-                full_name_kanji=employee_name,
-                full_name_kana=candidate.full_name_kana,
-                photo_url=candidate.photo_url,
-                date_of_birth=candidate.date_of_birth,
-                gender=candidate.gender,
-                nationality=candidate.nationality,
-                zairyu_card_number=candidate.residence_card_number,
-                zairyu_expire_date=candidate.residence_expiry,
-                address=candidate_address,
-                postal_code=candidate.postal_code,
-                phone=candidate.mobile or candidate.phone,
-                email=candidate.email,
-                emergency_contact=_build_emergency_contact(candidate),
-                emergency_phone=candidate.emergency_contact_phone,
-                hire_date=approve_data.hire_date or candidate.hire_date,
-                jikyu=jikyu_value,
-                position=approve_data.position,
-                contract_type=approve_data.contract_type,
-                notes=approve_data.notes,
-            )
-
-            db.add(new_employee)
-            db.flush()
-
-            # Copy candidate documents to the new employee profile
-            candidate_documents = db.query(Document).filter(Document.candidate_id == candidate.id).all()
-            for doc in candidate_documents:
-                employee_document = Document(
-                    employee_id=new_employee.id,
-                    candidate_id=None,
-                    document_type=doc.document_type,
-                    file_name=doc.file_name,
-                    file_path=doc.file_path,
-                    file_size=doc.file_size,
-                    mime_type=doc.mime_type,
-                    ocr_data=doc.ocr_data,
-                    uploaded_by=current_user.id,
-                )
-                db.add(employee_document)
-        candidate.status = CandidateStatus.HIRED
-
-    db.commit()
-    db.refresh(candidate)
 
-    return candidate
+    return db.query(Candidate).filter(Candidate.id == candidate_id).first()
 
 
 @router.post("/{candidate_id}/reject", response_model=CandidateResponse)
@@ -408,6 +427,51 @@ async def ocr_process_options():
     return {"success": True}
 
 
+@router.post("/ocr/stream")
+async def stream_ocr_document(
+    file: UploadFile = File(...),
+    document_type: str = Form(...)
+):
+    """
+    OCR a PDF page by page as NDJSON (one ``{"page": n, ...}`` line per page,
+    in completion order, then ``{"done": true}``); images give a single line
+    """
+    file_ext = os.path.splitext(file.filename or "")[1].lower()
+    if file_ext not in ['.jpg', '.jpeg', '.png', '.pdf']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File type not allowed. Allowed types: jpg, jpeg, png, pdf"
+        )
+
+    def save() -> str:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext, dir=ocr_service.work_dir) as tmp_file:
+            shutil.copyfileobj(file.file, tmp_file)
+            return tmp_file.name
+
+    tmp_path = await run_in_threadpool(save)
+
+    async def lines():
+        try:
+            if ocr_service.is_pdf(tmp_path):
+                async for page in ocr_service.process_pages(tmp_path, document_type):
+                    yield orjson.dumps(page, default=str) + b"\n"
+            else:
+                result = await ocr_service.process_document(tmp_path, document_type)
+                yield orjson.dumps({**result, "page": 1, "page_count": 1}, default=str) + b"\n"
+            yield b'{"done":true}\n'
+        except Exception as e:
+            logger.error(f"OCR streaming error: {e}")
+            yield orjson.dumps({"done": True, "error": str(e)}) + b"\n"
+        finally:
+            os.remove(tmp_path)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/ocr/process")
 async def process_ocr_document(
     file: UploadFile = File(...),
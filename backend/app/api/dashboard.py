@@ -2,12 +2,11 @@
 Dashboard API Endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
 
-from app.core.database import get_db
+from app.core.database import get_async_read_db
 from app.models.models import (
     User, Candidate, Employee, Factory, Request, TimerCard,
     SalaryCalculation, CandidateStatus, RequestStatus
@@ -18,6 +17,8 @@ from app.schemas.dashboard import (
     EmployeeDashboard, CoordinatorDashboard
 )
 from app.services.auth_service import auth_service
+from app.services.factory_registry import factory_registry
+from app.utils.dates import add_months, iter_months, month_bounds
 
 router = APIRouter()
 
@@ -25,7 +26,7 @@ router = APIRouter()
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get main dashboard statistics"""
     # Get current month
@@ -34,33 +35,33 @@ async def get_dashboard_stats(
     current_year = now.year
     
     # Candidates
-    total_candidates = db.query(Candidate).count()
-    pending_candidates = db.query(Candidate).filter(
+    total_candidates = await db.scalar(select(func.count(Candidate.id)))
+    pending_candidates = await db.scalar(select(func.count(Candidate.id)).where(
         Candidate.status == CandidateStatus.PENDING
-    ).count()
+    ))
     
     # Employees
-    total_employees = db.query(Employee).count()
-    active_employees = db.query(Employee).filter(Employee.is_active == True).count()
+    total_employees = await db.scalar(select(func.count(Employee.id)))
+    active_employees = await db.scalar(select(func.count(Employee.id)).where(Employee.is_active == True))
     
     # Factories
-    total_factories = db.query(Factory).filter(Factory.is_active == True).count()
+    total_factories = await db.scalar(select(func.count(Factory.id)).where(Factory.is_active == True))
     
     # Pending requests
-    pending_requests = db.query(Request).filter(
+    pending_requests = await db.scalar(select(func.count(Request.id)).where(
         Request.status == RequestStatus.PENDING
-    ).count()
+    ))
     
     # Pending timer cards
-    pending_timer_cards = db.query(TimerCard).filter(
+    pending_timer_cards = await db.scalar(select(func.count(TimerCard.id)).where(
         TimerCard.is_approved == False
-    ).count()
+    ))
     
     # Current month salary
-    current_salaries = db.query(SalaryCalculation).filter(
+    current_salaries = (await db.scalars(select(SalaryCalculation).where(
         SalaryCalculation.month == current_month,
         SalaryCalculation.year == current_year
-    ).all()
+    ))).all()
     
     total_salary = sum(s.net_salary for s in current_salaries)
     total_profit = sum(s.company_profit for s in current_salaries)
@@ -81,59 +82,74 @@ async def get_dashboard_stats(
 @router.get("/factories", response_model=list[FactoryDashboard])
 async def get_factories_dashboard(
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get dashboard for all factories"""
     now = datetime.now()
     current_month = now.month
     current_year = now.year
     
-    factories = db.query(Factory).filter(Factory.is_active == True).all()
+    month_start, month_end = month_bounds(current_year, current_month)
+
+    factories = (await db.scalars(select(Factory).where(Factory.is_active == True))).all()
+    factory_rules = await db.run_sync(factory_registry.all)
+
+    # One grouped query per metric instead of three queries per factory
+    employee_counts = {
+        factory_id: (total, int(active or 0))
+        for factory_id, total, active in (await db.execute(
+            select(
+                Employee.factory_id,
+                func.count(Employee.id),
+                func.sum(case((Employee.is_active == True, 1), else_=0))
+            ).group_by(Employee.factory_id)
+        )).all()
+    }
+    hours_by_factory = dict((await db.execute(
+        select(
+            Employee.factory_id,
+            func.sum(TimerCard.regular_hours + TimerCard.overtime_hours + TimerCard.night_hours + TimerCard.holiday_hours)
+        ).join(Employee, Employee.id == TimerCard.employee_id).where(
+            TimerCard.is_approved == True,
+            TimerCard.work_date >= month_start,
+            TimerCard.work_date < month_end
+        ).group_by(Employee.factory_id)
+    )).all())
+    salary_by_factory = {
+        factory_id: (net, revenue, profit)
+        for factory_id, net, revenue, profit in (await db.execute(
+            select(
+                Employee.factory_id,
+                func.sum(SalaryCalculation.net_salary),
+                func.sum(SalaryCalculation.factory_payment),
+                func.sum(SalaryCalculation.company_profit)
+            ).join(Employee, Employee.id == SalaryCalculation.employee_id).where(
+                SalaryCalculation.month == current_month,
+                SalaryCalculation.year == current_year
+            ).group_by(Employee.factory_id)
+        )).all()
+    }
     
     result = []
     for factory in factories:
-        # Employees
-        employees = db.query(Employee).filter(
-            Employee.factory_id == factory.factory_id
-        ).all()
-        active_employees = [e for e in employees if e.is_active]
-        
-        # Current month data
-        employee_ids = [e.id for e in employees]
-        
-        timer_cards = db.query(TimerCard).filter(
-            TimerCard.employee_id.in_(employee_ids),
-            TimerCard.is_approved == True,
-            extract('month', TimerCard.work_date) == current_month,
-            extract('year', TimerCard.work_date) == current_year
-        ).all()
-        
-        total_hours = sum(
-            float(tc.regular_hours + tc.overtime_hours + tc.night_hours + tc.holiday_hours)
-            for tc in timer_cards
+        total_employees, active_employees = employee_counts.get(factory.factory_id, (0, 0))
+        total_hours = float(hours_by_factory.get(factory.factory_id) or 0)
+        total_salary, total_revenue, total_profit = (
+            int(value or 0) for value in salary_by_factory.get(factory.factory_id, (0, 0, 0))
         )
-        
-        salaries = db.query(SalaryCalculation).filter(
-            SalaryCalculation.employee_id.in_(employee_ids),
-            SalaryCalculation.month == current_month,
-            SalaryCalculation.year == current_year
-        ).all()
-        
-        total_salary = sum(s.net_salary for s in salaries)
-        total_revenue = sum(s.factory_payment for s in salaries)
-        total_profit = sum(s.company_profit for s in salaries)
         profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
         
         result.append(FactoryDashboard(
             factory_id=factory.factory_id,
             factory_name=factory.name,
-            total_employees=len(employees),
-            active_employees=len(active_employees),
+            total_employees=total_employees,
+            active_employees=active_employees,
             current_month_hours=total_hours,
             current_month_salary=total_salary,
             current_month_revenue=total_revenue,
             current_month_profit=total_profit,
-            profit_margin=round(profit_margin, 2)
+            profit_margin=round(profit_margin, 2),
+            billing_rate=getattr(factory_rules.get(factory.factory_id), "billing_rate", None)
         ))
     
     return result
@@ -142,17 +158,17 @@ async def get_factories_dashboard(
 @router.get("/alerts", response_model=list[EmployeeAlert])
 async def get_alerts(
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get employee alerts (expiring zairyu, low yukyu, etc.)"""
     alerts = []
     today = date.today()
     
     # Zairyu card expiring in 60 days
-    employees = db.query(Employee).filter(
+    employees = (await db.scalars(select(Employee).where(
         Employee.is_active == True,
         Employee.zairyu_expire_date != None
-    ).all()
+    ))).all()
     
     for employee in employees:
         if employee.zairyu_expire_date:
@@ -186,48 +202,61 @@ async def get_alerts(
 async def get_monthly_trends(
     months: int = 6,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get monthly trend data (last N months)"""
     trends = []
     now = datetime.now()
+    current = (now.year, now.month)
+    periods = list(iter_months(add_months(*current, 1 - months), current))[::-1]  # newest first
+    if not periods:
+        return trends
+    range_start, _ = month_bounds(*periods[-1])
+    _, range_end = month_bounds(*periods[0])
     
-    for i in range(months):
-        target_date = now - relativedelta(months=i)
-        month = target_date.month
-        year = target_date.year
-        
-        # Active employees that month
-        total_employees = db.query(Employee).filter(
-            Employee.is_active == True
-        ).count()
-        
-        # Timer cards
-        timer_cards = db.query(TimerCard).filter(
-            TimerCard.is_approved == True,
-            extract('month', TimerCard.work_date) == month,
-            extract('year', TimerCard.work_date) == year
-        ).all()
-        
-        total_hours = sum(
-            float(tc.regular_hours + tc.overtime_hours + tc.night_hours + tc.holiday_hours)
-            for tc in timer_cards
+    # Active employees (current count, shown for every month)
+    total_employees = await db.scalar(select(func.count(Employee.id)).where(
+        Employee.is_active == True
+    ))
+    
+    # Timer card hours and salary totals for the whole range, grouped by month
+    card_year = func.extract("year", TimerCard.work_date)
+    card_month = func.extract("month", TimerCard.work_date)
+    hours_by_month = {
+        (int(year), int(month)): float(hours or 0)
+        for year, month, hours in (await db.execute(
+            select(
+                card_year, card_month,
+                func.sum(TimerCard.regular_hours + TimerCard.overtime_hours + TimerCard.night_hours + TimerCard.holiday_hours)
+            ).where(
+                TimerCard.is_approved == True,
+                TimerCard.work_date >= range_start,
+                TimerCard.work_date < range_end
+            ).group_by(card_year, card_month)
+        )).all()
+    }
+    salary_by_month = {
+        (year, month): (net, revenue, profit)
+        for year, month, net, revenue, profit in (await db.execute(
+            select(
+                SalaryCalculation.year, SalaryCalculation.month,
+                func.sum(SalaryCalculation.net_salary),
+                func.sum(SalaryCalculation.factory_payment),
+                func.sum(SalaryCalculation.company_profit)
+            ).where(
+                SalaryCalculation.year.between(periods[-1][0], periods[0][0])  # yearly partitions
+            ).group_by(SalaryCalculation.year, SalaryCalculation.month)
+        )).all()
+    }
+    
+    for year, month in periods:
+        total_salary, total_revenue, total_profit = (
+            int(value or 0) for value in salary_by_month.get((year, month), (0, 0, 0))
         )
-        
-        # Salaries
-        salaries = db.query(SalaryCalculation).filter(
-            SalaryCalculation.month == month,
-            SalaryCalculation.year == year
-        ).all()
-        
-        total_salary = sum(s.net_salary for s in salaries)
-        total_revenue = sum(s.factory_payment for s in salaries)
-        total_profit = sum(s.company_profit for s in salaries)
-        
         trends.append(MonthlyTrend(
             month=f"{year}-{month:02d}",
             total_employees=total_employees,
-            total_hours=total_hours,
+            total_hours=hours_by_month.get((year, month), 0.0),
             total_salary=total_salary,
             total_revenue=total_revenue,
             total_profit=total_profit
@@ -239,7 +268,7 @@ async def get_monthly_trends(
 @router.get("/admin", response_model=AdminDashboard)
 async def get_admin_dashboard(
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get complete admin dashboard"""
     stats = await get_dashboard_stats(current_user, db)
@@ -270,30 +299,31 @@ async def get_admin_dashboard(
 async def get_employee_dashboard(
     employee_id: int,
     current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get employee's personal dashboard"""
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = await db.get(Employee, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Get factory name
-    factory = db.query(Factory).filter(Factory.factory_id == employee.factory_id).first()
+    factory = await db.scalar(select(Factory).where(Factory.factory_id == employee.factory_id))
     factory_name = factory.name if factory else employee.factory_id
     
     # Last payment
-    last_salary = db.query(SalaryCalculation).filter(
+    last_salary = await db.scalar(select(SalaryCalculation).where(
         SalaryCalculation.employee_id == employee_id,
         SalaryCalculation.is_paid == True
-    ).order_by(SalaryCalculation.created_at.desc()).first()
+    ).order_by(SalaryCalculation.created_at.desc()).limit(1))
     
     # Current month hours
     now = datetime.now()
-    timer_cards = db.query(TimerCard).filter(
+    month_start, month_end = month_bounds(now.year, now.month)
+    timer_cards = (await db.scalars(select(TimerCard).where(
         TimerCard.employee_id == employee_id,
-        extract('month', TimerCard.work_date) == now.month,
-        extract('year', TimerCard.work_date) == now.year
-    ).all()
+        TimerCard.work_date >= month_start,
+        TimerCard.work_date < month_end
+    ))).all()
     
     current_hours = sum(
         float(tc.regular_hours + tc.overtime_hours + tc.night_hours + tc.holiday_hours)
@@ -301,10 +331,10 @@ async def get_employee_dashboard(
     )
     
     # Pending requests
-    pending_requests = db.query(Request).filter(
+    pending_requests = await db.scalar(select(func.count(Request.id)).where(
         Request.employee_id == employee_id,
         Request.status == RequestStatus.PENDING
-    ).count()
+    ))
     
     return EmployeeDashboard(
         employee_id=employee.id,
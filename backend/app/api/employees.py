@@ -1,24 +1,32 @@
 """
 Employees API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
-import pandas as pd
-from datetime import datetime
-import io
+from pathlib import Path
+import shutil
+
+from app.core.config import settings
 
 from app.core.database import get_db
-from app.models.models import Employee, Candidate, User, CandidateStatus, Factory, Document
+from app.core.responses import Page, page_response, validate_rows
+from app.models.models import Employee, Candidate, User, CandidateStatus, Factory
 from app.schemas.employee import (
     EmployeeCreate, EmployeeUpdate, EmployeeResponse,
     EmployeeTerminate, YukyuUpdate
 )
 from app.schemas.base import PaginatedResponse
 from app.services.auth_service import auth_service
+from app.services.employee_import_service import employee_import_service
+from app.services.job_service import job_registry
+from app.services.onboarding_service import onboarding_service
 
 router = APIRouter()
 
+IMPORT_TEMP_DIR = Path(settings.UPLOAD_DIR) / "import_temp"
+
 
 @router.post("/", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
 async def create_employee(
@@ -34,10 +42,6 @@ async def create_employee(
     if candidate.status != CandidateStatus.APPROVED:
         raise HTTPException(status_code=400, detail="Candidate not approved")
 
-    # Generate Hakenmoto ID
-    last_employee = db.query(Employee).order_by(Employee.hakenmoto_id.desc()).first()
-    hakenmoto_id = (last_employee.hakenmoto_id + 1) if last_employee else 1
-
     # Create employee with data from candidate
     employee_data = employee.model_dump()
 
@@ -45,41 +49,16 @@ async def create_employee(
     if candidate.photo_url:
         employee_data['photo_url'] = candidate.photo_url
 
-    new_employee = Employee(
-        hakenmoto_id=hakenmoto_id,
-        **employee_data
-    )
-
-    # Mark candidate as hired
-    candidate.status = CandidateStatus.HIRED
-
-    db.add(new_employee)
+    # Employee, hired status and document copies in one transaction
+    new_employee = onboarding_service.hire(db, candidate, employee_data)
+    onboarding_service.copy_documents(db, {candidate.id: new_employee.id}, current_user.id)
     db.commit()
     db.refresh(new_employee)
 
-    # Copy documents from candidate to employee
-    candidate_documents = db.query(Document).filter(Document.candidate_id == candidate.id).all()
-    for doc in candidate_documents:
-        # Create a copy of the document for the employee
-        employee_document = Document(
-            employee_id=new_employee.id,
-            candidate_id=None,  # Keep reference to original candidate if needed, or set to None
-            document_type=doc.document_type,
-            file_name=doc.file_name,
-            file_path=doc.file_path,
-            file_size=doc.file_size,
-            mime_type=doc.mime_type,
-            ocr_data=doc.ocr_data,
-            uploaded_by=current_user.id
-        )
-        db.add(employee_document)
-
-    db.commit()
-
     return new_employee
 
 
-@router.get("/")
+@router.get("/", response_model=Page[EmployeeResponse])
 async def list_employees(
     page: int = 1,
     page_size: int = 20,
@@ -120,23 +99,19 @@ async def list_employees(
     total = query.count()
     employees = query.offset((page - 1) * page_size).limit(page_size).all()
 
+    # Factory names for the whole page in one query
+    factory_ids = {emp.factory_id for emp in employees if emp.factory_id}
+    factory_names = dict(
+        db.query(Factory.factory_id, Factory.name).filter(Factory.factory_id.in_(factory_ids)).all()
+    ) if factory_ids else {}
+
     # Convert to response models and add factory name
-    items = []
-    for emp in employees:
-        emp_dict = EmployeeResponse.model_validate(emp).model_dump()
-        # Get factory name
-        if emp.factory_id:
-            factory = db.query(Factory).filter(Factory.factory_id == emp.factory_id).first()
-            emp_dict['factory_name'] = factory.name if factory else None
-        items.append(emp_dict)
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    items = validate_rows(EmployeeResponse, employees)
+    for item in items:
+        if item.factory_id:
+            item.factory_name = factory_names.get(item.factory_id)
+
+    return page_response(EmployeeResponse, items, total=total, page=page, page_size=page_size)
 
 
 @router.get("/{employee_id}")
@@ -219,151 +194,61 @@ async def update_yukyu(
     return employee
 
 
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+
 @router.post("/import-excel")
 async def import_employees_from_excel(
     file: UploadFile = File(...),
+    sheet_name: Optional[str] = None,
     current_user: User = Depends(auth_service.require_role("admin")),
     db: Session = Depends(get_db)
 ):
-    """Import employees from Excel file"""
+    """Import employees from Excel file (streaming, batched upserts)"""
 
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="File must be Excel format (.xlsx or .xls)")
+    if not file.filename.lower().endswith(EXCEL_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="File must be Excel format (.xlsx, .xlsm or .xls)")
 
     try:
-        # Read Excel file
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-
-        # Track results
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for index, row in df.iterrows():
-            try:
-                # Get or create hakenmoto_id
-                hakenmoto_id = row.get('社員№')
-
-                if pd.isna(hakenmoto_id) or not hakenmoto_id:
-                    # Generate new hakenmoto_id
-                    last_employee = db.query(Employee).order_by(Employee.hakenmoto_id.desc()).first()
-                    hakenmoto_id = (last_employee.hakenmoto_id + 1) if last_employee else 1
-
-                # Check if employee exists
-                existing = db.query(Employee).filter(Employee.hakenmoto_id == int(hakenmoto_id)).first()
-
-                # Parse dates
-                def parse_date(value):
-                    if pd.isna(value) or value == '' or value == '-':
-                        return None
-                    if isinstance(value, datetime):
-                        return value.date()
-                    try:
-                        return pd.to_datetime(value).date()
-                    except:
-                        return None
-
-                # Parse integer
-                def parse_int(value):
-                    if pd.isna(value) or value == '' or value == '-':
-                        return None
-                    try:
-                        return int(value)
-                    except:
-                        return None
-
-                # Parse boolean
-                def parse_bool(value):
-                    if pd.isna(value) or value == '':
-                        return None
-                    if isinstance(value, bool):
-                        return value
-                    if str(value).lower() in ['true', 'yes', '1', 'はい', '○']:
-                        return True
-                    return False
-
-                # Determine if active based on 現在 column
-                is_active = True
-                status_value = row.get('現在')
-                if not pd.isna(status_value):
-                    if str(status_value) in ['退社', '退職', '×']:
-                        is_active = False
-
-                # Get factory name from 派遣先 column
-                factory_name = row.get('派遣先')
-                factory_id = None
-
-                # Try to find factory by name
-                if factory_name and not pd.isna(factory_name):
-                    factory = db.query(Factory).filter(Factory.name.ilike(f'%{factory_name}%')).first()
-                    if factory:
-                        factory_id = factory.factory_id
-
-                # Create employee data with ALL columns
-                employee_data = {
-                    'hakenmoto_id': int(hakenmoto_id),
-                    'factory_id': factory_id,  # ID interno del sistema
-                    'hakensaki_shain_id': row.get('派遣先ID'),  # ID que la fábrica da al empleado
-                    'full_name_kanji': row.get('氏名'),
-                    'full_name_kana': row.get('カナ'),
-                    'gender': row.get('性別'),
-                    'nationality': row.get('国籍'),
-                    'date_of_birth': parse_date(row.get('生年月日')),
-                    'jikyu': parse_int(row.get('時給')) or 0,
-                    'hourly_rate_charged': parse_int(row.get('請求単価')),
-                    'profit_difference': parse_int(row.get('差額利益')),
-                    'standard_compensation': parse_int(row.get('標準報酬')),
-                    'health_insurance': parse_int(row.get('健康保険')),
-                    'nursing_insurance': parse_int(row.get('介護保険')),
-                    'pension_insurance': parse_int(row.get('厚生年金')),
-                    'zairyu_expire_date': parse_date(row.get('ビザ期限')),
-                    'visa_type': row.get('ビザ種類'),
-                    'postal_code': row.get('〒'),
-                    'address': row.get('住所'),
-                    'apartment_id': parse_int(row.get('ｱﾊﾟｰﾄ')),
-                    'apartment_start_date': parse_date(row.get('入居')),
-                    'hire_date': parse_date(row.get('入社日')),
-                    'termination_date': parse_date(row.get('退社日')),
-                    'apartment_move_out_date': parse_date(row.get('退去')),
-                    'social_insurance_date': parse_date(row.get('社保加入')),
-                    'entry_request_date': parse_date(row.get('入社依頼')),
-                    'notes': row.get('備考'),
-                    'license_type': row.get('免許種類'),
-                    'license_expire_date': parse_date(row.get('免許期限')),
-                    'commute_method': row.get('通勤方法'),
-                    'optional_insurance_expire': parse_date(row.get('任意保険期限')),
-                    'japanese_level': row.get('日本語検定'),
-                    'career_up_5years': parse_bool(row.get('キャリアアップ5年目')),
-                    'is_active': is_active
-                }
-
-                if existing:
-                    # Update existing employee
-                    for key, value in employee_data.items():
-                        if value is not None and key != 'hakenmoto_id':
-                            setattr(existing, key, value)
-                    updated_count += 1
-                else:
-                    # Create new employee
-                    new_employee = Employee(**employee_data)
-                    db.add(new_employee)
-                    created_count += 1
-
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-                continue
-
-        db.commit()
-
-        return {
-            "success": True,
-            "created": created_count,
-            "updated": updated_count,
-            "errors": errors,
-            "total_processed": created_count + updated_count
-        }
+        result = await run_in_threadpool(
+            employee_import_service.import_file, db, file.file, file.filename, sheet_name
+        )
+        return result.as_response()
 
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error processing Excel file: {str(e)}")
+
+
+@router.post("/import-excel/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def start_employee_import_job(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    sheet_name: Optional[str] = None,
+    current_user: User = Depends(auth_service.require_role("admin"))
+):
+    """Start an employee import in the background; poll /import-jobs/{job_id} for progress"""
+
+    if not file.filename.lower().endswith(EXCEL_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="File must be Excel format (.xlsx, .xlsm or .xls)")
+
+    IMPORT_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    job = job_registry.create("employee_import")
+    path = IMPORT_TEMP_DIR / f"{job.id}{Path(file.filename).suffix.lower()}"
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    background_tasks.add_task(employee_import_service.run_job, job.id, str(path), file.filename, sheet_name)
+    return {"job_id": job.id, "status": job.status, "status_url": f"/api/employees/import-jobs/{job.id}"}
+
+
+@router.get("/import-jobs/{job_id}")
+async def get_employee_import_job(
+    job_id: str,
+    current_user: User = Depends(auth_service.require_role("admin"))
+):
+    """Progress, counts and per-row errors of an employee import job"""
+    job = job_registry.get(job_id)
+    if not job or job.kind != "employee_import":
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
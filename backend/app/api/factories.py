@@ -2,12 +2,14 @@
 Factories API Endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import Factory, User
 from app.schemas.factory import FactoryCreate, FactoryUpdate, FactoryResponse
 from app.services.auth_service import auth_service
+from app.services.factory_registry import factory_registry
 
 router = APIRouter()
 
@@ -16,17 +18,18 @@ router = APIRouter()
 async def create_factory(
     factory: FactoryCreate,
     current_user: User = Depends(auth_service.require_role("super_admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create new factory"""
-    existing = db.query(Factory).filter(Factory.factory_id == factory.factory_id).first()
+    existing = await db.scalar(select(Factory).where(Factory.factory_id == factory.factory_id))
     if existing:
         raise HTTPException(status_code=400, detail="Factory ID already exists")
     
     new_factory = Factory(**factory.model_dump())
     db.add(new_factory)
-    db.commit()
-    db.refresh(new_factory)
+    await db.commit()
+    await db.refresh(new_factory)
+    factory_registry.invalidate(new_factory.factory_id)
     return new_factory
 
 
@@ -34,23 +37,23 @@ async def create_factory(
 async def list_factories(
     is_active: bool = True,
     current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all factories"""
-    query = db.query(Factory)
+    query = select(Factory)
     if is_active is not None:
-        query = query.filter(Factory.is_active == is_active)
-    return query.all()
+        query = query.where(Factory.is_active == is_active)
+    return (await db.scalars(query)).all()
 
 
 @router.get("/{factory_id}", response_model=FactoryResponse)
 async def get_factory(
     factory_id: str,
     current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get factory by ID"""
-    factory = db.query(Factory).filter(Factory.factory_id == factory_id).first()
+    factory = await db.scalar(select(Factory).where(Factory.factory_id == factory_id))
     if not factory:
         raise HTTPException(status_code=404, detail="Factory not found")
     return factory
@@ -61,18 +64,19 @@ async def update_factory(
     factory_id: str,
     factory_update: FactoryUpdate,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update factory"""
-    factory = db.query(Factory).filter(Factory.factory_id == factory_id).first()
+    factory = await db.scalar(select(Factory).where(Factory.factory_id == factory_id))
     if not factory:
         raise HTTPException(status_code=404, detail="Factory not found")
     
     for field, value in factory_update.model_dump(exclude_unset=True).items():
         setattr(factory, field, value)
     
-    db.commit()
-    db.refresh(factory)
+    await db.commit()
+    await db.refresh(factory)
+    factory_registry.invalidate(factory_id)
     return factory
 
 
@@ -80,13 +84,14 @@ async def update_factory(
 async def delete_factory(
     factory_id: str,
     current_user: User = Depends(auth_service.require_role("super_admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete factory"""
-    factory = db.query(Factory).filter(Factory.factory_id == factory_id).first()
+    factory = await db.scalar(select(Factory).where(Factory.factory_id == factory_id))
     if not factory:
         raise HTTPException(status_code=404, detail="Factory not found")
     
-    db.delete(factory)
-    db.commit()
+    await db.delete(factory)
+    await db.commit()
+    factory_registry.invalidate(factory_id)
     return {"message": "Factory deleted successfully"}
@@ -0,0 +1,70 @@
+"""
+Files API Endpoints
+Stored uploads by hash, as the original or a WebP derivative
+
+Like the /uploads mount this is not behind auth (<img> tags cannot send the
+bearer token); the URL is the unguessable SHA-256 of the content.
+"""
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from PIL import UnidentifiedImageError
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.models.models import Blob
+from app.services.blob_store import SHA256_NAME, blob_store
+from app.services.derivative_service import derivative_service, pick_size
+
+router = APIRouter()
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+@router.get("/{sha256}")
+async def get_file(
+    sha256: str,
+    request: Request,
+    size: Optional[Literal["thumb", "medium", "original"]] = None,
+    width: Optional[int] = Query(None, ge=1, description="Picks the smallest size at least this wide"),
+    db: Session = Depends(get_db)
+):
+    """Stored file; ``size`` (or ``width``) selects a WebP thumbnail/preview, default medium"""
+    if not SHA256_NAME.match(sha256):
+        raise HTTPException(status_code=404, detail="File not found")
+    size = size or pick_size(width)
+
+    if size == "original":
+        etag = f'"{sha256}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        path = blob_store.path_for(sha256)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="File not found")
+        mime_type = await run_in_threadpool(
+            lambda: db.query(Blob.mime_type).filter(Blob.sha256 == sha256).scalar()
+        )
+        return FileResponse(path, media_type=mime_type or "application/octet-stream", headers=headers)
+
+    etag = derivative_service.etag(sha256, size)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        path = await derivative_service.get(sha256, size)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=415, detail="No preview available for this file type")
+    return FileResponse(path, media_type="image/webp", headers=headers)
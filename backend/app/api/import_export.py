@@ -1,13 +1,20 @@
 """
 Import/Export API Endpoints for UNS-ClaudeJP 2.0
+
+Imports run as background jobs: each POST returns a job id right away, and
+progress is available from /jobs/{job_id} or streamed from /jobs/{job_id}/events.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import logging
 from pathlib import Path
 import shutil
+import uuid
 
 from app.services.import_service import import_service
+from app.services.job_service import job_registry
 from app.core.config import settings
 
 router = APIRouter()
@@ -16,109 +23,128 @@ logger = logging.getLogger(__name__)
 UPLOAD_DIR = Path(settings.UPLOAD_DIR) / "import_temp"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+IMPORT_JOB_KINDS = ("import_employees", "import_timer_cards", "import_factory_configs")
+EVENT_POLL_SECONDS = 0.5
+
+
+def _save_upload(file: UploadFile) -> Path:
+    """Copy the upload to a unique temp file (the request body is gone once the job runs)"""
+    temp_file = UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(file.filename).suffix.lower()}"
+    with open(temp_file, 'wb') as f:
+        shutil.copyfileobj(file.file, f)
+    return temp_file
+
+
+def _start_job(background_tasks: BackgroundTasks, kind: str, *args, cleanup: Path = None) -> dict:
+    job = job_registry.create(kind)
+    background_tasks.add_task(
+        import_service.run_job, job.id, kind, *args, cleanup=str(cleanup) if cleanup else None
+    )
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/import/jobs/{job.id}",
+        "events_url": f"/api/import/jobs/{job.id}/events",
+    }
 
-@router.post("/employees")
-async def import_employees(file: UploadFile = File(...)):
+
+@router.post("/employees", status_code=status.HTTP_202_ACCEPTED)
+async def import_employees(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Import employees from Excel file
-    
+
     Expected columns: 派遣元ID, 氏名, フリガナ, 生年月日, 性別, 国籍, etc.
     """
-    temp_file = None
-    
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are supported")
+
     try:
-        # Validate file type
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are supported")
-        
-        # Save file temporarily
-        temp_file = UPLOAD_DIR / file.filename
-        
-        with open(temp_file, 'wb') as f:
-            shutil.copyfileobj(file.file, f)
-        
-        logger.info(f"Importing employees from {file.filename}")
-        
-        # Import
-        results = import_service.import_employees_from_excel(str(temp_file))
-        
-        return results
-        
-    except HTTPException:
-        raise
+        temp_file = _save_upload(file)
     except Exception as e:
-        logger.error(f"Error importing employees: {e}")
+        logger.error(f"Error saving employee import: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if temp_file and temp_file.exists():
-            try:
-                temp_file.unlink()
-            except:
-                pass
 
+    logger.info(f"Queued employee import from {file.filename}")
+    return _start_job(background_tasks, "import_employees", str(temp_file), cleanup=temp_file)
 
-@router.post("/timer-cards")
+
+@router.post("/timer-cards", status_code=status.HTTP_202_ACCEPTED)
 async def import_timer_cards(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     factory_id: str = Query(...),
     year: int = Query(...),
-    month: int = Query(...)
+    month: int = Query(..., ge=1, le=12)
 ):
     """
     Import timer cards from Excel file
-    
+
     Expected columns: 日付, 社員ID, 社員名, 出勤時刻, 退勤時刻
     """
-    temp_file = None
-    
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Only Excel files are supported")
+
     try:
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(status_code=400, detail="Only Excel files are supported")
-        
-        temp_file = UPLOAD_DIR / file.filename
-        
-        with open(temp_file, 'wb') as f:
-            shutil.copyfileobj(file.file, f)
-        
-        logger.info(f"Importing timer cards for {factory_id} - {year}/{month}")
-        
-        results = import_service.import_timer_cards_from_excel(
-            str(temp_file),
-            factory_id,
-            year,
-            month
-        )
-        
-        return results
-        
-    except HTTPException:
-        raise
+        temp_file = _save_upload(file)
     except Exception as e:
-        logger.error(f"Error importing timer cards: {e}")
+        logger.error(f"Error saving timer card import: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if temp_file and temp_file.exists():
-            try:
-                temp_file.unlink()
-            except:
-                pass
 
+    logger.info(f"Queued timer card import for {factory_id} - {year}/{month}")
+    return _start_job(
+        background_tasks, "import_timer_cards", str(temp_file), factory_id, year, month, cleanup=temp_file
+    )
 
-@router.post("/factory-configs")
-async def import_factory_configs(directory_path: str):
+
+@router.post("/factory-configs", status_code=status.HTTP_202_ACCEPTED)
+async def import_factory_configs(background_tasks: BackgroundTasks, directory_path: str):
     """
     Import factory configurations from JSON files
-    
+
     Args:
         directory_path: Path to directory containing factory JSON files
     """
-    try:
-        results = import_service.import_factory_configs_from_json(directory_path)
-        return results
-        
-    except Exception as e:
-        logger.error(f"Error importing factory configs: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    if not Path(directory_path).is_dir():
+        raise HTTPException(status_code=400, detail="directory_path must be an existing directory")
+
+    return _start_job(background_tasks, "import_factory_configs", directory_path)
+
+
+@router.get("/jobs/{job_id}")
+async def get_import_job(job_id: str):
+    """Current progress, counts and errors of an import job"""
+    snapshot = job_registry.snapshot(job_id)
+    if not snapshot or snapshot["kind"] not in IMPORT_JOB_KINDS:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return snapshot
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_import_job(job_id: str):
+    """Server-Sent Events stream of job progress; closes when the job finishes"""
+    snapshot = job_registry.snapshot(job_id)
+    if not snapshot or snapshot["kind"] not in IMPORT_JOB_KINDS:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    async def events():
+        last = None
+        while True:
+            snapshot = job_registry.snapshot(job_id)
+            if snapshot is None:
+                break
+            if snapshot != last:
+                event = "done" if snapshot["status"] in ("completed", "failed") else "progress"
+                yield f"event: {event}\ndata: {json.dumps(snapshot, ensure_ascii=False, default=str)}\n\n"
+                last = snapshot
+                if event == "done":
+                    break
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/template/employees")
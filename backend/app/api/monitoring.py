@@ -6,8 +6,11 @@ import time
 from typing import Any, Dict
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
 
+from app.core.db_pool import pool_status
 from app.core.logging import app_logger
+from app.core.metrics import metrics_registry
 from app.services.ocr_service import ocr_service
 
 router = APIRouter()
@@ -42,9 +45,15 @@ async def metrics() -> Dict[str, Any]:
         "ocr_cache_hits": stats.get("cache_hits"),
         "ocr_cache_hit_rate": stats.get("cache_hit_rate"),
         "ocr_average_processing_time": stats.get("average_processing_time"),
+        "db_pool": pool_status(),
     }
 
 
+@router.get("/metrics/prometheus", summary="Metrics in Prometheus text format", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics_registry.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.delete("/cache", summary="Clear OCR cache")
 async def clear_cache() -> Dict[str, Any]:
     result = ocr_service.clear_cache()
@@ -1,11 +1,16 @@
 """
 Reports API Endpoints for UNS-ClaudeJP 2.0
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 import logging
 from pathlib import Path
 
+from app.core.database import get_read_db
+from app.models.models import Employee, SalaryCalculation
+from app.services.archive_service import archive_service
 from app.services.report_service import report_service
 
 router = APIRouter()
@@ -169,10 +174,14 @@ async def download_report(filename: str):
 @router.post("/annual-summary")
 async def generate_annual_summary(
     factory_id: str = Query(...),
-    year: int = Query(...)
+    year: int = Query(...),
+    db: Session = Depends(get_read_db)
 ):
     """
     Generate annual summary report
+
+    Hours come from live timer_cards partitions plus archived months in cold
+    storage; payroll totals come from the year's salary_calculations partition.
     
     Args:
         factory_id: Factory ID
@@ -182,17 +191,29 @@ async def generate_annual_summary(
         Report metadata
     """
     try:
-        # TODO: Get monthly data from database
-        monthly_data = [
-            {
-                "month": i,
-                "total_hours": 1800 + (i * 50),
-                "total_cost": 2700000 + (i * 50000),
-                "total_revenue": 3240000 + (i * 60000),
-                "profit": 540000 + (i * 10000)
-            }
-            for i in range(1, 13)
-        ]
+        monthly_hours = archive_service.monthly_hours(db, year, factory_id)
+
+        salary_rows = db.query(
+            SalaryCalculation.month,
+            func.sum(SalaryCalculation.gross_salary),
+            func.sum(SalaryCalculation.factory_payment),
+            func.sum(SalaryCalculation.company_profit)
+        ).join(Employee, Employee.id == SalaryCalculation.employee_id).filter(
+            SalaryCalculation.year == year,
+            Employee.factory_id == factory_id
+        ).group_by(SalaryCalculation.month).all()
+        salary_by_month = {month: (cost, revenue, profit) for month, cost, revenue, profit in salary_rows}
+
+        monthly_data = []
+        for month in range(1, 13):
+            cost, revenue, profit = salary_by_month.get(month, (0, 0, 0))
+            monthly_data.append({
+                "month": month,
+                "total_hours": monthly_hours.get(month, 0.0),
+                "total_cost": int(cost or 0),
+                "total_revenue": int(revenue or 0),
+                "profit": int(profit or 0)
+            })
         
         result = report_service.generate_annual_summary_report(
             factory_id,
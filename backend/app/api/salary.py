@@ -3,17 +3,21 @@ Salary Calculation API Endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_read_db
 from app.core.config import settings
-from app.models.models import SalaryCalculation, Employee, TimerCard, Factory, User
+from app.core.responses import list_response
+from app.models.models import SalaryCalculation, Employee, TimerCard, User
 from app.schemas.salary import (
     SalaryCalculate, SalaryCalculationResponse, SalaryBulkCalculate,
     SalaryBulkResult, SalaryMarkPaid, SalaryStatistics
 )
 from app.services.auth_service import auth_service
+from app.services.factory_registry import factory_registry
+from app.utils.dates import month_bounds
 
 router = APIRouter()
 
@@ -25,17 +29,18 @@ def calculate_employee_salary(db: Session, employee_id: int, month: int, year: i
     if not employee:
         raise ValueError("Employee not found")
     
-    # Get factory config
-    factory = db.query(Factory).filter(Factory.factory_id == employee.factory_id).first()
-    if not factory:
+    # Get compiled factory rules (in-memory registry, hot-reloaded)
+    rules = factory_registry.get(db, employee.factory_id)
+    if not rules:
         raise ValueError("Factory not found")
     
-    # Get approved timer cards for the month
+    # Get approved timer cards for the month (date range so only one partition is scanned)
+    month_start, month_end = month_bounds(year, month)
     timer_cards = db.query(TimerCard).filter(
         TimerCard.employee_id == employee_id,
         TimerCard.is_approved == True,
-        extract('month', TimerCard.work_date) == month,
-        extract('year', TimerCard.work_date) == year
+        TimerCard.work_date >= month_start,
+        TimerCard.work_date < month_end
     ).all()
     
     if not timer_cards:
@@ -46,44 +51,22 @@ def calculate_employee_salary(db: Session, employee_id: int, month: int, year: i
     total_overtime_hours = sum(float(tc.overtime_hours) for tc in timer_cards)
     total_night_hours = sum(float(tc.night_hours) for tc in timer_cards)
     total_holiday_hours = sum(float(tc.holiday_hours) for tc in timer_cards)
+    work_days = len(timer_cards)
     
-    # Get rates from settings or factory config
-    overtime_rate = settings.OVERTIME_RATE_25
-    night_rate = settings.NIGHT_SHIFT_PREMIUM
-    holiday_rate = settings.HOLIDAY_WORK_PREMIUM
-    
-    # Calculate payments
+    # Calculate payments (rates from factory config, settings as fallback)
     base_salary = int(employee.jikyu * total_regular_hours)
-    overtime_pay = int(employee.jikyu * total_overtime_hours * (1 + overtime_rate))
-    night_pay = int(employee.jikyu * total_night_hours * (1 + night_rate))
-    holiday_pay = int(employee.jikyu * total_holiday_hours * (1 + holiday_rate))
-    
-    # Bonuses (can be customized from factory config)
-    bonus = 0
-    gasoline_allowance = 0
+    overtime_pay = int(employee.jikyu * total_overtime_hours * (1 + rules.overtime_rate))
+    night_pay = int(employee.jikyu * total_night_hours * (1 + rules.night_rate))
+    holiday_pay = int(employee.jikyu * total_holiday_hours * (1 + rules.holiday_rate))
     
-    if factory.config and "bonuses" in factory.config:
-        bonuses_config = factory.config["bonuses"]
-        
-        # Gasoline allowance
-        if bonuses_config.get("gasoline_allowance", {}).get("enabled"):
-            amount_per_day = bonuses_config["gasoline_allowance"].get("amount_per_day", 0)
-            work_days = len(timer_cards)
-            gasoline_allowance = amount_per_day * work_days
-        
-        # Attendance bonus
-        if bonuses_config.get("attendance_bonus", {}).get("enabled"):
-            bonus_config = bonuses_config["attendance_bonus"]
-            conditions = bonus_config.get("conditions", {})
-            if conditions.get("full_month") and work_days >= 20:
-                bonus += bonus_config.get("amount", 0)
+    # Bonuses (attendance bonus and gasoline allowance from factory config)
+    bonus, gasoline_allowance = rules.bonuses(work_days)
     
     # Deductions
     apartment_deduction = 0
     if employee.apartment_id and employee.apartment_rent:
         # Calculate prorated rent
         days_in_month = 30  # Simplified
-        work_days = len(timer_cards)
         if settings.APARTMENT_PRORATE_BY_DAY:
             apartment_deduction = int((employee.apartment_rent / days_in_month) * work_days)
         else:
@@ -97,14 +80,13 @@ def calculate_employee_salary(db: Session, employee_id: int, month: int, year: i
     factory_payment = 0
     company_profit = 0
     
-    if factory.config and "working_hours" in factory.config:
-        shifts = factory.config["working_hours"].get("shifts", [])
-        if shifts:
-            # Use first shift's jikyu_tanka as default
-            jikyu_tanka = shifts[0].get("jikyu_tanka", employee.jikyu)
-            total_hours = total_regular_hours + total_overtime_hours + total_night_hours + total_holiday_hours
-            factory_payment = int(jikyu_tanka * total_hours)
-            company_profit = factory_payment - gross_salary
+    jikyu_tanka = rules.billing_rate
+    if jikyu_tanka is None and rules.shifts:
+        jikyu_tanka = employee.jikyu
+    if jikyu_tanka is not None:
+        total_hours = total_regular_hours + total_overtime_hours + total_night_hours + total_holiday_hours
+        factory_payment = int(jikyu_tanka * total_hours)
+        company_profit = factory_payment - gross_salary
     
     return {
         "employee_id": employee_id,
@@ -133,23 +115,23 @@ def calculate_employee_salary(db: Session, employee_id: int, month: int, year: i
 async def calculate_salary(
     salary_data: SalaryCalculate,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate salary for single employee"""
     try:
         # Check if already calculated
-        existing = db.query(SalaryCalculation).filter(
+        existing = await db.scalar(select(SalaryCalculation).where(
             SalaryCalculation.employee_id == salary_data.employee_id,
             SalaryCalculation.month == salary_data.month,
             SalaryCalculation.year == salary_data.year
-        ).first()
+        ).limit(1))
         
         if existing:
             raise HTTPException(status_code=400, detail="Salary already calculated for this month")
         
         # Calculate
-        calc_data = calculate_employee_salary(
-            db, 
+        calc_data = await db.run_sync(
+            calculate_employee_salary,
             salary_data.employee_id,
             salary_data.month,
             salary_data.year
@@ -177,8 +159,8 @@ async def calculate_salary(
         # Save
         new_salary = SalaryCalculation(**calc_data)
         db.add(new_salary)
-        db.commit()
-        db.refresh(new_salary)
+        await db.commit()
+        await db.refresh(new_salary)
         
         return new_salary
         
@@ -190,18 +172,18 @@ async def calculate_salary(
 async def calculate_salaries_bulk(
     bulk_data: SalaryBulkCalculate,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate salaries for multiple employees"""
     # Get employees
-    query = db.query(Employee).filter(Employee.is_active == True)
+    query = select(Employee).where(Employee.is_active == True)
     
     if bulk_data.employee_ids:
-        query = query.filter(Employee.id.in_(bulk_data.employee_ids))
+        query = query.where(Employee.id.in_(bulk_data.employee_ids))
     elif bulk_data.factory_id:
-        query = query.filter(Employee.factory_id == bulk_data.factory_id)
+        query = query.where(Employee.factory_id == bulk_data.factory_id)
     
-    employees = query.all()
+    employees = (await db.scalars(query)).all()
     
     successful = 0
     failed = 0
@@ -212,8 +194,8 @@ async def calculate_salaries_bulk(
     
     for employee in employees:
         try:
-            calc_data = calculate_employee_salary(
-                db,
+            calc_data = await db.run_sync(
+                calculate_employee_salary,
                 employee.id,
                 bulk_data.month,
                 bulk_data.year
@@ -221,7 +203,7 @@ async def calculate_salaries_bulk(
             
             new_salary = SalaryCalculation(**calc_data)
             db.add(new_salary)
-            db.flush()
+            await db.flush()
             
             successful += 1
             total_gross += calc_data["gross_salary"]
@@ -232,7 +214,7 @@ async def calculate_salaries_bulk(
             failed += 1
             errors.append(f"Employee {employee.hakenmoto_id}: {str(e)}")
     
-    db.commit()
+    await db.commit()
     
     return SalaryBulkResult(
         total_employees=len(employees),
@@ -254,33 +236,33 @@ async def list_salaries(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(auth_service.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """List salary calculations"""
-    query = db.query(SalaryCalculation)
+    query = select(SalaryCalculation)
     
     if employee_id:
-        query = query.filter(SalaryCalculation.employee_id == employee_id)
+        query = query.where(SalaryCalculation.employee_id == employee_id)
     if month:
-        query = query.filter(SalaryCalculation.month == month)
+        query = query.where(SalaryCalculation.month == month)
     if year:
-        query = query.filter(SalaryCalculation.year == year)
+        query = query.where(SalaryCalculation.year == year)
     if is_paid is not None:
-        query = query.filter(SalaryCalculation.is_paid == is_paid)
+        query = query.where(SalaryCalculation.is_paid == is_paid)
     
-    return query.offset(skip).limit(limit).all()
+    return list_response(SalaryCalculationResponse, (await db.scalars(query.offset(skip).limit(limit))).all())
 
 
 @router.post("/mark-paid")
 async def mark_salaries_paid(
     payment_data: SalaryMarkPaid,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark salaries as paid"""
-    salaries = db.query(SalaryCalculation).filter(
+    salaries = (await db.scalars(select(SalaryCalculation).where(
         SalaryCalculation.id.in_(payment_data.salary_ids)
-    ).all()
+    ))).all()
     
     payment_date = payment_data.payment_date or datetime.now()
     
@@ -288,7 +270,7 @@ async def mark_salaries_paid(
         salary.is_paid = True
         salary.paid_at = payment_date
     
-    db.commit()
+    await db.commit()
     
     return {"message": f"Marked {len(salaries)} salaries as paid"}
 
@@ -298,13 +280,15 @@ async def get_salary_statistics(
     month: int,
     year: int,
     current_user: User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get salary statistics for a month"""
-    salaries = db.query(SalaryCalculation).filter(
-        SalaryCalculation.month == month,
-        SalaryCalculation.year == year
-    ).all()
+    rows = (await db.execute(
+        select(SalaryCalculation, Employee.id, Employee.factory_id)
+        .outerjoin(Employee, Employee.id == SalaryCalculation.employee_id)
+        .where(SalaryCalculation.month == month, SalaryCalculation.year == year)
+    )).all()
+    salaries = [salary for salary, _, _ in rows]
     
     if not salaries:
         raise HTTPException(status_code=404, detail="No salary data found for this month")
@@ -319,10 +303,8 @@ async def get_salary_statistics(
     
     # Group by factory
     factory_stats = {}
-    for salary in salaries:
-        employee = db.query(Employee).filter(Employee.id == salary.employee_id).first()
-        if employee:
-            factory_id = employee.factory_id
+    for salary, employee_id, factory_id in rows:
+        if employee_id is not None:
             if factory_id not in factory_stats:
                 factory_stats[factory_id] = {
                     "factory_id": factory_id,
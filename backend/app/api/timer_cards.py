@@ -1,22 +1,26 @@
 """
 Timer Cards API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+import mimetypes
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from datetime import time as datetime_time
-import os
-import shutil
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.models.models import TimerCard, Employee, User
+from app.core.exceptions import ValidationError
+from app.core.responses import list_response
+from app.models.models import TimerCard, TimerCardUpload, Employee, User
 from app.schemas.timer_card import (
     TimerCardCreate, TimerCardUpdate, TimerCardResponse,
     TimerCardBulkCreate, TimerCardProcessResult,
     TimerCardUploadResponse, TimerCardApprove, TimerCardOCRData
 )
 from app.services.auth_service import auth_service
-from app.services.ocr_service import ocr_service
+from app.services.blob_store import blob_store
+from app.services.timer_card_extractor import timer_card_extractor
 
 router = APIRouter()
 
@@ -111,31 +115,47 @@ async def create_timer_cards_bulk(
 async def upload_timer_card_file(
     file: UploadFile = File(...),
     factory_id: str = None,
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="Overrides the year read from the sheet title"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Overrides the month read from the sheet title"),
     current_user: User = Depends(auth_service.require_role("admin")),
     db: Session = Depends(get_db)
 ):
-    """Upload timer card file and process with OCR"""
-    # Save file
-    upload_dir = os.path.join(settings.UPLOAD_DIR, "timer_cards")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_path = os.path.join(upload_dir, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    """Upload timer card sheets (image or multi-page PDF) and extract their table with OCR"""
+    # Save file (sha256 path); the upload row references the blob so the scan
+    # is kept as the payroll source (blob GC only removes unreferenced files)
+    try:
+        blob = await blob_store.put_upload(file, settings.MAX_UPLOAD_SIZE)
+    except ValidationError as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    mime_type = file.content_type or mimetypes.guess_type(file.filename)[0]
+    blob_store.add_reference(db, blob, mime_type)
+    upload = TimerCardUpload(
+        blob_sha256=blob.sha256,
+        file_name=file.filename,
+        factory_id=factory_id,
+        uploaded_by=current_user.id
+    )
+    db.add(upload)
+    db.commit()
     
     # Process with OCR
     try:
-        ocr_result = ocr_service.process_document(file_path, "timer_card")
-        records = ocr_result.get("records", [])
+        records = await timer_card_extractor.extract_file(blob.path, year, month)
         
         ocr_data = [TimerCardOCRData(**record) for record in records]
+        review = sum(record.needs_review for record in ocr_data)
+        upload.records_found = len(records)
+        db.commit()
         
         return TimerCardUploadResponse(
+            upload_id=upload.id,
             file_name=file.filename,
             records_found=len(records),
             ocr_data=ocr_data,
-            message="File processed successfully. Please review and confirm data."
+            message=f"File processed successfully ({review} rows need review). Please review and confirm data."
         )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
@@ -160,7 +180,7 @@ async def list_timer_cards(
     if is_approved is not None:
         query = query.filter(TimerCard.is_approved == is_approved)
     
-    return query.offset(skip).limit(limit).all()
+    return list_response(TimerCardResponse, query.offset(skip).limit(limit).all())
 
 
 @router.put("/{timer_card_id}", response_model=TimerCardResponse)
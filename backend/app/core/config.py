@@ -2,7 +2,7 @@
 Configuration settings for UNS-ClaudeJP 2.0
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 
@@ -16,20 +16,53 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "postgresql://uns_admin:password@db:5432/uns_claudejp")
+    # Read replica for dashboards/reports (unset = everything on the primary)
+    DATABASE_REPLICA_URL: Optional[str] = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_MAX_LAG_SECONDS: float = 10.0  # above this, reads fall back to the primary
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # Pool per engine and worker: size the total as workers * (POOL_SIZE + MAX_OVERFLOW) < max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds waiting for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 disables (e.g. for one-off bulk maintenance runs)
+    SLOW_QUERY_MS: int = 200  # statements at or above this are logged with normalized SQL
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_TTL_SECONDS: float = 30.0  # authenticated principals kept per worker
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Shared directory (like METRICS_DIR) to propagate invalidations to all workers
+    AUTH_CACHE_DIR: Optional[str] = os.getenv("AUTH_CACHE_DIR")
+    # bcrypt runs on this many threads per worker (it releases the GIL); beyond
+    # PASSWORD_HASH_MAX_PENDING queued jobs logins get 503 + Retry-After
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+    PASSWORD_HASH_MAX_PENDING: int = 64
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     ALLOWED_EXTENSIONS: list = ["pdf", "jpg", "jpeg", "png", "xlsx", "xls"]
     UPLOAD_DIR: str = "/app/uploads"
+    # Content-addressed documents under UPLOAD_DIR/blobs; unreferenced blobs older
+    # than the grace period are removed by scripts/gc_blobs.py
+    BLOB_GC_GRACE_HOURS: float = 24.0
+    # WebP thumbnails/previews of image uploads (app.services.derivative_service)
+    THUMBNAIL_WORKERS: int = min(2, os.cpu_count() or 1)
+    THUMBNAIL_QUALITY: int = 80
     
     # OCR Settings
     OCR_ENABLED: bool = True
     TESSERACT_LANG: str = "jpn+eng"
+    # PDFs are rasterized one page at a time (poppler) and OCR'd in parallel
+    OCR_PDF_DPI: int = 200
+    OCR_PDF_MAX_PAGES: int = 50
+    # Timer card sheets: table extraction on this many threads (tesseract runs as a
+    # subprocess); rows with a field below the confidence are flagged for review
+    TIMER_CARD_OCR_WORKERS: int = min(8, os.cpu_count() or 1)
+    TIMER_CARD_MIN_CONFIDENCE: float = 0.6
     
     # Gemini API (Primary OCR method)
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -57,6 +90,8 @@ class Settings(BaseSettings):
     # ID Configuration
     RIREKISHO_ID_PREFIX: str = "UNS-"
     RIREKISHO_ID_START: int = 1000
+    ID_ALLOCATION_ATTEMPTS: int = 5  # inserts retried when an allocated id already exists
+    ID_ALLOCATION_BACKOFF_SECONDS: float = 0.01
     FACTORY_ID_PREFIX: str = "Factory-"
     FACTORY_ID_START: int = 1
     
@@ -66,6 +101,14 @@ class Settings(BaseSettings):
     NIGHT_SHIFT_PREMIUM: float = 0.25
     HOLIDAY_WORK_PREMIUM: float = 0.35
     
+    # Factory configs (compiled into the in-memory factory registry)
+    FACTORY_CONFIG_DIR: str = "/app/config/factories"
+    FACTORY_REGISTRY_RELOAD_SECONDS: float = 5.0
+
+    # Candidate matching (candidate arrays reloaded when the table changed)
+    MATCH_POOL_RELOAD_SECONDS: float = 30.0
+    MATCH_DEFAULT_MAX_COMMUTE_MINUTES: Optional[int] = None
+    
     # Yukyu Settings
     YUKYU_INITIAL_DAYS: int = 10
     YUKYU_AFTER_MONTHS: int = 6
@@ -79,10 +122,42 @@ class Settings(BaseSettings):
     # Reports Settings
     REPORTS_DIR: str = "/app/reports"
     REPORTS_LOGO_PATH: Optional[str] = None
+
+    # Duplicate candidates (on-create warning + nightly report under REPORTS_DIR/duplicates)
+    DEDUP_THRESHOLD: float = 0.7
+    DEDUP_MAX_BLOCK_SIZE: int = 500  # larger blocks (very common keys) are skipped
+
+    # Archival (closed timer card months moved to cold storage)
+    ARCHIVE_DIR: str = "/app/archive"
+    ARCHIVE_FORMAT: str = "csv.gz"  # csv.gz | parquet
+    TIMER_CARD_HOT_MONTHS: int = 3  # closed months kept in PostgreSQL
+    
+    # Import job progress; with several workers set JOBS_DIR to a shared directory so
+    # any worker can answer the progress / SSE endpoints (unset = this worker only)
+    JOBS_DIR: Optional[str] = os.getenv("JOBS_DIR")
+    
+    # Metrics (Prometheus text format); set METRICS_DIR to aggregate several workers
+    METRICS_DIR: Optional[str] = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_SECONDS: float = 5.0
+    
+    # Response compression (br needs the optional brotli package)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESSLEVEL: int = 6
+    BROTLI_QUALITY: int = 4
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "/app/logs/uns-claudejp.log"
+    LOG_CONSOLE: bool = True
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the background writers
+    LOG_BATCH_SIZE: int = 500
+    LOG_FLUSH_SECONDS: float = 0.5
+    LOG_BLOCK_SECONDS: float = 1.0  # max wait for WARNING+ records when the queue is full
+    LOG_ROTATION_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 14
+    LOG_SAMPLE_RATE: float = 1.0  # share of successful requests logged
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # per route template, e.g. {"/api/health": 0.01}
+    LOG_SLOW_REQUEST_MS: int = 1000  # always logged
     
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
@@ -1,22 +1,60 @@
 """
 Database configuration for UNS-ClaudeJP 1.0
 """
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.db_pool import (
+    async_pool_metrics, async_replica_pool_metrics, engine_options, instrument_engine,
+    replica_pool_metrics, sync_pool_metrics
+)
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql://uns_admin:uns_secure_pass_2025@db:5432/uns_claudejp"
 )
 
-engine = create_engine(DATABASE_URL)
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """postgresql[+psycopg2]:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Sync engine: scripts, Alembic, background jobs and the sync service layer
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine, sync_pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers. Created on first use so sync-only processes
+# (scripts, workers) never need the async driver installed.
+_async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -31,6 +69,193 @@ def get_db():
         db.close()
 
 
+def get_async_engine() -> AsyncEngine:
+    """Lazily create the async engine (asyncpg / aiosqlite)"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+        instrument_engine(_async_engine.sync_engine, async_pool_metrics)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency to get an async database session
+
+    Sync helpers that take a ``Session`` can still be reused from async
+    handlers through ``await db.run_sync(helper, *args)``.
+    """
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections (application shutdown)"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    await replica_router.dispose()
+
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+READ_PRIMARY_HEADER = "X-Read-Your-Writes"
+
+
+class ReplicaRouter:
+    """
+    Routes read-only sessions to DATABASE_REPLICA_URL
+
+    Replication lag is measured at most every REPLICA_LAG_CHECK_SECONDS; while
+    it is above REPLICA_MAX_LAG_SECONDS (or the replica is unreachable) reads
+    go to the primary.
+    """
+
+    def __init__(self, url: Optional[str], max_lag: float, check_interval: float):
+        self.url = url
+        self.measures_lag = bool(url) and make_url(url).get_backend_name() == "postgresql"
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._sessions = sessionmaker(autocommit=False, autoflush=False)
+        self._async_sessions = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = create_engine(self.url, **engine_options(self.url, metrics=replica_pool_metrics))
+            instrument_engine(self._engine, replica_pool_metrics)
+            self._sessions.configure(bind=self._engine)
+        return self._engine
+
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            url = to_async_url(self.url)
+            self._async_engine = create_async_engine(
+                url, **engine_options(url, is_async=True, metrics=async_replica_pool_metrics)
+            )
+            instrument_engine(self._async_engine.sync_engine, async_replica_pool_metrics)
+            self._async_sessions.configure(bind=self._async_engine)
+        return self._async_engine
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def _usable(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def _record(self, lag: Optional[float]) -> None:
+        if lag is None or lag > self.max_lag:
+            logger.warning(f"Read replica unavailable or lagging ({lag}s), reading from primary")
+        self.lag = lag
+
+    def replica_ok(self) -> bool:
+        """True when reads may use the replica (sync callers)"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            due = self._due()
+            if due:
+                self._checked_at = time.monotonic()  # other callers keep the last result meanwhile
+        if due and not self.measures_lag:
+            self.lag = 0.0
+        elif due:
+            try:
+                with self.engine().connect() as conn:
+                    lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+            except SQLAlchemyError as e:
+                logger.error(f"Replica lag check failed: {e}")
+                lag = None
+            self._record(lag)
+        return self._usable()
+
+    async def replica_ok_async(self) -> bool:
+        """True when reads may use the replica (async callers)"""
+        if not self.enabled:
+            return False
+        if self._due() and not self.measures_lag:
+            self.lag = 0.0
+        elif self._due():
+            self._checked_at = time.monotonic()
+            try:
+                async with self.async_engine().connect() as conn:
+                    lag = float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+            except (SQLAlchemyError, OSError) as e:
+                logger.error(f"Replica lag check failed: {e}")
+                lag = None
+            self._record(lag)
+        return self._usable()
+
+    def session(self):
+        self.engine()
+        return self._sessions()
+
+    def async_session(self) -> AsyncSession:
+        self.async_engine()
+        return self._async_sessions()
+
+    async def dispose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+
+replica_router = ReplicaRouter(
+    settings.DATABASE_REPLICA_URL,
+    settings.REPLICA_MAX_LAG_SECONDS,
+    settings.REPLICA_LAG_CHECK_SECONDS,
+)
+
+
+def wants_primary(request: Request) -> bool:
+    """Read-your-writes override: the client just wrote and must not read stale data"""
+    return request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes")
+
+
+def get_read_db(request: Request, response: Response):
+    """
+    Dependency for read-only endpoints: replica when healthy, else primary
+    """
+    use_replica = not wants_primary(request) and replica_router.replica_ok()
+    response.headers["X-DB-Route"] = "replica" if use_replica else "primary"
+    db = replica_router.session() if use_replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request, response: Response) -> AsyncIterator[AsyncSession]:
+    """
+    Async dependency for read-only endpoints: replica when healthy, else primary
+    """
+    use_replica = not wants_primary(request) and await replica_router.replica_ok_async()
+    response.headers["X-DB-Route"] = "replica" if use_replica else "primary"
+    if not use_replica:
+        get_async_engine()
+    async with (replica_router.async_session() if use_replica else AsyncSessionLocal()) as db:
+        yield db
+
+
 def init_db():
     """
     Initialize database tables
@@ -0,0 +1,169 @@
+"""
+Connection pool configuration and metrics for UNS-ClaudeJP 2.0
+
+Pool sizing, pre-ping, recycle and the per-statement timeout come from
+Settings. Pools are instrumented to record checkout latency, checkout
+timeouts and cancelled statements; figures are per worker process, so with
+N uvicorn workers the database sees up to N * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+connections per engine.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT, DB_POOL_CONNECTIONS, DB_POOL_TIMEOUTS, DB_STATEMENT_TIMEOUTS, metrics_registry
+)
+
+QUERY_CANCELED = "57014"  # PostgreSQL: canceling statement due to statement timeout
+LATENCY_SAMPLES = 1000
+
+
+class PoolMetrics:
+    """Thread-safe counters for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.pool_timeouts = 0
+        self.statement_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+        self.engine: Optional[Engine] = None
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+        DB_POOL_CHECKOUT.observe(seconds, engine=self.name)
+
+    def record_pool_timeout(self) -> None:
+        with self._lock:
+            self.pool_timeouts += 1
+        DB_POOL_TIMEOUTS.inc(engine=self.name)
+
+    def record_statement_timeout(self) -> None:
+        with self._lock:
+            self.statement_timeouts += 1
+        DB_STATEMENT_TIMEOUTS.inc(engine=self.name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_ms_p95": round(waits[int(len(waits) * 0.95) - 1] * 1000, 3) if waits else 0.0,
+                "checkout_ms_max": round(self.wait_max * 1000, 3),
+                "pool_timeouts": self.pool_timeouts,
+                "statement_timeouts": self.statement_timeouts,
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout (including waits for a free connection)"""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_pool_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+def instrumented_pool(base: type, metrics: PoolMetrics) -> type:
+    return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"metrics": metrics})
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+replica_pool_metrics = PoolMetrics("replica")
+async_replica_pool_metrics = PoolMetrics("async_replica")
+
+
+def engine_options(url: str, is_async: bool = False, metrics: Optional[PoolMetrics] = None) -> Dict[str, Any]:
+    """create_engine()/create_async_engine() keyword arguments for ``url``"""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if parsed.get_backend_name() == "sqlite":
+        return options  # sqlite pools take no sizing arguments
+
+    metrics = metrics or (async_pool_metrics if is_async else sync_pool_metrics)
+    options.update({
+        "poolclass": instrumented_pool(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    })
+
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout_ms and parsed.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics) -> None:
+    """Attach ``metrics`` to the engine (sync engine of an AsyncEngine) and count statement timeouts"""
+    metrics.engine = engine
+
+    @event.listens_for(engine, "handle_error")
+    def _count_statement_timeout(context):
+        original = context.original_exception
+        code = getattr(original, "pgcode", None) or getattr(original, "sqlstate", None)
+        if code == QUERY_CANCELED:
+            metrics.record_statement_timeout()
+
+
+def _collect_pool_gauges() -> None:
+    for metrics in (sync_pool_metrics, async_pool_metrics, replica_pool_metrics, async_replica_pool_metrics):
+        pool = metrics.engine.pool if metrics.engine is not None else None
+        if isinstance(pool, QueuePool):
+            DB_POOL_CONNECTIONS.set(pool.checkedout(), engine=metrics.name, state="in_use")
+            DB_POOL_CONNECTIONS.set(pool.checkedin(), engine=metrics.name, state="idle")
+            DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), engine=metrics.name, state="overflow")
+
+
+metrics_registry.add_collector(_collect_pool_gauges)
+
+
+def pool_status() -> Dict[str, Any]:
+    """Per-process pool metrics for /api/monitoring/metrics"""
+    status = {
+        "pid": os.getpid(),
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        "sync": sync_pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
+    for metrics in (replica_pool_metrics, async_replica_pool_metrics):
+        if metrics.engine is not None:
+            status[metrics.name] = metrics.snapshot()
+    return status
@@ -57,6 +57,13 @@ class NotificationError(UNSException):
     pass
 
 
+class ServiceBusyError(UNSException):
+    """Servicio saturado; el cliente debe reintentar tras retry_after segundos"""
+    def __init__(self, message: str, retry_after: int = 1, details: dict | None = None):
+        super().__init__(message, details)
+        self.retry_after = retry_after
+
+
 # Funciones para convertir excepciones a HTTPException
 def http_exception_from_uns(exc: UNSException) -> HTTPException:
     """Convertir excepción UNS a HTTPException"""
@@ -80,6 +87,12 @@ def http_exception_from_uns(exc: UNSException) -> HTTPException:
             status_code=status.HTTP_409_CONFLICT,
             detail={"message": exc.message, "details": exc.details}
         )
+    elif isinstance(exc, ServiceBusyError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"message": exc.message, "details": exc.details},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
     elif isinstance(exc, ValidationError):
         return HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
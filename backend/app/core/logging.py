@@ -1,38 +1,200 @@
-"""Structured logging setup using Loguru."""
+"""
+Structured logging setup using Loguru.
+
+Sinks do not write on the request path: records are queued and written in
+batches by background threads (JSON file with size rotation, and the
+console). When the queue is full, WARNING+ records wait up to
+LOG_BLOCK_SECONDS for room while lower levels are dropped and counted.
+Successful requests are sampled per route (LOG_SAMPLE_RATE /
+LOG_SAMPLE_RATES); errors and slow requests are always logged.
+"""
 from __future__ import annotations
 
+import atexit
+import random
+import sys
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, List, Optional, TextIO
 
 from loguru import logger
 
 from app.core.config import settings
+from app.core.metrics import metrics_registry
 
 LOG_SINK = Path(settings.LOG_FILE)
 LOG_SINK.parent.mkdir(parents=True, exist_ok=True)
+WARNING_LEVEL = 30
+
+LOG_RECORDS_DROPPED = metrics_registry.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full", ("sink",))
+
+class RotatingFile:
+    """Append-only file rotated by size into path.1 ... path.N"""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._stream: Optional[TextIO] = None
+
+    def write(self, data: str) -> None:
+        if self._stream is None:
+            self._stream = self.path.open("a", encoding="utf-8")
+        self._stream.write(data)
+        self._stream.flush()
+        if self.max_bytes and self._stream.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+class BatchingSink:
+    """
+    Loguru sink that buffers formatted records; a daemon thread swaps the
+    buffer out and writes it with one write() per batch (every
+    LOG_FLUSH_SECONDS, or sooner once LOG_BATCH_SIZE records are waiting).
+    """
+
+    def __init__(self, name: str, write: Callable[[str], None], close: Optional[Callable[[], None]] = None,
+                 max_queue: int = 10000, batch_size: int = 500, flush_seconds: float = 0.5,
+                 block_seconds: float = 1.0):
+        self.name = name
+        self._write = write
+        self._close = close
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.block_seconds = block_seconds
+        self.dropped = 0
+        self._buffer: List[str] = []
+        self._stopped = False
+        self._ready = threading.Condition()  # writer waits for a full batch
+        self._room = threading.Condition(self._ready._lock)  # producers wait for space
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{name}", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        text = str(message)
+        with self._ready:
+            if self._stopped:  # after shutdown: write straight through
+                self._write(text)
+                return
+            if len(self._buffer) >= self.max_queue:
+                # backpressure: WARNING+ records are worth a short wait, the rest is shed
+                if message.record["level"].no < WARNING_LEVEL or not self._room.wait_for(
+                        lambda: len(self._buffer) < self.max_queue, self.block_seconds):
+                    self._drop()
+                    return
+            self._buffer.append(text)
+            if len(self._buffer) >= self.batch_size:
+                self._ready.notify()
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        LOG_RECORDS_DROPPED.inc(sink=self.name)
+
+    def _take(self) -> List[str]:
+        batch, self._buffer = self._buffer, []
+        self._room.notify_all()
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._stopped or len(self._buffer) >= self.batch_size,
+                                     self.flush_seconds)
+                stop = self._stopped
+                batch = self._take()
+            if batch:
+                try:
+                    self._write("".join(batch))
+                except Exception as exc:  # pragma: no cover - disk full, closed stdout
+                    print(f"log writer {self.name} failed: {exc}", file=sys.stderr)
+            if stop:
+                return
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is buffered and stop the writer thread"""
+        with self._ready:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._ready.notify()
+        self._thread.join(timeout)
+        if self._close is not None:
+            self._close()
+
+
+def _console_write(data: str) -> None:
+    sys.stdout.write(data)
+    sys.stdout.flush()
+
+
+_log_file = RotatingFile(LOG_SINK, settings.LOG_ROTATION_BYTES, settings.LOG_BACKUP_COUNT)
+_sink_options = dict(
+    max_queue=settings.LOG_QUEUE_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_seconds=settings.LOG_FLUSH_SECONDS,
+    block_seconds=settings.LOG_BLOCK_SECONDS,
+)
+_sinks: List[BatchingSink] = [BatchingSink("file", _log_file.write, _log_file.close, **_sink_options)]
 
 logger.remove()
 logger.add(
-    LOG_SINK,
-    rotation="10 MB",
-    retention="14 days",
-    compression="zip",
+    _sinks[0],
     serialize=True,
     backtrace=True,
     diagnose=settings.DEBUG,
     level=settings.LOG_LEVEL,
 )
-logger.add(
-    lambda msg: print(msg, end=""),
-    level=settings.LOG_LEVEL,
-    colorize=True,
-    backtrace=True,
-    diagnose=settings.DEBUG,
-)
+if settings.LOG_CONSOLE:
+    _sinks.append(BatchingSink("console", _console_write, **_sink_options))
+    logger.add(
+        _sinks[1],
+        level=settings.LOG_LEVEL,
+        colorize=True,
+        backtrace=True,
+        diagnose=settings.DEBUG,
+    )
 
 app_logger = logger.bind(app=settings.APP_NAME)
 
 
+def shutdown_logging() -> None:
+    """Flush queued records (called on application shutdown and at exit)"""
+    for sink in _sinks:
+        sink.stop()
+
+
+atexit.register(shutdown_logging)
+
+
+def request_sample_rate(route: str, status: int, elapsed: float) -> float:
+    """Sampling rate for this request's log lines (1.0 for errors and slow requests)"""
+    if status >= 400 or elapsed * 1000 >= settings.LOG_SLOW_REQUEST_MS:
+        return 1.0
+    return settings.LOG_SAMPLE_RATES.get(route, settings.LOG_SAMPLE_RATE)
+
+
+def should_log_request(rate: float) -> bool:
+    return rate >= 1.0 or random.random() < rate
+
+
 def log_audit_event(**payload: Any) -> None:
     app_logger.bind(event="audit").info(payload)
 
@@ -55,4 +217,7 @@ __all__ = [
     "log_security_event",
     "log_performance_metric",
     "log_ocr_operation",
+    "request_sample_rate",
+    "should_log_request",
+    "shutdown_logging",
 ]
@@ -0,0 +1,284 @@
+"""
+In-process metrics registry with Prometheus text exposition
+
+Counters, gauges and histograms live in memory per worker. With several
+uvicorn workers set METRICS_DIR (an emptied/tmpfs directory shared by the
+workers): each worker flushes a snapshot file every METRICS_FLUSH_SECONDS
+and a scrape on any worker merges all of them. Counters and histograms
+are summed; gauges are summed over live workers only. Files of dead workers
+are removed, which Prometheus sees as a counter reset.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SNAPSHOT_PREFIX = "worker-"
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.documentation, "labels": list(self.labelnames), "samples": samples}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            counts = list(counts)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    """Holds the metrics of this worker and renders the merged exposition"""
+
+    def __init__(self, directory: Optional[str] = None, flush_seconds: float = 5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_seconds = flush_seconds
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Callback run before every snapshot (e.g. to refresh gauges)"""
+        self._collectors.append(collector)
+
+    # Snapshots -----------------------------------------------------------
+    def snapshot(self) -> Dict[str, dict]:
+        for collector in self._collectors:
+            collector()
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.directory / f"{SNAPSHOT_PREFIX}{pid}.json"
+
+    def flush(self) -> None:
+        """Write this worker's snapshot atomically (multi-worker mode only)"""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(temp, path)
+
+    def start_flusher(self) -> None:
+        if self.directory is None or self._flusher is not None:
+            return
+
+        def _run():
+            while not self._stop.wait(self.flush_seconds):
+                try:
+                    self.flush()
+                except OSError:  # pragma: no cover - full disk / removed directory
+                    pass
+
+        self._flusher = threading.Thread(target=_run, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self) -> None:
+        self._stop.set()
+        if self.directory is not None:
+            self._snapshot_path(os.getpid()).unlink(missing_ok=True)
+
+    def _worker_snapshots(self) -> Iterable[Dict[str, dict]]:
+        """Snapshot of every live worker; files of dead workers are removed"""
+        self.flush()
+        for path in sorted(self.directory.glob(f"{SNAPSHOT_PREFIX}*.json")):
+            pid = int(path.stem[len(SNAPSHOT_PREFIX):])
+            if not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                yield json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+
+    # Exposition ------------------------------------------------------------
+    def exposition(self) -> str:
+        """Prometheus text format (0.0.4), merged across workers when METRICS_DIR is set"""
+        if self.directory is None:
+            return render(merge([self.snapshot()]))
+        return render(merge(self._worker_snapshots()))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+    """Sum samples with equal labels across worker snapshots"""
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, data in snapshot.items():
+            target = merged.setdefault(name, {**data, "samples": {}})
+            for labels, value in data["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if data["kind"] == "histogram":
+                    counts, total, count = value
+                    if current:
+                        counts = [a + b for a, b in zip(current[0], counts)]
+                        total, count = total + current[1], count + current[2]
+                    target["samples"][key] = (counts, total, count)
+                else:
+                    target["samples"][key] = (current or 0) + value
+    return merged
+
+
+def render(merged: Dict[str, dict]) -> str:
+    lines: List[str] = []
+    for name, data in sorted(merged.items()):
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['kind']}")
+        names = data["labels"]
+        for key, value in sorted(data["samples"].items()):
+            if data["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket in zip(data["buckets"], counts):
+                cumulative += bucket
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(names, key, INF_LABEL)} {count}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry(settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS)
+
+# HTTP
+HTTP_REQUESTS = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = metrics_registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served")
+HTTP_DB_QUERIES = metrics_registry.histogram(
+    "http_request_db_queries", "SQL statements per request", ("route",), buckets=(1, 2, 5, 10, 20, 50, 100))
+
+# Database pools
+DB_POOL_CHECKOUT = metrics_registry.histogram(
+    "db_pool_checkout_seconds", "Time to obtain a pooled connection", ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+DB_POOL_TIMEOUTS = metrics_registry.counter(
+    "db_pool_timeouts_total", "Pool checkouts that timed out", ("engine",))
+DB_STATEMENT_TIMEOUTS = metrics_registry.counter(
+    "db_statement_timeouts_total", "Statements cancelled by statement_timeout", ("engine",))
+DB_POOL_CONNECTIONS = metrics_registry.gauge(
+    "db_pool_connections", "Pooled connections by state", ("engine", "state"))
+
+# OCR
+OCR_REQUESTS = metrics_registry.counter(
+    "ocr_requests_total", "OCR requests by source (cache or fresh)", ("source",))
+OCR_BACKEND_DURATION = metrics_registry.histogram(
+    "ocr_backend_duration_seconds", "OCR backend call latency", ("backend", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
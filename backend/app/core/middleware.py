@@ -1,69 +1,197 @@
-"""Custom middlewares for logging, security and exception handling."""
+"""Request middleware: timing, security headers, exception mapping and logging."""
 from __future__ import annotations
 
+import json
 import time
-from fastapi import HTTPException, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-
-from app.core.exceptions import UNSException, http_exception_from_uns
-from app.core.logging import app_logger, log_performance_metric, log_security_event
+from typing import Any, Dict, List, Tuple
 
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Attach structured logging to each request."""
+from app.core.exceptions import UNSException, http_exception_from_uns
+from app.core.logging import (
+    app_logger, log_performance_metric, log_security_event, request_sample_rate, should_log_request
+)
+from app.core.metrics import HTTP_DB_QUERIES, HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from app.core.query_stats import track_queries
+
+try:  # optional: brotli (or brotlicffi) enables Content-Encoding: br
+    import brotli
+except ImportError:  # pragma: no cover - depends on the installed extras
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+SECURITY_HEADERS: Tuple[Tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+)
+SUSPICIOUS_USER_AGENTS = {None, "", "curl", "python-requests/2.x"}
+
+
+class RequestMiddleware:
+    """
+    Pure ASGI middleware doing in one pass what used to take three
+    BaseHTTPMiddleware layers (logging, exception mapping, security headers).
+
+    Response bodies are passed through untouched, so streaming responses
+    (SSE, file downloads) are not buffered; headers are added on
+    ``http.response.start`` and the request is logged when the last body
+    chunk has been sent.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
         start = time.perf_counter()
-        route = request.url.path
-        method = request.method
-        client = request.client.host if request.client else "unknown"
-
-        app_logger.bind(route=route, method=method, client=client).info("request.started")
-
-        response = await call_next(request)
-
-        elapsed = time.perf_counter() - start
-        response.headers["X-Process-Time"] = f"{elapsed:.4f}"
-
-        log_performance_metric("request_duration", elapsed, route=route, status=response.status_code)
-        app_logger.bind(route=route, method=method, status=response.status_code).info("request.finished")
-        return response
-
-
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Add common security headers and detect suspicious behaviour."""
-
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        response = await call_next(request)
-
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
-        response.headers.setdefault("Referrer-Policy", "strict-origin-when-cross-origin")
-
-        if request.headers.get("User-Agent") in {None, "", "curl", "python-requests/2.x"}:
-            log_security_event(message="Suspicious user agent", user_agent=request.headers.get("User-Agent"))
-
-        return response
-
-
-class ExceptionHandlerMiddleware(BaseHTTPMiddleware):
-    """Convert internal exceptions into JSON responses."""
-
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        try:
-            return await call_next(request)
-        except UNSException as exc:
-            app_logger.bind(route=request.url.path, type="uns").error(exc.message)
-            raise http_exception_from_uns(exc)
-        except HTTPException:
-            raise
-        except Exception as exc:  # pragma: no cover - defensive programming
-            app_logger.bind(route=request.url.path, type="unhandled").exception("Unhandled exception")
-            raise HTTPException(
-                status_code=500,
-                detail={"message": "Internal server error", "details": str(exc)}
-            )
-
-
-__all__ = ["LoggingMiddleware", "SecurityMiddleware", "ExceptionHandlerMiddleware"]
+        route = scope["path"]
+        method = scope["method"]
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        user_agent = _header(scope, b"user-agent")
+        state: Dict[str, Any] = {"status": 500, "started": False}
+
+        # request.finished carries everything; the start line is for debugging only
+        app_logger.bind(route=route, method=method, client=client).debug("request.started")
+
+        with track_queries() as queries:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    state["status"] = message["status"]
+                    state["started"] = True
+                    headers: List[Tuple[bytes, bytes]] = list(message.get("headers", []))
+                    present = {name.lower() for name, _ in headers}
+                    headers.extend(header for header in SECURITY_HEADERS if header[0] not in present)
+                    headers.extend([
+                        (b"x-process-time", f"{time.perf_counter() - start:.4f}".encode()),
+                        (b"x-db-queries", str(queries.count).encode()),
+                        (b"x-db-time", f"{queries.seconds:.4f}".encode()),
+                    ])
+                    message["headers"] = headers
+                await send(message)
+
+            HTTP_IN_FLIGHT.inc()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception as exc:
+                if state["started"]:
+                    raise  # headers already sent; let the server close the connection
+                status_code, detail, extra_headers = self._map_exception(exc, route)
+                await send_wrapper({
+                    "type": "http.response.start",
+                    "status": status_code,
+                    "headers": [(b"content-type", b"application/json"), *extra_headers],
+                })
+                await send({"type": "http.response.body", "body": json.dumps({"detail": detail}, default=str).encode()})
+            finally:
+                HTTP_IN_FLIGHT.dec()
+                self._record(scope, method, route, state["status"], time.perf_counter() - start, queries)
+
+        if user_agent in SUSPICIOUS_USER_AGENTS:
+            log_security_event(message="Suspicious user agent", user_agent=user_agent)
+
+    @staticmethod
+    def _map_exception(exc: Exception, route: str) -> Tuple[int, Any, List[Tuple[bytes, bytes]]]:
+        if isinstance(exc, UNSException):
+            app_logger.bind(route=route, type="uns").error(exc.message)
+            http_exc = http_exception_from_uns(exc)
+            headers = [(name.lower().encode(), value.encode()) for name, value in (http_exc.headers or {}).items()]
+            return http_exc.status_code, http_exc.detail, headers
+        app_logger.bind(route=route, type="unhandled").exception("Unhandled exception")
+        return 500, {"message": "Internal server error", "details": str(exc)}, []
+
+    @staticmethod
+    def _record(scope: Scope, method: str, route: str, status: int, elapsed: float, queries) -> None:
+        # Route template (/api/employees/{employee_id}) keeps label cardinality bounded
+        template = getattr(scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.inc(method=method, route=template, status=status)
+        HTTP_LATENCY.observe(elapsed, method=method, route=template)
+        HTTP_DB_QUERIES.observe(queries.count, route=template)
+
+        # Successful requests are sampled per route; errors and slow requests always logged
+        rate = request_sample_rate(template, status, elapsed)
+        if not should_log_request(rate):
+            return
+        log_performance_metric(
+            "request_duration", elapsed, route=route, status=status, sample_rate=rate,
+            db_queries=queries.count, db_time=round(queries.seconds, 4), slow_queries=queries.slow
+        )
+        app_logger.bind(
+            route=route, method=method, status=status, sample_rate=rate,
+            db_queries=queries.count, db_time=round(queries.seconds, 4)
+        ).info("request.finished")
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression: br when the client accepts it and
+    brotli is installed, else gzip. Bodies below COMPRESSION_MINIMUM_SIZE,
+    already-encoded responses, event streams, the NDJSON OCR stream (gzip
+    would hold lines back) and stored files (images and PDFs, already
+    compressed) are sent as is. Levels favour CPU over ratio
+    (gzip 6, brotli 4), as bodies are compressed per request.
+    """
+
+    uncompressed_prefixes = ("/api/files/", "/uploads/", "/api/candidates/ocr/stream")
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.uncompressed_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        responder: ASGIApp
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+def _accepted_encodings(header: str) -> set:
+    """Codings from Accept-Encoding, without those refused with q=0"""
+    accepted = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding)
+    return accepted
+
+
+def _header(scope: Scope, name: bytes):
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+__all__ = ["CompressionMiddleware", "RequestMiddleware"]
@@ -0,0 +1,115 @@
+"""
+Per-request SQL instrumentation for UNS-ClaudeJP 2.0
+
+Engine-wide cursor events count statements and DB time into the QueryStats
+of the current request (a ContextVar set by RequestMiddleware; it follows the
+request into threadpool and run_sync calls). Statements slower than
+SLOW_QUERY_MS are logged with their normalized SQL.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import app_logger
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?|%s")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_lock = threading.Lock()
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals, placeholders and IN lists: one line per query shape"""
+    sql = _PLACEHOLDER.sub("?", statement)
+    sql = _LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect statement count/time for everything executed in this context"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    slow = elapsed * 1000 >= settings.SLOW_QUERY_MS
+
+    stats = _current.get()
+    if stats is not None:
+        with _lock:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.slow += slow
+
+    if slow:
+        app_logger.bind(event="slow_query").warning({
+            "duration_ms": round(elapsed * 1000, 2),
+            "sql": normalize_sql(statement),
+            "rows": cursor.rowcount,
+        })
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute does not fire for failed statements
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+@contextmanager
+def count_queries() -> Iterator[list]:
+    """
+    Record every statement run by any engine, on any thread, inside the block
+
+    Used by tests, where the app may run on another thread than the caller.
+    """
+    statements: list = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(normalize_sql(statement))
+
+    event.listen(Engine, "after_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "after_cursor_execute", _record)
@@ -0,0 +1,108 @@
+"""
+Fast JSON responses for large list endpoints
+
+Handlers opt in by returning ``list_response()`` / ``page_response()``
+instead of ORM objects. Rows are validated and dumped by pydantic-core in
+one pass (TypeAdapter.dump_json), skipping FastAPI's response_model
+re-validation, jsonable_encoder and json.dumps. Keep ``response_model`` on
+the route for the OpenAPI schema. ``ORJSONResponse`` is for plain
+dict/list payloads.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Generic, Iterable, List, Optional, Type, TypeVar, Union, get_args, get_origin
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, EmailStr, TypeAdapter, create_model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class Page(BaseModel, Generic[ModelT]):
+    """Paginated envelope (same shape as schemas.base.PaginatedResponse)"""
+    items: List[ModelT]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)  # same as pydantic's JSON mode
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (datetimes, UUIDs, numpy natively)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def _is_email(annotation: Any) -> bool:
+    if annotation is EmailStr:
+        return True
+    return get_origin(annotation) is Union and EmailStr in get_args(annotation)
+
+
+@lru_cache(maxsize=None)
+def _output_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    ``model`` with EmailStr fields relaxed to str: stored addresses were
+    checked on input, and email-validator costs ~0.1 ms per value, which
+    dominated rendering a page of candidates. The JSON is identical.
+    """
+    relaxed = {
+        name: (Optional[str] if field.annotation is not EmailStr else str, field)
+        for name, field in model.model_fields.items()
+        if _is_email(field.annotation)
+    }
+    if not relaxed:
+        return model
+    return create_model(model.__name__, __base__=model, __module__=model.__module__, **relaxed)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[_output_model(model)])
+
+
+@lru_cache(maxsize=None)
+def _page_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(Page[_output_model(model)])
+
+
+def validate_rows(model: Type[ModelT], rows: Iterable[Any]) -> List[ModelT]:
+    """Rows as (output) ``model`` instances, e.g. to fill computed fields before page_response()"""
+    return _list_adapter(model).validate_python(list(rows), from_attributes=True)
+
+
+def list_response(model: Type[ModelT], rows: Iterable[Any], status_code: int = 200) -> Response:
+    """``[model, ...]`` from ORM rows (or dicts)"""
+    adapter = _list_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+def page_response(model: Type[ModelT], rows: Iterable[Any], total: int, page: int, page_size: int) -> Response:
+    """``{"items": [...], "total", "page", "page_size", "total_pages"}`` from ORM rows"""
+    adapter = _page_adapter(model)
+    envelope = adapter.validate_python({
+        "items": list(rows),
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size,
+    }, from_attributes=True)
+    return Response(adapter.dump_json(envelope), media_type="application/json")
+
+
+__all__ = ["ORJSONResponse", "Page", "list_response", "page_response", "validate_rows"]
@@ -11,9 +11,12 @@ from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
-from app.core.database import init_db
-from app.core.logging import app_logger
-from app.core.middleware import ExceptionHandlerMiddleware, LoggingMiddleware, SecurityMiddleware
+from app.core.database import dispose_async_engine, init_db
+from app.core.logging import app_logger, shutdown_logging
+from app.core.metrics import metrics_registry
+from app.core.middleware import CompressionMiddleware, RequestMiddleware
+from app.services.derivative_service import derivative_service
+from app.services.password_hasher import password_hasher
 
 app = FastAPI(
     title=f"{settings.APP_NAME} API",
@@ -48,9 +51,13 @@ Todas las respuestas retornan JSON estructurado con mensajes y códigos claros.
     ],
 )
 
-app.add_middleware(SecurityMiddleware)
-app.add_middleware(ExceptionHandlerMiddleware)
-app.add_middleware(LoggingMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESSLEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+app.add_middleware(RequestMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
@@ -70,6 +77,7 @@ if os.path.exists(settings.UPLOAD_DIR):
 @app.on_event("startup")
 async def on_startup() -> None:
     app_logger.info("Starting application", version=settings.APP_VERSION, environment=settings.ENVIRONMENT)
+    metrics_registry.start_flusher()
     try:
         init_db()
         app_logger.info("Database initialised")
@@ -80,6 +88,11 @@ async def on_startup() -> None:
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
     app_logger.info("Shutting down application")
+    metrics_registry.stop_flusher()
+    await dispose_async_engine()
+    password_hasher.shutdown()
+    derivative_service.shutdown()
+    shutdown_logging()
 
 
 @app.get("/")
@@ -119,6 +132,7 @@ from app.api import (  # noqa: E402  pylint: disable=wrong-import-position
     dashboard,
     employees,
     factories,
+    files,
     import_export,
     monitoring,
     notifications,
@@ -142,6 +156,7 @@ app.include_router(import_export.router, prefix="/api/import", tags=["Import/Exp
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
 app.include_router(monitoring.router, prefix="/api/monitoring", tags=["Monitoring"])
+app.include_router(files.router, prefix="/api/files", tags=["Files"])
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -1,7 +1,8 @@
 """
 SQLAlchemy Models for UNS-ClaudeJP 1.0
 """
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, Date, Time, Numeric, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Text, DateTime, Date, Time, Numeric, ForeignKey, Enum as SQLEnum, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -33,6 +34,7 @@ class DocumentType(str, enum.Enum):
     ZAIRYU_CARD = "zairyu_card"
     LICENSE = "license"
     CONTRACT = "contract"
+    PHOTO = "photo"  # 写真: also sets photo_url
     OTHER = "other"
 
 
@@ -56,6 +58,33 @@ class ShiftType(str, enum.Enum):
     OTHER = "other"
 
 
+class CandidateSkillCode(str, enum.Enum):
+    """Skills and licences of a candidate; member order is the bit in candidates.skills_mask (append only)"""
+    NC_LATHE = "nc_lathe"  # NC旋盤
+    LATHE = "lathe"  # 旋盤
+    PRESS = "press"  # ﾌﾟﾚｽ
+    FORKLIFT = "forklift"  # ﾌｫｰｸﾘﾌﾄ
+    PACKING = "packing"  # 梱包
+    WELDING = "welding"  # 溶接
+    CAR_ASSEMBLY = "car_assembly"  # 車部品組立
+    CAR_LINE = "car_line"  # 車部品ライン
+    CAR_INSPECTION = "car_inspection"  # 車部品検査
+    ELECTRONIC_INSPECTION = "electronic_inspection"  # 電子部品検査
+    FOOD_PROCESSING = "food_processing"  # 食品加工
+    CASTING = "casting"  # 鋳造
+    LINE_LEADER = "line_leader"  # ラインリーダー
+    PAINTING = "painting"  # 塗装
+    FORKLIFT_LICENSE = "forklift_license"  # ﾌｫｰｸﾘﾌﾄ免許
+    TAMA_KAKE = "tama_kake"  # 玉掛
+    MOBILE_CRANE_UNDER_5T = "mobile_crane_under_5t"  # 移動式ｸﾚｰﾝ運転士(5ﾄﾝ未満)
+    MOBILE_CRANE_OVER_5T = "mobile_crane_over_5t"  # 移動式ｸﾚｰﾝ運転士(5ﾄﾝ以上)
+    GAS_WELDING = "gas_welding"  # ｶﾞｽ溶接作業者
+
+    @property
+    def bit(self) -> int:
+        return 1 << list(CandidateSkillCode).index(self)
+
+
 # ============================================
 # MODELS
 # ============================================
@@ -91,7 +120,7 @@ class Candidate(Base):
     full_name_kana = Column(String(100))  # フリガナ
     full_name_roman = Column(String(100))  # 氏名（ローマ字)
     gender = Column(String(10))  # 性別
-    date_of_birth = Column(Date)  # 生年月日
+    date_of_birth = Column(Date, index=True)  # 生年月日 (duplicate blocking key)
     photo_url = Column(String(255))  # 写真
     nationality = Column(String(50))  # 国籍
     marital_status = Column(String(20))  # 配偶者
@@ -105,8 +134,8 @@ class Candidate(Base):
     registered_address = Column(Text)  # 登録住所
 
     # 連絡先 (Contact Information)
-    phone = Column(String(20))  # 電話番号
-    mobile = Column(String(20))  # 携帯電話
+    phone = Column(String(20), index=True)  # 電話番号
+    mobile = Column(String(20), index=True)  # 携帯電話
 
     # パスポート情報 (Passport Information)
     passport_number = Column(String(50))  # パスポート番号
@@ -123,68 +152,9 @@ class Candidate(Base):
     car_ownership = Column(String(10))  # 自動車所有
     voluntary_insurance = Column(String(10))  # 任意保険加入
 
-    # 資格・免許 (Qualifications & Licenses)
-    forklift_license = Column(String(10))  # ﾌｫｰｸﾘﾌﾄ免許
-    tama_kake = Column(String(10))  # 玉掛
-    mobile_crane_under_5t = Column(String(10))  # 移動式ｸﾚｰﾝ運転士(5ﾄﾝ未満)
-    mobile_crane_over_5t = Column(String(10))  # 移動式ｸﾚｰﾝ運転士(5ﾄﾝ以上)
-    gas_welding = Column(String(10))  # ｶﾞｽ溶接作業者
-
-    # 家族構成 (Family Members) - Member 1
-    family_name_1 = Column(String(100))  # 家族構成氏名1
-    family_relation_1 = Column(String(50))  # 家族構成続柄1
-    family_age_1 = Column(Integer)  # 年齢1
-    family_residence_1 = Column(String(50))  # 居住1
-    family_separate_address_1 = Column(Text)  # 別居住住所1
-
-    # 家族構成 - Member 2
-    family_name_2 = Column(String(100))  # 家族構成氏名2
-    family_relation_2 = Column(String(50))  # 家族構成続柄2
-    family_age_2 = Column(Integer)  # 年齢2
-    family_residence_2 = Column(String(50))  # 居住2
-    family_separate_address_2 = Column(Text)  # 別居住住所2
-
-    # 家族構成 - Member 3
-    family_name_3 = Column(String(100))  # 氏名3
-    family_relation_3 = Column(String(50))  # 家族構成続柄3
-    family_age_3 = Column(Integer)  # 年齢3
-    family_residence_3 = Column(String(50))  # 居住3
-    family_separate_address_3 = Column(Text)  # 別居住住所3
-
-    # 家族構成 - Member 4
-    family_name_4 = Column(String(100))  # 家族構成氏名4
-    family_relation_4 = Column(String(50))  # 家族構成続柄4
-    family_age_4 = Column(Integer)  # 年齢4
-    family_residence_4 = Column(String(50))  # 居住4
-    family_separate_address_4 = Column(Text)  # 別居住住所4
-
-    # 家族構成 - Member 5
-    family_name_5 = Column(String(100))  # 家族構成氏名5
-    family_relation_5 = Column(String(50))  # 家族構成続柄5
-    family_age_5 = Column(Integer)  # 年齢5
-    family_residence_5 = Column(String(50))  # 居住5
-    family_separate_address_5 = Column(Text)  # 別居住住所5
-
-    # 職歴 (Work History) - Entry 7 (as per your column list)
-    work_history_company_7 = Column(String(200))  # 家族構成社社7
-    work_history_entry_company_7 = Column(String(200))  # 職歴入社会社名7
-    work_history_exit_company_7 = Column(String(200))  # 職歴退社会社名7
-
-    # 経験作業 (Work Experience)
-    exp_nc_lathe = Column(String(10))  # NC旋盤
-    exp_lathe = Column(String(10))  # 旋盤
-    exp_press = Column(String(10))  # ﾌﾟﾚｽ
-    exp_forklift = Column(String(10))  # ﾌｫｰｸﾘﾌﾄ
-    exp_packing = Column(String(10))  # 梱包
-    exp_welding = Column(String(10))  # 溶接
-    exp_car_assembly = Column(String(10))  # 車部品組立
-    exp_car_line = Column(String(10))  # 車部品ライン
-    exp_car_inspection = Column(String(10))  # 車部品検査
-    exp_electronic_inspection = Column(String(10))  # 電子部品検査
-    exp_food_processing = Column(String(10))  # 食品加工
-    exp_casting = Column(String(10))  # 鋳造
-    exp_line_leader = Column(String(10))  # ラインリーダー
-    exp_painting = Column(String(10))  # 塗装
+    # 資格・免許, 経験作業 (flags) -> candidate_skills + skills_mask
+    # 家族構成 -> candidate_family_members, 職歴 -> candidate_work_history
+    skills_mask = Column(Integer, nullable=False, default=0, server_default="0")
     exp_other = Column(Text)  # その他
 
     # お弁当 (Lunch/Bento Options)
@@ -203,10 +173,8 @@ class Candidate(Base):
     antigen_test_date = Column(Date)  # 簡易抗原検査実施日
     covid_vaccine_status = Column(String(50))  # コロナワクチン予防接種状態
 
-    # 語学スキル (Language Skills)
+    # 語学スキル (Language Skills); 語学スキル・有資格 -> candidate_qualifications
     language_skill_exists = Column(String(10))  # 語学スキル有無
-    language_skill_1 = Column(String(100))  # 語学スキル有無１
-    language_skill_2 = Column(String(100))  # 語学スキル有無2
 
     # 日本語能力 (Japanese Language Ability)
     japanese_qualification = Column(String(50))  # 日本語能力資格
@@ -216,11 +184,6 @@ class Candidate(Base):
     jlpt_score = Column(Integer)  # 能力試験受験点数
     jlpt_scheduled = Column(String(10))  # 能力試験受験受験予定
 
-    # 有資格 (Qualifications)
-    qualification_1 = Column(String(100))  # 有資格取得
-    qualification_2 = Column(String(100))  # 有資格取得1
-    qualification_3 = Column(String(100))  # 有資格取得2
-
     # 学歴 (Education)
     major = Column(String(100))  # 専攻
 
@@ -268,6 +231,92 @@ class Candidate(Base):
 
     # Relationships
     documents = relationship("Document", back_populates="candidate", foreign_keys="Document.candidate_id")
+    family_members = relationship(
+        "CandidateFamilyMember", order_by="CandidateFamilyMember.position",
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+    work_history = relationship(
+        "CandidateWorkHistory", order_by="CandidateWorkHistory.position",
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+    qualification_entries = relationship(
+        "CandidateQualification", order_by="CandidateQualification.position",
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+    skill_entries = relationship("CandidateSkill", cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def qualifications(self) -> list:
+        return [entry.name for entry in self.qualification_entries if entry.kind == "qualification"]
+
+    @property
+    def language_skills(self) -> list:
+        return [entry.name for entry in self.qualification_entries if entry.kind == "language"]
+
+    @property
+    def skills(self) -> list:
+        return sorted((CandidateSkillCode(entry.skill) for entry in self.skill_entries),
+                      key=lambda code: code.bit)
+
+
+class CandidateFamilyMember(Base):
+    """家族構成 - one row per family member of a candidate"""
+    __tablename__ = "candidate_family_members"
+    __table_args__ = (UniqueConstraint("candidate_id", "position"),)
+
+    id = Column(Integer, primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    name = Column(String(100))  # 氏名
+    relation = Column(String(50))  # 続柄
+    age = Column(Integer)  # 年齢
+    residence = Column(String(50))  # 居住
+    separate_address = Column(Text)  # 別居住住所
+
+
+class CandidateWorkHistory(Base):
+    """職歴 - previous employers of a candidate"""
+    __tablename__ = "candidate_work_history"
+    __table_args__ = (UniqueConstraint("candidate_id", "position"),)
+
+    id = Column(Integer, primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    company = Column(String(200))
+    entry_company = Column(String(200))  # 入社会社名
+    exit_company = Column(String(200))  # 退社会社名
+
+
+class CandidateQualification(Base):
+    """有資格 (kind=qualification) and 語学スキル (kind=language)"""
+    __tablename__ = "candidate_qualifications"
+    __table_args__ = (UniqueConstraint("candidate_id", "kind", "position"),)
+
+    id = Column(Integer, primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String(100), nullable=False)
+
+
+class CandidateSkill(Base):
+    """Skill/licence flag of a candidate; the (skill, candidate_id) key serves skill searches"""
+    __tablename__ = "candidate_skills"
+
+    skill = Column(String(40), primary_key=True)  # CandidateSkillCode value
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class Blob(Base):
+    """Stored file content, named by its SHA-256 (see app.services.blob_store)"""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String(100))
+    ref_count = Column(Integer, nullable=False, default=0)  # documents + timer card uploads pointing at it
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Document(Base):
@@ -281,6 +330,7 @@ class Document(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)
     mime_type = Column(String(100))
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)  # NULL for pre-blob uploads
     ocr_data = Column(JSON)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     uploaded_by = Column(Integer, ForeignKey("users.id"))
@@ -290,6 +340,19 @@ class Document(Base):
     employee = relationship("Employee", back_populates="documents", foreign_keys=[employee_id])
 
 
+class TimerCardUpload(Base):
+    """Uploaded timer card scan, kept as the payroll source of its timer cards"""
+    __tablename__ = "timer_card_uploads"
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    factory_id = Column(String(20), ForeignKey("factories.factory_id"))
+    records_found = Column(Integer)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    uploaded_by = Column(Integer, ForeignKey("users.id"))
+
+
 class Factory(Base):
     __tablename__ = "factories"
 
@@ -299,7 +362,7 @@ class Factory(Base):
     address = Column(Text)
     phone = Column(String(20))
     contact_person = Column(String(100))
-    config = Column(JSON)
+    config = Column(JSON().with_variant(JSONB(), "postgresql"))  # JSONB in 001_initial_schema
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -555,6 +618,8 @@ class Staff(Base):
 
 
 class TimerCard(Base):
+    # Range-partitioned by month on work_date (migration 004); closed months are
+    # archived to cold storage by app.services.archive_service
     __tablename__ = "timer_cards"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -588,6 +653,7 @@ class TimerCard(Base):
 
 
 class SalaryCalculation(Base):
+    # Range-partitioned by year (migration 004)
     __tablename__ = "salary_calculations"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -694,3 +760,11 @@ class AuditLog(Base):
     ip_address = Column(String(50))
     user_agent = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdSequence(Base):
+    """Last allocated value of a business id (used where the database has no sequences, e.g. SQLite)"""
+    __tablename__ = "id_sequences"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False)
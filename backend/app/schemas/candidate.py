@@ -2,9 +2,29 @@
 Candidate Schemas - 履歴書 (Rirekisho) Complete Fields
 """
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import date, datetime
-from app.models.models import CandidateStatus
+from app.models.models import CandidateSkillCode, CandidateStatus
+
+
+class FamilyMember(BaseModel):
+    """家族構成 - one family member"""
+    name: Optional[str] = None
+    relation: Optional[str] = None
+    age: Optional[int] = None
+    residence: Optional[str] = None
+    separate_address: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WorkHistoryEntry(BaseModel):
+    """職歴 - one previous employer"""
+    company: Optional[str] = None
+    entry_company: Optional[str] = None
+    exit_company: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CandidateBase(BaseModel):
@@ -51,64 +71,10 @@ class CandidateBase(BaseModel):
     car_ownership: Optional[str] = None
     voluntary_insurance: Optional[str] = None
 
-    # 資格・免許 (Qualifications & Licenses)
-    forklift_license: Optional[str] = None
-    tama_kake: Optional[str] = None
-    mobile_crane_under_5t: Optional[str] = None
-    mobile_crane_over_5t: Optional[str] = None
-    gas_welding: Optional[str] = None
-
-    # 家族構成 (Family Members) - 5 members
-    family_name_1: Optional[str] = None
-    family_relation_1: Optional[str] = None
-    family_age_1: Optional[int] = None
-    family_residence_1: Optional[str] = None
-    family_separate_address_1: Optional[str] = None
-
-    family_name_2: Optional[str] = None
-    family_relation_2: Optional[str] = None
-    family_age_2: Optional[int] = None
-    family_residence_2: Optional[str] = None
-    family_separate_address_2: Optional[str] = None
-
-    family_name_3: Optional[str] = None
-    family_relation_3: Optional[str] = None
-    family_age_3: Optional[int] = None
-    family_residence_3: Optional[str] = None
-    family_separate_address_3: Optional[str] = None
-
-    family_name_4: Optional[str] = None
-    family_relation_4: Optional[str] = None
-    family_age_4: Optional[int] = None
-    family_residence_4: Optional[str] = None
-    family_separate_address_4: Optional[str] = None
-
-    family_name_5: Optional[str] = None
-    family_relation_5: Optional[str] = None
-    family_age_5: Optional[int] = None
-    family_residence_5: Optional[str] = None
-    family_separate_address_5: Optional[str] = None
-
-    # 職歴 (Work History)
-    work_history_company_7: Optional[str] = None
-    work_history_entry_company_7: Optional[str] = None
-    work_history_exit_company_7: Optional[str] = None
-
-    # 経験作業 (Work Experience)
-    exp_nc_lathe: Optional[str] = None
-    exp_lathe: Optional[str] = None
-    exp_press: Optional[str] = None
-    exp_forklift: Optional[str] = None
-    exp_packing: Optional[str] = None
-    exp_welding: Optional[str] = None
-    exp_car_assembly: Optional[str] = None
-    exp_car_line: Optional[str] = None
-    exp_car_inspection: Optional[str] = None
-    exp_electronic_inspection: Optional[str] = None
-    exp_food_processing: Optional[str] = None
-    exp_casting: Optional[str] = None
-    exp_line_leader: Optional[str] = None
-    exp_painting: Optional[str] = None
+    # 資格・免許, 経験作業 (flags), 家族構成, 職歴 -> child tables
+    skills: List[CandidateSkillCode] = Field(default_factory=list)
+    family_members: List[FamilyMember] = Field(default_factory=list, max_length=10)
+    work_history: List[WorkHistoryEntry] = Field(default_factory=list)
     exp_other: Optional[str] = None
 
     # お弁当 (Lunch/Bento Options)
@@ -129,8 +95,7 @@ class CandidateBase(BaseModel):
 
     # 語学スキル (Language Skills)
     language_skill_exists: Optional[str] = None
-    language_skill_1: Optional[str] = None
-    language_skill_2: Optional[str] = None
+    language_skills: List[str] = Field(default_factory=list)
 
     # 日本語能力 (Japanese Language Ability)
     japanese_qualification: Optional[str] = None
@@ -141,9 +106,7 @@ class CandidateBase(BaseModel):
     jlpt_scheduled: Optional[str] = None
 
     # 有資格 (Qualifications)
-    qualification_1: Optional[str] = None
-    qualification_2: Optional[str] = None
-    qualification_3: Optional[str] = None
+    qualifications: List[str] = Field(default_factory=list)
 
     # 学歴 (Education)
     major: Optional[str] = None
@@ -206,6 +169,96 @@ class CandidateResponse(CandidateBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class DuplicateCandidate(BaseModel):
+    """Existing candidate that looks like the same person"""
+    candidate_id: int
+    rirekisho_id: str
+    name: Optional[str] = None
+    score: float
+    reasons: List[str] = Field(default_factory=list)
+
+
+class CandidateCreateResponse(CandidateResponse):
+    """Created candidate plus likely duplicates (the candidate is created anyway)"""
+    duplicates: List[DuplicateCandidate] = Field(default_factory=list)
+
+
+class CandidateSummary(BaseModel):
+    """Candidate list row (view=summary): ~1/10 of the rirekisho columns"""
+    id: int
+    rirekisho_id: str
+    status: CandidateStatus
+    reception_date: Optional[date] = None
+    full_name_kanji: Optional[str] = None
+    full_name_kana: Optional[str] = None
+    full_name_roman: Optional[str] = None
+    gender: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    nationality: Optional[str] = None
+    photo_url: Optional[str] = None
+    mobile: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CandidateDetail(CandidateSummary):
+    """Candidate with contact, residence and hiring data (view=detail); no family/skill blocks"""
+    arrival_date: Optional[date] = None
+    marital_status: Optional[str] = None
+    hire_date: Optional[date] = None
+    postal_code: Optional[str] = None
+    current_address: Optional[str] = None
+    address_banchi: Optional[str] = None
+    building_name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    passport_number: Optional[str] = None
+    passport_expiry: Optional[date] = None
+    residence_status: Optional[str] = None
+    residence_expiry: Optional[date] = None
+    residence_card_number: Optional[str] = None
+    license_number: Optional[str] = None
+    license_expiry: Optional[date] = None
+    japanese_level: Optional[str] = None
+    interview_result: Optional[str] = None
+    commute_method: Optional[str] = None
+    emergency_contact_name: Optional[str] = None
+    emergency_contact_phone: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+
+
+# view= profiles of GET /api/candidates/
+CANDIDATE_VIEWS = {
+    "summary": CandidateSummary,
+    "detail": CandidateDetail,
+    "full": CandidateResponse,
+}
+
+
+class CandidateMatch(BaseModel):
+    """One shortlisted candidate for a factory"""
+    candidate_id: int
+    rirekisho_id: str
+    full_name_kanji: Optional[str] = None
+    score: float
+    matched_skills: List[CandidateSkillCode] = Field(default_factory=list)
+    jlpt_level: Optional[int] = None
+
+
+class FactoryShortlist(BaseModel):
+    """Ranked candidates for one factory opening"""
+    factory_id: str
+    factory_name: str
+    prefecture: Optional[str] = None
+    skills: List[CandidateSkillCode] = Field(default_factory=list)
+    required_skills: List[CandidateSkillCode] = Field(default_factory=list)
+    skills_inferred: bool = False  # skills guessed from the job description
+    candidates: List[CandidateMatch] = Field(default_factory=list)
+
+
 class OCRData(BaseModel):
     """OCR extracted data"""
     full_name_kanji: Optional[str] = None
@@ -239,6 +292,29 @@ class CandidateApprove(BaseModel):
     hakensaki_shain_id: Optional[str] = None
 
 
+class CandidateBatchApproveItem(CandidateApprove):
+    """One candidate of a batch approval"""
+    candidate_id: int
+
+
+class CandidateBatchApprove(BaseModel):
+    """Approve many candidates in one transaction (onboarding wave)"""
+    candidates: List[CandidateBatchApproveItem] = Field(..., min_length=1, max_length=500)
+
+
+class OnboardingResult(BaseModel):
+    """Per-candidate outcome of a batch approval"""
+    candidate_id: int
+    status: Literal["approved", "hired", "failed"]
+    rirekisho_id: Optional[str] = None
+    employee_id: Optional[int] = None
+    hakenmoto_id: Optional[int] = None
+    documents: int = 0
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class CandidateReject(BaseModel):
     """Reject candidate"""
     reason: str
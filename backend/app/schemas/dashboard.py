@@ -30,6 +30,7 @@ class FactoryDashboard(BaseModel):
     current_month_revenue: int
     current_month_profit: int
     profit_margin: float
+    billing_rate: Optional[float] = None
 
 
 class EmployeeAlert(BaseModel):
@@ -1,8 +1,8 @@
 """
 Timer Card Schemas
 """
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Optional
 from datetime import date, time, datetime
 from decimal import Decimal
 from app.models.models import ShiftType
@@ -69,12 +69,17 @@ class TimerCardOCRData(BaseModel):
     work_date: Optional[str] = None
     clock_in: Optional[str] = None
     clock_out: Optional[str] = None
+    break_minutes: Optional[int] = None
     total_hours: Optional[str] = None
     notes: Optional[str] = None
+    confidence: Optional[float] = None  # lowest field confidence, 0..1
+    field_confidence: Dict[str, float] = Field(default_factory=dict)
+    needs_review: bool = False
 
 
 class TimerCardUploadResponse(BaseModel):
     """Timer card upload response"""
+    upload_id: Optional[int] = None  # timer_card_uploads row keeping the scan
     file_name: str
     records_found: int
     ocr_data: list[TimerCardOCRData]
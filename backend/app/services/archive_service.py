@@ -0,0 +1,257 @@
+"""
+Archive Service for UNS-ClaudeJP 2.0
+Moves closed timer card months from PostgreSQL partitions to cold storage
+"""
+import logging
+import re
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ImportExportError
+from app.models.models import TimerCard
+from app.utils.dates import add_months, iter_months, month_bounds
+
+try:  # Parquet is optional; CSV.gz works with pandas alone
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+TIMER_CARD_COLUMNS = [
+    "id", "employee_id", "factory_id", "work_date", "clock_in", "clock_out",
+    "break_minutes", "regular_hours", "overtime_hours", "night_hours",
+    "holiday_hours", "shift_type", "notes", "is_approved", "created_at", "updated_at",
+]
+HOURS_COLUMNS = ["regular_hours", "overtime_hours", "night_hours", "holiday_hours"]
+PARTITION_PATTERN = re.compile(r"^timer_cards_(\d{4})_(\d{2})$")
+CHUNK_SIZE = 50000
+
+
+class ArchiveService:
+    """Service for timer card partition archival and cold storage reads"""
+
+    def __init__(self, archive_dir: Optional[str] = None, archive_format: Optional[str] = None):
+        self.archive_dir = Path(archive_dir or settings.ARCHIVE_DIR) / "timer_cards"
+        archive_format = archive_format or settings.ARCHIVE_FORMAT
+        if archive_format == "parquet" and pq is None:
+            logger.warning("pyarrow is not installed, archiving timer cards as csv.gz")
+            archive_format = "csv.gz"
+        self.archive_format = archive_format
+
+    # Paths -----------------------------------------------------------------
+    @staticmethod
+    def partition_name(year: int, month: int) -> str:
+        """Name of the monthly timer_cards partition"""
+        return f"timer_cards_{year:04d}_{month:02d}"
+
+    def archive_path(self, year: int, month: int, archive_format: Optional[str] = None) -> Path:
+        """Cold storage file for a month"""
+        return self.archive_dir / f"{year:04d}" / f"{month:02d}.{archive_format or self.archive_format}"
+
+    def find_archive(self, year: int, month: int) -> Optional[Path]:
+        """Return the archive file for a month in any supported format"""
+        for archive_format in ("parquet", "csv.gz"):
+            path = self.archive_path(year, month, archive_format)
+            if path.exists():
+                return path
+        return None
+
+    # Partition maintenance ---------------------------------------------------
+    def archive_cutoff(self, today: Optional[date] = None) -> Tuple[int, int]:
+        """
+        First (year, month) that stays hot
+
+        The current month plus TIMER_CARD_HOT_MONTHS closed months remain in
+        PostgreSQL; everything before is eligible for archival.
+        """
+        today = today or date.today()
+        return add_months(today.year, today.month, -settings.TIMER_CARD_HOT_MONTHS)
+
+    def ensure_partitions(self, db: Session, months_ahead: int = 3) -> List[str]:
+        """Create upcoming monthly and yearly partitions ahead of time"""
+        self._require_postgresql(db)
+        today = date.today()
+        created = []
+        current = (today.year, today.month)
+        for year, month in iter_months(current, add_months(*current, months_ahead)):
+            created.append(db.execute(
+                text("SELECT ensure_timer_card_partition(:month)"),
+                {"month": date(year, month, 1)}
+            ).scalar())
+        created.append(db.execute(
+            text("SELECT ensure_salary_partition(:year)"), {"year": today.year + 1}
+        ).scalar())
+        db.commit()
+        return created
+
+    def list_archivable_months(self, db: Session, today: Optional[date] = None) -> List[Tuple[int, int]]:
+        """Attached monthly partitions older than the hot window"""
+        self._require_postgresql(db)
+        rows = db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'timer_cards'"
+        )).scalars().all()
+
+        cutoff = self.archive_cutoff(today)
+        months = []
+        for name in rows:
+            match = PARTITION_PATTERN.match(name)
+            if match and (int(match.group(1)), int(match.group(2))) < cutoff:
+                months.append((int(match.group(1)), int(match.group(2))))
+        return sorted(months)
+
+    def archive_month(self, db: Session, year: int, month: int) -> Dict:
+        """
+        Export one closed month to cold storage, then detach and drop its partition
+
+        The partition is only dropped once the file has been written and its row
+        count matches the partition, so a failed run can simply be retried.
+
+        Returns:
+            Dict with archive path and row count
+        """
+        self._require_postgresql(db)
+        if (year, month) >= self.archive_cutoff():
+            raise ImportExportError(
+                f"{year}/{month:02d} is still within the hot window",
+                {"hot_months": settings.TIMER_CARD_HOT_MONTHS}
+            )
+
+        partition = self.partition_name(year, month)
+        exists = db.execute(text("SELECT to_regclass(:name)"), {"name": partition}).scalar()
+        if not exists:
+            path = self.find_archive(year, month)
+            logger.info(f"Partition {partition} already archived")
+            return {"partition": partition, "path": str(path) if path else None, "rows": 0, "skipped": True}
+
+        expected = db.execute(text(f'SELECT count(*) FROM "{partition}"')).scalar()
+        path = self.archive_path(year, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+
+        written = self._export_partition(db, partition, tmp_path)
+        if written != expected:
+            tmp_path.unlink(missing_ok=True)
+            raise ImportExportError(
+                f"Archive of {partition} is incomplete",
+                {"expected": expected, "written": written}
+            )
+        tmp_path.replace(path)
+
+        db.execute(text(f'ALTER TABLE timer_cards DETACH PARTITION "{partition}"'))
+        db.execute(text(f'DROP TABLE "{partition}"'))
+        db.commit()
+
+        logger.info(f"Archived {written} timer cards from {partition} to {path}")
+        return {"partition": partition, "path": str(path), "rows": written, "skipped": False}
+
+    def _export_partition(self, db: Session, partition: str, path: Path) -> int:
+        query = text(
+            f'SELECT {", ".join(TIMER_CARD_COLUMNS)} FROM "{partition}" ORDER BY work_date, employee_id'
+        )
+        chunks = pd.read_sql(query, db.connection(), chunksize=CHUNK_SIZE)
+        written = 0
+
+        if self.archive_format == "parquet":
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(self._normalise_chunk(chunk), preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                    writer.write_table(table)
+                    written += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return written
+
+        header = True
+        for chunk in chunks:
+            self._normalise_chunk(chunk).to_csv(
+                path, mode="w" if header else "a", header=header, index=False, compression="gzip"
+            )
+            header = False
+            written += len(chunk)
+        if header:  # empty partition still gets a readable file
+            pd.DataFrame(columns=TIMER_CARD_COLUMNS).to_csv(path, index=False, compression="gzip")
+        return written
+
+    @staticmethod
+    def _normalise_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+        for column in HOURS_COLUMNS:
+            chunk[column] = pd.to_numeric(chunk[column]).astype("float64")
+        for column in ("clock_in", "clock_out", "shift_type"):
+            chunk[column] = chunk[column].astype("string")
+        return chunk
+
+    # Cold storage reads ------------------------------------------------------
+    def load_month(self, year: int, month: int, factory_id: Optional[str] = None) -> pd.DataFrame:
+        """Read an archived month back as a DataFrame (empty if not archived)"""
+        path = self.find_archive(year, month)
+        if path is None:
+            return pd.DataFrame(columns=TIMER_CARD_COLUMNS)
+
+        if path.suffix == ".parquet":
+            filters = [("factory_id", "=", factory_id)] if factory_id else None
+            return pd.read_parquet(path, filters=filters)
+
+        frame = pd.read_csv(path, compression="gzip", parse_dates=["work_date"], dtype={"factory_id": "string"})
+        if factory_id:
+            frame = frame[frame["factory_id"] == factory_id]
+        return frame
+
+    def monthly_hours(self, db: Session, year: int, factory_id: Optional[str] = None) -> Dict[int, float]:
+        """
+        Approved hours per month for a year, combining hot partitions and cold storage
+
+        Months still present in PostgreSQL win over an archive file, so a month
+        whose detach failed after export is never counted twice.
+        """
+        start, _ = month_bounds(year, 1)
+        _, end = month_bounds(year, 12)
+        total = (
+            TimerCard.regular_hours + TimerCard.overtime_hours
+            + TimerCard.night_hours + TimerCard.holiday_hours
+        )
+        month_col = func.extract("month", TimerCard.work_date)
+
+        query = db.query(month_col, func.sum(total)).filter(
+            TimerCard.work_date >= start,
+            TimerCard.work_date < end,
+            TimerCard.is_approved == True,
+        )
+        if factory_id:
+            query = query.filter(TimerCard.factory_id == factory_id)
+
+        hours = {int(month): float(value or 0) for month, value in query.group_by(month_col).all()}
+
+        for month in range(1, 13):
+            if month in hours:
+                continue
+            frame = self.load_month(year, month, factory_id)
+            if frame.empty:
+                continue
+            approved = frame[frame["is_approved"].astype(bool)]
+            hours[month] = float(approved[HOURS_COLUMNS].to_numpy(dtype="float64").sum())
+        return hours
+
+    @staticmethod
+    def _require_postgresql(db: Session) -> None:
+        if db.get_bind().dialect.name != "postgresql":
+            raise ImportExportError("Timer card partitions require PostgreSQL")
+
+
+# Global instance
+archive_service = ArchiveService()
@@ -4,21 +4,31 @@ Authentication and Security Service for UNS-ClaudeJP 1.0
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import User
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import Principal, principal_cache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (sync helpers below are for scripts; request handlers await password_hasher)
+pwd_context = password_hasher.context
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Roles accepted by require_role()
+ALLOWED_ROLES = {
+    'super_admin': frozenset({'SUPER_ADMIN'}),
+    'admin': frozenset({'SUPER_ADMIN', 'ADMIN'}),
+    'coordinator': frozenset({'SUPER_ADMIN', 'ADMIN', 'COORDINATOR'}),
+    'employee': frozenset({'SUPER_ADMIN', 'ADMIN', 'COORDINATOR', 'EMPLOYEE'}),
+}
+
 
 class AuthService:
     """Authentication service"""
@@ -49,13 +59,18 @@ class AuthService:
         return encoded_jwt
     
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str):
-        """Authenticate user"""
-        user = db.query(User).filter(User.username == username).first()
+    async def hash_password(password: str) -> str:
+        """Hash password on the bcrypt pool"""
+        return await password_hasher.hash(password)
+    
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, username: str, password: str):
+        """Authenticate user (bcrypt runs on the password_hasher pool)"""
+        user = await db.scalar(select(User).where(User.username == username))
         
         if not user:
             return False
-        if not AuthService.verify_password(password, str(user.password_hash)):
+        if not await password_hasher.verify(password, str(user.password_hash)):
             return False
         
         return user
@@ -63,9 +78,9 @@ class AuthService:
     @staticmethod
     async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
-    ):
-        """Get current user from token"""
+        db: AsyncSession = Depends(get_async_db)
+    ) -> Principal:
+        """Get current user from token (cached principal, see principal_cache)"""
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -80,17 +95,21 @@ class AuthService:
         except JWTError:
             raise credentials_exception
         
-        user = db.query(User).filter(User.username == username).first()
-        if user is None:
-            raise credentials_exception
+        principal = principal_cache.get(username)
+        if principal is None:
+            user = await db.scalar(select(User).where(User.username == username))
+            if user is None:
+                raise credentials_exception
+            principal = Principal.from_user(user)
+            principal_cache.put(username, principal)
         
-        return user
+        return principal
     
     @staticmethod
     async def get_current_active_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
-    ):
+        db: AsyncSession = Depends(get_async_db)
+    ) -> Principal:
         """Get current active user"""
         current_user = await AuthService.get_current_user(token, db)
         if not bool(current_user.is_active):
@@ -100,15 +119,10 @@ class AuthService:
     @staticmethod
     def require_role(required_role: str):
         """Dependency to check user role"""
-        async def role_checker(current_user: User = Depends(AuthService.get_current_active_user)):
-            allowed_roles = {
-                'super_admin': ['SUPER_ADMIN'],
-                'admin': ['SUPER_ADMIN', 'ADMIN'],
-                'coordinator': ['SUPER_ADMIN', 'ADMIN', 'COORDINATOR'],
-                'employee': ['SUPER_ADMIN', 'ADMIN', 'COORDINATOR', 'EMPLOYEE']
-            }
+        allowed = ALLOWED_ROLES.get(required_role, frozenset())
 
-            if current_user.role.name not in allowed_roles.get(required_role, []):
+        async def role_checker(current_user: Principal = Depends(AuthService.get_current_active_user)):
+            if current_user.role.name not in allowed:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Not enough permissions"
@@ -0,0 +1,279 @@
+"""
+Blob Store for UNS-ClaudeJP 2.0
+Uploaded files stored once per content, named by their SHA-256
+
+Layout: ``UPLOAD_DIR/blobs/ab/cd/abcd...`` (two shard levels keep every
+directory small). Uploads are copied in chunks to a temp file on the same
+filesystem while hashing, then renamed into place; when a blob with that
+hash already exists the temp file is dropped, so disk usage grows with
+unique content, not with upload count.
+
+Each Blob row counts the Document and TimerCardUpload rows pointing at
+it. Writers add references in the transaction that inserts those rows,
+before adding them (their blob_sha256 is a foreign key to blobs).
+collect_garbage() recounts from both tables (cascaded deletes do not
+decrement) and removes blobs nothing references, plus files that never got
+a row (aborted requests). Only blobs untouched for
+BLOB_GC_GRACE_HOURS are removed: put() refreshes the mtime of an existing
+blob, so a request that is about to reference it is never raced.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models.models import Blob, Document, TimerCardUpload
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    """Result of put(): where the content lives and whether it was new"""
+    sha256: str
+    size: int
+    path: str
+    created: bool
+
+
+class BlobStore:
+    """SHA-256 addressed files with reference counts"""
+
+    def __init__(self, root: Optional[str] = None, grace_hours: Optional[float] = None):
+        self.root = Path(root or Path(settings.UPLOAD_DIR) / "blobs")
+        self.grace_hours = settings.BLOB_GC_GRACE_HOURS if grace_hours is None else grace_hours
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    # Writing ---------------------------------------------------------------
+    def put(self, source: BinaryIO, max_size: Optional[int] = None) -> StoredBlob:
+        """
+        Stream ``source`` into the store while hashing it
+
+        Raises:
+            ValidationError: when the content exceeds ``max_size`` bytes
+        """
+        temp_dir = self.root / "tmp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(handle, "wb") as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValidationError("File too large", {"max_size": max_size})
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.path_for(sha256)
+            if path.exists():
+                os.utime(path)  # keeps it out of a running collect_garbage()
+                created = False
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, path)
+                created = True
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+        return StoredBlob(sha256=sha256, size=size, path=str(path), created=created)
+
+    async def put_upload(self, upload: UploadFile, max_size: Optional[int] = None) -> StoredBlob:
+        """put() for a FastAPI upload, on the threadpool"""
+        await upload.seek(0)
+        return await run_in_threadpool(self.put, upload.file, max_size)
+
+    # References ------------------------------------------------------------
+    def add_reference(self, db: Session, blob: StoredBlob, mime_type: Optional[str] = None, count: int = 1) -> None:
+        """
+        Count ``count`` more documents pointing at ``blob`` (creates its row)
+
+        Call before adding the documents: creating the row flushes the
+        session, and a pending document would reach the database before the
+        blob row its foreign key points at.
+        """
+        if self._increment(db, {blob.sha256: count}):
+            return
+        try:
+            with db.begin_nested():
+                db.add(Blob(sha256=blob.sha256, size=blob.size, mime_type=mime_type, ref_count=count))
+                db.flush()
+        except IntegrityError:
+            self._increment(db, {blob.sha256: count})  # row created concurrently
+
+    def add_references(self, db: Session, counts: Dict[str, int]) -> None:
+        """Bulk increment for blobs that already have rows (document copies)"""
+        if counts:
+            self._increment(db, counts)
+
+    def release(self, db: Session, sha256: str, count: int = 1) -> None:
+        """Count ``count`` fewer references; the file stays until collect_garbage()"""
+        remaining = case((Blob.ref_count > count, Blob.ref_count - count), else_=0)
+        db.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=remaining))
+
+    def recount(self, db: Session) -> int:
+        """Reset every ref_count from the documents and timer_card_uploads tables; returns rows changed"""
+        references = (
+            select(func.count(Document.id)).where(Document.blob_sha256 == Blob.sha256).scalar_subquery()
+            + select(func.count(TimerCardUpload.id)).where(TimerCardUpload.blob_sha256 == Blob.sha256)
+            .scalar_subquery()
+        )
+        result = db.execute(update(Blob).where(Blob.ref_count != references).values(ref_count=references))
+        return result.rowcount
+
+    def adopt_documents(self, db: Session, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Move files of documents uploaded before the blob store into it
+
+        Rows are committed per batch; the old files are removed at the end,
+        once every document sharing them points at the blob.
+        """
+        stats = {"documents": 0, "missing": 0, "blobs": 0}
+        upload_dir = Path(settings.UPLOAD_DIR).resolve()
+        stored: Dict[str, StoredBlob] = {}
+        last_id = 0
+        while True:
+            documents = (
+                db.query(Document)
+                .filter(Document.blob_sha256.is_(None), Document.id > last_id)
+                .order_by(Document.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not documents:
+                break
+            for document in documents:
+                last_id = document.id
+                blob = stored.get(document.file_path)
+                if blob is None:
+                    try:
+                        with open(document.file_path, "rb") as source:
+                            blob = stored[document.file_path] = self.put(source)
+                    except FileNotFoundError:
+                        stats["missing"] += 1
+                        continue
+                    stats["blobs"] += blob.created
+                self.add_reference(db, blob, document.mime_type)
+                document.file_path = blob.path
+                document.file_size = blob.size
+                document.blob_sha256 = blob.sha256
+                stats["documents"] += 1
+            db.commit()
+
+        for old_path in stored:
+            path = Path(old_path).resolve()
+            if upload_dir in path.parents and self.root.resolve() not in path.parents:
+                path.unlink(missing_ok=True)
+        logger.info(f"Adopted legacy documents into the blob store: {stats}")
+        return stats
+
+    # Garbage collection ----------------------------------------------------
+    def collect_garbage(self, db: Session, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Remove blobs nothing references (rows and files) and stray files
+        older than the grace period; commits
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.grace_hours)
+        cutoff_ts = cutoff.timestamp()
+        stats = {"recounted": 0, "rows": 0, "files": 0, "bytes": 0}
+
+        stats["recounted"] = self.recount(db)
+        unreferenced = [
+            sha256 for (sha256,) in
+            db.query(Blob.sha256).filter(Blob.ref_count == 0, Blob.updated_at < cutoff)
+        ]
+        if dry_run:
+            stats["rows"] = len(unreferenced)
+            db.rollback()
+        else:
+            for batch in _batches(unreferenced, 1000):
+                result = db.execute(Blob.__table__.delete().where(Blob.sha256.in_(batch), Blob.ref_count == 0))
+                stats["rows"] += result.rowcount
+            db.commit()
+
+        # Files without a row: collected rows above, scans, aborted requests
+        for batch in _batches(self._old_files(cutoff_ts), 1000):
+            known = {
+                sha256 for (sha256,) in
+                db.query(Blob.sha256).filter(Blob.sha256.in_([path.name for path in batch]))
+            }
+            for path in batch:
+                if path.name in known:
+                    continue
+                try:
+                    if path.stat().st_mtime >= cutoff_ts:
+                        continue  # touched by put() meanwhile
+                    stats["bytes"] += path.stat().st_size
+                    if not dry_run:
+                        path.unlink()
+                    stats["files"] += 1
+                except FileNotFoundError:
+                    continue
+        db.rollback()
+
+        self._sweep_temp(cutoff_ts, dry_run)
+        logger.info(f"Blob GC{' (dry run)' if dry_run else ''}: {stats}")
+        return stats
+
+    def _old_files(self, cutoff_ts: float) -> Iterator[Path]:
+        if not self.root.exists():
+            return
+        for shard in sorted(self.root.glob("[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]")):
+            for entry in os.scandir(shard):
+                if entry.is_file() and SHA256_NAME.match(entry.name) and entry.stat().st_mtime < cutoff_ts:
+                    yield Path(entry.path)
+
+    def _sweep_temp(self, cutoff_ts: float, dry_run: bool) -> None:
+        temp_dir = self.root / "tmp"
+        if not temp_dir.exists():
+            return
+        for path in temp_dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff_ts and not dry_run:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+    def _increment(self, db: Session, counts: Dict[str, int]) -> int:
+        result = db.execute(
+            update(Blob).where(Blob.sha256.in_(list(counts)))
+            .values(ref_count=Blob.ref_count + case(counts, value=Blob.sha256, else_=0))
+        )
+        return result.rowcount
+
+
+def _batches(items, size: int) -> Iterator[List]:
+    batch: List = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Global instance
+blob_store = BlobStore()
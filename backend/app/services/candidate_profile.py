@@ -0,0 +1,114 @@
+"""
+Candidate Profile for UNS-ClaudeJP 2.0
+Family members, work history, qualifications and skills of a candidate
+
+These groups live in child tables (migration 005) instead of numbered
+columns on ``candidates``. Skills are stored twice: one candidate_skills
+row per skill, whose (skill, candidate_id) primary key answers "who has
+forklift + welding" from the index, and the ``skills_mask`` bitmap for
+vectorized scoring. apply_profile() keeps both in sync.
+"""
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import object_session, selectinload
+
+from app.models.models import (
+    Candidate, CandidateFamilyMember, CandidateQualification, CandidateSkill, CandidateSkillCode,
+    CandidateWorkHistory
+)
+
+PROFILE_FIELDS = frozenset({"family_members", "work_history", "qualifications", "language_skills", "skills"})
+
+# Relationship behind each profile field of the response schemas
+PROFILE_RELATIONSHIPS = {
+    "family_members": Candidate.family_members,
+    "work_history": Candidate.work_history,
+    "qualifications": Candidate.qualification_entries,
+    "language_skills": Candidate.qualification_entries,
+    "skills": Candidate.skill_entries,
+}
+
+# Values of the legacy flag columns that mean "no" (migration 005 uses the same list)
+FALSY_FLAGS = frozenset({"", "無", "なし", "無し", "×", "✕", "-", "no", "0", "false", "n"})
+
+
+def is_truthy(value: Any) -> bool:
+    """Legacy 有/○/はい flag -> bool"""
+    if value is None:
+        return False
+    return str(value).strip().lower() not in FALSY_FLAGS
+
+
+def skills_mask(codes: Iterable[CandidateSkillCode]) -> int:
+    mask = 0
+    for code in codes:
+        mask |= CandidateSkillCode(code).bit
+    return mask
+
+
+def codes_from_mask(mask: int) -> List[CandidateSkillCode]:
+    return [code for code in CandidateSkillCode if mask & code.bit]
+
+
+def profile_loads(fields: Iterable[str]) -> list:
+    """selectinload() options for the profile fields being rendered (one query per child table)"""
+    relationships = {PROFILE_RELATIONSHIPS[name] for name in fields if name in PROFILE_RELATIONSHIPS}
+    return [selectinload(relationship) for relationship in relationships]
+
+
+def with_skills(codes: Iterable[CandidateSkillCode]):
+    """WHERE clause: candidates having every skill in ``codes`` (index-only on candidate_skills)"""
+    values = sorted({CandidateSkillCode(code).value for code in codes})
+    having_all = (
+        select(CandidateSkill.candidate_id)
+        .where(CandidateSkill.skill.in_(values))
+        .group_by(CandidateSkill.candidate_id)
+        .having(func.count() == len(values))
+    )
+    return Candidate.id.in_(having_all)
+
+
+def _replace(candidate: Candidate, attribute: str, rows: list) -> None:
+    """
+    Swap a child collection, deleting the old rows first: the unit of work
+    would INSERT the new rows before deleting the orphans, which breaks the
+    UNIQUE (candidate_id, position) keys
+    """
+    session = object_session(candidate)
+    collection = getattr(candidate, attribute)
+    if collection and session is not None:
+        collection.clear()
+        session.flush()
+    setattr(candidate, attribute, rows)
+
+
+def apply_profile(candidate: Candidate, data: Dict[str, Any]) -> None:
+    """
+    Replace the groups present in ``data`` (PROFILE_FIELDS keys, as dumped by
+    the candidate schemas); absent keys are left untouched
+    """
+    if "family_members" in data:
+        _replace(candidate, "family_members", [
+            CandidateFamilyMember(**{**member, "position": index})
+            for index, member in enumerate(data["family_members"], start=1)
+        ])
+    if "work_history" in data:
+        _replace(candidate, "work_history", [
+            CandidateWorkHistory(**{**entry, "position": index})
+            for index, entry in enumerate(data["work_history"], start=1)
+        ])
+    if "qualifications" in data or "language_skills" in data:
+        names = {
+            "qualification": data.get("qualifications", candidate.qualifications),
+            "language": data.get("language_skills", candidate.language_skills),
+        }
+        _replace(candidate, "qualification_entries", [
+            CandidateQualification(kind=kind, position=index, name=name)
+            for kind, values in names.items()
+            for index, name in enumerate((value for value in values if value and value.strip()), start=1)
+        ])
+    if "skills" in data:
+        codes = sorted({CandidateSkillCode(code) for code in data["skills"]}, key=lambda code: code.bit)
+        _replace(candidate, "skill_entries", [CandidateSkill(skill=code.value) for code in codes])
+        candidate.skills_mask = skills_mask(codes)
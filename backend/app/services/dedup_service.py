@@ -0,0 +1,340 @@
+"""
+Duplicate Candidate Detection for UNS-ClaudeJP 2.0
+Finds people who applied more than once under slightly different spellings
+
+Names, phones and birth dates are normalized (kana folded to full-size
+katakana without spaces or ー, romaji lowercased with sorted tokens, phones
+to domestic digits). Only records that share a blocking key are compared:
+
+- birth date + first two kana (or romaji) characters
+- phone number
+- full normalized kana name + birth year (catches a mistyped day or month)
+
+Each pair is scored 0..1 (0.50 name similarity, 0.30 birth date,
+0.20 phone); pairs at or above DEDUP_THRESHOLD are reported. New
+candidates are checked on create against the rows sharing their birth date
+or phone (indexed); the nightly report (scripts/report_duplicate_candidates.py)
+checks every pair inside every block.
+"""
+import csv
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from difflib import SequenceMatcher
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Candidate
+
+logger = logging.getLogger(__name__)
+
+NAME_WEIGHT = 0.50
+DOB_WEIGHT = 0.30
+PHONE_WEIGHT = 0.20
+
+_HIRAGANA = {code: code + 0x60 for code in range(0x3041, 0x3097)}
+_SMALL_KANA = str.maketrans("ァィゥェォッャュョヮヵヶ", "アイウエオツヤユヨワカケ")
+_NAME_NOISE = re.compile(r"[\s・=ー\-‐.,、。()]")
+_NON_DIGIT = re.compile(r"\D")
+_ROMAN_TOKEN = re.compile(r"[a-z]+")
+
+_COLUMNS = (
+    Candidate.id, Candidate.rirekisho_id, Candidate.full_name_kanji, Candidate.full_name_kana,
+    Candidate.full_name_roman, Candidate.date_of_birth, Candidate.phone, Candidate.mobile,
+)
+
+
+def normalize_kana(value: Optional[str]) -> str:
+    """'ぐえん　ゔぁん・あん' / 'ｸﾞｴﾝ ｳﾞｧﾝ ｱﾝ' -> 'グエンヴアンアン'"""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKC", value).translate(_HIRAGANA).translate(_SMALL_KANA)
+    return _NAME_NOISE.sub("", text)
+
+
+def normalize_roman(value: Optional[str]) -> str:
+    """'NGUYỄN Văn  An' / 'An Nguyen Van' -> 'an nguyen van' (accents dropped, tokens sorted)"""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKD", value).lower().replace("đ", "d")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(sorted(_ROMAN_TOKEN.findall(text)))
+
+
+def normalize_kanji(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return re.sub(r"\s", "", unicodedata.normalize("NFKC", value))
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """'+81 90-1234-5678' / '０９０（１２３４）５６７８' -> '09012345678'"""
+    if not value:
+        return None
+    digits = _NON_DIGIT.sub("", unicodedata.normalize("NFKC", value))
+    if digits.startswith("81") and len(digits) in (11, 12):
+        digits = "0" + digits[2:]
+    return digits if len(digits) >= 9 else None
+
+
+def phone_variants(digits: str) -> List[str]:
+    """Stored spellings of a normalized phone, for indexed equality lookups"""
+    variants = {digits}
+    if len(digits) == 11:
+        variants.add(f"{digits[:3]}-{digits[3:7]}-{digits[7:]}")
+    elif len(digits) == 10:
+        for area in (2, 3, 4):
+            variants.add(f"{digits[:area]}-{digits[area:6]}-{digits[6:]}")
+    return sorted(variants)
+
+
+def normalize_dob(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = unicodedata.normalize("NFKC", str(value)).strip()
+    for pattern in ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d", "%Y年%m月%d日"):
+        try:
+            return datetime.strptime(text, pattern).date()
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class DedupRecord:
+    """Normalized identity fields of one candidate"""
+    id: Optional[int]
+    rirekisho_id: Optional[str]
+    kanji: str
+    kana: str
+    roman: str
+    dob: Optional[date]
+    phones: FrozenSet[str] = field(default_factory=frozenset)
+    name: Optional[str] = None  # as entered, for reports
+
+    @classmethod
+    def from_values(cls, id=None, rirekisho_id=None, full_name_kanji=None, full_name_kana=None,
+                    full_name_roman=None, date_of_birth=None, phone=None, mobile=None) -> "DedupRecord":
+        return cls(
+            id=id,
+            rirekisho_id=rirekisho_id,
+            kanji=normalize_kanji(full_name_kanji),
+            kana=normalize_kana(full_name_kana),
+            roman=normalize_roman(full_name_roman),
+            dob=normalize_dob(date_of_birth),
+            phones=frozenset(filter(None, (normalize_phone(phone), normalize_phone(mobile)))),
+            name=full_name_kanji or full_name_kana or full_name_roman,
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "DedupRecord":
+        """row: the _COLUMNS of a candidate"""
+        return cls.from_values(*row)
+
+
+def blocking_keys(record: DedupRecord) -> List[tuple]:
+    keys = []
+    if record.dob:
+        if record.kana:
+            keys.append(("dob+kana", record.dob, record.kana[:2]))
+        if record.roman:
+            keys.append(("dob+roman", record.dob, record.roman[:2]))
+    keys.extend(("phone", phone) for phone in record.phones)
+    if len(record.kana) >= 4:
+        keys.append(("kana+year", record.kana, record.dob.year if record.dob else None))
+    return keys
+
+
+def _similarity(a: str, b: str, needed: float = 0.0) -> float:
+    """difflib ratio; 0 when the cheap upper bounds already fall below ``needed``"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < needed or matcher.quick_ratio() < needed:
+        return 0.0
+    return matcher.ratio()
+
+
+def _dob_similarity(a: Optional[date], b: Optional[date]) -> float:
+    if a is None or b is None:
+        return 0.0
+    if a == b:
+        return 1.0
+    same = (a.year == b.year) + (a.month == b.month) + (a.day == b.day)
+    swapped = a.year == b.year and a.month == b.day and a.day == b.month
+    return 0.5 if same == 2 or swapped else 0.0
+
+
+def score_pair(a: DedupRecord, b: DedupRecord, minimum: float = 0.0) -> Tuple[float, List[str]]:
+    """
+    (score 0..1, matching signals) for two records
+
+    Names are only compared as far as the pair can still reach ``minimum``
+    (the string comparison is most of the cost), so scores below it are
+    lower bounds.
+    """
+    dob = _dob_similarity(a.dob, b.dob)
+    phone = 1.0 if a.phones & b.phones else 0.0
+    needed = (minimum - DOB_WEIGHT * dob - PHONE_WEIGHT * phone) / NAME_WEIGHT
+    if needed > 1.0:
+        return round(DOB_WEIGHT * dob + PHONE_WEIGHT * phone, 4), []
+    name = float(bool(a.kanji) and a.kanji == b.kanji) or \
+        max(_similarity(a.kana, b.kana, needed), _similarity(a.roman, b.roman, needed))
+
+    reasons = []
+    if name >= 0.8:
+        reasons.append("name" if name == 1.0 else "similar_name")
+    if dob:
+        reasons.append("date_of_birth" if dob == 1.0 else "similar_date_of_birth")
+    if phone:
+        reasons.append("phone")
+    return round(NAME_WEIGHT * name + DOB_WEIGHT * dob + PHONE_WEIGHT * phone, 4), reasons
+
+
+@dataclass
+class DuplicatePair:
+    a: DedupRecord
+    b: DedupRecord
+    score: float
+    reasons: List[str]
+
+
+@dataclass
+class DedupReport:
+    candidates: int = 0
+    blocks: int = 0
+    comparisons: int = 0
+    skipped_blocks: int = 0
+    pairs: List[DuplicatePair] = field(default_factory=list)
+    clusters: List[List[int]] = field(default_factory=list)  # record ids, each cluster sorted
+
+    def summary(self) -> Dict:
+        return {
+            "candidates": self.candidates,
+            "blocks": self.blocks,
+            "comparisons": self.comparisons,
+            "skipped_blocks": self.skipped_blocks,
+            "pairs": len(self.pairs),
+            "clusters": len(self.clusters),
+        }
+
+
+def _clusters(pairs: Iterable[DuplicatePair]) -> List[List[int]]:
+    """Connected components of the duplicate graph (union-find)"""
+    parent: Dict[int, int] = {}
+
+    def find(node: int) -> int:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for pair in pairs:
+        parent[find(pair.a.id)] = find(pair.b.id)
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for node in parent:
+        groups[find(node)].append(node)
+    return sorted(sorted(group) for group in groups.values())
+
+
+class DedupService:
+    """On-create duplicate lookup and the batch duplicate report"""
+
+    def __init__(self, threshold: Optional[float] = None, max_block_size: Optional[int] = None):
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.max_block_size = settings.DEDUP_MAX_BLOCK_SIZE if max_block_size is None else max_block_size
+
+    def find_duplicates(self, db: Session, record: DedupRecord, limit: int = 5) -> List[DuplicatePair]:
+        """Existing candidates likely to be ``record`` (same birth date or phone), best first"""
+        conditions = []
+        if record.dob:
+            conditions.append(Candidate.date_of_birth == record.dob)
+        for phone in record.phones:
+            variants = phone_variants(phone)
+            conditions.extend((Candidate.phone.in_(variants), Candidate.mobile.in_(variants)))
+        if not conditions:
+            return []
+
+        query = db.query(*_COLUMNS).filter(or_(*conditions))
+        if record.id is not None:
+            query = query.filter(Candidate.id != record.id)
+        matches = []
+        for row in query.limit(self.max_block_size):
+            other = DedupRecord.from_row(row)
+            score, reasons = score_pair(record, other, self.threshold)
+            if score >= self.threshold:
+                matches.append(DuplicatePair(record, other, score, reasons))
+        matches.sort(key=lambda pair: (-pair.score, pair.b.id))
+        return matches[:limit]
+
+    def build_report(self, records: Iterable[DedupRecord]) -> DedupReport:
+        """Compare every pair of records sharing a blocking key"""
+        report = DedupReport()
+        records = list(records)
+        report.candidates = len(records)
+
+        blocks: Dict[tuple, List[int]] = defaultdict(list)
+        for index, record in enumerate(records):
+            for key in blocking_keys(record):
+                blocks[key].append(index)
+
+        compared = set()
+        for key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            if len(members) > self.max_block_size:
+                report.skipped_blocks += 1
+                logger.warning(f"Duplicate check skipped block {key[0]} with {len(members)} candidates")
+                continue
+            report.blocks += 1
+            for i, j in combinations(members, 2):
+                if (i, j) in compared:
+                    continue
+                compared.add((i, j))
+                score, reasons = score_pair(records[i], records[j], self.threshold)
+                if score >= self.threshold:
+                    report.pairs.append(DuplicatePair(records[i], records[j], score, reasons))
+        report.comparisons = len(compared)
+        report.pairs.sort(key=lambda pair: (-pair.score, pair.a.id, pair.b.id))
+        report.clusters = _clusters(report.pairs)
+        return report
+
+    def scan(self, db: Session) -> DedupReport:
+        """Batch report over every candidate (streamed from the database)"""
+        rows = db.query(*_COLUMNS).order_by(Candidate.id).yield_per(5000)
+        return self.build_report(DedupRecord.from_row(row) for row in rows)
+
+    def write_report(self, report: DedupReport, directory: Optional[str] = None) -> Path:
+        """CSV with one line per duplicate pair (cluster = first candidate id of its group)"""
+        path = Path(directory or Path(settings.REPORTS_DIR) / "duplicates")
+        path.mkdir(parents=True, exist_ok=True)
+        path = path / f"candidate_duplicates_{datetime.now():%Y%m%d}.csv"
+        cluster_of = {candidate_id: cluster[0] for cluster in report.clusters for candidate_id in cluster}
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["cluster", "score", "reasons", "id_a", "rirekisho_id_a", "name_a",
+                             "id_b", "rirekisho_id_b", "name_b"])
+            for pair in report.pairs:
+                writer.writerow([cluster_of[pair.a.id], pair.score, " ".join(pair.reasons),
+                                 pair.a.id, pair.a.rirekisho_id, pair.a.name,
+                                 pair.b.id, pair.b.rirekisho_id, pair.b.name])
+        return path
+
+
+# Global instance
+dedup_service = DedupService()
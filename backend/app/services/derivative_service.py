@@ -0,0 +1,164 @@
+"""
+Derivative Service for UNS-ClaudeJP 2.0
+WebP thumbnails and previews of uploaded photos and scans
+
+Image uploads are rendered on a thread pool of THUMBNAIL_WORKERS right
+after they are stored (Pillow releases the GIL while resizing and
+encoding). Derivatives live next to the blob store, keyed by the source
+blob hash: ``UPLOAD_DIR/derivatives/v1/<size>/ab/<sha256>.webp``. They
+never change for a given source, so they are served with a strong ETag and
+a one-year immutable Cache-Control; bump DERIVATIVE_VERSION when SIZES or
+the encoding change (new paths and ETags).
+
+Missing derivatives (uploads from before this service, a crashed worker)
+are rendered on first request; concurrent requests share one render.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.services.blob_store import SHA256_NAME, StoredBlob, blob_store
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_VERSION = 1
+SIZES: Dict[str, int] = {"thumb": 160, "medium": 800}  # longest side, px
+IMAGE_MIME_TYPES = frozenset({"image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp", "image/tiff"})
+
+
+def file_url(sha256: str) -> str:
+    """URL of a stored file (see app.api.files); add ``?size=thumb`` for a derivative"""
+    return f"/api/files/{sha256}"
+
+
+def pick_size(width: Optional[int]) -> str:
+    """Smallest derivative at least ``width`` px wide (``original`` beyond the largest)"""
+    if width is None:
+        return "medium"
+    for name, pixels in sorted(SIZES.items(), key=lambda item: item[1]):
+        if width <= pixels:
+            return name
+    return "original"
+
+
+class DerivativeService:
+    """Renders and locates WebP derivatives of image blobs"""
+
+    def __init__(self, root: Optional[str] = None, workers: Optional[int] = None, quality: Optional[int] = None):
+        self.root = Path(root or Path(settings.UPLOAD_DIR) / "derivatives")
+        self.workers = max(1, settings.THUMBNAIL_WORKERS if workers is None else workers)
+        self.quality = settings.THUMBNAIL_QUALITY if quality is None else quality
+        self.blob_store = blob_store
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, sha256: str, size: str) -> Path:
+        return self.root / f"v{DERIVATIVE_VERSION}" / size / sha256[:2] / f"{sha256}.webp"
+
+    def etag(self, sha256: str, size: str) -> str:
+        return f'"{sha256}-{size}-v{DERIVATIVE_VERSION}"'
+
+    # Rendering -------------------------------------------------------------
+    def render(self, source: str, sha256: str) -> Dict[str, Path]:
+        """
+        Write every size of ``source`` (sync; runs on the pool)
+
+        Raises:
+            UnidentifiedImageError: when the source is not an image Pillow reads
+        """
+        paths = {}
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            for size, pixels in sorted(SIZES.items(), key=lambda item: -item[1]):
+                image.thumbnail((pixels, pixels), Image.LANCZOS)  # largest first, each from the previous
+                path = self.path_for(sha256, size)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handle, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                try:
+                    with os.fdopen(handle, "wb") as target:
+                        image.save(target, "WEBP", quality=self.quality, method=4)
+                    os.replace(temp_path, path)
+                finally:
+                    Path(temp_path).unlink(missing_ok=True)
+                paths[size] = path
+        return paths
+
+    def schedule(self, blob: StoredBlob, mime_type: Optional[str]) -> Optional[Future]:
+        """Render derivatives of a freshly stored image in the background"""
+        if (mime_type or "").lower() not in IMAGE_MIME_TYPES:
+            return None
+        if all(self.path_for(blob.sha256, size).exists() for size in SIZES):
+            return None
+        return self._submit(blob.path, blob.sha256)
+
+    async def get(self, sha256: str, size: str) -> Path:
+        """
+        Path of a derivative, rendering it first when missing
+
+        Raises:
+            FileNotFoundError: unknown blob
+            UnidentifiedImageError: the blob is not an image
+        """
+        path = self.path_for(sha256, size)
+        if path.exists():
+            return path
+        source = self.blob_store.path_for(sha256)
+        if not source.exists():
+            raise FileNotFoundError(sha256)
+        await asyncio.wrap_future(self._submit(str(source), sha256))
+        return path
+
+    def _submit(self, source: str, sha256: str) -> Future:
+        with self._lock:
+            future = self._inflight.get(sha256)
+            if future is not None:
+                return future
+            future = self._inflight[sha256] = self._get_executor().submit(self.render, source, sha256)
+        future.add_done_callback(lambda done: self._finished(sha256, done))
+        return future
+
+    def _finished(self, sha256: str, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(sha256, None)
+        error = future.exception() if not future.cancelled() else None
+        if isinstance(error, UnidentifiedImageError):
+            logger.info(f"No derivatives for {sha256}: not an image")
+        elif error is not None:
+            logger.warning(f"Derivative rendering failed for {sha256}: {error}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="derivatives")
+        return self._executor
+
+    # Maintenance -----------------------------------------------------------
+    def collect_orphans(self, dry_run: bool = False) -> int:
+        """Remove derivatives whose source blob is gone or of an older version (run after blob GC)"""
+        removed = 0
+        for path in self.root.glob("v*/*/*/*.webp"):
+            sha256 = path.stem
+            stale = path.parents[2].name != f"v{DERIVATIVE_VERSION}"
+            if stale or (SHA256_NAME.match(sha256) and not self.blob_store.path_for(sha256).exists()):
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+derivative_service = DerivativeService()
@@ -0,0 +1,402 @@
+"""
+Employee Import Service for UNS-ClaudeJP 2.0
+Streaming Excel import of the employee master with batched upserts
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.exceptions import ImportExportError
+from app.core.logging import log_performance_metric
+from app.models.models import Apartment, Employee, Factory
+from app.services.id_allocator import id_allocator
+from app.services.job_service import job_registry
+from app.utils.excel import blank_mask, to_bool, to_date, to_int, to_text
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+# Excel header -> Employee column
+TEXT_COLUMNS = {
+    '派遣先ID': 'hakensaki_shain_id',
+    '氏名': 'full_name_kanji',
+    'カナ': 'full_name_kana',
+    '性別': 'gender',
+    '国籍': 'nationality',
+    'ビザ種類': 'visa_type',
+    '〒': 'postal_code',
+    '住所': 'address',
+    '備考': 'notes',
+    '免許種類': 'license_type',
+    '通勤方法': 'commute_method',
+    '日本語検定': 'japanese_level',
+}
+INT_COLUMNS = {
+    '時給': 'jikyu',
+    '請求単価': 'hourly_rate_charged',
+    '差額利益': 'profit_difference',
+    '標準報酬': 'standard_compensation',
+    '健康保険': 'health_insurance',
+    '介護保険': 'nursing_insurance',
+    '厚生年金': 'pension_insurance',
+    'ｱﾊﾟｰﾄ': 'apartment_id',
+}
+DATE_COLUMNS = {
+    '生年月日': 'date_of_birth',
+    'ビザ期限': 'zairyu_expire_date',
+    '入居': 'apartment_start_date',
+    '入社日': 'hire_date',
+    '退社日': 'termination_date',
+    '退去': 'apartment_move_out_date',
+    '社保加入': 'social_insurance_date',
+    '入社依頼': 'entry_request_date',
+    '免許期限': 'license_expire_date',
+    '任意保険期限': 'optional_insurance_expire',
+}
+BOOL_COLUMNS = {
+    'キャリアアップ5年目': 'career_up_5years',
+}
+ID_COLUMN = '社員№'
+FACTORY_COLUMN = '派遣先'
+STATUS_COLUMN = '現在'
+KNOWN_HEADERS = (
+    set(TEXT_COLUMNS) | set(INT_COLUMNS) | set(DATE_COLUMNS) | set(BOOL_COLUMNS)
+    | {ID_COLUMN, FACTORY_COLUMN, STATUS_COLUMN}
+)
+
+INACTIVE_VALUES = ['退社', '退職', '×']
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an employee import"""
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+    def as_response(self) -> Dict:
+        """Shape returned by POST /api/employees/import-excel"""
+        return {
+            "success": True,
+            "created": self.created,
+            "updated": self.updated,
+            "errors": [f"Row {error['row']}: {error['error']}" for error in self.errors],
+            "total_processed": self.created + self.updated,
+        }
+
+
+class FactoryNameIndex:
+    """In-memory factory lookup replacing a per-row ILIKE query"""
+
+    def __init__(self, factories: Iterable[Tuple[str, str]]):
+        self._factories = [(factory_id, (name or '').lower()) for factory_id, name in factories]
+        self._exact = {}
+        for factory_id, name in self._factories:
+            self._exact.setdefault(name, factory_id)
+        self._memo: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_db(cls, db: Session) -> "FactoryNameIndex":
+        return cls(db.query(Factory.factory_id, Factory.name).order_by(Factory.factory_id).all())
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """factory_id whose name contains ``name`` (case-insensitive)"""
+        if not name:
+            return None
+        key = name.lower()
+        if key not in self._memo:
+            factory_id = self._exact.get(key)
+            if factory_id is None:
+                factory_id = next((fid for fid, fname in self._factories if key in fname), None)
+            self._memo[key] = factory_id
+        return self._memo[key]
+
+
+class EmployeeImportService:
+    """Streams employee rows out of Excel and upserts them in batches"""
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+
+    # Reading ---------------------------------------------------------------
+    def iter_batches(
+        self,
+        source: Union[str, BinaryIO],
+        filename: str,
+        sheet_name: Optional[str] = None
+    ) -> Iterator[Tuple[List[int], pd.DataFrame]]:
+        """
+        Yield (excel row numbers, DataFrame) batches without loading the whole sheet
+
+        .xlsx/.xlsm files are read with openpyxl in read-only mode; legacy .xls
+        files fall back to pandas (xlrd) and are chunked after reading.
+        """
+        if filename.lower().endswith('.xls'):
+            yield from self._iter_xls(source, sheet_name)
+            return
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            worksheet = self._pick_sheet(workbook, sheet_name)
+            rows = worksheet.iter_rows(values_only=True)
+            headers = self._unique_headers(next(rows, ()))
+            width = len(headers)
+
+            row_numbers: List[int] = []
+            values: List[tuple] = []
+            for row_number, row in enumerate(rows, start=2):
+                if row is None or all(cell is None for cell in row):
+                    continue
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                row_numbers.append(row_number)
+                values.append(row)
+                if len(values) >= self.batch_size:
+                    yield row_numbers, pd.DataFrame(values, columns=headers, dtype=object)
+                    row_numbers, values = [], []
+            if values:
+                yield row_numbers, pd.DataFrame(values, columns=headers, dtype=object)
+        finally:
+            workbook.close()
+
+    def count_rows(self, source: Union[str, BinaryIO], filename: str, sheet_name: Optional[str] = None) -> Optional[int]:
+        """Row count from the sheet dimensions (None when unknown)"""
+        if filename.lower().endswith('.xls'):
+            return None
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            max_row = self._pick_sheet(workbook, sheet_name).max_row
+            return max(max_row - 1, 0) if max_row else None
+        finally:
+            workbook.close()
+
+    def _iter_xls(self, source, sheet_name: Optional[str]) -> Iterator[Tuple[List[int], pd.DataFrame]]:
+        frame = pd.read_excel(source, sheet_name=sheet_name or 0, dtype=object)
+        frame.columns = self._unique_headers(frame.columns)
+        for start in range(0, len(frame), self.batch_size):
+            chunk = frame.iloc[start:start + self.batch_size]
+            yield [int(index) + 2 for index in chunk.index], chunk.reset_index(drop=True)
+
+    @staticmethod
+    def _pick_sheet(workbook, sheet_name: Optional[str]):
+        """Requested sheet, otherwise the one whose header best matches employee columns"""
+        if sheet_name:
+            if sheet_name not in workbook.sheetnames:
+                raise ImportExportError(f"Sheet '{sheet_name}' not found", {"sheets": workbook.sheetnames})
+            return workbook[sheet_name]
+
+        best, best_score = workbook.worksheets[0], 0
+        for worksheet in workbook.worksheets:
+            header = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            score = len(KNOWN_HEADERS.intersection(str(cell).strip() for cell in header if cell is not None))
+            if score > best_score:
+                best, best_score = worksheet, score
+        return best
+
+    @staticmethod
+    def _unique_headers(header: Iterable) -> List[str]:
+        """Strip header names and suffix duplicates the way pandas does (名前, 名前.1)"""
+        seen: Dict[str, int] = {}
+        headers = []
+        for position, cell in enumerate(header):
+            name = str(cell).strip() if cell is not None else f"Unnamed: {position}"
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            headers.append(name)
+        return headers
+
+    def normalise(
+        self,
+        frame: pd.DataFrame,
+        row_numbers: List[int],
+        factories: FactoryNameIndex,
+        apartment_ids: set
+    ) -> Tuple[pd.DataFrame, List[Dict]]:
+        """
+        Convert one raw batch into Employee column values
+
+        Returns:
+            (DataFrame indexed like the batch with an ``excel_row`` column, row errors)
+        """
+        empty = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+        column = lambda name: frame[name] if name in frame.columns else empty  # noqa: E731
+
+        out = pd.DataFrame(index=frame.index)
+        out['excel_row'] = row_numbers
+
+        raw_ids = column(ID_COLUMN)
+        out['hakenmoto_id'] = to_int(raw_ids)
+        invalid_ids = out['hakenmoto_id'].isna() & ~blank_mask(raw_ids)
+
+        out['factory_id'] = to_text(column(FACTORY_COLUMN)).map(factories.resolve)
+        for header, name in TEXT_COLUMNS.items():
+            out[name] = to_text(column(header))
+        for header, name in INT_COLUMNS.items():
+            out[name] = to_int(column(header))
+        for header, name in DATE_COLUMNS.items():
+            out[name] = to_date(column(header))
+        for header, name in BOOL_COLUMNS.items():
+            out[name] = to_bool(column(header))
+
+        out['jikyu'] = out['jikyu'].where(out['jikyu'].notna(), 0)
+        out['apartment_id'] = out['apartment_id'].where(out['apartment_id'].isin(apartment_ids), None)
+        out['is_active'] = ~column(STATUS_COLUMN).astype(str).str.strip().isin(INACTIVE_VALUES)
+
+        errors = [
+            {"row": int(row), "error": f"Invalid {ID_COLUMN} value: {raw}"}
+            for row, raw in zip(out.loc[invalid_ids, 'excel_row'], raw_ids[invalid_ids])
+        ]
+        return out[~invalid_ids], errors
+
+    # Writing ---------------------------------------------------------------
+    def import_file(
+        self,
+        db: Session,
+        source: Union[str, BinaryIO],
+        filename: str,
+        sheet_name: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> ImportResult:
+        """
+        Import an employee master workbook
+
+        Rows are upserted on hakenmoto_id in batches of ``batch_size``, each
+        batch in its own transaction. Existing employees only get the columns
+        that have a value in the file. Progress is reported to ``job_id``.
+        """
+        started = time.perf_counter()
+        result = ImportResult()
+        factories = FactoryNameIndex.from_db(db)
+        apartment_ids = {row[0] for row in db.query(Apartment.id).all()}
+
+        for row_numbers, frame in self.iter_batches(source, filename, sheet_name):
+            batch, errors = self.normalise(frame, row_numbers, factories, apartment_ids)
+
+            # Rows without 派遣元ID get a block from the sequence, above the ids in the file
+            missing = batch['hakenmoto_id'].isna()
+            known = batch.loc[~missing, 'hakenmoto_id']
+            if len(known):
+                id_allocator.advance_past(db, "hakenmoto_id", int(known.max()))
+            if missing.any():
+                batch.loc[missing, 'hakenmoto_id'] = id_allocator.reserve(db, "hakenmoto_id", int(missing.sum()))
+
+            created, updated, batch_errors, failed = self._upsert(db, batch)
+            failed += len(errors)
+            errors.extend(batch_errors)
+
+            result.created += created
+            result.updated += updated
+            result.failed += failed
+            result.errors.extend(errors)
+            if job_id:
+                job_registry.advance(job_id, processed=len(frame), created=created, updated=updated)
+                if errors:
+                    job_registry.add_errors(job_id, errors, failed=failed)
+
+        elapsed = time.perf_counter() - started
+        log_performance_metric(
+            "employee_import_seconds", elapsed,
+            created=result.created, updated=result.updated, failed=result.failed
+        )
+        logger.info(
+            f"Employee import: {result.created} created, {result.updated} updated, "
+            f"{result.failed} failed in {elapsed:.2f}s"
+        )
+        return result
+
+    def _upsert(self, db: Session, batch: pd.DataFrame) -> Tuple[int, int, List[Dict], int]:
+        """Upsert one batch; returns (created, updated, errors, failed rows)"""
+        if batch.empty:
+            return 0, 0, [], 0
+
+        records: Dict[int, Dict] = {}
+        for record in batch.to_dict('records'):
+            key = int(record['hakenmoto_id'])
+            record['hakenmoto_id'] = key
+            if key in records:  # later rows win, like sequential updates did
+                record = {**records[key], **{k: v for k, v in record.items() if v is not None}}
+            records[key] = record
+
+        first_row, last_row = int(batch['excel_row'].min()), int(batch['excel_row'].max())
+        try:
+            existing = dict(
+                db.query(Employee.hakenmoto_id, Employee.id)
+                .filter(Employee.hakenmoto_id.in_(list(records)))
+                .all()
+            )
+            errors = []
+            for key in [key for key, record in records.items() if key not in existing and not record['full_name_kanji']]:
+                errors.append({"row": records.pop(key)['excel_row'], "error": "氏名 is required for new employees"})
+
+            rows = [{k: v for k, v in record.items() if k != 'excel_row'} for record in records.values()]
+            if rows:
+                if db.get_bind().dialect.name == 'postgresql':
+                    self._upsert_postgresql(db, rows)
+                else:
+                    self._upsert_generic(db, rows, existing)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Employee import batch {first_row}-{last_row} failed: {e}")
+            return 0, 0, [{"row": first_row, "error": f"Rows {first_row}-{last_row} not imported: {e}"}], len(batch)
+
+        updated = sum(1 for key in records if key in existing)
+        return len(records) - updated, updated, errors, len(errors)
+
+    @staticmethod
+    def _upsert_postgresql(db: Session, rows: List[Dict]) -> None:
+        table = Employee.__table__
+        stmt = pg_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.hakenmoto_id],
+            set_={
+                name: func.coalesce(stmt.excluded[name], table.c[name])
+                for name in rows[0] if name != 'hakenmoto_id'
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def _upsert_generic(db: Session, rows: List[Dict], existing: Dict[int, int]) -> None:
+        new_rows = [row for row in rows if row['hakenmoto_id'] not in existing]
+        updates = [
+            {'id': existing[row['hakenmoto_id']], **{k: v for k, v in row.items() if v is not None and k != 'hakenmoto_id'}}
+            for row in rows if row['hakenmoto_id'] in existing
+        ]
+        if new_rows:
+            db.bulk_insert_mappings(Employee, new_rows)
+        if updates:
+            db.bulk_update_mappings(Employee, updates)
+
+    # Background jobs -------------------------------------------------------
+    def run_job(self, job_id: str, path: str, filename: str, sheet_name: Optional[str] = None) -> None:
+        """Run an import stored at ``path`` as a background job, then delete the file"""
+        db = SessionLocal()
+        try:
+            job_registry.update(job_id, total=self.count_rows(path, filename, sheet_name))
+            result = self.import_file(db, path, filename, sheet_name, job_id=job_id)
+            job_registry.complete(job_id, result.as_response())
+        except Exception as e:
+            logger.error(f"Employee import job {job_id} failed: {e}")
+            job_registry.fail(job_id, str(e))
+        finally:
+            db.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# Global instance
+employee_import_service = EmployeeImportService()
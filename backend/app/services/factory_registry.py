@@ -0,0 +1,440 @@
+"""
+Factory Registry for UNS-ClaudeJP 2.0
+Compiles factory configurations into typed payroll rules, kept in memory
+
+Sources, in order of precedence:
+- ``factories.config`` (JSON column), versioned by updated_at/created_at
+- ``config/factories/*.json`` files, versioned by mtime
+
+Both are checked for changes at most every FACTORY_REGISTRY_RELOAD_SECONDS
+with one narrow query and a directory scan; only changed factories are
+recompiled. Lookups in between are a dict access.
+
+Besides payroll rules each factory gets JobRequirements (skills, JLPT,
+commute) for candidate matching, read from ``job.requirements`` or
+guessed from the ``job.description`` text.
+"""
+import json
+import logging
+import re
+import threading
+import unicodedata
+import time as _time
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models.models import CandidateSkillCode, Factory
+
+logger = logging.getLogger(__name__)
+
+FULL_MONTH_WORK_DAYS = 20
+
+PREFECTURES = (
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県", "茨城県", "栃木県", "群馬県",
+    "埼玉県", "千葉県", "東京都", "神奈川県", "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県",
+    "岐阜県", "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県",
+    "鳥取県", "島根県", "岡山県", "広島県", "山口県", "徳島県", "香川県", "愛媛県", "高知県", "福岡県",
+    "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+)
+_PREFECTURE = re.compile("|".join(PREFECTURES))
+_JLPT_LEVEL = re.compile(r"N\s*([1-5])")
+
+# job.description keyword (NFKC) -> skill it suggests; first match per skill wins
+DESCRIPTION_SKILLS = (
+    ("NC旋盤", CandidateSkillCode.NC_LATHE),
+    ("NC施盤", CandidateSkillCode.NC_LATHE),
+    ("NCプログラム", CandidateSkillCode.NC_LATHE),
+    ("マシニング", CandidateSkillCode.NC_LATHE),
+    ("旋盤", CandidateSkillCode.LATHE),
+    ("施盤", CandidateSkillCode.LATHE),
+    ("旋削", CandidateSkillCode.LATHE),
+    ("施削", CandidateSkillCode.LATHE),
+    ("プレス", CandidateSkillCode.PRESS),
+    ("フォークリフト", CandidateSkillCode.FORKLIFT),
+    ("梱包", CandidateSkillCode.PACKING),
+    ("ガス溶接", CandidateSkillCode.GAS_WELDING),
+    ("溶接", CandidateSkillCode.WELDING),
+    ("自動車部品", CandidateSkillCode.CAR_LINE),
+    ("電子部品", CandidateSkillCode.ELECTRONIC_INSPECTION),
+    ("ウエハ", CandidateSkillCode.ELECTRONIC_INSPECTION),
+    ("抜き取り検査", CandidateSkillCode.CAR_INSPECTION),
+    ("食品", CandidateSkillCode.FOOD_PROCESSING),
+    ("鋳造", CandidateSkillCode.CASTING),
+    ("リーダー", CandidateSkillCode.LINE_LEADER),
+    ("塗装", CandidateSkillCode.PAINTING),
+    ("玉掛", CandidateSkillCode.TAMA_KAKE),
+)
+
+
+def prefecture_of(address: Optional[str]) -> Optional[str]:
+    """First prefecture named in an address (都道府県), if any"""
+    if not address:
+        return None
+    match = _PREFECTURE.search(unicodedata.normalize("NFKC", address))
+    return match.group(0) if match else None
+
+
+def jlpt_level(value: Optional[str]) -> Optional[int]:
+    """'N2', 'Ｎ２合格', 'n 3' -> 2, 2, 3"""
+    if not value:
+        return None
+    match = _JLPT_LEVEL.search(unicodedata.normalize("NFKC", str(value)).upper())
+    return int(match.group(1)) if match else None
+
+
+@dataclass(frozen=True, slots=True)
+class ShiftRule:
+    """One shift of a factory (working_hours.shifts[])"""
+    shift_id: str
+    name: str
+    start: Optional[time]
+    end: Optional[time]
+    break_minutes: int
+    jikyu_tanka: Optional[float]
+    night_premium: bool = False
+    night_start: Optional[time] = None
+    night_end: Optional[time] = None
+
+
+@dataclass(frozen=True, slots=True)
+class BonusRule:
+    """Enabled bonus or allowance; per-day amounts are multiplied by work days"""
+    kind: str
+    amount: int
+    per_day: bool = False
+    min_work_days: Optional[int] = None
+
+    def amount_for(self, work_days: int) -> int:
+        if self.min_work_days is not None and work_days < self.min_work_days:
+            return 0
+        return self.amount * work_days if self.per_day else self.amount
+
+
+@dataclass(frozen=True, slots=True)
+class JobRequirements:
+    """What an opening asks of a candidate; masks use CandidateSkillCode.bit"""
+    skills_mask: int = 0  # preferred: scored by coverage
+    required_mask: int = 0  # must have all
+    max_jlpt_level: Optional[int] = None  # N-level or better (N1 = 1)
+    max_commute_minutes: Optional[int] = None
+    prefecture: Optional[str] = None  # of the plant, from its address
+    inferred: bool = False  # skills guessed from job.description
+
+
+@dataclass(frozen=True, slots=True)
+class FactoryRules:
+    """Compiled payroll rules of one factory"""
+    factory_id: str
+    name: str
+    shifts: Tuple[ShiftRule, ...] = ()
+    billing_rate: Optional[float] = None  # 時給単価 charged to the factory
+    overtime_rate: float = settings.OVERTIME_RATE_25
+    night_rate: float = settings.NIGHT_SHIFT_PREMIUM
+    holiday_rate: float = settings.HOLIDAY_WORK_PREMIUM
+    gasoline_allowance: Optional[BonusRule] = None
+    attendance_bonus: Optional[BonusRule] = None
+    source: str = "default"
+    requirements: JobRequirements = JobRequirements()
+    shifts_by_id: Dict[str, ShiftRule] = field(default_factory=dict, compare=False, repr=False)
+
+    def shift(self, shift_id: str) -> Optional[ShiftRule]:
+        return self.shifts_by_id.get(shift_id)
+
+    def bonuses(self, work_days: int) -> Tuple[int, int]:
+        """(attendance bonus, gasoline allowance) for a month with ``work_days``"""
+        bonus = self.attendance_bonus.amount_for(work_days) if self.attendance_bonus else 0
+        gasoline = self.gasoline_allowance.amount_for(work_days) if self.gasoline_allowance else 0
+        return bonus, gasoline
+
+
+def _parse_time(value, label: str) -> Optional[time]:
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.strptime(str(value), "%H:%M").time()
+    except ValueError:
+        raise ValidationError(f"{label} must be HH:MM", {"value": value})
+
+
+def _number(value, label: str, default=None):
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{label} must be a number", {"value": value})
+
+
+def _skills_mask(values, label: str) -> int:
+    if not isinstance(values, list):
+        raise ValidationError(f"{label} must be a list of skill codes", {"value": values})
+    mask = 0
+    for value in values:
+        try:
+            mask |= CandidateSkillCode(value).bit
+        except ValueError:
+            raise ValidationError(f"{label} has an unknown skill", {"value": value})
+    return mask
+
+
+def compile_requirements(config: Dict) -> JobRequirements:
+    """
+    JobRequirements from ``job.requirements``::
+
+        {"skills": ["lathe"], "required_skills": ["forklift_license"],
+         "jlpt": "N3", "max_commute_minutes": 60}
+
+    Without ``skills`` the preferred skills are guessed from job.description.
+    """
+    job = config.get("job") or {}
+    requirements = job.get("requirements") or {}
+    if not isinstance(requirements, dict):
+        raise ValidationError("job.requirements must be an object", {"value": requirements})
+
+    inferred = "skills" not in requirements
+    if inferred:
+        text = unicodedata.normalize("NFKC", f"{job.get('description') or ''} {job.get('description2') or ''}")
+        skills_mask = 0
+        for keyword, code in DESCRIPTION_SKILLS:
+            if keyword in text:
+                skills_mask |= code.bit
+    else:
+        skills_mask = _skills_mask(requirements["skills"], "job.requirements.skills")
+    required_mask = _skills_mask(requirements.get("required_skills") or [], "job.requirements.required_skills")
+
+    level = requirements.get("jlpt")
+    max_jlpt_level = jlpt_level(level)
+    if level and max_jlpt_level is None:
+        raise ValidationError("job.requirements.jlpt must be N1-N5", {"value": level})
+    max_commute = _number(requirements.get("max_commute_minutes"), "job.requirements.max_commute_minutes")
+
+    plant = config.get("plant") or {}
+    company = config.get("client_company") or {}
+    address = (plant.get("address") if isinstance(plant, dict) else None) or \
+        (company.get("address") if isinstance(company, dict) else None)
+
+    return JobRequirements(
+        skills_mask=skills_mask | required_mask,
+        required_mask=required_mask,
+        max_jlpt_level=max_jlpt_level,
+        max_commute_minutes=int(max_commute) if max_commute is not None else None,
+        prefecture=prefecture_of(address),
+        inferred=inferred,
+    )
+
+
+def compile_rules(factory_id: str, config: Optional[Dict], name: str = "", source: str = "default") -> FactoryRules:
+    """
+    Validate a factory config and compile it into FactoryRules
+
+    Understands both layouts found in config/factories: the detailed one
+    (working_hours.shifts, overtime_rules, bonuses) and the contract one
+    (job.hourly_rate, schedule, payment).
+
+    Raises:
+        ValidationError: when a present field has the wrong type or format
+    """
+    config = config or {}
+    if not isinstance(config, dict):
+        raise ValidationError("Factory config must be a JSON object", {"factory_id": factory_id})
+
+    shifts = []
+    for position, shift in enumerate((config.get("working_hours") or {}).get("shifts") or []):
+        label = f"working_hours.shifts[{position}]"
+        shifts.append(ShiftRule(
+            shift_id=str(shift.get("shift_id") or position),
+            name=shift.get("shift_name") or "",
+            start=_parse_time(shift.get("start_time"), f"{label}.start_time"),
+            end=_parse_time(shift.get("end_time"), f"{label}.end_time"),
+            break_minutes=int(_number(shift.get("break_minutes"), f"{label}.break_minutes", 0)),
+            jikyu_tanka=_number(shift.get("jikyu_tanka"), f"{label}.jikyu_tanka"),
+            night_premium=bool(shift.get("night_premium")),
+            night_start=_parse_time(shift.get("night_start"), f"{label}.night_start"),
+            night_end=_parse_time(shift.get("night_end"), f"{label}.night_end"),
+        ))
+
+    # The first shift's 時給単価 is the factory default; contract configs carry job.hourly_rate
+    billing_rate = shifts[0].jikyu_tanka if shifts else None
+    if billing_rate is None and not shifts:
+        hourly_rate = _number((config.get("job") or {}).get("hourly_rate"), "job.hourly_rate")
+        billing_rate = hourly_rate if hourly_rate else None
+
+    overtime_rules = config.get("overtime_rules") or {}
+    rate = lambda key, default: _number((overtime_rules.get(key) or {}).get("rate"), f"overtime_rules.{key}.rate", default)  # noqa: E731
+
+    bonuses = config.get("bonuses") or {}
+    gasoline = bonuses.get("gasoline_allowance") or {}
+    attendance = bonuses.get("attendance_bonus") or {}
+    gasoline_rule = None
+    if gasoline.get("enabled"):
+        gasoline_rule = BonusRule(
+            kind="gasoline_allowance",
+            amount=int(_number(gasoline.get("amount_per_day"), "bonuses.gasoline_allowance.amount_per_day", 0)),
+            per_day=True,
+        )
+    attendance_rule = None
+    if attendance.get("enabled") and (attendance.get("conditions") or {}).get("full_month"):
+        attendance_rule = BonusRule(
+            kind="attendance_bonus",
+            amount=int(_number(attendance.get("amount"), "bonuses.attendance_bonus.amount", 0)),
+            min_work_days=FULL_MONTH_WORK_DAYS,
+        )
+
+    if not name:
+        company = config.get("client_company") or {}
+        plant = config.get("plant") or {}
+        parts = [config.get("name"), company.get("name") if isinstance(company, dict) else None,
+                 plant.get("name") if isinstance(plant, dict) else None]
+        name = " - ".join(part.strip() for part in parts if part and part.strip())
+
+    return FactoryRules(
+        factory_id=factory_id,
+        name=name or factory_id,
+        shifts=tuple(shifts),
+        billing_rate=billing_rate,
+        overtime_rate=rate("overtime_25", settings.OVERTIME_RATE_25),
+        night_rate=rate("night_shift", settings.NIGHT_SHIFT_PREMIUM),
+        holiday_rate=rate("overtime_35", settings.HOLIDAY_WORK_PREMIUM),
+        gasoline_allowance=gasoline_rule,
+        attendance_bonus=attendance_rule,
+        source=source,
+        requirements=compile_requirements(config),
+        shifts_by_id={shift.shift_id: shift for shift in shifts},
+    )
+
+
+class FactoryRegistry:
+    """Thread-safe, hot-reloading cache of compiled factory rules"""
+
+    def __init__(self, config_dir: Optional[str] = None, reload_seconds: Optional[float] = None):
+        self.config_dir = Path(config_dir or settings.FACTORY_CONFIG_DIR)
+        self.reload_seconds = settings.FACTORY_REGISTRY_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        self._rules: Dict[str, FactoryRules] = {}
+        self._db_entries: Dict[str, Tuple[Optional[datetime], str, Optional[Dict]]] = {}
+        self._file_entries: Dict[Path, Tuple[int, Optional[str], Optional[Dict]]] = {}
+        self.errors: Dict[str, str] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    # Lookups ---------------------------------------------------------------
+    def get(self, db: Session, factory_id: Optional[str]) -> Optional[FactoryRules]:
+        """Compiled rules for a factory, or None if it is unknown"""
+        self.refresh(db)
+        return self._rules.get(factory_id) if factory_id else None
+
+    def all(self, db: Session) -> Dict[str, FactoryRules]:
+        self.refresh(db)
+        return self._rules
+
+    def invalidate(self, factory_id: Optional[str] = None) -> None:
+        """Force a change check on the next lookup (call after writing factories)"""
+        if factory_id:
+            # updated_at has one-second resolution on some backends; refetch the row regardless
+            self._db_entries.pop(factory_id, None)
+        self._checked_at = float("-inf")
+
+    # Reloading -------------------------------------------------------------
+    def refresh(self, db: Session, force: bool = False) -> List[str]:
+        """Recompile factories whose DB row or file changed; returns their ids"""
+        if not force and _time.monotonic() - self._checked_at < self.reload_seconds:
+            return []
+
+        with self._lock:
+            if not force and _time.monotonic() - self._checked_at < self.reload_seconds:
+                return []
+            changed = self._reload_db(db) | self._reload_files()
+            if changed:
+                rules = dict(self._rules)
+                for factory_id in changed:
+                    self._compile_into(rules, factory_id)
+                self._rules = rules
+                logger.info(f"Factory registry recompiled {len(changed)} factories")
+            self._checked_at = _time.monotonic()
+            return sorted(changed)
+
+    def _reload_db(self, db: Session) -> set:
+        versions = {
+            factory_id: updated_at or created_at
+            for factory_id, updated_at, created_at in db.query(
+                Factory.factory_id, Factory.updated_at, Factory.created_at
+            ).all()
+        }
+        removed = set(self._db_entries) - set(versions)
+        stale = [fid for fid, version in versions.items()
+                 if fid not in self._db_entries or self._db_entries[fid][0] != version]
+
+        for factory_id in removed:
+            del self._db_entries[factory_id]
+        if stale:
+            for factory_id, name, config in db.query(
+                Factory.factory_id, Factory.name, Factory.config
+            ).filter(Factory.factory_id.in_(stale)).all():
+                self._db_entries[factory_id] = (versions[factory_id], name, config)
+        return removed | set(stale)
+
+    def _reload_files(self) -> set:
+        if not self.config_dir.is_dir():
+            return set()
+        current = {
+            path: path.stat().st_mtime_ns
+            for path in self.config_dir.glob("*.json")
+            if "example" not in path.stem
+        }
+        changed = set()
+        for path in set(self._file_entries) - set(current):
+            changed.add(self._file_entries.pop(path)[1])
+        for path, mtime in current.items():
+            entry = self._file_entries.get(path)
+            if entry and entry[0] == mtime:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                factory_id = config.get("factory_id") or path.stem.split("_")[0]
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cannot read factory config {path.name}: {e}")
+                config, factory_id = None, path.stem.split("_")[0]
+            if entry:
+                changed.add(entry[1])
+            self._file_entries[path] = (mtime, factory_id, config)
+            changed.add(factory_id)
+        changed.discard(None)
+        return changed
+
+    def _compile_into(self, rules: Dict[str, FactoryRules], factory_id: str) -> None:
+        db_entry = self._db_entries.get(factory_id)
+        file_config = next(
+            (config for _, fid, config in self._file_entries.values() if fid == factory_id and config), None
+        )
+        if db_entry is None and file_config is None:
+            rules.pop(factory_id, None)
+            self.errors.pop(factory_id, None)
+            return
+
+        name = db_entry[1] if db_entry else ""
+        if db_entry and db_entry[2]:
+            config, source = db_entry[2], "db"
+        elif file_config:
+            config, source = file_config, "file"
+        else:
+            config, source = None, "default"
+
+        try:
+            rules[factory_id] = compile_rules(factory_id, config, name=name, source=source)
+            self.errors.pop(factory_id, None)
+        except (ValidationError, AttributeError, TypeError) as e:
+            # Keep serving the last good rules; a broken edit must not stop payroll
+            message = e.message if isinstance(e, ValidationError) else str(e)
+            self.errors[factory_id] = message
+            logger.error(f"Invalid config for {factory_id} ({source}): {message}")
+            rules.setdefault(factory_id, compile_rules(factory_id, None, name=name))
+
+
+# Global instance
+factory_registry = FactoryRegistry()
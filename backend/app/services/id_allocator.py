@@ -0,0 +1,172 @@
+"""
+ID Allocator for UNS-ClaudeJP 2.0
+Business ids (rirekisho_id, hakenmoto_id) without reading the last row
+
+On PostgreSQL each id has a sequence (migration 007): one ``nextval`` per
+id, or one ``nextval ... FROM generate_series`` round trip for a block of
+ids (Excel imports). Sequences never hand out the same value twice, so
+concurrent inserts do not race. Other databases (SQLite in tests and
+scripts) use a counter row in ``id_sequences``, which stays locked until
+the allocating transaction ends.
+
+Rows written with explicit ids (imports, manual SQL) can still be ahead
+of the sequence: insert() retries such collisions with a fresh id after
+a short jittered backoff, moving the sequence past the highest id in use.
+"""
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import Integer, cast, func, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Candidate, Employee, IdSequence
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class IdSpec:
+    """One allocated id: its sequence and the column it must be unique in"""
+    name: str
+    sequence: str
+    column: object
+    start: int = 1
+    prefix: str = ""
+
+    def format(self, value: int):
+        return f"{self.prefix}{value}" if self.prefix else value
+
+
+SPECS: Dict[str, IdSpec] = {
+    "rirekisho_id": IdSpec("rirekisho_id", "rirekisho_id_seq", Candidate.rirekisho_id,
+                           settings.RIREKISHO_ID_START, settings.RIREKISHO_ID_PREFIX),
+    "hakenmoto_id": IdSpec("hakenmoto_id", "hakenmoto_id_seq", Employee.hakenmoto_id),
+}
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+class IdAllocator:
+    """Allocates rirekisho_id / hakenmoto_id values"""
+
+    def __init__(self, attempts: Optional[int] = None, backoff_seconds: Optional[float] = None):
+        self.attempts = settings.ID_ALLOCATION_ATTEMPTS if attempts is None else attempts
+        self.backoff_seconds = settings.ID_ALLOCATION_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+
+    # Allocation ------------------------------------------------------------
+    def next(self, db: Session, name: str):
+        """One id, formatted (``UNS-1234`` / ``57``)"""
+        return self.reserve(db, name, 1)[0]
+
+    def reserve(self, db: Session, name: str, count: int) -> List:
+        """``count`` ids in one round trip, ascending (not necessarily contiguous on PostgreSQL)"""
+        spec = SPECS[name]
+        if count <= 0:
+            return []
+        if _is_postgres(db):
+            values = db.execute(
+                text("SELECT nextval(CAST(:sequence AS regclass)) FROM generate_series(1, :count)"),
+                {"sequence": spec.sequence, "count": count},
+            ).scalars().all()
+        else:
+            last = self._bump_counter(db, spec, count)
+            values = range(last - count + 1, last + 1)
+        return [spec.format(value) for value in sorted(values)]
+
+    def advance_past(self, db: Session, name: str, value: Optional[int] = None) -> None:
+        """
+        Make sure the next id is above ``value`` (default: the highest id in use)
+
+        Call after writing explicit ids. On PostgreSQL this is not atomic with
+        concurrent nextval() calls; insert() retries cover that window.
+        """
+        spec = SPECS[name]
+        if value is None:
+            value = self._max_used(db, spec)
+        if not value:
+            return
+        if _is_postgres(db):
+            # last_value was not handed out yet while is_called is false
+            # (migration 007 seeds with setval(..., max + 1, false))
+            db.execute(
+                text("SELECT setval(CAST(:sequence AS regclass), :value) "
+                     "WHERE (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END "
+                     "FROM " + spec.sequence + ") < :value"),
+                {"sequence": spec.sequence, "value": value},
+            )
+        else:
+            self._bump_counter(db, spec, 0)
+            db.execute(
+                update(IdSequence).where(IdSequence.name == spec.name, IdSequence.value < value).values(value=value)
+            )
+
+    def insert(self, db: Session, name: str, build: Callable[[object], T], first_id=None) -> T:
+        """
+        Add ``build(new_id)`` and flush it, retrying with a new id when the
+        id already exists (jittered exponential backoff). ``first_id`` is an
+        id reserved beforehand, used for the first attempt.
+
+        Raises:
+            IntegrityError: for other constraint violations, or when every
+                attempt collided
+        """
+        spec = SPECS[name]
+        column = spec.column.key
+        for attempt in range(1, self.attempts + 1):
+            value = first_id if attempt == 1 and first_id is not None else self.next(db, name)
+            instance = build(value)
+            try:
+                with db.begin_nested():
+                    db.add(instance)
+                    db.flush()
+                return instance
+            except IntegrityError as e:
+                if column not in str(e.orig) or attempt == self.attempts:
+                    raise
+                logger.warning(f"{name} collision on attempt {attempt}, retrying: {e.orig}")
+                self.advance_past(db, name)
+                time.sleep(self.backoff_seconds * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        raise AssertionError("unreachable")
+
+    # Internals -------------------------------------------------------------
+    def _max_used(self, db: Session, spec: IdSpec) -> int:
+        if not spec.prefix:
+            return db.query(func.max(spec.column)).scalar() or 0
+        query = db.query(func.max(cast(func.substr(spec.column, len(spec.prefix) + 1), Integer)))
+        if _is_postgres(db):
+            query = query.filter(spec.column.op("~")(f"^{re.escape(spec.prefix)}[0-9]+$"))
+        else:
+            query = query.filter(spec.column.like(f"{spec.prefix}%"))
+        return query.scalar() or 0
+
+    def _bump_counter(self, db: Session, spec: IdSpec, count: int) -> int:
+        """Add ``count`` to the counter row (created from the highest id in use) and return it"""
+        statement = (
+            update(IdSequence).where(IdSequence.name == spec.name)
+            .values(value=IdSequence.value + count).returning(IdSequence.value)
+        )
+        last = db.execute(statement).scalar()
+        if last is not None:
+            return last
+        try:
+            with db.begin_nested():
+                seed = max(self._max_used(db, spec), spec.start - 1)
+                db.add(IdSequence(name=spec.name, value=seed))
+                db.flush()
+        except IntegrityError:
+            pass  # created concurrently
+        return db.execute(statement).scalar()
+
+
+# Global instance
+id_allocator = IdAllocator()
@@ -1,352 +1,523 @@
 """
 Import Service for UNS-ClaudeJP 2.0
 Mass import from Excel with validation
+
+Every import runs as a staged pipeline inside a single transaction:
+1. read and normalize the source in vectorized form (pandas)
+2. bulk insert the rows into a temporary staging table
+3. validate with set-based UPDATEs that write an ``error`` per staging row
+4. merge the valid rows into the live table (UPDATE ... FROM + INSERT ... SELECT)
 """
-import pandas as pd
+import json
 import logging
-from typing import Dict, List
-from datetime import datetime
+import os
+import uuid
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    Column, Date, Integer, MetaData, Numeric, Table, Text, Time,
+    and_, exists, func, insert, literal, select, update
+)
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.models import Employee, Factory, TimerCard
+from app.services.id_allocator import id_allocator
+from app.services.job_service import JobStatus, job_registry
+from app.utils.dates import month_bounds
+from app.utils.excel import blank_mask, to_date, to_int, to_text, to_time
 
 logger = logging.getLogger(__name__)
 
+STAGING_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+VALID_GENDERS = ['男性', '女性', '男', '女']
+
+# Excel header -> Employee column
+EMPLOYEE_TEXT_COLUMNS = {
+    '氏名': 'full_name_kanji',
+    'フリガナ': 'full_name_kana',
+    '性別': 'gender',
+    '国籍': 'nationality',
+    '郵便番号': 'postal_code',
+    '住所': 'address',
+    'メール': 'email',
+    '在留カード番号': 'zairyu_card_number',
+    'ビザ種類': 'visa_type',
+    '緊急連絡先氏名': 'emergency_contact',
+    '緊急連絡先電話': 'emergency_phone',
+}
+EMPLOYEE_DATE_COLUMNS = {
+    '生年月日': 'date_of_birth',
+    'ビザ期限': 'zairyu_expire_date',
+    '運転免許証期限': 'license_expire_date',
+}
+EMPLOYEE_PHONE_COLUMNS = ['携帯電話', '電話番号']
+
 
 class ImportService:
     """Service for mass data import from Excel"""
-    
-    def import_employees_from_excel(self, file_path: str) -> Dict:
+
+    # ------------------------------------------------------------------
+    # Employees
+    # ------------------------------------------------------------------
+    def import_employees_from_excel(self, db: Session, file_path: str, job_id: Optional[str] = None) -> Dict:
         """
         Import employees from Excel file
-        
+
         Expected columns:
         - 派遣元ID, 氏名, フリガナ, 生年月日, 性別, 国籍, 住所, 電話番号, etc.
-        
+
+        Existing employees (same 派遣元ID) only get the columns that have a
+        value in the file; new employees are inserted.
+
         Args:
+            db: Database session
             file_path: Path to Excel file
-            
+            job_id: Optional job to report progress to
+
         Returns:
             Dict with import results
         """
         logger.info(f"Importing employees from {file_path}")
-        
-        results = {
-            "success": [],
-            "errors": [],
-            "warnings": [],
-            "total_rows": 0,
-            "imported": 0,
-            "failed": 0
-        }
-        
-        try:
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            results["total_rows"] = len(df)
-            
-            logger.info(f"Found {len(df)} rows in Excel")
-            
-            # Process each row
-            for i, (_, row) in enumerate(df.iterrows()):
-                try:
-                    # Validate required fields
-                    validation_errors = self._validate_employee_data(row)
-                    
-                    if validation_errors:
-                        results["errors"].append({
-                            "row": i + 2,  # +2 for Excel header
-                            "errors": validation_errors
-                        })
-                        results["failed"] += 1
-                        continue
-                    
-                    # Prepare employee data
-                    employee_data = self._prepare_employee_data(row)
-                    
-                    # TODO: Insert into database
-                    # For now, just validate and log
-                    logger.info(f"Row {i + 2}: {employee_data.get('full_name_kanji')}")
-                    
-                    results["success"].append({
-                        "row": i + 2,
-                        "name": employee_data.get('full_name_kanji'),
-                        "id": employee_data.get('hakenmoto_id')
-                    })
-                    results["imported"] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing row {i + 2}: {e}")
-                    results["errors"].append({
-                        "row": i + 2,
-                        "error": str(e)
-                    })
-                    results["failed"] += 1
-            
-            logger.info(f"Import complete: {results['imported']} succeeded, {results['failed']} failed")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Failed to read Excel file: {e}")
-            return {
-                "success": [],
-                "errors": [{"error": f"Failed to read file: {str(e)}"}],
-                "warnings": [],
-                "total_rows": 0,
-                "imported": 0,
-                "failed": 0
-            }
-    
-    def _validate_employee_data(self, row: pd.Series) -> List[str]:
-        """
-        Validate employee data row
-        
-        Returns:
-            List of validation error messages
-        """
-        errors = []
-        
-        # Required fields
-        required_fields = {
-            '派遣元ID': 'hakenmoto_id',
-            '氏名': 'name',
-            '生年月日': 'birthday'
-        }
-        
-        for excel_col, field_name in required_fields.items():
-            if excel_col not in row or pd.isna(row[excel_col]):
-                errors.append(f"{excel_col} is required")
-        
-        # Validate birthday format
-        if '生年月日' in row and not pd.isna(row['生年月日']):
-            try:
-                if isinstance(row['生年月日'], str):
-                    datetime.strptime(row['生年月日'], '%Y-%m-%d')
-                elif not isinstance(row['生年月日'], datetime):
-                    errors.append("生年月日 must be date format")
-            except ValueError:
-                errors.append("生年月日 must be YYYY-MM-DD format")
-        
-        # Validate gender
-        if '性別' in row and not pd.isna(row['性別']):
-            if row['性別'] not in ['男性', '女性']:
-                errors.append("性別 must be 男性 or 女性")
-        
-        return errors
-    
-    def _prepare_employee_data(self, row: pd.Series) -> Dict:
-        """
-        Prepare employee data from Excel row
-        
-        Returns:
-            Dict with employee data
-        """
-        data = {}
-        
-        # Map Excel columns to database fields
-        column_mapping = {
-            '派遣元ID': 'hakenmoto_id',
-            '氏名': 'full_name_kanji',
-            'フリガナ': 'full_name_kana',
-            'ローマ字': 'full_name_roman',
-            '生年月日': 'date_of_birth',
-            '性別': 'gender',
-            '国籍': 'nationality',
-            '郵便番号': 'postal_code',
-            '住所': 'current_address',
-            '携帯電話': 'mobile_phone',
-            '電話番号': 'home_phone',
-            'メール': 'email',
-            '在留カード番号': 'residence_card_no',
-            'ビザ種類': 'visa_status',
-            'ビザ期限': 'visa_expiry',
-            'パスポート番号': 'passport_no',
-            'パスポート期限': 'passport_expiry',
-            '運転免許証番号': 'drivers_license_no',
-            '運転免許証期限': 'drivers_license_expiry',
-            '緊急連絡先氏名': 'emergency_contact_name',
-            '緊急連絡先続柄': 'emergency_contact_relationship',
-            '緊急連絡先電話': 'emergency_contact_phone'
-        }
-        
-        for excel_col, db_field in column_mapping.items():
-            if excel_col in row and not pd.isna(row[excel_col]):
-                value = row[excel_col]
-                
-                # Convert dates
-                if 'date' in db_field or 'expiry' in db_field or db_field == 'date_of_birth':
-                    if isinstance(value, str):
-                        value = datetime.strptime(value, '%Y-%m-%d').date()
-                    elif isinstance(value, datetime):
-                        value = value.date()
-                
-                data[db_field] = value
-        
-        return data
-    
+        self._stage_progress(job_id, "reading")
+        raw = pd.read_excel(file_path, dtype=object)
+        frame = self._normalise_employees(raw)
+
+        staging = self._staging_table("employees", [
+            Column("hakenmoto_id", Integer),
+            Column("full_name_kanji", Text),
+            Column("full_name_kana", Text),
+            Column("date_of_birth", Date),
+            Column("gender", Text),
+            Column("nationality", Text),
+            Column("postal_code", Text),
+            Column("address", Text),
+            Column("phone", Text),
+            Column("email", Text),
+            Column("zairyu_card_number", Text),
+            Column("visa_type", Text),
+            Column("zairyu_expire_date", Date),
+            Column("license_expire_date", Date),
+            Column("emergency_contact", Text),
+            Column("emergency_phone", Text),
+            Column("jikyu", Integer),
+        ])
+        target = Employee.__table__
+        s = staging.c
+
+        def validate():
+            self._flag(db, staging, s.hakenmoto_id.is_(None), "派遣元ID is required")
+            self._flag(db, staging, s.full_name_kanji.is_(None), "氏名 is required")
+            self._flag(db, staging, s.date_of_birth.is_(None), "生年月日 is required")
+            self._flag(db, staging, and_(s.gender.isnot(None), s.gender.notin_(VALID_GENDERS)),
+                       "性別 must be 男性 or 女性")
+            self._flag_duplicates(db, staging, [s.hakenmoto_id], "Duplicate 派遣元ID in file")
+
+        return self._run_pipeline(
+            db, staging, frame, validate, job_id,
+            target=target,
+            keys=["hakenmoto_id"],
+            insert_defaults={"jikyu": 0, "is_active": True},
+            sequences=["hakenmoto_id"],
+        )
+
+    def _normalise_employees(self, raw: pd.DataFrame) -> pd.DataFrame:
+        raw.columns = [str(column).strip() for column in raw.columns]
+        column = self._column_getter(raw)
+
+        frame = pd.DataFrame(index=raw.index)
+        frame["row_no"] = raw.index + 2  # +2 for Excel header
+        frame["hakenmoto_id"] = to_int(column('派遣元ID'))
+        for header, name in EMPLOYEE_TEXT_COLUMNS.items():
+            frame[name] = to_text(column(header))
+        for header, name in EMPLOYEE_DATE_COLUMNS.items():
+            frame[name] = to_date(column(header))
+        mobile, home = (to_text(column(header)) for header in EMPLOYEE_PHONE_COLUMNS)
+        frame["phone"] = mobile.where(mobile.notna(), home)
+        frame["jikyu"] = to_int(column('時給'))
+
+        frame["parse_error"] = self._parse_errors([
+            (column('派遣元ID'), frame["hakenmoto_id"], "派遣元ID must be a number"),
+            (column('生年月日'), frame["date_of_birth"], "生年月日 must be a date"),
+            (column('ビザ期限'), frame["zairyu_expire_date"], "ビザ期限 must be a date"),
+        ])
+        return frame
+
+    # ------------------------------------------------------------------
+    # Timer cards
+    # ------------------------------------------------------------------
     def import_timer_cards_from_excel(
         self,
+        db: Session,
         file_path: str,
         factory_id: str,
         year: int,
-        month: int
+        month: int,
+        job_id: Optional[str] = None
     ) -> Dict:
         """
         Import timer cards from Excel
-        
+
         Expected columns:
-        - 日付, 社員ID, 社員名, 出勤時刻, 退勤時刻
-        
+        - 日付, 社員ID, 社員名, 出勤時刻, 退勤時刻 (optional 休憩 in minutes)
+
+        社員ID is the employee's 派遣元ID. Hours are calculated like
+        POST /api/timer-cards; a card for the same employee and day is updated.
+
         Args:
+            db: Database session
             file_path: Path to Excel file
             factory_id: Factory ID
             year: Year
             month: Month
-            
+            job_id: Optional job to report progress to
+
         Returns:
             Dict with import results
         """
         logger.info(f"Importing timer cards from {file_path}")
-        
-        results = {
-            "success": [],
-            "errors": [],
-            "total_rows": 0,
-            "imported": 0,
-            "failed": 0
-        }
-        
-        try:
-            df = pd.read_excel(file_path)
-            results["total_rows"] = len(df)
-            
-            for i, (_, row) in enumerate(df.iterrows()):
-                try:
-                    # Validate required fields
-                    required = ['日付', '社員ID', '出勤時刻', '退勤時刻']
-                    missing = [f for f in required if f not in row or pd.isna(row[f])]
-                    
-                    if missing:
-                        results["errors"].append({
-                            "row": i + 2,
-                            "error": f"Missing fields: {', '.join(missing)}"
-                        })
-                        results["failed"] += 1
-                        continue
-                    
-                    # Prepare timer card data
-                    timer_data = {
-                        "factory_id": factory_id,
-                        "employee_id": row['社員ID'],
-                        "work_date": row['日付'] if isinstance(row['日付'], datetime) else datetime.strptime(str(row['日付']), '%Y-%m-%d'),
-                        "clock_in": str(row['出勤時刻']),
-                        "clock_out": str(row['退勤時刻']),
-                        "year": year,
-                        "month": month
-                    }
-                    
-                    # TODO: Insert into database
-                    logger.info(f"Row {i + 2}: Timer card for {timer_data['employee_id']}")
-                    
-                    results["success"].append({
-                        "row": i + 2,
-                        "employee_id": timer_data['employee_id'],
-                        "date": timer_data['work_date']
-                    })
-                    results["imported"] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing row {i + 2}: {e}")
-                    results["errors"].append({
-                        "row": i + 2,
-                        "error": str(e)
-                    })
-                    results["failed"] += 1
-            
-            logger.info(f"Timer cards import: {results['imported']} succeeded, {results['failed']} failed")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Failed to import timer cards: {e}")
-            return {
-                "success": [],
-                "errors": [{"error": str(e)}],
-                "total_rows": 0,
-                "imported": 0,
-                "failed": 0
-            }
-    
-    def import_factory_configs_from_json(self, directory_path: str) -> Dict:
+        self._stage_progress(job_id, "reading")
+        raw = pd.read_excel(file_path, dtype=object)
+        frame = self._normalise_timer_cards(raw, factory_id)
+
+        staging = self._staging_table("timer_cards", [
+            Column("employee_code", Integer),
+            Column("employee_id", Integer),
+            Column("factory_id", Text),
+            Column("work_date", Date),
+            Column("clock_in", Time),
+            Column("clock_out", Time),
+            Column("break_minutes", Integer),
+            Column("regular_hours", Numeric(5, 2)),
+            Column("overtime_hours", Numeric(5, 2)),
+            Column("night_hours", Numeric(5, 2)),
+            Column("holiday_hours", Numeric(5, 2)),
+        ])
+        target = TimerCard.__table__
+        s = staging.c
+        start, end = month_bounds(year, month)
+
+        def validate():
+            self._flag(db, staging, s.work_date.is_(None), "日付 is required")
+            self._flag(db, staging, s.employee_code.is_(None), "社員ID is required")
+            self._flag(db, staging, s.clock_in.is_(None), "出勤時刻 is required")
+            self._flag(db, staging, s.clock_out.is_(None), "退勤時刻 is required")
+            self._flag(db, staging, and_(s.work_date.isnot(None), (s.work_date < start) | (s.work_date >= end)),
+                       f"日付 is outside {year}/{month:02d}")
+            db.execute(update(staging).values(employee_id=(
+                select(Employee.id).where(Employee.hakenmoto_id == s.employee_code).scalar_subquery()
+            )))
+            self._flag(db, staging, and_(s.employee_code.isnot(None), s.employee_id.is_(None)), "社員ID not found")
+            self._flag_duplicates(db, staging, [s.employee_code, s.work_date], "Duplicate 社員ID/日付 in file")
+
+        results = self._run_pipeline(
+            db, staging, frame, validate, job_id,
+            target=target,
+            keys=["employee_id", "work_date"],
+            staged_only=["employee_code"],
+            insert_defaults={"is_approved": False},
+        )
+        results["factory_id"] = factory_id
+        return results
+
+    def _normalise_timer_cards(self, raw: pd.DataFrame, factory_id: str) -> pd.DataFrame:
+        raw.columns = [str(column).strip() for column in raw.columns]
+        column = self._column_getter(raw)
+
+        frame = pd.DataFrame(index=raw.index)
+        frame["row_no"] = raw.index + 2
+        frame["employee_code"] = to_int(column('社員ID'))
+        frame["factory_id"] = factory_id
+        frame["work_date"] = to_date(column('日付'))
+        frame["clock_in"] = to_time(column('出勤時刻'))
+        frame["clock_out"] = to_time(column('退勤時刻'))
+        breaks = to_int(column('休憩'))
+        frame["break_minutes"] = breaks.where(breaks.notna(), 0)
+
+        # Same rules as calculate_hours() in app/api/timer_cards.py, vectorized
+        minutes = lambda times: times.map(lambda t: np.nan if t is None else t.hour * 60 + t.minute + t.second / 60)  # noqa: E731
+        shift = (minutes(frame["clock_out"]) - minutes(frame["clock_in"])) % (24 * 60)
+        worked = (shift - frame["break_minutes"].astype(float)) / 60
+        frame["regular_hours"] = worked.clip(upper=8.0).round(2)
+        frame["overtime_hours"] = (worked - 8.0).clip(lower=0).round(2)
+        frame["night_hours"] = 0.0
+        frame["holiday_hours"] = 0.0
+        for name in ("regular_hours", "overtime_hours"):
+            frame[name] = frame[name].astype(object).where(frame[name].notna(), None)
+
+        frame["parse_error"] = self._parse_errors([
+            (column('社員ID'), frame["employee_code"], "社員ID must be a number"),
+            (column('日付'), frame["work_date"], "日付 must be a date"),
+            (column('出勤時刻'), frame["clock_in"], "出勤時刻 must be HH:MM"),
+            (column('退勤時刻'), frame["clock_out"], "退勤時刻 must be HH:MM"),
+        ])
+        return frame
+
+    # ------------------------------------------------------------------
+    # Factory configs
+    # ------------------------------------------------------------------
+    def import_factory_configs_from_json(self, db: Session, directory_path: str, job_id: Optional[str] = None) -> Dict:
         """
         Import factory configurations from JSON files
-        
+
         Args:
+            db: Database session
             directory_path: Directory containing factory JSON files
-            
+            job_id: Optional job to report progress to
+
         Returns:
             Dict with import results
         """
         logger.info(f"Importing factory configs from {directory_path}")
-        
-        results = {
-            "success": [],
-            "errors": [],
-            "total_files": 0,
-            "imported": 0,
-            "failed": 0
+        self._stage_progress(job_id, "reading")
+
+        records = []
+        for position, json_file in enumerate(sorted(Path(directory_path).glob('*.json'))):
+            record = {"row_no": position + 1, "file": json_file.name, "parse_error": None}
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                missing = [key for key in ('factory_id', 'client_company', 'plant', 'assignment', 'job') if key not in config]
+                if missing:
+                    record["parse_error"] = f"Missing fields: {', '.join(missing)}"
+                else:
+                    record.update(
+                        factory_id=config['factory_id'],
+                        name=" - ".join(
+                            part.strip() for part in (config['client_company'].get('name'), config['plant'].get('name'))
+                            if part and part.strip()
+                        ),
+                        address=config['plant'].get('address'),
+                        phone=config['plant'].get('phone'),
+                        contact_person=(config['assignment'].get('supervisor') or {}).get('name'),
+                        config=config,
+                    )
+            except (OSError, ValueError) as e:
+                record["parse_error"] = str(e)
+            records.append(record)
+
+        frame = pd.DataFrame.from_records(records, columns=[
+            "row_no", "file", "factory_id", "name", "address", "phone", "contact_person", "config", "parse_error"
+        ]).astype(object)
+        frame = frame.where(frame.notna(), None)
+
+        staging = self._staging_table("factories", [
+            Column("file", Text),
+            Column("factory_id", Text),
+            Column("name", Text),
+            Column("address", Text),
+            Column("phone", Text),
+            Column("contact_person", Text),
+            Column("config", Factory.__table__.c.config.type),  # JSONB on PostgreSQL, for COALESCE in _merge
+        ])
+        s = staging.c
+
+        def validate():
+            self._flag(db, staging, s.factory_id.is_(None), "factory_id is required")
+            self._flag(db, staging, func.length(s.name) == 0, "client_company/plant name is required")
+            self._flag_duplicates(db, staging, [s.factory_id], "Duplicate factory_id")
+
+        results = self._run_pipeline(
+            db, staging, frame, validate, job_id,
+            target=Factory.__table__,
+            keys=["factory_id"],
+            staged_only=["file"],
+            insert_defaults={"is_active": True},
+        )
+        results["total_files"] = results["total_rows"]
+        return results
+
+    # ------------------------------------------------------------------
+    # Background jobs
+    # ------------------------------------------------------------------
+    def run_job(self, job_id: str, kind: str, *args, cleanup: Optional[str] = None) -> None:
+        """Run an import in the background with its own session"""
+        runners = {
+            "import_employees": self.import_employees_from_excel,
+            "import_timer_cards": self.import_timer_cards_from_excel,
+            "import_factory_configs": self.import_factory_configs_from_json,
         }
-        
+        db = SessionLocal()
         try:
-            import json
-            directory = Path(directory_path)
-            json_files = list(directory.glob('*.json'))
-            results["total_files"] = len(json_files)
-            
-            for json_file in json_files:
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                    
-                    # Validate config structure
-                    required = ['factory_id', 'client_company', 'plant', 'assignment', 'job']
-                    missing = [f for f in required if f not in config]
-                    
-                    if missing:
-                        results["errors"].append({
-                            "file": json_file.name,
-                            "error": f"Missing fields: {', '.join(missing)}"
-                        })
-                        results["failed"] += 1
-                        continue
-                    
-                    # TODO: Insert into database
-                    logger.info(f"Imported factory config: {config['factory_id']}")
-                    
-                    results["success"].append({
-                        "file": json_file.name,
-                        "factory_id": config['factory_id'],
-                        "name": config['name']
-                    })
-                    results["imported"] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error importing {json_file.name}: {e}")
-                    results["errors"].append({
-                        "file": json_file.name,
-                        "error": str(e)
-                    })
-                    results["failed"] += 1
-            
-            logger.info(f"Factory configs import: {results['imported']} succeeded, {results['failed']} failed")
-            return results
-            
+            results = runners[kind](db, *args, job_id=job_id)
+            job_registry.complete(job_id, results)
         except Exception as e:
-            logger.error(f"Failed to import factory configs: {e}")
-            return {
-                "success": [],
-                "errors": [{"error": str(e)}],
-                "total_files": 0,
-                "imported": 0,
-                "failed": 0
-            }
+            logger.error(f"Import job {job_id} failed: {e}")
+            job_registry.fail(job_id, str(e))
+        finally:
+            db.close()
+            if cleanup and os.path.exists(cleanup):
+                os.remove(cleanup)
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+    def _run_pipeline(
+        self,
+        db: Session,
+        staging: Table,
+        frame: pd.DataFrame,
+        validate,
+        job_id: Optional[str],
+        target: Table,
+        keys: Sequence[str],
+        staged_only: Sequence[str] = (),
+        insert_defaults: Optional[Dict] = None,
+        sequences: Sequence[str] = ()
+    ) -> Dict:
+        """
+        Stage, validate and merge in one transaction; returns the import results
+
+        ``sequences`` are id_allocator ids written explicitly by the merge: they
+        are moved past the highest id in use so later allocations do not collide
+        """
+        results = {"errors": [], "warnings": [], "total_rows": len(frame), "imported": 0,
+                   "created": 0, "updated": 0, "failed": 0}
+        if job_id:
+            job_registry.update(job_id, total=len(frame))
+
+        try:
+            staging.create(db.connection())
+
+            self._stage_progress(job_id, "staging")
+            records = frame.to_dict("records")
+            for offset in range(0, len(records), STAGING_CHUNK_SIZE):
+                chunk = records[offset:offset + STAGING_CHUNK_SIZE]
+                db.execute(insert(staging), chunk)
+                if job_id:
+                    job_registry.advance(job_id, processed=len(chunk))
+
+            self._stage_progress(job_id, "validating")
+            self._flag(db, staging, staging.c.parse_error.isnot(None), staging.c.parse_error)
+            self._flag_lengths(db, staging, target)
+            validate()
+
+            self._stage_progress(job_id, "merging")
+            created, updated = self._merge(db, staging, target, keys, staged_only, insert_defaults or {})
+            for name in sequences:
+                id_allocator.advance_past(db, name)
+
+            error_rows = db.execute(
+                select(staging.c.row_no, staging.c.error)
+                .where(staging.c.error.isnot(None))
+                .order_by(staging.c.row_no)
+            ).all()
+            staging.drop(db.connection())
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        results["failed"] = len(error_rows)
+        results["errors"] = [{"row": row_no, "error": error} for row_no, error in error_rows[:MAX_REPORTED_ERRORS]]
+        results.update(created=created, updated=updated, imported=created + updated)
+        if job_id:
+            job_registry.update(job_id, created=created, updated=updated)
+            job_registry.add_errors(job_id, results["errors"], failed=len(error_rows))
+
+        logger.info(
+            f"Import into {target.name}: {created} created, {updated} updated, {len(error_rows)} failed"
+        )
+        return results
+
+    @staticmethod
+    def _staging_table(name: str, columns: List[Column]) -> Table:
+        return Table(
+            f"staging_{name}_{uuid.uuid4().hex[:8]}",
+            MetaData(),
+            Column("row_no", Integer, primary_key=True, autoincrement=False),
+            *columns,
+            Column("parse_error", Text),
+            Column("error", Text),
+            prefixes=["TEMPORARY"],
+        )
+
+    @staticmethod
+    def _flag(db: Session, staging: Table, condition, message) -> None:
+        """Append ``message`` to the error of every staging row matching ``condition``"""
+        message = literal(message) if isinstance(message, str) else message
+        db.execute(
+            update(staging)
+            .where(condition)
+            .values(error=func.coalesce(staging.c.error + literal("; "), literal("")) + message)
+        )
+
+    def _flag_lengths(self, db: Session, staging: Table, target: Table) -> None:
+        """Staging text columns are unbounded; enforce the live VARCHAR lengths here"""
+        for column in target.columns:
+            length = getattr(column.type, "length", None)
+            if length and column.name in staging.c:
+                self._flag(db, staging, func.length(staging.c[column.name]) > length,
+                           f"{column.name} is longer than {length} characters")
+
+    def _flag_duplicates(self, db: Session, staging: Table, columns: List[Column], message: str) -> None:
+        """Flag every row but the first of each duplicated key"""
+        first = select(func.min(staging.c.row_no)).where(staging.c.error.is_(None)).group_by(*columns)
+        self._flag(db, staging, and_(staging.c.error.is_(None), staging.c.row_no.notin_(first)), message)
+
+    @staticmethod
+    def _merge(
+        db: Session,
+        staging: Table,
+        target: Table,
+        keys: Sequence[str],
+        staged_only: Sequence[str],
+        insert_defaults: Dict
+    ):
+        """UPDATE matching live rows (non-null values only), then INSERT the rest"""
+        valid = staging.c.error.is_(None)
+        match = and_(*[target.c[key] == staging.c[key] for key in keys])
+        skip = {"row_no", "parse_error", "error", *staged_only}
+        columns = [column.name for column in staging.columns if column.name not in skip]
+
+        updated = db.execute(
+            select(func.count()).select_from(staging).where(valid, exists().where(match))
+        ).scalar()
+        db.execute(
+            update(target)
+            .where(match, valid)
+            .values({name: func.coalesce(staging.c[name], target.c[name]) for name in columns if name not in keys})
+        )
+
+        insert_columns = columns + [name for name in insert_defaults if name not in columns]
+        values = [
+            func.coalesce(staging.c[name], literal(insert_defaults[name])) if name in insert_defaults and name in columns
+            else literal(insert_defaults[name]) if name not in columns
+            else staging.c[name]
+            for name in insert_columns
+        ]
+        created = db.execute(
+            insert(target).from_select(insert_columns, select(*values).where(valid, ~exists().where(match)))
+        ).rowcount
+        return created, updated
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _column_getter(raw: pd.DataFrame):
+        empty = pd.Series([None] * len(raw), index=raw.index, dtype=object)
+        return lambda header: raw[header] if header in raw.columns else empty
+
+    @staticmethod
+    def _parse_errors(checks) -> pd.Series:
+        """'; '-joined messages for cells that had a value but could not be converted"""
+        errors = None
+        for raw, parsed, message in checks:
+            errors = pd.Series("", index=raw.index) if errors is None else errors
+            failed = ~blank_mask(raw) & parsed.isna()
+            errors = errors.where(~failed, errors + message + "; ")
+        errors = errors.str.rstrip("; ")
+        return errors.where(errors != "", None).astype(object)
+
+    @staticmethod
+    def _stage_progress(job_id: Optional[str], stage: str) -> None:
+        if job_id:
+            job_registry.update(job_id, status=JobStatus.RUNNING, stage=stage)
 
 
 # Global instance
@@ -0,0 +1,179 @@
+"""
+Background Job Registry for UNS-ClaudeJP 2.0
+Tracks progress and per-row errors of long-running imports
+
+A job runs in the worker that created it, but with several uvicorn workers
+its progress can be requested from any of them. Set JOBS_DIR (like
+METRICS_DIR) to a directory shared by all workers: every change is written
+there as ``<job id>.json`` and workers that do not own a job read it from
+that file. Without JOBS_DIR jobs are only visible to their own worker, so
+run a single worker.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+MAX_ERRORS_PER_JOB = 1000
+MAX_JOBS_KEPT = 200
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """Progress snapshot of a background job"""
+    id: str
+    kind: str
+    status: str = JobStatus.QUEUED
+    stage: Optional[str] = None
+    total: Optional[int] = None
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[Dict] = field(default_factory=list)
+    result: Optional[Dict] = None
+    message: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["progress"] = round(self.processed / self.total, 4) if self.total else None
+        return data
+
+
+class JobRegistry:
+    """Thread-safe registry of background jobs, optionally shared through a directory"""
+
+    def __init__(self, shared_dir: Optional[str] = None):
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, kind: str, total: Optional[int] = None) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, total=total)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job (a copy read from JOBS_DIR when another worker runs it)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def snapshot(self, job_id: str) -> Optional[Dict]:
+        """Consistent copy of a job's state (safe to serialize while it runs)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        job = self._load(job_id)
+        return job.to_dict() if job else None
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            for key, value in fields.items():
+                setattr(job, key, value)
+            self._save(job)
+
+    def advance(self, job_id: str, processed: int = 0, created: int = 0, updated: int = 0) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = JobStatus.RUNNING
+            job.processed += processed
+            job.created += created
+            job.updated += updated
+            self._save(job)
+
+    def add_errors(self, job_id: str, errors: List[Dict], failed: Optional[int] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.failed += len(errors) if failed is None else failed
+            room = MAX_ERRORS_PER_JOB - len(job.errors)
+            if room > 0:
+                job.errors.extend(errors[:room])
+            self._save(job)
+
+    def complete(self, job_id: str, result: Optional[Dict] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = JobStatus.COMPLETED
+            job.stage = None
+            job.result = result
+            job.finished_at = datetime.now().isoformat()
+            self._save(job)
+
+    def fail(self, job_id: str, message: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = JobStatus.FAILED
+            job.message = message
+            job.finished_at = datetime.now().isoformat()
+            self._save(job)
+
+    def _prune(self) -> None:
+        if len(self._jobs) > MAX_JOBS_KEPT:
+            finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.created_at)
+            for job in finished[:len(self._jobs) - MAX_JOBS_KEPT]:
+                del self._jobs[job.id]
+        if self.shared_dir is None:
+            return
+        # files of every worker (including ones that exited); running jobs are rewritten often
+        try:
+            files = sorted(self.shared_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+            for path in files[:max(len(files) - MAX_JOBS_KEPT, 0)]:
+                if path.stem not in self._jobs:
+                    path.unlink(missing_ok=True)
+        except OSError:  # pragma: no cover - raced with another worker's prune
+            pass
+
+    # Shared state ----------------------------------------------------------
+    def _save(self, job: Job) -> None:
+        """Write the job to JOBS_DIR (atomic replace, so readers never see half a file)"""
+        if self.shared_dir is None:
+            return
+        self.shared_dir.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.shared_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as target:
+                json.dump(asdict(job), target, ensure_ascii=False, default=str)
+            os.replace(temp_path, self.shared_dir / f"{job.id}.json")
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        if self.shared_dir is None or not JOB_ID.match(job_id):
+            return None
+        try:
+            data = json.loads((self.shared_dir / f"{job_id}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return Job(**data)
+
+
+# Global instance
+job_registry = JobRegistry(settings.JOBS_DIR)
@@ -0,0 +1,238 @@
+"""
+Matching Service for UNS-ClaudeJP 2.0
+Ranks candidates for every factory opening in one vectorized pass
+
+Candidates are kept in memory as NumPy arrays (skills bitmap, JLPT level,
+commute minutes, prefecture), reloaded when the candidates table changes
+(checked at most every MATCH_POOL_RELOAD_SECONDS). Factory requirements
+come from the factory registry (JobRequirements). Scoring builds one
+candidates x factories matrix:
+
+    score = 0.60 * skill coverage (preferred skills the candidate has)
+          + 0.25 * JLPT level (N1 = 1.0 ... N5 = 0.2, unknown = 0)
+          + 0.15 * same prefecture as the plant
+
+Candidates missing a required skill, below the required JLPT level or
+with a longer commute than allowed are left out (score -1).
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Candidate, CandidateStatus
+from app.services.candidate_profile import codes_from_mask
+from app.services.factory_registry import (
+    PREFECTURES, FactoryRules, factory_registry, jlpt_level, prefecture_of
+)
+
+SKILL_WEIGHT = 0.60
+JLPT_WEIGHT = 0.25
+AREA_WEIGHT = 0.15
+
+MATCHABLE_STATUSES = (CandidateStatus.PENDING, CandidateStatus.APPROVED)
+NO_JLPT = 9  # unknown level / no requirement
+NO_LIMIT = np.iinfo(np.int32).max
+_PREFECTURE_INDEX = {name: index for index, name in enumerate(PREFECTURES)}
+
+
+def _prefecture_index(address: Optional[str]) -> int:
+    return _PREFECTURE_INDEX.get(prefecture_of(address), -1)
+
+
+@dataclass(frozen=True)
+class CandidatePool:
+    """Matchable candidates as parallel arrays (row i = one candidate)"""
+    ids: np.ndarray  # int64
+    skills: np.ndarray  # uint32 skills_mask
+    jlpt: np.ndarray  # int8 N-level, NO_JLPT if unknown
+    commute: np.ndarray  # int32 minutes one way, -1 if unknown
+    prefecture: np.ndarray  # int8 index in PREFECTURES, -1 if unknown
+    rirekisho_ids: List[str]
+    names: List[Optional[str]]
+    version: tuple = ()
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple], version: tuple = ()) -> "CandidatePool":
+        """rows: (id, rirekisho_id, full_name_kanji, skills_mask, japanese_level, commute_time_oneway, current_address)"""
+        return cls(
+            ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            skills=np.fromiter((row[3] or 0 for row in rows), dtype=np.uint32, count=len(rows)),
+            jlpt=np.fromiter((jlpt_level(row[4]) or NO_JLPT for row in rows), dtype=np.int8, count=len(rows)),
+            commute=np.fromiter(
+                (row[5] if row[5] is not None else -1 for row in rows), dtype=np.int32, count=len(rows)
+            ),
+            prefecture=np.fromiter((_prefecture_index(row[6]) for row in rows), dtype=np.int8, count=len(rows)),
+            rirekisho_ids=[row[1] for row in rows],
+            names=[row[2] for row in rows],
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass(frozen=True)
+class FactoryMatrix:
+    """JobRequirements of the factories as parallel arrays (column j = one factory)"""
+    rules: List[FactoryRules]
+    skills: np.ndarray  # uint32
+    required: np.ndarray  # uint32
+    max_jlpt: np.ndarray  # int8, NO_JLPT if any level
+    max_commute: np.ndarray  # int32, NO_LIMIT if any
+    prefecture: np.ndarray  # int8, -1 if unknown
+
+    @classmethod
+    def from_rules(cls, rules: Sequence[FactoryRules]) -> "FactoryMatrix":
+        default_commute = settings.MATCH_DEFAULT_MAX_COMMUTE_MINUTES
+        commute = [rule.requirements.max_commute_minutes or default_commute for rule in rules]
+        return cls(
+            rules=list(rules),
+            skills=np.array([rule.requirements.skills_mask for rule in rules], dtype=np.uint32),
+            required=np.array([rule.requirements.required_mask for rule in rules], dtype=np.uint32),
+            max_jlpt=np.array([rule.requirements.max_jlpt_level or NO_JLPT for rule in rules], dtype=np.int8),
+            max_commute=np.array([NO_LIMIT if value is None else value for value in commute], dtype=np.int32),
+            prefecture=np.array([_PREFECTURE_INDEX.get(rule.requirements.prefecture, -1) for rule in rules],
+                                dtype=np.int8),
+        )
+
+    def select(self, positions: Sequence[int]) -> "FactoryMatrix":
+        index = np.asarray(positions, dtype=np.intp)
+        return FactoryMatrix(
+            rules=[self.rules[position] for position in positions],
+            skills=self.skills[index],
+            required=self.required[index],
+            max_jlpt=self.max_jlpt[index],
+            max_commute=self.max_commute[index],
+            prefecture=self.prefecture[index],
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+def score_matrix(pool: CandidatePool, factories: FactoryMatrix) -> np.ndarray:
+    """float32 (candidates x factories) scores in [0, 1]; -1 where a hard requirement fails"""
+    skills = pool.skills[:, None]
+    wanted = np.bitwise_count(factories.skills).astype(np.float32)
+    hits = np.bitwise_count(skills & factories.skills).astype(np.float32)
+    coverage = hits * np.divide(1.0, wanted, out=np.zeros_like(wanted), where=wanted > 0)
+
+    jlpt_fit = np.where(pool.jlpt <= 5, (6 - pool.jlpt.astype(np.float32)) / 5, np.float32(0))
+    same_area = (pool.prefecture[:, None] == factories.prefecture) & (factories.prefecture >= 0)
+
+    scores = SKILL_WEIGHT * coverage
+    scores += (JLPT_WEIGHT * jlpt_fit)[:, None]
+    scores += AREA_WEIGHT * same_area
+
+    eligible = (skills & factories.required) == factories.required
+    eligible &= pool.jlpt[:, None] <= factories.max_jlpt
+    eligible &= pool.commute[:, None] <= factories.max_commute  # unknown (-1) always passes
+    return np.where(eligible, scores, np.float32(-1)).astype(np.float32, copy=False)
+
+
+def top_candidates(scores: np.ndarray, limit: int) -> np.ndarray:
+    """(k x factories) row indices of the best candidates per factory, best first"""
+    k = min(limit, scores.shape[0])
+    if k == 0:
+        return np.empty((0, scores.shape[1]), dtype=np.intp)
+    best = np.argpartition(-scores, k - 1, axis=0)[:k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(best, order, axis=0)
+
+
+class MatchingEngine:
+    """Cached candidate arrays + factory matrix; ranks shortlists per factory"""
+
+    def __init__(self, reload_seconds: Optional[float] = None):
+        self.reload_seconds = settings.MATCH_POOL_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        self._pool: Optional[CandidatePool] = None
+        self._checked_at = float("-inf")
+        self._factories: tuple = (None, None)  # (registry rules dict, FactoryMatrix)
+        self._lock = threading.Lock()
+
+    def pool(self, db: Session) -> CandidatePool:
+        """Matchable candidates, reloaded when count / max id / max updated_at changed"""
+        if self._pool is not None and time.monotonic() - self._checked_at < self.reload_seconds:
+            return self._pool
+        with self._lock:
+            if self._pool is not None and time.monotonic() - self._checked_at < self.reload_seconds:
+                return self._pool
+            version = tuple(db.query(
+                func.count(Candidate.id), func.max(Candidate.id), func.max(Candidate.updated_at)
+            ).one())
+            if self._pool is None or self._pool.version != version:
+                rows = db.query(
+                    Candidate.id, Candidate.rirekisho_id, Candidate.full_name_kanji, Candidate.skills_mask,
+                    Candidate.japanese_level, Candidate.commute_time_oneway, Candidate.current_address,
+                ).filter(Candidate.status.in_(MATCHABLE_STATUSES)).order_by(Candidate.id).all()
+                self._pool = CandidatePool.from_rows(rows, version)
+            self._checked_at = time.monotonic()
+            return self._pool
+
+    def factories(self, db: Session) -> FactoryMatrix:
+        """All factories of the registry (rebuilt when the registry recompiled)"""
+        rules = factory_registry.all(db)
+        cached_rules, matrix = self._factories
+        if cached_rules is not rules:
+            matrix = FactoryMatrix.from_rules([rules[factory_id] for factory_id in sorted(rules)])
+            self._factories = (rules, matrix)
+        return matrix
+
+    def invalidate(self) -> None:
+        self._checked_at = float("-inf")
+
+    def match(self, db: Session, factory_ids: Optional[Sequence[str]] = None, limit: int = 10) -> List[Dict]:
+        """
+        Shortlist of up to ``limit`` candidates for each factory (all, or ``factory_ids``)
+
+        Raises:
+            KeyError: for a factory id the registry does not know
+        """
+        factories = self.factories(db)
+        if factory_ids:
+            positions = {rule.factory_id: position for position, rule in enumerate(factories.rules)}
+            unknown = [factory_id for factory_id in factory_ids if factory_id not in positions]
+            if unknown:
+                raise KeyError(", ".join(unknown))
+            factories = factories.select([positions[factory_id] for factory_id in dict.fromkeys(factory_ids)])
+        pool = self.pool(db)
+
+        scores = score_matrix(pool, factories)
+        best = top_candidates(scores, limit)
+
+        shortlists = []
+        for column, rule in enumerate(factories.rules):
+            wanted = int(factories.skills[column])
+            candidates = []
+            for row in best[:, column]:
+                score = float(scores[row, column])
+                if score < 0:
+                    break
+                candidates.append({
+                    "candidate_id": int(pool.ids[row]),
+                    "rirekisho_id": pool.rirekisho_ids[row],
+                    "full_name_kanji": pool.names[row],
+                    "score": round(score, 4),
+                    "matched_skills": codes_from_mask(int(pool.skills[row]) & wanted),
+                    "jlpt_level": int(pool.jlpt[row]) if pool.jlpt[row] != NO_JLPT else None,
+                })
+            shortlists.append({
+                "factory_id": rule.factory_id,
+                "factory_name": rule.name,
+                "prefecture": rule.requirements.prefecture,
+                "skills": codes_from_mask(wanted),
+                "required_skills": codes_from_mask(rule.requirements.required_mask),
+                "skills_inferred": rule.requirements.inferred,
+                "candidates": candidates,
+            })
+        return shortlists
+
+
+# Global instance
+matching_engine = MatchingEngine()
@@ -1,4 +1,11 @@
-"""Consolidated OCR service with hybrid processing pipeline."""
+"""Consolidated OCR service with hybrid processing pipeline.
+
+PDFs are rasterized lazily: each page is rendered on its own (pdftoppm at
+OCR_PDF_DPI, straight to a temp PNG) by the worker that OCRs it, so at most
+one bitmap per worker exists at a time. Page results are cached by document
+hash + page + DPI and yielded as they finish (process_pages()), which the
+NDJSON endpoint streams to the client.
+"""
 from __future__ import annotations
 
 import asyncio
@@ -7,24 +14,28 @@ import concurrent.futures
 import hashlib
 import json
 import os
+import tempfile
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 import cv2
 import numpy as np
 import pytesseract
 import requests
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 
 from app.core.config import settings
 from app.core.logging import app_logger, log_ocr_operation
+from app.core.metrics import OCR_BACKEND_DURATION, OCR_REQUESTS
 
 DEFAULT_CACHE_DIR = Path(settings.UPLOAD_DIR) / "ocr_cache"
 DEFAULT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 MAX_IMAGE_SIZE = 1600
 OCR_TIMEOUT = 60
+HASH_CHUNK_SIZE = 1024 * 1024
 
 
 class OCRService:
@@ -35,13 +46,16 @@ class OCRService:
         self.vision_api_key = settings.GOOGLE_CLOUD_VISION_API_KEY
         self.gemini_api_key = settings.GEMINI_API_KEY
         self.cache: Dict[str, Dict[str, Any]] = {}
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+        self.workers = 5
+        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
         self.total_requests = 0
         self.cache_hits = 0
         self.average_processing_time = 0.0
         self.started_at = time.time()
         self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.work_dir = self.cache_dir / "tmp"
+        self.work_dir.mkdir(exist_ok=True)
         self._preload_cache()
         app_logger.info("OCR service initialised")
 
@@ -54,8 +68,17 @@ class OCRService:
                 app_logger.warning("Failed to preload cache entry", file=str(cache_file), error=str(exc))
 
     def _hash_file(self, path: str) -> str:
+        digest = hashlib.md5()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def is_pdf(path: str) -> bool:
+        """By content: stored uploads have no extension"""
         with open(path, "rb") as handle:
-            return hashlib.md5(handle.read()).hexdigest()
+            return handle.read(5) == b"%PDF-"
 
     def _load_cache(self, key: str) -> Optional[Dict[str, Any]]:
         if key in self.cache:
@@ -101,19 +124,104 @@ class OCRService:
         cache_key = self._hash_file(file_path)
         cached = self._load_cache(cache_key)
         if cached:
+            OCR_REQUESTS.inc(source="cache")
             log_ocr_operation(source="cache", document_type=document_type, cache_key=cache_key)
             return cached
+        OCR_REQUESTS.inc(source="fresh")
 
-        loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(
-            self.thread_pool, self._process_with_fallbacks, file_path, document_type, cache_key
-        )
+        if self.is_pdf(file_path):
+            pages = sorted([page async for page in self.process_pages(file_path, document_type)],
+                           key=lambda page: page["page"])
+            failed = [page for page in pages if page.get("error")]
+            if len(failed) == len(pages):
+                raise RuntimeError(f"All OCR methods failed on every page: {failed[0]['error'] if failed else 'empty PDF'}")
+            result = {
+                "text": "\n\f".join(page.get("text") or "" for page in pages),
+                "pages": pages,
+                "page_count": len(pages),
+                "method": "pdf",
+                "document_type": document_type,
+                "cache_key": cache_key,
+            }
+            if not failed:
+                self._save_cache(cache_key, result)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.thread_pool, self._process_with_fallbacks, file_path, document_type, cache_key
+            )
 
         elapsed = time.perf_counter() - start
         self.average_processing_time = ((self.average_processing_time * (self.total_requests - 1)) + elapsed) / self.total_requests
         log_ocr_operation(source="fresh", processing_time=elapsed, document_type=document_type, cache_key=cache_key)
         return result
 
+    async def process_pages(
+        self, file_path: str, document_type: str, dpi: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        OCR every page of a PDF, yielding ``{"page": n, ...}`` in completion order
+
+        At most one page per worker is rasterized or OCR'd at a time; a failed
+        page yields ``{"page": n, "error": ...}`` instead of stopping the rest.
+        """
+        dpi = dpi or settings.OCR_PDF_DPI
+        document_key = await asyncio.to_thread(self._hash_file, file_path)
+        page_count = await asyncio.to_thread(self.page_count, file_path)
+        if page_count > settings.OCR_PDF_MAX_PAGES:
+            raise ValueError(f"PDF has {page_count} pages (max {settings.OCR_PDF_MAX_PAGES})")
+
+        loop = asyncio.get_running_loop()
+        window = self.workers
+        pending: Dict[asyncio.Future, int] = {}
+        next_page = 1
+        try:
+            while next_page <= page_count or pending:
+                while next_page <= page_count and len(pending) < window:
+                    page, next_page = next_page, next_page + 1
+                    key = self._page_key(document_key, page, dpi)
+                    cached = self._load_cache(key)
+                    if cached:
+                        yield {**cached, "page": page, "page_count": page_count, "cached": True}
+                        continue
+                    future = loop.run_in_executor(
+                        self.thread_pool, self._process_page, file_path, page, dpi, document_type, key
+                    )
+                    pending[future] = page
+                if not pending:
+                    continue
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    try:
+                        result = {**future.result(), "cached": False}
+                    except Exception as exc:
+                        app_logger.warning("OCR page failed", page=page, error=str(exc))
+                        result = {"error": str(exc)}
+                    yield {**result, "page": page, "page_count": page_count}
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def page_count(self, file_path: str) -> int:
+        return int(pdfinfo_from_path(file_path)["Pages"])
+
+    def _page_key(self, document_key: str, page: int, dpi: int) -> str:
+        return hashlib.md5(f"{document_key}:{page}:{dpi}".encode()).hexdigest()
+
+    def _process_page(self, file_path: str, page: int, dpi: int, document_type: str, cache_key: str) -> Dict[str, Any]:
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as workdir:
+            image_path = self._rasterize_page(file_path, page, dpi, workdir)
+            return self._process_with_fallbacks(image_path, document_type, cache_key)
+
+    def _rasterize_page(self, file_path: str, page: int, dpi: int, workdir: str) -> str:
+        """Render one page to a PNG on disk (the bitmap never enters this process)"""
+        paths = convert_from_path(
+            file_path, dpi=dpi, first_page=page, last_page=page, fmt="png",
+            output_folder=workdir, paths_only=True, single_file=True,
+        )
+        return paths[0]
+
     async def process_from_base64(self, image_base64: str, mime_type: str, document_type: str) -> Dict[str, Any]:
         extension = mime_type.split("/")[-1]
         temp_file = self.cache_dir / f"temp_{time.time_ns()}.{extension}"
@@ -148,26 +256,34 @@ class OCRService:
         processors = [self._process_with_gemini, self._process_with_vision, self._process_with_tesseract]
         try:
             for processor in processors:
+                backend = processor.__name__.replace("_process_with_", "")
+                started = time.perf_counter()
                 try:
                     result = processor(optimised_path, document_type)
+                    OCR_BACKEND_DURATION.observe(
+                        time.perf_counter() - started, backend=backend, outcome="success" if result else "empty"
+                    )
                     if result:
                         result.update({"method": processor.__name__, "document_type": document_type, "cache_key": cache_key})
                         self._save_cache(cache_key, result)
                         return result
                 except Exception as exc:  # pragma: no cover - fallback
+                    OCR_BACKEND_DURATION.observe(time.perf_counter() - started, backend=backend, outcome="error")
                     app_logger.warning("OCR fallback failed", processor=processor.__name__, error=str(exc))
         finally:
             Path(optimised_path).unlink(missing_ok=True)
         raise RuntimeError("All OCR methods failed")
 
     def _optimise_image(self, path: str) -> str:
-        image = Image.open(path)
-        width, height = image.size
-        if width > MAX_IMAGE_SIZE or height > MAX_IMAGE_SIZE:
-            scale = MAX_IMAGE_SIZE / max(width, height)
-            image = image.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
-        temp_path = f"{os.path.splitext(path)[0]}_opt.png"
-        image.save(temp_path)
+        with Image.open(path) as image:
+            width, height = image.size
+            if width > MAX_IMAGE_SIZE or height > MAX_IMAGE_SIZE:
+                scale = MAX_IMAGE_SIZE / max(width, height)
+                image = image.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
+            # next to the cache, not the source (stored uploads are shared blobs)
+            handle, temp_path = tempfile.mkstemp(suffix="_opt.png", dir=self.work_dir)
+            with os.fdopen(handle, "wb") as target:
+                image.save(target, "PNG")
         return temp_path
 
     def _process_with_tesseract(self, path: str, document_type: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,246 @@
+"""
+Onboarding Service for UNS-ClaudeJP 2.0
+Candidate -> employee promotion (承認 / 入社) in one transaction
+
+A wave of approvals is one transaction with a fixed number of round trips
+besides the per-candidate inserts:
+
+- candidates and their existing employees are loaded with two IN queries
+- hakenmoto ids for the whole wave are reserved in one call
+- every candidate is promoted inside its own savepoint, so one bad row
+  (missing name, constraint error) is reported and the rest still commit
+- documents of every promoted candidate are copied with a single
+  ``INSERT ... SELECT``, mapping candidate id -> new employee id with CASE;
+  copies share the stored file (blob_store) and only add references
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationError
+from app.models.models import Candidate, CandidateStatus, Document, Employee
+from app.schemas.candidate import CandidateApprove
+from app.services.blob_store import blob_store
+from app.services.id_allocator import id_allocator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OnboardingResult:
+    """Outcome of one candidate in an approval wave"""
+    candidate_id: int
+    status: str = "approved"  # approved | hired | failed
+    rirekisho_id: Optional[str] = None
+    employee_id: Optional[int] = None
+    hakenmoto_id: Optional[int] = None
+    documents: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+def _emergency_contact(candidate: Candidate) -> Optional[str]:
+    """Emergency contact name plus relation, e.g. ``山田花子 (母)``"""
+    parts = []
+    if candidate.emergency_contact_name:
+        parts.append(candidate.emergency_contact_name)
+    if candidate.emergency_contact_relation:
+        parts.append(f"({candidate.emergency_contact_relation})")
+    contact = " ".join(parts).strip()
+    return contact or None
+
+
+def employee_values(candidate: Candidate, options: CandidateApprove) -> dict:
+    """Employee columns for a candidate approved with ``options`` (hakenmoto_id excluded)"""
+    name = candidate.full_name_kanji or candidate.full_name_roman
+    if not name:
+        raise ValidationError("Candidate name is required to create an employee",
+                              {"rirekisho_id": candidate.rirekisho_id})
+
+    address_parts = [candidate.current_address, candidate.address_banchi, candidate.building_name]
+    address = " ".join(part for part in address_parts if part) or candidate.registered_address
+
+    return {
+        "rirekisho_id": candidate.rirekisho_id,
+        "factory_id": options.factory_id,
+        "hakensaki_shain_id": options.hakensaki_shain_id,
+        "full_name_kanji": name,
+        "full_name_kana": candidate.full_name_kana,
+        "photo_url": candidate.photo_url,
+        "date_of_birth": candidate.date_of_birth,
+        "gender": candidate.gender,
+        "nationality": candidate.nationality,
+        "zairyu_card_number": candidate.residence_card_number,
+        "zairyu_expire_date": candidate.residence_expiry,
+        "address": address,
+        "postal_code": candidate.postal_code,
+        "phone": candidate.mobile or candidate.phone,
+        "emergency_contact": _emergency_contact(candidate),
+        "emergency_phone": candidate.emergency_contact_phone,
+        "hire_date": options.hire_date or candidate.hire_date,
+        "jikyu": options.jikyu if options.jikyu is not None else 0,
+        "position": options.position,
+        "contract_type": options.contract_type,
+        "notes": options.notes,
+    }
+
+
+class OnboardingService:
+    """Approves candidates and promotes them to employees"""
+
+    def hire(self, db: Session, candidate: Candidate, values: dict, hakenmoto_id=None) -> Employee:
+        """
+        Flush a new employee for ``candidate`` and mark the candidate hired
+
+        Documents are not copied here; call copy_documents() once for the
+        whole wave. Nothing is committed.
+        """
+        values = {key: value for key, value in values.items() if key != "hakenmoto_id"}
+        employee = id_allocator.insert(
+            db, "hakenmoto_id", lambda value: Employee(hakenmoto_id=value, **values), first_id=hakenmoto_id
+        )
+        candidate.status = CandidateStatus.HIRED
+        return employee
+
+    def copy_documents(self, db: Session, promoted: Dict[int, int], user_id: Optional[int]) -> Dict[int, int]:
+        """
+        Copy the documents of every candidate in ``promoted`` (candidate id ->
+        employee id) with one INSERT ... SELECT; returns copies per candidate
+
+        Copies point at the same blob, whose reference count is raised.
+        """
+        if not promoted:
+            return {}
+        counts: Dict[int, int] = defaultdict(int)
+        references: Dict[str, int] = defaultdict(int)
+        rows = (
+            db.query(Document.candidate_id, Document.blob_sha256, func.count(Document.id))
+            .filter(Document.candidate_id.in_(promoted))
+            .group_by(Document.candidate_id, Document.blob_sha256)
+        )
+        for candidate_id, sha256, copies in rows:
+            counts[candidate_id] += copies
+            if sha256:
+                references[sha256] += copies
+        if not counts:
+            return {}
+
+        employee_id = case(promoted, value=Document.candidate_id)
+        source = select(
+            employee_id,
+            Document.document_type,
+            Document.file_name,
+            Document.file_path,
+            Document.file_size,
+            Document.mime_type,
+            Document.blob_sha256,
+            Document.ocr_data,
+            literal(user_id, Document.uploaded_by.type),
+        ).where(Document.candidate_id.in_(list(counts)))
+        db.execute(
+            insert(Document).from_select(
+                ["employee_id", "document_type", "file_name", "file_path", "file_size", "mime_type", "blob_sha256",
+                 "ocr_data", "uploaded_by"],
+                source,
+            )
+        )
+        blob_store.add_references(db, references)
+        return dict(counts)
+
+    def approve(
+        self,
+        db: Session,
+        requests: Sequence[Tuple[int, CandidateApprove]],
+        user_id: Optional[int] = None,
+    ) -> List[OnboardingResult]:
+        """
+        Approve (and optionally promote) candidates in one transaction
+
+        Failures are reported per candidate and do not roll back the others.
+        Commits once at the end.
+        """
+        ids = [candidate_id for candidate_id, _ in requests]
+        candidates = {c.id: c for c in db.query(Candidate).filter(Candidate.id.in_(ids))} if ids else {}
+        employed = self._employees_by_rirekisho(db, (c.rirekisho_id for c in candidates.values()))
+
+        to_hire = {
+            candidate_id for candidate_id, options in requests
+            if options.promote_to_employee and candidate_id in candidates
+            and candidates[candidate_id].rirekisho_id not in employed
+        }
+        hakenmoto_ids = iter(id_allocator.reserve(db, "hakenmoto_id", len(to_hire)))
+
+        results: List[OnboardingResult] = []
+        promoted: Dict[int, int] = {}
+        seen = set()
+        for candidate_id, options in requests:
+            result = OnboardingResult(candidate_id)
+            results.append(result)
+            candidate = candidates.get(candidate_id)
+            if candidate is None:
+                result.status, result.error = "failed", "Candidate not found"
+                continue
+            result.rirekisho_id = candidate.rirekisho_id
+            if candidate_id in seen:
+                result.status, result.error = "failed", "Candidate listed more than once"
+                continue
+            seen.add(candidate_id)
+
+            employee = new_employee = None
+            try:
+                with db.begin_nested():
+                    candidate.status = CandidateStatus.APPROVED
+                    candidate.approved_by = user_id
+                    candidate.approved_at = func.now()
+                    if options.promote_to_employee:
+                        employee = employed.get(candidate.rirekisho_id)
+                        if employee is None:
+                            employee = new_employee = self.hire(
+                                db, candidate, employee_values(candidate, options), next(hakenmoto_ids, None)
+                            )
+                        candidate.status = CandidateStatus.HIRED
+                    db.flush()
+            except ValidationError as e:
+                result.status, result.error = "failed", e.message
+                continue
+            except SQLAlchemyError as e:
+                logger.warning(f"Onboarding failed for candidate {candidate_id}: {e}")
+                result.status, result.error = "failed", "Database error"
+                continue
+
+            if new_employee is not None:
+                employed[candidate.rirekisho_id] = new_employee
+                promoted[candidate_id] = new_employee.id
+            if employee is not None:
+                result.status = "hired"
+                result.employee_id, result.hakenmoto_id = employee.id, employee.hakenmoto_id
+
+        counts = self.copy_documents(db, promoted, user_id)
+        for result in results:
+            if result.candidate_id in promoted:
+                result.documents = counts.get(result.candidate_id, 0)
+        db.commit()
+
+        hired = sum(1 for result in results if result.status == "hired")
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(f"Onboarding wave: {len(results)} candidates, {hired} hired, {failed} failed")
+        return results
+
+    def _employees_by_rirekisho(self, db: Session, rirekisho_ids: Iterable[str]) -> Dict[str, Employee]:
+        rirekisho_ids = [value for value in rirekisho_ids if value]
+        if not rirekisho_ids:
+            return {}
+        employees = db.query(Employee).filter(Employee.rirekisho_id.in_(rirekisho_ids)).all()
+        return {employee.rirekisho_id: employee for employee in employees}
+
+
+# Global instance
+onboarding_service = OnboardingService()
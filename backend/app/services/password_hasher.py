@@ -0,0 +1,88 @@
+"""
+Password Hasher for UNS-ClaudeJP 2.0
+bcrypt hashing/verification off the event loop, with bounded admission
+
+bcrypt costs ~100-300 ms of CPU per call. Calls run on a dedicated thread
+pool of PASSWORD_HASH_WORKERS (the bcrypt backend releases the GIL, so they
+run in parallel and the event loop keeps serving other requests). At most
+PASSWORD_HASH_MAX_PENDING calls may be queued or running per worker; beyond
+that ServiceBusyError is raised (503 + Retry-After) instead of letting a
+login burst build an unbounded queue.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.exceptions import ServiceBusyError
+from app.core.metrics import metrics_registry
+
+T = TypeVar("T")
+
+PASSWORD_HASH_DURATION = metrics_registry.histogram(
+    "password_hash_seconds", "bcrypt call latency including queue wait", ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+PASSWORD_HASH_REJECTED = metrics_registry.counter(
+    "password_hash_rejected_total", "bcrypt calls rejected because the queue was full", ("operation",))
+
+
+class PasswordHasher:
+    """Async front-end for a passlib CryptContext"""
+
+    def __init__(self, context: CryptContext, workers: int = 2, max_pending: int = 64):
+        self.context = context
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                PASSWORD_HASH_REJECTED.inc(operation=operation)
+                # rough time to drain the queue, at least one second
+                retry_after = max(1, round(self._pending / self.workers * 0.25))
+                raise ServiceBusyError("Demasiadas solicitudes de autenticación", retry_after=retry_after)
+            self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            PASSWORD_HASH_DURATION.observe(time.perf_counter() - started, operation=operation)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+password_hasher = PasswordHasher(
+    CryptContext(schemes=["bcrypt"], deprecated="auto"),
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
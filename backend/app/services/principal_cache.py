@@ -0,0 +1,162 @@
+"""
+Principal Cache for UNS-ClaudeJP 2.0
+Authenticated users kept in memory so a request does not query ``users``
+
+Entries are keyed by token subject (username) and live for
+AUTH_CACHE_TTL_SECONDS. Updating or deleting a User (role change,
+deactivation, password change) drops its entry once the transaction commits:
+evicting at flush time would let a concurrent request re-cache the old row
+before the commit makes the change visible. With several workers
+set AUTH_CACHE_DIR to a shared directory: an invalidation bumps a generation
+file there and every worker clears its cache when it sees the change.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.models import User, UserRole
+
+GENERATION_FILE = "generation"
+STALE_KEY = "principal_cache_stale"  # session.info: usernames to evict on commit
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Snapshot of the authenticated user (no password hash)"""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    role: UserRole
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    """TTL + LRU cache of principals by subject"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000, shared_dir: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = self._read_generation()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        self._sync_shared()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, subject: str, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: Optional[str] = None) -> None:
+        """Drop one subject (or everything) here and, when shared, in every worker"""
+        with self._lock:
+            if subject is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(subject, None)
+        self._bump_shared()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    # Shared invalidation ---------------------------------------------------
+    def _read_generation(self) -> Optional[int]:
+        if self.shared_dir is None:
+            return None
+        try:
+            return os.stat(self.shared_dir / GENERATION_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def _bump_shared(self) -> None:
+        if self.shared_dir is None:
+            return
+        try:
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+            path = self.shared_dir / GENERATION_FILE
+            path.touch()
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        except OSError:  # pragma: no cover - read-only volume; TTL still bounds staleness
+            return
+        self._generation = self._read_generation()
+
+    def _sync_shared(self) -> None:
+        """Another worker invalidated something: start over (invalidations are rare)"""
+        if self.shared_dir is None:
+            return
+        generation = self._read_generation()
+        if generation != self._generation:
+            with self._lock:
+                self._entries.clear()
+            self._generation = generation
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_stale(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is None:  # pragma: no cover - flushes always run in a session
+        return
+    stale = session.info.setdefault(STALE_KEY, set())
+    stale.add(target.username)
+    stale.update(inspect(target).attrs.username.history.deleted or ())  # renamed user
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for username in session.info.pop(STALE_KEY, ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(STALE_KEY, None)
+
+
+# Global instance
+principal_cache = PrincipalCache(
+    settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_DIR
+)
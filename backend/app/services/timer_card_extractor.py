@@ -0,0 +1,412 @@
+"""
+Timer Card Extractor for UNS-ClaudeJP 2.0
+Scanned timer card sheets (タイムカード) -> TimerCardOCRData rows
+
+Pipeline per sheet (an image, or one PDF page rasterized by its worker):
+
+1. rulings: horizontal and vertical lines isolated with long morphological
+   openings of the binarized scan; the sheet is deskewed by their angle
+2. grid: rulings projected to row / column positions, cells cropped
+   between them; blank cells (almost no ink) are never OCR'd
+3. OCR in batches: the cells of a sheet are stacked into one strip and read
+   with a single tesseract call (digits only for time cells), words are
+   mapped back to their cell by y position
+4. parsing: common OCR confusions folded (O->0, l->1, ...), times checked
+   (hours up to 29 for overnight shifts), one confidence per field
+
+Column roles come from the header row (日付/出勤/退勤/休憩/合計 or
+Day/In/Out/Break/Total), DEFAULT_COLUMNS when it cannot be read. The name
+and month are read from the title above the table. Sheets run in parallel
+on TIMER_CARD_OCR_WORKERS threads (tesseract is a subprocess).
+"""
+import asyncio
+import logging
+import re
+import tempfile
+import unicodedata
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.services.ocr_service import ocr_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLUMNS = ("day", "clock_in", "clock_out", "break", "total")
+HEADER_KEYWORDS = (
+    ("clock_in", ("出勤", "出社", "in")),
+    ("clock_out", ("退勤", "退社", "out")),
+    ("break", ("休憩", "break")),
+    ("total", ("合計", "実働", "total")),
+    ("day", ("日付", "日", "day", "date")),
+)
+MAX_CLOCK_HOUR = 29  # 翌5時 written as 29:00 on overnight shifts
+TIME_CHARS = "0123456789:."
+CELL_HEIGHT = 48  # cells are scaled to this height before OCR
+BLANK_INK_RATIO = 0.01
+RULING_BAND = 6  # px around a detected line treated as ruling, not ink
+
+OCR_FIXES = str.maketrans({
+    "O": "0", "o": "0", "D": "0", "Q": "0", "l": "1", "I": "1", "|": "1", "i": "1",
+    "S": "5", "s": "5", "B": "8", "Z": "2", "z": "2", "G": "6", "g": "9", "q": "9",
+    ";": ":", ",": ".",
+})
+YEAR_MONTH = re.compile(r"(20\d{2})\s*[年/.\-]\s*(\d{1,2})")
+NAME_LABEL = re.compile(r"(氏名|名前|name)\s*[:：]?", re.IGNORECASE)
+
+
+# Parsing -------------------------------------------------------------------
+def _normalize(text: Optional[str]) -> str:
+    return unicodedata.normalize("NFKC", text or "").strip().translate(OCR_FIXES)
+
+
+def parse_time(text: Optional[str]) -> Optional[str]:
+    """``8:30`` / ``830`` / ``08.30`` / ``２５：１０`` -> ``HH:MM``; None when not a clock time"""
+    value = re.sub(r"[^0-9:]", "", _normalize(text).replace(".", ":"))
+    match = re.fullmatch(r"(\d{1,2}):?(\d{2})", value)
+    if not match:
+        return None
+    hour, minute = int(match[1]), int(match[2])
+    if hour > MAX_CLOCK_HOUR or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def parse_hours(text: Optional[str]) -> Optional[str]:
+    """``7:30`` or decimal ``7.5`` -> ``7:30``"""
+    value = re.sub(r"[^0-9:.]", "", _normalize(text))
+    if re.fullmatch(r"\d{1,2}:\d{2}", value):
+        hours, minutes = (int(part) for part in value.split(":"))
+    elif re.fullmatch(r"\d{1,2}(\.\d{1,2})?", value):
+        hours, minutes = divmod(round(float(value) * 60), 60)
+    else:
+        return None
+    if hours > 24 or minutes > 59:
+        return None
+    return f"{hours}:{minutes:02d}"
+
+
+def parse_minutes(text: Optional[str]) -> Optional[int]:
+    """Break length: ``60`` / ``1:00`` / ``0.75`` -> minutes"""
+    hours = parse_hours(text) if re.search(r"[:.]", _normalize(text)) else None
+    if hours:
+        hour, minute = hours.split(":")
+        return int(hour) * 60 + int(minute)
+    value = re.sub(r"[^0-9]", "", _normalize(text))
+    return int(value) if value and int(value) <= 600 else None
+
+
+def parse_day(text: Optional[str]) -> Optional[int]:
+    value = re.sub(r"[^0-9]", "", _normalize(text))
+    return int(value) if value and 1 <= int(value) <= 31 else None
+
+
+def column_roles(header: Sequence[str]) -> Tuple[Optional[str], ...]:
+    """Role of each column from its header text; DEFAULT_COLUMNS when fewer than two are recognized"""
+    roles: List[Optional[str]] = []
+    for text in header:
+        text = unicodedata.normalize("NFKC", text or "").lower()
+        tokens = set(re.findall(r"[a-z]+", text))
+        roles.append(next(
+            (role for role, words in HEADER_KEYWORDS
+             if any(word in tokens if word.isascii() else word in text for word in words)),
+            None,
+        ))
+    if sum(role is not None for role in roles) >= 2:
+        return tuple(roles)
+    return tuple(DEFAULT_COLUMNS[index] if index < len(DEFAULT_COLUMNS) else None for index in range(len(header)))
+
+
+# Image processing ----------------------------------------------------------
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Ink = 255"""
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+
+
+def rulings(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Horizontal and vertical line masks"""
+    height, width = binary.shape
+    horizontal = cv2.morphologyEx(
+        binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 40, 10), 1))
+    )
+    vertical = cv2.morphologyEx(
+        binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(height // 40, 10)))
+    )
+    return horizontal, vertical
+
+
+def deskew(gray: np.ndarray, horizontal: np.ndarray, max_degrees: float = 5.0) -> Optional[np.ndarray]:
+    """Sheet rotated so the rulings are level; None when it already is"""
+    contours, _ = cv2.findContours(horizontal, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    angles = []
+    for contour in contours:
+        (_, _), (width, height), angle = cv2.minAreaRect(contour)
+        if width < height:
+            width, height, angle = height, width, angle - 90
+        if width >= gray.shape[1] // 4:
+            angles.append(angle if angle <= 45 else angle - 180)
+    if not angles:
+        return None
+    angle = float(np.median(angles))
+    if abs(angle) < 0.1 or abs(angle) > max_degrees:
+        return None
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def line_positions(mask: np.ndarray, axis: int) -> np.ndarray:
+    """Centres of the rulings in ``mask`` (axis=1: rows of horizontal lines, axis=0: columns)"""
+    profile = mask.sum(axis=axis) / 255
+    if not profile.any():
+        return np.empty(0, dtype=int)
+    hits = np.flatnonzero(profile >= profile.max() * 0.5)
+    groups = np.split(hits, np.flatnonzero(np.diff(hits) > 2) + 1)
+    return np.array([int(group.mean()) for group in groups])
+
+
+@dataclass
+class Cell:
+    row: int
+    col: int
+    image: np.ndarray
+
+
+def _stack(images: Sequence[np.ndarray], gap: int = 24, pad: int = 12) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Cells scaled to CELL_HEIGHT and stacked vertically on a white strip"""
+    scaled = []
+    for image in images:
+        height, width = image.shape[:2]
+        scale = CELL_HEIGHT / max(height, 1)
+        scaled.append(cv2.resize(image, (max(1, int(width * scale)), CELL_HEIGHT), interpolation=cv2.INTER_AREA))
+    strip_width = max(image.shape[1] for image in scaled) + 2 * pad
+    strip = np.full((len(scaled) * (CELL_HEIGHT + gap) + gap, strip_width), 255, dtype=np.uint8)
+    spans = []
+    top = gap
+    for image in scaled:
+        strip[top:top + CELL_HEIGHT, pad:pad + image.shape[1]] = image
+        spans.append((top, top + CELL_HEIGHT))
+        top += CELL_HEIGHT + gap
+    return strip, spans
+
+
+class TesseractCellReader:
+    """Reads many cell images with one tesseract call"""
+
+    def __init__(self, lang: Optional[str] = None):
+        self.lang = lang or settings.TESSERACT_LANG
+
+    def read(self, images: Sequence[np.ndarray], kind: str) -> List[Tuple[str, float]]:
+        """``(text, confidence 0..1)`` per image; kind ``time`` restricts to digits"""
+        if not images:
+            return []
+        strip, spans = _stack(images)
+        if kind == "time":
+            lang, config = "eng", f"--psm 6 -c tessedit_char_whitelist={TIME_CHARS}"
+        else:
+            lang, config = self.lang, "--psm 6"
+        data = pytesseract.image_to_data(strip, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+        starts = [start for start, _ in spans]
+        words: List[List[Tuple[int, str, float]]] = [[] for _ in images]
+        for text, conf, top, height, left in zip(data["text"], data["conf"], data["top"], data["height"], data["left"]):
+            text, conf = str(text).strip(), float(conf)
+            if not text or conf < 0:
+                continue
+            index = bisect_right(starts, top + height / 2) - 1
+            if index >= 0:
+                words[index].append((left, text, conf / 100))
+        joiner = "" if kind == "time" else " "
+        results = []
+        for cell_words in words:
+            cell_words.sort()
+            text = joiner.join(word for _, word, _ in cell_words)
+            confidence = min((conf for _, _, conf in cell_words), default=0.0)
+            results.append((text, confidence))
+        return results
+
+
+# Extraction ----------------------------------------------------------------
+class TimerCardExtractor:
+    """Table extraction from timer card scans"""
+
+    def __init__(self, reader=None, workers: Optional[int] = None, min_confidence: Optional[float] = None):
+        self.reader = reader or TesseractCellReader()
+        self.workers = max(1, settings.TIMER_CARD_OCR_WORKERS if workers is None else workers)
+        self.min_confidence = settings.TIMER_CARD_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def segment(self, gray: np.ndarray) -> Tuple[np.ndarray, List[List[Optional[Cell]]], np.ndarray]:
+        """
+        Deskewed sheet, cell grid (None = blank cell) and the title area above the table
+
+        Raises:
+            ValidationError: when no table with at least 2 rows and 2 columns is found
+        """
+        binary = binarize(gray)
+        horizontal, vertical = rulings(binary)
+        straightened = deskew(gray, horizontal)
+        if straightened is not None:
+            gray = straightened
+            binary = binarize(gray)
+            horizontal, vertical = rulings(binary)
+
+        ys, xs = line_positions(horizontal, axis=1), line_positions(vertical, axis=0)
+        if len(ys) < 3 or len(xs) < 3:
+            raise ValidationError("No timer card table found", {"rows": max(len(ys) - 1, 0),
+                                                                "columns": max(len(xs) - 1, 0)})
+        # ruling pixels near the detected lines only: the short kernels above also keep tall glyph strokes
+        lines = np.zeros_like(binary)
+        for y in ys:
+            band = slice(max(y - RULING_BAND, 0), y + RULING_BAND + 1)
+            lines[band] |= horizontal[band]
+        for x in xs:
+            band = slice(max(x - RULING_BAND, 0), x + RULING_BAND + 1)
+            lines[:, band] |= vertical[:, band]
+        ink = cv2.subtract(binary, lines)
+        grid: List[List[Optional[Cell]]] = []
+        for row, (top, bottom) in enumerate(zip(ys[:-1], ys[1:])):
+            cells: List[Optional[Cell]] = []
+            for col, (left, right) in enumerate(zip(xs[:-1], xs[1:])):
+                margin = max(3, min(bottom - top, right - left) // 12)
+                y0, y1, x0, x1 = top + margin, bottom - margin, left + margin, right - margin
+                if y1 <= y0 or x1 <= x0 or np.count_nonzero(ink[y0:y1, x0:x1]) < BLANK_INK_RATIO * (y1 - y0) * (x1 - x0):
+                    cells.append(None)
+                else:
+                    cells.append(Cell(row, col, gray[y0:y1, x0:x1]))
+            grid.append(cells)
+        title = gray[:max(int(ys[0]) - 4, 0), xs[0]:xs[-1]]
+        return gray, grid, title
+
+    def extract_sheet(self, gray: np.ndarray, year: Optional[int] = None, month: Optional[int] = None) -> List[Dict]:
+        """TimerCardOCRData dicts for the worked days of one sheet"""
+        _, grid, title = self.segment(gray)
+        header, rows = grid[0], grid[1:]
+
+        has_title = title.size and np.count_nonzero(binarize(title)) > BLANK_INK_RATIO * title.size
+        text_cells = ([title] if has_title else []) + [cell.image for cell in header if cell is not None]
+        texts = iter(self.reader.read(text_cells, "text"))
+        title_text = next(texts)[0] if has_title else ""
+        roles = column_roles([next(texts)[0] if cell is not None else "" for cell in header])
+
+        employee_name, title_year, title_month = self._parse_title(title_text)
+        year, month = year or title_year, month or title_month
+
+        cells = [cell for cells in rows for cell in cells if cell is not None and roles[cell.col]]
+        values: Dict[Tuple[int, int], Tuple[str, float]] = dict(zip(
+            ((cell.row, cell.col) for cell in cells),
+            self.reader.read([cell.image for cell in cells], "time"),
+        ))
+
+        records = []
+        for index, cells in enumerate(rows, start=1):
+            fields: Dict[str, Tuple[str, float]] = {
+                roles[col]: values[(index, col)] for col in range(len(cells)) if (index, col) in values
+            }
+            if "clock_in" not in fields and "clock_out" not in fields:
+                continue  # day off
+            records.append(self._record(fields, index, employee_name, year, month))
+        return records
+
+    def _record(self, fields: Dict[str, Tuple[str, float]], row: int, employee_name: Optional[str],
+                year: Optional[int], month: Optional[int]) -> Dict:
+        parsers = {"clock_in": parse_time, "clock_out": parse_time, "total": parse_hours, "break": parse_minutes}
+        parsed, confidence, unreadable = {}, {}, []
+        for role, parser in parsers.items():
+            if role not in fields:
+                continue
+            text, conf = fields[role]
+            parsed[role] = parser(text)
+            confidence[role] = round(conf if parsed[role] is not None else 0.0, 3)
+            if parsed[role] is None:
+                unreadable.append(role)
+
+        day = parse_day(fields["day"][0]) if "day" in fields else None
+        if day is None:
+            day = row  # rows are printed 1..31
+        work_date = None
+        if year and month:
+            try:
+                work_date = date(year, month, day).isoformat()
+            except ValueError:
+                unreadable.append("day")
+
+        lowest = min(confidence.values(), default=0.0)
+        return {
+            "employee_name": employee_name,
+            "work_date": work_date,
+            "clock_in": parsed.get("clock_in"),
+            "clock_out": parsed.get("clock_out"),
+            "break_minutes": parsed.get("break"),
+            "total_hours": parsed.get("total"),
+            "notes": f"要確認: {', '.join(unreadable)}" if unreadable else None,
+            "confidence": lowest,
+            "field_confidence": confidence,
+            "needs_review": bool(unreadable) or lowest < self.min_confidence,
+        }
+
+    @staticmethod
+    def _parse_title(text: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+        text = unicodedata.normalize("NFKC", text or "")
+        year = month = None
+        match = YEAR_MONTH.search(text)
+        if match and 1 <= int(match[2]) <= 12:
+            year, month = int(match[1]), int(match[2])
+            text = text[:match.start()] + text[match.end():]
+        name = NAME_LABEL.sub(" ", text)
+        name = re.sub(r"[年月度/.\-:]", " ", name)
+        name = " ".join(name.split()) or None
+        return name, year, month
+
+    # Files -----------------------------------------------------------------
+    def extract_images(self, sheets: Sequence[np.ndarray], year: Optional[int] = None,
+                       month: Optional[int] = None) -> List[Dict]:
+        """Several sheets in parallel (sync, e.g. benchmarks and scripts)"""
+        results = self._get_executor().map(lambda gray: self.extract_sheet(gray, year, month), sheets)
+        return [record for records in results for record in records]
+
+    async def extract_file(self, path: str, year: Optional[int] = None, month: Optional[int] = None) -> List[Dict]:
+        """Records of an image or of every page of a PDF (pages rasterized by their worker)"""
+        loop = asyncio.get_running_loop()
+        if not ocr_service.is_pdf(path):
+            return await loop.run_in_executor(self._get_executor(), self._extract_image, path, year, month)
+        pages = await asyncio.to_thread(ocr_service.page_count, path)
+        if pages > settings.OCR_PDF_MAX_PAGES:
+            raise ValidationError(f"PDF has {pages} pages (max {settings.OCR_PDF_MAX_PAGES})")
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._get_executor(), self._extract_page, path, page, year, month)
+            for page in range(1, pages + 1)
+        ))
+        return [record for records in results for record in records]
+
+    def _extract_image(self, path: str, year: Optional[int], month: Optional[int]) -> List[Dict]:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValidationError("Unreadable image", {"path": path})
+        return self.extract_sheet(gray, year, month)
+
+    def _extract_page(self, path: str, page: int, year: Optional[int], month: Optional[int]) -> List[Dict]:
+        with tempfile.TemporaryDirectory(dir=ocr_service.work_dir) as workdir:
+            image_path = ocr_service._rasterize_page(path, page, settings.OCR_PDF_DPI, workdir)
+            try:
+                return self._extract_image(image_path, year, month)
+            except ValidationError as e:
+                logger.warning(f"Timer card page {page} skipped: {e.message}")
+                return []
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="timer-cards")
+        return self._executor
+
+
+# Global instance
+timer_card_extractor = TimerCardExtractor()
@@ -0,0 +1,31 @@
+"""
+Date helpers shared by API endpoints and services
+"""
+from datetime import date
+from typing import Iterator, Tuple
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """
+    Return the half-open range [first day, first day of next month)
+
+    Filtering ``work_date >= start AND work_date < end`` lets PostgreSQL prune
+    timer_cards partitions, which ``extract('month', ...)`` cannot do.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def add_months(year: int, month: int, delta: int) -> Tuple[int, int]:
+    """Shift (year, month) by ``delta`` months"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def iter_months(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+    """Yield (year, month) pairs from ``start`` to ``end`` inclusive"""
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = add_months(year, month, 1)
@@ -0,0 +1,74 @@
+"""
+Vectorized converters for raw Excel columns
+
+Each helper takes an object Series straight from openpyxl/pandas and returns
+an object Series holding Python values (``None`` for empty cells), ready to be
+inserted through SQLAlchemy or written to COPY.
+"""
+from datetime import date, datetime, time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+BLANK_VALUES = ['', '-']
+TRUE_VALUES = ['true', 'yes', '1', 'はい', '○']
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+MAX_EXCEL_SERIAL = 100000  # 2173-10-14, well inside the datetime64 range
+
+
+def blank_mask(series: pd.Series) -> pd.Series:
+    """True for NaN/None, empty strings and '-'"""
+    return series.isna() | series.astype(str).str.strip().isin(BLANK_VALUES)
+
+
+def to_text(series: pd.Series) -> pd.Series:
+    text = series.astype(str).str.strip()
+    return text.where(~blank_mask(series), None)
+
+
+def to_int(series: pd.Series) -> pd.Series:
+    """Integers truncated toward zero; unparseable values become None"""
+    numeric = np.trunc(pd.to_numeric(series.where(~blank_mask(series)), errors='coerce'))
+    return numeric.astype('Int64').astype(object).where(numeric.notna(), None)
+
+
+def to_date(series: pd.Series) -> pd.Series:
+    """Dates from datetime cells, text and raw Excel serial numbers (0 = empty)"""
+    values = series.where(~blank_mask(series))
+    numeric = pd.to_numeric(values, errors='coerce')
+    serial = numeric.where((numeric > 0) & (numeric <= MAX_EXCEL_SERIAL)).astype('float64')
+    with np.errstate(over='ignore', invalid='ignore'):  # NaN cells warn inside pandas
+        from_serial = EXCEL_EPOCH + pd.to_timedelta(np.floor(serial), unit='D')
+
+    textual = values.where(numeric.isna() & values.map(lambda v: isinstance(v, (str, date, datetime))))
+    from_text = pd.to_datetime(textual, errors='coerce', format='mixed')
+
+    parsed = from_serial.where(from_serial.notna(), from_text)
+    return parsed.dt.date.astype(object).where(parsed.notna(), None)
+
+
+def to_bool(series: pd.Series, true_values: Iterable[str] = TRUE_VALUES) -> pd.Series:
+    """True/False by membership in ``true_values``; empty cells become None"""
+    text = series.astype(str).str.strip()
+    truthy = text.str.lower().isin([value.lower() for value in true_values])
+    return truthy.astype(object).where(~(series.isna() | (text == '')), None)
+
+
+def to_time(series: pd.Series) -> pd.Series:
+    """Times from time/datetime cells, day fractions (0.375 = 09:00) and 'HH:MM[:SS]' text"""
+    values = series.where(~blank_mask(series))
+    native = values.map(lambda v: v if isinstance(v, time) else v.time() if isinstance(v, datetime) else None)
+
+    numeric = pd.to_numeric(values.where(native.isna()), errors='coerce')
+    seconds = (numeric.where((numeric >= 0) & (numeric < 1)) * 86400).round()
+
+    text = values.where(native.isna() & numeric.isna()).astype(str).str.strip()
+    parsed = pd.to_datetime(text, format='%H:%M', errors='coerce')
+    parsed = parsed.where(parsed.notna(), pd.to_datetime(text, format='%H:%M:%S', errors='coerce'))
+    seconds = seconds.where(seconds.notna(), parsed.dt.hour * 3600 + parsed.dt.minute * 60 + parsed.dt.second)
+
+    from_seconds = seconds.map(
+        lambda s: None if pd.isna(s) else time(int(s) // 3600 % 24, int(s) % 3600 // 60, int(s) % 60)
+    )
+    return native.where(native.notna(), from_seconds).astype(object).where(lambda s: s.notna(), None)
@@ -0,0 +1,125 @@
+"""
+Concurrency benchmark: sync Session vs AsyncSession inside async handlers
+
+Starts one uvicorn worker serving the same two endpoints per mode:
+    /{mode}/slow  -> SELECT pg_sleep(SLOW_SECONDS)   (a heavy dashboard query)
+    /{mode}/fast  -> SELECT 1                        (a cheap lookup)
+and fires a mixed load at it (SLOW_RATIO of the requests are slow).
+
+With the sync session every slow query blocks the event loop, so fast
+requests queue behind it; with AsyncSession they keep flowing.
+
+Usage (PostgreSQL required, pg_sleep is used as the slow query):
+    python benchmarks/async_db_benchmark.py --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import get_async_db, get_db
+
+SLOW_SECONDS = 0.5
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/slow")
+    async def sync_slow(db: Session = Depends(get_db)):
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": SLOW_SECONDS})
+        return {"ok": True}
+
+    @app.get("/sync/fast")
+    async def sync_fast(db: Session = Depends(get_db)):
+        return {"value": db.execute(text("SELECT 1")).scalar()}
+
+    @app.get("/async/slow")
+    async def async_slow(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT pg_sleep(:s)"), {"s": SLOW_SECONDS})
+        return {"ok": True}
+
+    @app.get("/async/fast")
+    async def async_fast(db: AsyncSession = Depends(get_async_db)):
+        return {"value": (await db.execute(text("SELECT 1"))).scalar()}
+
+    return app
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_mode(base_url: str, mode: str, total: int, concurrency: int, slow_ratio: float) -> dict:
+    slow_every = max(1, round(1 / slow_ratio)) if slow_ratio > 0 else total + 1
+    latencies = {"slow": [], "fast": []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await client.get(f"/{mode}/fast")  # warm up the pool
+
+        async def one(i: int) -> None:
+            kind = "slow" if i % slow_every == 0 else "fast"
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(f"/{mode}/{kind}")
+                response.raise_for_status()
+                latencies[kind].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    fast = sorted(latencies["fast"])
+    return {
+        "mode": mode,
+        "throughput": total / elapsed,
+        "fast_p50": statistics.median(fast) * 1000 if fast else 0,
+        "fast_p95": fast[int(len(fast) * 0.95) - 1] * 1000 if fast else 0,
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = [
+            asyncio.run(run_mode(base_url, mode, args.requests, args.concurrency, args.slow_ratio))
+            for mode in ("sync", "async")
+        ]
+    finally:
+        server.should_exit = True
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.slow_ratio:.0%} slow ({SLOW_SECONDS}s)")
+    print(f"{'mode':<8}{'req/s':>10}{'fast p50 ms':>14}{'fast p95 ms':>14}{'total s':>10}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['throughput']:>10.1f}{r['fast_p50']:>14.1f}{r['fast_p95']:>14.1f}{r['elapsed']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+List rendering benchmark: FastAPI's default response path vs page_response()
+
+Serves one page of CandidateResponse rows (~126 fields each) two ways:
+    /default -> return the rows; FastAPI validates them against
+                response_model, runs jsonable_encoder and json.dumps
+    /fast    -> page_response(): pydantic-core validate + dump_json
+and reports server time per request, then body size and compression time
+for identity / gzip / br (br only when brotli is installed).
+
+Rows are plain objects filled with realistic values, so no database is
+needed.
+
+Usage:
+    python benchmarks/json_response_benchmark.py --page-size 100 --requests 200
+"""
+import argparse
+import asyncio
+import enum
+import gzip
+import sys
+import time
+import typing
+from datetime import date, datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.responses import Page, page_response
+from app.schemas.candidate import CandidateResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def sample_value(annotation, index: int, name: str):
+    if typing.get_origin(annotation) is typing.Union:
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return list(annotation)[index % len(annotation)]
+    if annotation is int:
+        return 1000 + index
+    if annotation is datetime:
+        return datetime(2024, 4, 1, 9, 30)
+    if annotation is date:
+        return date(1990, 1 + index % 12, 1 + index % 28)
+    if "email" in name or "Email" in str(annotation):
+        return f"worker{index}@example.jp"
+    return f"{name} 値 {index}"
+
+
+def make_rows(count: int):
+    fields = CandidateResponse.model_fields
+    return [
+        SimpleNamespace(**{name: sample_value(field.annotation, index, name) for name, field in fields.items()})
+        for index in range(count)
+    ]
+
+
+def build_app(rows) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=Page[CandidateResponse])
+    async def default():
+        return {"items": rows, "total": 5000, "page": 1, "page_size": len(rows), "total_pages": 50}
+
+    @app.get("/fast", response_model=Page[CandidateResponse])
+    async def fast():
+        return page_response(CandidateResponse, rows, total=5000, page=1, page_size=len(rows))
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, total: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get(path)).content
+        started = time.perf_counter()
+        for _ in range(total):
+            (await client.get(path)).raise_for_status()
+        return (time.perf_counter() - started) / total * 1000, body
+
+
+def time_it(fn, repeat: int = 20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    app = build_app(make_rows(args.page_size))
+    default_ms, default_body = asyncio.run(measure(app, "/default", args.requests))
+    fast_ms, fast_body = asyncio.run(measure(app, "/fast", args.requests))
+
+    print(f"page of {args.page_size} candidates ({len(CandidateResponse.model_fields)} fields), "
+          f"{args.requests} requests")
+    print(f"{'path':<10}{'ms/request':>12}{'req/s':>10}")
+    for path, ms in (("default", default_ms), ("fast", fast_ms)):
+        print(f"{path:<10}{ms:>12.2f}{1000 / ms:>10.0f}")
+
+    print(f"\n{'encoding':<12}{'bytes':>10}{'ratio':>8}{'ms':>8}")
+    print(f"{'identity':<12}{len(fast_body):>10}{1.0:>8.2f}{0.0:>8.2f}")
+    encoders = [(f"gzip-{level}", lambda level=level: gzip.compress(fast_body, compresslevel=level)) for level in (6, 9)]
+    if brotli is not None:
+        encoders.append(("br-4", lambda: brotli.compress(fast_body, quality=4)))
+    for name, encode in encoders:
+        ms, compressed = time_it(encode)
+        print(f"{name:<12}{len(compressed):>10}{len(fast_body) / len(compressed):>8.2f}{ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
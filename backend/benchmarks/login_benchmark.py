@@ -0,0 +1,134 @@
+"""
+Login burst benchmark: bcrypt on the event loop vs on the password_hasher pool
+
+Serves, in one uvicorn worker:
+    /inline/login -> pwd_context.verify() inside the async handler (old behaviour)
+    /pool/login   -> await password_hasher.verify()
+    /ping         -> trivial endpoint, probed during the burst
+and fires a burst of logins (a shift change) while a prober calls /ping.
+No database is needed: logins verify against one precomputed hash.
+
+Usage:
+    python benchmarks/login_benchmark.py --logins 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+from app.core.exceptions import ServiceBusyError
+from app.services.password_hasher import password_hasher
+
+PASSWORD = "shift-change-2024"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    hashed = password_hasher.context.hash(PASSWORD)
+
+    @app.post("/inline/login")
+    async def inline_login():
+        return {"ok": password_hasher.context.verify(PASSWORD, hashed)}
+
+    @app.post("/pool/login")
+    async def pool_login():
+        try:
+            return {"ok": await password_hasher.verify(PASSWORD, hashed)}
+        except ServiceBusyError as exc:
+            return JSONResponse({"detail": exc.message}, status_code=503,
+                                headers={"Retry-After": str(exc.retry_after)})
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_mode(base_url: str, mode: str, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies, ping_latencies, rejected = [], [], 0
+    done = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=concurrency + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def login():
+            nonlocal rejected
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(f"/{mode}/login")
+                if response.status_code == 503:
+                    rejected += 1
+                    return
+                response.raise_for_status()
+                login_latencies.append(time.perf_counter() - started)
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    pings = sorted(ping_latencies)
+    return {
+        "mode": mode,
+        "logins_per_s": len(login_latencies) / elapsed,
+        "login_p50": statistics.median(login_latencies) * 1000 if login_latencies else 0,
+        "rejected": rejected,
+        "ping_p50": statistics.median(pings) * 1000,
+        "ping_max": pings[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    logger.remove()
+    server = start_server(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = [asyncio.run(run_mode(base_url, mode, args.logins, args.concurrency)) for mode in ("inline", "pool")]
+    finally:
+        server.should_exit = True
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, "
+          f"{password_hasher.workers} bcrypt threads, max pending {password_hasher.max_pending}")
+    print(f"{'mode':<8}{'logins/s':>10}{'login p50 ms':>14}{'503s':>6}{'ping p50 ms':>13}{'ping max ms':>13}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['logins_per_s']:>10.1f}{r['login_p50']:>14.0f}{r['rejected']:>6}"
+              f"{r['ping_p50']:>13.1f}{r['ping_max']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
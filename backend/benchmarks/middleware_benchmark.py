@@ -0,0 +1,136 @@
+"""
+Per-request overhead of the middleware stack
+
+Compares the same tiny endpoint (JSON and a streamed response) served:
+    bare    - no middleware
+    legacy  - the previous three BaseHTTPMiddleware layers
+              (Logging, ExceptionHandler, Security), reproduced below
+    asgi    - app.core.middleware.RequestMiddleware (one pure ASGI pass)
+
+Requests go through httpx's in-process ASGI transport, so the figures are
+middleware + framework cost only. Log sinks are removed so console/file
+output does not dominate.
+
+Usage:
+    python benchmarks/middleware_benchmark.py --requests 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from app.core.exceptions import UNSException, http_exception_from_uns
+from app.core.logging import app_logger, log_performance_metric, log_security_event
+from app.core.middleware import RequestMiddleware
+from app.core.query_stats import track_queries
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        start = time.perf_counter()
+        route = request.url.path
+        app_logger.bind(route=route, method=request.method).info("request.started")
+        with track_queries() as queries:
+            response = await call_next(request)
+        elapsed = time.perf_counter() - start
+        response.headers["X-Process-Time"] = f"{elapsed:.4f}"
+        response.headers["X-DB-Queries"] = str(queries.count)
+        log_performance_metric("request_duration", elapsed, route=route, status=response.status_code)
+        app_logger.bind(route=route, status=response.status_code).info("request.finished")
+        return response
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response = await call_next(request)
+        response.headers.setdefault("X-Content-Type-Options", "nosniff")
+        response.headers.setdefault("X-Frame-Options", "DENY")
+        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
+        response.headers.setdefault("Referrer-Policy", "strict-origin-when-cross-origin")
+        if request.headers.get("User-Agent") in {None, "", "curl", "python-requests/2.x"}:
+            log_security_event(message="Suspicious user agent")
+        return response
+
+
+class LegacyExceptionHandlerMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        try:
+            return await call_next(request)
+        except UNSException as exc:
+            raise http_exception_from_uns(exc)
+        except HTTPException:
+            raise
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 1024
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    if stack == "legacy":
+        app.add_middleware(LegacySecurityMiddleware)
+        app.add_middleware(LegacyExceptionHandlerMiddleware)
+        app.add_middleware(LegacyLoggingMiddleware)
+    elif stack == "asgi":
+        app.add_middleware(RequestMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    """Mean wall time per request in microseconds"""
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"User-Agent": "bench"}) as client:
+        for _ in range(200):  # warm-up
+            await client.get(path)
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return (time.perf_counter() - started) / total * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    logger.remove()
+    results = {
+        (stack, path): asyncio.run(measure(build_app(stack), path, args.requests, args.concurrency))
+        for path in ("/ping", "/stream")
+        for stack in ("bare", "legacy", "asgi")
+    }
+
+    print(f"{args.requests} requests, concurrency {args.concurrency} (µs per request)")
+    print(f"{'endpoint':<10}{'bare':>10}{'legacy':>10}{'asgi':>10}{'legacy +':>12}{'asgi +':>10}")
+    for path in ("/ping", "/stream"):
+        bare, legacy, asgi = (results[(stack, path)] for stack in ("bare", "legacy", "asgi"))
+        print(f"{path:<10}{bare:>10.0f}{legacy:>10.0f}{asgi:>10.0f}{legacy - bare:>12.0f}{asgi - bare:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Timer card extraction benchmark on synthetic sheets
+
+Draws one A4 sheet (150 dpi) per worker: a title ("Worker NN 2025/10"), a
+Day/In/Out/Break/Total header and 31 day rows with random days off, then a
+small random rotation and scanner noise. Measures:
+
+    segment  -> deskew + grid detection + cell cropping of every sheet
+    extract  -> the full pipeline with batched tesseract calls, checked
+                against the drawn times (needs the tesseract binary)
+
+Usage:
+    python benchmarks/timer_card_benchmark.py --workers 40 --threads 8
+"""
+import argparse
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import cv2
+import numpy as np
+
+from app.services.timer_card_extractor import TimerCardExtractor
+
+WIDTHS = (150, 250, 250, 200, 200)
+ROW_HEIGHT = 45
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def make_sheet(worker: int, rng: random.Random):
+    """Grayscale sheet and the expected (day, in, out) rows"""
+    sheet = np.full((1754, 1240), 255, dtype=np.uint8)
+    xs = np.cumsum((95,) + WIDTHS)
+    ys = [200 + ROW_HEIGHT * index for index in range(33)]
+    for y in ys:
+        cv2.line(sheet, (int(xs[0]), y), (int(xs[-1]), y), 0, 2)
+    for x in xs:
+        cv2.line(sheet, (int(x), ys[0]), (int(x), ys[-1]), 0, 2)
+    cv2.putText(sheet, f"Worker {worker:02d} 2025/10", (int(xs[0]), 150), FONT, 1.2, 0, 2)
+
+    expected = []
+    rows = [("Day", "In", "Out", "Break", "Total")]
+    for day in range(1, 32):
+        if rng.random() < 0.25:
+            rows.append((str(day), "", "", "", ""))
+            continue
+        start = rng.choice((7, 8, 9)) * 60 + rng.choice((0, 15, 30))
+        end = start + rng.randrange(8, 12) * 60 + rng.choice((0, 10, 45))
+        clock_in, clock_out = f"{start // 60}:{start % 60:02d}", f"{end // 60}:{end % 60:02d}"
+        worked = end - start - 60
+        rows.append((str(day), clock_in, clock_out, "60", f"{worked // 60}:{worked % 60:02d}"))
+        expected.append((day, f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+    for row, texts in enumerate(rows):
+        for col, text in enumerate(texts):
+            cv2.putText(sheet, text, (int(xs[col]) + 15, ys[row] + 33), FONT, 0.9, 0, 2)
+
+    angle = rng.uniform(-1.5, 1.5)
+    matrix = cv2.getRotationMatrix2D((620, 877), angle, 1.0)
+    sheet = cv2.warpAffine(sheet, matrix, (1240, 1754), borderValue=255)
+    noise = np.random.default_rng(worker).normal(0, 12, sheet.shape)
+    return np.clip(sheet + noise, 0, 255).astype(np.uint8), expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=40, help="sheets (one per worker)")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sheets, expected = zip(*(make_sheet(worker, rng) for worker in range(1, args.workers + 1)))
+    extractor = TimerCardExtractor(workers=args.threads)
+
+    started = time.perf_counter()
+    grids = [extractor.segment(sheet)[1] for sheet in sheets]
+    segment_s = time.perf_counter() - started
+    shapes = {(len(grid), len(grid[0])) for grid in grids}
+    cells = sum(cell is not None for grid in grids for row in grid[1:] for cell in row)
+
+    print(f"{args.workers} sheets x 31 days")
+    print(f"  segment        {segment_s:8.2f} s  grids {sorted(shapes)} (expected [(32, 5)]), {cells:,} cells to read")
+
+    if not shutil.which("tesseract"):
+        print("  extract        skipped (tesseract binary not found)")
+        return
+
+    started = time.perf_counter()
+    records = extractor.extract_images(sheets, year=2025, month=10)
+    extract_s = time.perf_counter() - started
+
+    truth = {
+        (f"Worker {worker:02d}", f"2025-10-{day:02d}"): (clock_in, clock_out)
+        for worker, rows in enumerate(expected, start=1) for day, clock_in, clock_out in rows
+    }
+    correct = sum(
+        truth.get((record["employee_name"], record["work_date"])) == (record["clock_in"], record["clock_out"])
+        for record in records
+    )
+    review = sum(record["needs_review"] for record in records)
+    print(f"  extract        {extract_s:8.2f} s  ({args.threads} threads)")
+    print(f"  rows           {len(records):>8,} found / {len(truth):,} worked days")
+    print(f"  exact in/out   {correct / max(len(truth), 1):8.1%}   needs review {review:,}")
+
+
+if __name__ == "__main__":
+    main()
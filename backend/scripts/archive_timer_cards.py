@@ -0,0 +1,43 @@
+"""
+Archive closed timer card months to cold storage
+
+Creates upcoming partitions, then exports every monthly partition older than
+TIMER_CARD_HOT_MONTHS to ARCHIVE_DIR and drops it from PostgreSQL.
+Intended to run once a month (cron / scheduled container).
+"""
+import sys
+sys.path.insert(0, '/app')
+
+from app.core.database import SessionLocal
+from app.services.archive_service import archive_service
+
+
+def main():
+    db = SessionLocal()
+
+    try:
+        print("=" * 50)
+        print("ARCHIVANDO TARJETAS DE TIEMPO")
+        print("=" * 50)
+
+        created = archive_service.ensure_partitions(db)
+        print(f"✓ Particiones verificadas: {', '.join(created)}")
+
+        months = archive_service.list_archivable_months(db)
+        if not months:
+            print("  No hay meses cerrados para archivar")
+
+        for year, month in months:
+            try:
+                result = archive_service.archive_month(db, year, month)
+                print(f"✓ {result['partition']}: {result['rows']} filas → {result['path']}")
+            except Exception as e:
+                db.rollback()
+                print(f"✗ Error archivando {year}/{month:02d}: {e}")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Blob store garbage collection
+
+Recounts document and timer card upload references and removes stored
+files nothing references anymore (older than BLOB_GC_GRACE_HOURS), then
+the WebP derivatives of
+removed files. Pass --dry-run to only report.
+Intended to run once a night (cron / scheduled container).
+"""
+import sys
+sys.path.insert(0, '/app')
+
+from app.core.database import SessionLocal
+from app.services.blob_store import blob_store
+from app.services.derivative_service import derivative_service
+
+
+def main():
+    dry_run = "--dry-run" in sys.argv[1:]
+    db = SessionLocal()
+
+    try:
+        print("=" * 50)
+        print("LIMPIEZA DE ARCHIVOS" + (" (simulación)" if dry_run else ""))
+        print("=" * 50)
+
+        stats = blob_store.collect_garbage(db, dry_run=dry_run)
+        print(f"✓ {stats['recounted']} contadores de referencias corregidos")
+        print(f"✓ {stats['rows']} blobs sin referencias eliminados")
+        print(f"✓ {stats['files']} archivos eliminados ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+
+        removed = derivative_service.collect_orphans(dry_run=dry_run)
+        print(f"✓ {removed} miniaturas huérfanas eliminadas")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,248 @@
 """
 Script to import factory and employee data to PostgreSQL
+
+Bulk loader run by the importer container before the backend starts:
+- the 派遣社員, 請負社員 and スタッフ sheets are parsed in parallel processes
+- columns are validated and normalized in vectorized form
+- each sheet is loaded with COPY into a temp table and merged with
+  INSERT ... ON CONFLICT DO NOTHING, in one transaction per sheet
+- content hashes of the workbook and of every sheet are stored in
+  import_runs, so a rerun skips whatever did not change (--force reloads)
 """
+import argparse
+import hashlib
+import io
 import json
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
 
 # Add parent directory to path
 sys.path.insert(0, '/app')
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.models.models import Factory, Employee, ContractWorker, Staff
+from app.core.database import Base, SessionLocal
+from app.models.models import Factory
+from app.services.id_allocator import id_allocator
+from app.utils.excel import blank_mask, to_bool, to_date, to_int, to_text
+
+CONFIG_DIR = Path('/app/config')
+WORKBOOK = CONFIG_DIR / 'employee_master.xlsm'
+WORKBOOK_MARKER = '*'
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """How one employee_master sheet maps onto a table"""
+    label: str
+    sheet: str
+    header: int
+    table: str
+    key: str
+    texts: Dict[str, str] = field(default_factory=dict)
+    ints: Dict[str, str] = field(default_factory=dict)
+    dates: Dict[str, str] = field(default_factory=dict)
+    bools: Dict[str, str] = field(default_factory=dict)
+    constants: Dict[str, object] = field(default_factory=dict)
+    required: Tuple[str, ...] = ('full_name_kanji', 'full_name_kana')
+
+
+HAKEN = SheetSpec(
+    label='派遣社員', sheet='派遣社員', header=1, table='employees', key='hakenmoto_id',
+    texts={
+        'factory_id': '派遣先ID', 'hakensaki_shain_id': '派遣先社員ID',
+        'full_name_kanji': '氏名', 'full_name_kana': 'カナ', 'gender': '性別',
+        'nationality': '国籍', 'visa_type': 'ビザ種類', 'postal_code': '〒',
+        'address': '住所', 'position': '職種', 'assignment_location': '配属先',
+        'assignment_line': '配属ライン', 'job_description': '仕事内容',
+        'license_type': '免許種類', 'commute_method': '通勤方法',
+        'japanese_level': '日本語検定', 'notes': '備考',
+    },
+    ints={
+        'jikyu': '時給', 'hourly_rate_charged': '請求単価', 'profit_difference': '差額利益',
+        'standard_compensation': '標準報酬', 'health_insurance': '健康保険',
+        'nursing_insurance': '介護保険', 'pension_insurance': '厚生年金',
+    },
+    dates={
+        'hire_date': '入社日', 'current_hire_date': '現入社', 'termination_date': '退社日',
+        'zairyu_expire_date': 'ビザ期限', 'date_of_birth': '生年月日',
+        'jikyu_revision_date': '時給改定', 'billing_revision_date': '請求改定',
+        'social_insurance_date': '社保加入', 'entry_request_date': '入社依頼',
+        'license_expire_date': '免許期限', 'optional_insurance_expire': '任意保険期限',
+        'apartment_start_date': '入居', 'apartment_move_out_date': '退去',
+    },
+    bools={'career_up_5years': 'キャリアアップ5年目'},
+    constants={'contract_type': '派遣'},
+)
+
+UKEOI = SheetSpec(
+    label='請負社員', sheet='請負社員', header=2, table='contract_workers', key='hakenmoto_id',
+    texts={'full_name_kanji': '氏名', 'full_name_kana': 'カナ', 'gender': '性別', 'nationality': '国籍'},
+    ints={'jikyu': '時給'},
+    dates={'hire_date': '入社日', 'termination_date': '退社日'},
+    constants={'contract_type': '請負'},
+)
+
+STAFF = SheetSpec(
+    label='スタッフ', sheet='スタッフ', header=2, table='staff', key='staff_id',
+    texts={'full_name_kanji': '氏名', 'full_name_kana': 'カナ'},
+    constants={'monthly_salary': 0},
+)
+
+SHEETS = (HAKEN, UKEOI, STAFF)
+
+
+# ============================================
+# Parsing (runs in worker processes)
+# ============================================
+
+def normalize_sheet(raw: pd.DataFrame, spec: SheetSpec) -> Tuple[pd.DataFrame, int]:
+    """Vectorized conversion of a raw sheet; returns (rows, invalid rows)"""
+    raw.columns = [str(column).strip() for column in raw.columns]
+    empty = pd.Series([None] * len(raw), index=raw.index, dtype=object)
+    column = lambda header: raw[header] if header in raw.columns else empty  # noqa: E731
+
+    out = pd.DataFrame(index=raw.index)
+    out[spec.key] = to_int(column('社員№'))
+    for name, header in spec.texts.items():
+        out[name] = to_text(column(header))
+    for name, header in spec.ints.items():
+        out[name] = to_int(column(header))
+    for name, header in spec.dates.items():
+        out[name] = to_date(column(header))
+    for name, header in spec.bools.items():
+        flags = to_bool(column(header), true_values=['はい'])
+        out[name] = flags.where(flags.notna(), False)
+    for name, value in spec.constants.items():
+        out[name] = value
+    out['is_active'] = column('現在').astype(str).str.strip() != '退社'
+
+    for name in spec.required:
+        out[name] = out[name].where(out[name].notna(), '')
+    if 'jikyu' in out:
+        out['jikyu'] = out['jikyu'].where(out['jikyu'].notna(), 0)
+
+    invalid = out[spec.key].isna() & ~blank_mask(column('社員№'))
+    out = out[out[spec.key].notna()].drop_duplicates(subset=spec.key, keep='first')
+    return out.reset_index(drop=True), int(invalid.sum())
+
+
+def frame_hash(frame: pd.DataFrame) -> str:
+    digest = hashlib.sha256(','.join(frame.columns).encode())
+    digest.update(pd.util.hash_pandas_object(frame.astype(str), index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def parse_sheet(workbook: str, spec: SheetSpec) -> Dict:
+    """Read and normalize one sheet; executed in a separate process"""
+    started = time.perf_counter()
+    raw = pd.read_excel(workbook, sheet_name=spec.sheet, header=spec.header, dtype=object)
+    read_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    frame, invalid = normalize_sheet(raw, spec)
+    content_hash = frame_hash(frame)
+    return {
+        'spec': spec,
+        'frame': frame,
+        'invalid': invalid,
+        'hash': content_hash,
+        'read': read_seconds,
+        'normalize': time.perf_counter() - started,
+    }
+
+
+def oversized_rows(frame: pd.DataFrame, table: str) -> pd.Series:
+    """Rows with text longer than the VARCHAR column allows (COPY would abort the sheet)"""
+    mask = pd.Series(False, index=frame.index)
+    for column in Base.metadata.tables[table].columns:
+        length = getattr(column.type, 'length', None)
+        if length and column.name in frame and frame[column.name].dtype == object:
+            mask |= frame[column.name].map(lambda v: isinstance(v, str) and len(v) > length)
+    return mask
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ============================================
+# Loading
+# ============================================
+
+def ensure_import_runs(db: Session):
+    db.execute(text(
+        "CREATE TABLE IF NOT EXISTS import_runs ("
+        " id SERIAL PRIMARY KEY,"
+        " source VARCHAR(255) NOT NULL,"
+        " sheet VARCHAR(100) NOT NULL,"
+        " content_hash CHAR(64) NOT NULL,"
+        " rows_read INTEGER DEFAULT 0,"
+        " rows_inserted INTEGER DEFAULT 0,"
+        " duration_ms INTEGER DEFAULT 0,"
+        " imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    db.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_import_runs_source_sheet ON import_runs(source, sheet, imported_at)"
+    ))
+    db.commit()
+
+
+def last_hash(db: Session, source: str, sheet: str) -> Optional[str]:
+    return db.execute(
+        text("SELECT content_hash FROM import_runs WHERE source = :source AND sheet = :sheet "
+             "ORDER BY imported_at DESC, id DESC LIMIT 1"),
+        {'source': source, 'sheet': sheet}
+    ).scalar()
+
+
+def record_run(db: Session, source: str, sheet: str, content_hash: str,
+               rows_read: int = 0, rows_inserted: int = 0, seconds: float = 0.0):
+    db.execute(
+        text("INSERT INTO import_runs (source, sheet, content_hash, rows_read, rows_inserted, duration_ms) "
+             "VALUES (:source, :sheet, :hash, :rows_read, :rows_inserted, :duration_ms)"),
+        {'source': source, 'sheet': sheet, 'hash': content_hash, 'rows_read': rows_read,
+         'rows_inserted': rows_inserted, 'duration_ms': int(seconds * 1000)}
+    )
+
+
+def copy_sheet(db: Session, spec: SheetSpec, frame: pd.DataFrame, source: str, content_hash: str) -> int:
+    """COPY a normalized sheet into its table in a single transaction; returns inserted rows"""
+    columns = ', '.join(frame.columns)
+    temp_table = f"import_{spec.table}"
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+
+    started = time.perf_counter()
+    try:
+        cursor = db.connection().connection.cursor()
+        cursor.execute(
+            f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {spec.table} WITH NO DATA"
+        )
+        cursor.copy_expert(f"COPY {temp_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        cursor.execute(
+            f"INSERT INTO {spec.table} ({columns}) SELECT {columns} FROM {temp_table} "
+            f"ON CONFLICT ({spec.key}) DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        record_run(db, source, spec.sheet, content_hash, len(frame), inserted, time.perf_counter() - started)
+        db.commit()
+        return inserted
+    except Exception:
+        db.rollback()
+        raise
 
 
 def import_factories(db: Session):
@@ -23,29 +253,22 @@ def import_factories(db: Session):
 
     try:
         # Load factories index
-        with open('/app/config/factories_index.json', 'r', encoding='utf-8') as f:
+        with open(CONFIG_DIR / 'factories_index.json', 'r', encoding='utf-8') as f:
             index = json.load(f)
 
-        imported = 0
-        skipped = 0
+        existing = {row[0] for row in db.query(Factory.factory_id).all()}
+        factories = []
+        errors = 0
 
         for factory_info in index['factories']:
+            factory_id = factory_info['factory_id']
+            if factory_id in existing:
+                continue
             try:
-                factory_id = factory_info['factory_id']
-
-                # Check if exists
-                existing = db.query(Factory).filter(Factory.factory_id == factory_id).first()
-                if existing:
-                    skipped += 1
-                    continue
-
-                # Load full factory config
-                factory_file = Path(f'/app/config/factories/{factory_id}.json')
-                with open(factory_file, 'r', encoding='utf-8') as f:
+                with open(CONFIG_DIR / 'factories' / f'{factory_id}.json', 'r', encoding='utf-8') as f:
                     config = json.load(f)
 
-                # Create factory record
-                factory = Factory(
+                factories.append(Factory(
                     factory_id=factory_id,
                     name=f"{config['client_company']['name']} - {config['plant']['name']}".strip(),
                     address=config['plant']['address'],
@@ -53,385 +276,150 @@ def import_factories(db: Session):
                     contact_person=config['assignment']['supervisor']['name'],
                     config=config,
                     is_active=True
-                )
-
-                db.add(factory)
-                db.commit()  # Commit individually
-                imported += 1
-
-                if imported % 20 == 0:
-                    print(f"  Procesadas {imported} fábricas...")
-
+                ))
+                existing.add(factory_id)
             except Exception as e:
-                db.rollback()
+                errors += 1
                 print(f"  ✗ Error en {factory_id}: {e}")
 
-        print(f"✓ Importadas {imported} fábricas a PostgreSQL")
+        db.add_all(factories)
+        db.commit()
+
+        print(f"✓ Importadas {len(factories)} fábricas a PostgreSQL")
+        skipped = len(index['factories']) - len(factories) - errors
         if skipped > 0:
             print(f"  ⚠ {skipped} duplicados omitidos\n")
-        return imported
+        return len(factories)
 
     except Exception as e:
+        db.rollback()
         print(f"✗ Error importando fábricas: {e}\n")
         return 0
 
 
-def import_haken_employees(db: Session):
-    """Import 派遣社員 (Dispatch employees)"""
-    print("=" * 50)
-    print("IMPORTANDO 派遣社員 (DISPATCH EMPLOYEES)")
-    print("=" * 50)
+def import_employees(db: Session, workbook: Path, force: bool = False) -> Tuple[Dict[str, int], List[Tuple]]:
+    """Parse all employee sheets in parallel and COPY each one as soon as it is ready"""
+    counts = {spec.label: 0 for spec in SHEETS}
+    timings = []
+    source = workbook.name
 
-    try:
-        df = pd.read_excel('/app/config/employee_master.xlsm', sheet_name='派遣社員', header=1)
+    started = time.perf_counter()
+    workbook_hash = file_hash(workbook)
+    timings.append(('hash workbook', time.perf_counter() - started))
 
-        imported = 0
-        errors = 0
-        skipped = 0
+    if not force and last_hash(db, source, WORKBOOK_MARKER) == workbook_hash:
+        print(f"✓ {source} sin cambios desde la última importación, omitido\n")
+        return counts, timings
 
-        for idx, row in df.iterrows():
-            try:
-                # Skip if no employee number
-                if pd.isna(row['社員№']):
-                    continue
-
-                hakenmoto_id = int(row['社員№'])
-
-                # Check if employee already exists (skip duplicates)
-                existing = db.query(Employee).filter(Employee.hakenmoto_id == hakenmoto_id).first()
-                if existing:
-                    skipped += 1
-                    continue
-
-                # Helper function to parse dates safely
-                def parse_date(value):
-                    if pd.notna(value):
-                        try:
-                            return pd.to_datetime(value).date()
-                        except:
-                            pass
-                    return None
-
-                # Helper function to parse integers safely
-                def parse_int(value):
-                    if pd.notna(value):
-                        try:
-                            return int(float(value))
-                        except:
-                            pass
-                    return None
-
-                # Parse dates
-                hire_date = parse_date(row.get('入社日'))
-                current_hire_date = parse_date(row.get('現入社'))
-                termination_date = parse_date(row.get('退社日'))
-                zairyu_expire = parse_date(row.get('ビザ期限'))
-                dob = parse_date(row.get('生年月日'))
-                jikyu_revision_date = parse_date(row.get('時給改定'))
-                billing_revision_date = parse_date(row.get('請求改定'))
-                social_insurance_date = parse_date(row.get('社保加入'))
-                entry_request_date = parse_date(row.get('入社依頼'))
-                license_expire_date = parse_date(row.get('免許期限'))
-                optional_insurance_expire = parse_date(row.get('任意保険期限'))
-                apartment_start_date = parse_date(row.get('入居'))
-                apartment_move_out_date = parse_date(row.get('退去'))
-
-                # Parse status
-                is_active = row.get('現在') != '退社' if pd.notna(row.get('現在')) else True
-
-                # Parse integers
-                jikyu = parse_int(row.get('時給')) or 0
-                hourly_rate_charged = parse_int(row.get('請求単価'))
-                profit_difference = parse_int(row.get('差額利益'))
-                standard_compensation = parse_int(row.get('標準報酬'))
-                health_insurance = parse_int(row.get('健康保険'))
-                nursing_insurance = parse_int(row.get('介護保険'))
-                pension_insurance = parse_int(row.get('厚生年金'))
-
-                # Parse strings
-                def get_str(key):
-                    val = row.get(key)
-                    return str(val) if pd.notna(val) else None
-
-                # Create employee record with ALL fields
-                employee = Employee(
-                    hakenmoto_id=hakenmoto_id,
-                    factory_id=get_str('派遣先ID'),
-                    hakensaki_shain_id=get_str('派遣先社員ID'),
-                    full_name_kanji=get_str('氏名') or '',
-                    full_name_kana=get_str('カナ') or '',
-                    date_of_birth=dob,
-                    gender=get_str('性別'),
-                    nationality=get_str('国籍'),
-                    zairyu_expire_date=zairyu_expire,
-                    visa_type=get_str('ビザ種類'),
-                    postal_code=get_str('〒'),
-                    address=get_str('住所'),
-                    phone=None,
-                    email=None,
-                    # Employment
-                    hire_date=hire_date,
-                    current_hire_date=current_hire_date,
-                    jikyu=jikyu,
-                    jikyu_revision_date=jikyu_revision_date,
-                    position=get_str('職種'),
-                    contract_type='派遣',
-                    # Assignment
-                    assignment_location=get_str('配属先'),
-                    assignment_line=get_str('配属ライン'),
-                    job_description=get_str('仕事内容'),
-                    # Financial
-                    hourly_rate_charged=hourly_rate_charged,
-                    billing_revision_date=billing_revision_date,
-                    profit_difference=profit_difference,
-                    standard_compensation=standard_compensation,
-                    health_insurance=health_insurance,
-                    nursing_insurance=nursing_insurance,
-                    pension_insurance=pension_insurance,
-                    social_insurance_date=social_insurance_date,
-                    # License
-                    license_type=get_str('免許種類'),
-                    license_expire_date=license_expire_date,
-                    commute_method=get_str('通勤方法'),
-                    optional_insurance_expire=optional_insurance_expire,
-                    # Skills
-                    japanese_level=get_str('日本語検定'),
-                    career_up_5years=get_str('キャリアアップ5年目') == 'はい',
-                    # Apartment
-                    apartment_start_date=apartment_start_date,
-                    apartment_move_out_date=apartment_move_out_date,
-                    # Other
-                    entry_request_date=entry_request_date,
-                    notes=get_str('備考'),
-                    is_active=is_active,
-                    termination_date=termination_date
-                )
-
-                db.add(employee)
-                db.commit()  # Commit individually
-                imported += 1
-
-                if imported % 100 == 0:
-                    print(f"  Procesados {imported} empleados...")
+    factory_ids = {row[0] for row in db.query(Factory.factory_id).all()}
+    all_loaded = True
 
+    with ProcessPoolExecutor(max_workers=len(SHEETS)) as pool:
+        futures = {pool.submit(parse_sheet, str(workbook), spec): spec for spec in SHEETS}
+        for future in as_completed(futures):
+            spec = futures[future]
+            print("=" * 50)
+            print(f"IMPORTANDO {spec.label}")
+            print("=" * 50)
+            try:
+                parsed = future.result()
             except Exception as e:
-                db.rollback()
-                errors += 1
-                if errors < 10:  # Only show first 10 errors
-                    print(f"  ✗ Error en fila {idx}: {e}")
-        print(f"✓ Importados {imported} empleados 派遣社員")
-        if skipped > 0:
-            print(f"  ⚠ {skipped} duplicados omitidos")
-        if errors > 0:
-            print(f"  ⚠ {errors} errores encontrados\n")
-        return imported
-
-    except Exception as e:
-        db.rollback()
-        print(f"✗ Error importando 派遣社員: {e}\n")
-        return 0
-
-
-def import_ukeoi_employees(db: Session):
-    """Import 請負社員 (Contract employees)"""
-    print("=" * 50)
-    print("IMPORTANDO 請負社員 (CONTRACT EMPLOYEES)")
-    print("=" * 50)
-
-    try:
-        df = pd.read_excel('/app/config/employee_master.xlsm', sheet_name='請負社員', header=2)
-
-        imported = 0
-        errors = 0
-        skipped = 0
-
-        for idx, row in df.iterrows():
+                all_loaded = False
+                print(f"✗ Error leyendo {spec.label}: {e}\n")
+                continue
+
+            frame = parsed['frame']
+            timings.append((f"{spec.label} read", parsed['read']))
+            timings.append((f"{spec.label} normalize", parsed['normalize']))
+            if parsed['invalid']:
+                print(f"  ⚠ {parsed['invalid']} filas con 社員№ inválido omitidas")
+
+            if 'factory_id' in frame:
+                unknown = frame['factory_id'].notna() & ~frame['factory_id'].isin(factory_ids)
+                if unknown.any():
+                    print(f"  ⚠ {int(unknown.sum())} filas con 派遣先ID desconocido, se importan sin fábrica")
+                    frame.loc[unknown, 'factory_id'] = None
+
+            oversized = oversized_rows(frame, spec.table)
+            if oversized.any():
+                print(f"  ⚠ {int(oversized.sum())} filas con textos demasiado largos omitidas")
+                frame = frame[~oversized]
+
+            if not force and last_hash(db, source, spec.sheet) == parsed['hash']:
+                print(f"✓ {spec.label} sin cambios, omitido\n")
+                continue
+
+            load_started = time.perf_counter()
             try:
-                # Get column by index since names might be problematic
-                status = row.iloc[0] if len(row) > 0 else None
-                shain_no = row.iloc[1] if len(row) > 1 else None
-
-                # Skip if no employee number
-                if pd.isna(shain_no):
-                    continue
-
-                hakenmoto_id = int(shain_no)
-
-                # Check if already exists
-                existing = db.query(ContractWorker).filter(ContractWorker.hakenmoto_id == hakenmoto_id).first()
-                if existing:
-                    skipped += 1
-                    continue
-
-                name = row.iloc[3] if len(row) > 3 else ''
-                kana = row.iloc[4] if len(row) > 4 else ''
-                gender = row.iloc[5] if len(row) > 5 else None
-                nationality = row.iloc[6] if len(row) > 6 else None
-
-                # Jikyu
-                jikyu = 0
-                if len(row) > 9 and pd.notna(row.iloc[9]):
-                    try:
-                        jikyu = int(float(row.iloc[9]))
-                    except:
-                        pass
-
-                # Dates
-                hire_date = None
-                if len(row) > 25 and pd.notna(row.iloc[25]):
-                    try:
-                        hire_date = pd.to_datetime(row.iloc[25]).date()
-                    except:
-                        pass
-
-                termination_date = None
-                is_active = status != '退社' if pd.notna(status) else True
-                if len(row) > 26 and pd.notna(row.iloc[26]):
-                    try:
-                        termination_date = pd.to_datetime(row.iloc[26]).date()
-                    except:
-                        pass
-
-                contract_worker = ContractWorker(
-                    hakenmoto_id=hakenmoto_id,
-                    full_name_kanji=str(name) if pd.notna(name) else '',
-                    full_name_kana=str(kana) if pd.notna(kana) else '',
-                    gender=str(gender) if pd.notna(gender) else None,
-                    nationality=str(nationality) if pd.notna(nationality) else None,
-                    hire_date=hire_date,
-                    jikyu=jikyu,
-                    contract_type='請負',
-                    is_active=is_active,
-                    termination_date=termination_date
-                )
-
-                db.add(contract_worker)
-                db.commit()  # Commit individually
-                imported += 1
-
-                if imported % 50 == 0:
-                    print(f"  Procesados {imported} empleados...")
-
+                inserted = copy_sheet(db, spec, frame, source, parsed['hash'])
             except Exception as e:
-                db.rollback()
-                errors += 1
-                if errors < 10:
-                    print(f"  ✗ Error en fila {idx}: {e}")
-        print(f"✓ Importados {imported} empleados 請負社員")
-        if skipped > 0:
-            print(f"  ⚠ {skipped} duplicados omitidos")
-        if errors > 0:
-            print(f"  ⚠ {errors} errores encontrados\n")
-        return imported
-
-    except Exception as e:
-        db.rollback()
-        print(f"✗ Error importando 請負社員: {e}\n")
-        return 0
-
+                all_loaded = False
+                print(f"✗ Error importando {spec.label}: {e}\n")
+                continue
+            timings.append((f"{spec.label} copy", time.perf_counter() - load_started))
 
-def import_staff_employees(db: Session):
-    """Import スタッフ (Staff employees)"""
-    print("=" * 50)
-    print("IMPORTANDO スタッフ (STAFF)")
-    print("=" * 50)
+            counts[spec.label] = inserted
+            print(f"✓ Importados {inserted} empleados {spec.label}")
+            if len(frame) > inserted:
+                print(f"  ⚠ {len(frame) - inserted} duplicados omitidos\n")
 
-    try:
-        df = pd.read_excel('/app/config/employee_master.xlsm', sheet_name='スタッフ', header=2)
+    if counts[HAKEN.label]:
+        # explicit 派遣元IDs: the next approval must not reuse one
+        id_allocator.advance_past(db, "hakenmoto_id")
+        db.commit()
 
-        imported = 0
-        errors = 0
-        skipped = 0
-
-        for idx, row in df.iterrows():
-            try:
-                # Get by index
-                status = row.iloc[0] if len(row) > 0 else None
-                shain_no = row.iloc[1] if len(row) > 1 else None
-
-                if pd.isna(shain_no):
-                    continue
-
-                staff_id = int(shain_no)
-
-                # Check if already exists
-                existing = db.query(Staff).filter(Staff.staff_id == staff_id).first()
-                if existing:
-                    skipped += 1
-                    continue
-
-                name = row.iloc[2] if len(row) > 2 else ''
-                kana = row.iloc[3] if len(row) > 3 else ''
-
-                # Monthly salary (staff typically have monthly salary, not hourly)
-                monthly_salary = 0
-                if len(row) > 7 and pd.notna(row.iloc[7]):
-                    try:
-                        monthly_salary = int(float(row.iloc[7]))
-                    except:
-                        pass
-
-                staff = Staff(
-                    staff_id=staff_id,
-                    full_name_kanji=str(name) if pd.notna(name) else '',
-                    full_name_kana=str(kana) if pd.notna(kana) else '',
-                    monthly_salary=monthly_salary,
-                    is_active=status != '退社' if pd.notna(status) else True
-                )
-
-                db.add(staff)
-                db.commit()  # Commit individually
-                imported += 1
-
-            except Exception as e:
-                db.rollback()
-                errors += 1
-                if errors < 10:
-                    print(f"  ✗ Error en fila {idx}: {e}")
-        print(f"✓ Importados {imported} empleados スタッフ")
-        if skipped > 0:
-            print(f"  ⚠ {skipped} duplicados omitidos")
-        if errors > 0:
-            print(f"  ⚠ {errors} errores encontrados\n")
-        return imported
-
-    except Exception as e:
-        db.rollback()
-        print(f"✗ Error importando スタッフ: {e}\n")
-        return 0
+    if all_loaded:
+        record_run(db, source, WORKBOOK_MARKER, workbook_hash)
+        db.commit()
+    return counts, timings
 
 
 def main():
     """Main import function"""
+    parser = argparse.ArgumentParser(description="Bootstrap import of factories and employees")
+    parser.add_argument('--workbook', default=str(WORKBOOK), help="employee_master workbook path")
+    parser.add_argument('--force', action='store_true', help="ignore stored content hashes")
+    args = parser.parse_args()
+
     db = SessionLocal()
+    total_started = time.perf_counter()
 
     try:
         print("\n" + "=" * 50)
         print("INICIANDO IMPORTACIÓN DE DATOS")
         print("=" * 50 + "\n")
 
+        ensure_import_runs(db)
+
         # Import factories
+        started = time.perf_counter()
         factories_count = import_factories(db)
+        timings = [('fábricas', time.perf_counter() - started)]
 
         # Import employees
-        haken_count = import_haken_employees(db)
-        ukeoi_count = import_ukeoi_employees(db)
-        staff_count = import_staff_employees(db)
-
-        total_employees = haken_count + ukeoi_count + staff_count
+        counts, employee_timings = import_employees(db, Path(args.workbook), force=args.force)
+        timings.extend(employee_timings)
+        total_employees = sum(counts.values())
 
         # Summary
         print("=" * 50)
         print("RESUMEN DE IMPORTACIÓN")
         print("=" * 50)
         print(f"Fábricas:        {factories_count:4d}")
-        print(f"派遣社員:        {haken_count:4d}")
-        print(f"請負社員:        {ukeoi_count:4d}")
-        print(f"スタッフ:        {staff_count:4d}")
+        for label, count in counts.items():
+            print(f"{label}:        {count:4d}")
         print(f"{'─' * 50}")
         print(f"TOTAL Empleados: {total_employees:4d}")
         print("=" * 50)
 
+        print("TIEMPOS")
+        print("=" * 50)
+        for step, seconds in timings:
+            print(f"{step:<30} {seconds:8.2f}s")
+        print(f"{'─' * 50}")
+        print(f"{'total':<30} {time.perf_counter() - total_started:8.2f}s")
+        print("=" * 50)
+
     except Exception as e:
         print(f"\n✗ Error general: {e}")
     finally:
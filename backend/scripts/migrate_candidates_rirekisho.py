@@ -1,5 +1,9 @@
 """
 Migration script to add all rirekisho (履歴書) fields to candidates table
+
+Family members, work history, qualifications, language skills and the
+exp_* / licence flags are not columns any more: they live in the child
+tables of database/migrations/005_normalize_candidate_blocks.sql.
 """
 import sys
 import os
@@ -49,68 +53,7 @@ def migrate_candidates_table():
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS car_ownership VARCHAR(10);
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS voluntary_insurance VARCHAR(10);
 
-    -- 資格・免許 (Qualifications & Licenses)
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS forklift_license VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS tama_kake VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS mobile_crane_under_5t VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS mobile_crane_over_5t VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS gas_welding VARCHAR(10);
-
-    -- 家族構成 (Family Members) - Member 1
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_name_1 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_relation_1 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_age_1 INTEGER;
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_residence_1 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_separate_address_1 TEXT;
-
-    -- 家族構成 - Member 2
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_name_2 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_relation_2 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_age_2 INTEGER;
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_residence_2 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_separate_address_2 TEXT;
-
-    -- 家族構成 - Member 3
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_name_3 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_relation_3 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_age_3 INTEGER;
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_residence_3 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_separate_address_3 TEXT;
-
-    -- 家族構成 - Member 4
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_name_4 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_relation_4 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_age_4 INTEGER;
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_residence_4 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_separate_address_4 TEXT;
-
-    -- 家族構成 - Member 5
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_name_5 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_relation_5 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_age_5 INTEGER;
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_residence_5 VARCHAR(50);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS family_separate_address_5 TEXT;
-
-    -- 職歴 (Work History)
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS work_history_company_7 VARCHAR(200);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS work_history_entry_company_7 VARCHAR(200);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS work_history_exit_company_7 VARCHAR(200);
-
     -- 経験作業 (Work Experience)
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_nc_lathe VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_lathe VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_press VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_forklift VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_packing VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_welding VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_car_assembly VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_car_line VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_car_inspection VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_electronic_inspection VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_food_processing VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_casting VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_line_leader VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_painting VARCHAR(10);
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS exp_other TEXT;
 
     -- お弁当 (Lunch/Bento Options)
@@ -131,8 +74,6 @@ def migrate_candidates_table():
 
     -- 語学スキル (Language Skills)
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS language_skill_exists VARCHAR(10);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS language_skill_1 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS language_skill_2 VARCHAR(100);
 
     -- 日本語能力 (Japanese Language Ability)
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS japanese_qualification VARCHAR(50);
@@ -142,11 +83,6 @@ def migrate_candidates_table():
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS jlpt_score INTEGER;
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS jlpt_scheduled VARCHAR(10);
 
-    -- 有資格 (Qualifications)
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS qualification_1 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS qualification_2 VARCHAR(100);
-    ALTER TABLE candidates ADD COLUMN IF NOT EXISTS qualification_3 VARCHAR(100);
-
     -- 学歴 (Education)
     ALTER TABLE candidates ADD COLUMN IF NOT EXISTS major VARCHAR(100);
 
@@ -0,0 +1,34 @@
+"""
+Move documents uploaded before migration 008 into the blob store
+
+Hashes every document file that has no blob yet, stores it once under
+UPLOAD_DIR/blobs and points the document rows at it. Identical files and
+the copies made on candidate promotion end up sharing one blob.
+Run once after applying database/migrations/008_content_addressed_documents.sql.
+"""
+import sys
+sys.path.insert(0, '/app')
+
+from app.core.database import SessionLocal
+from app.services.blob_store import blob_store
+
+
+def main():
+    db = SessionLocal()
+
+    try:
+        print("=" * 50)
+        print("MIGRANDO DOCUMENTOS AL ALMACÉN DE BLOBS")
+        print("=" * 50)
+
+        stats = blob_store.adopt_documents(db)
+        print(f"✓ {stats['documents']} documentos migrados a {stats['blobs']} blobs nuevos")
+        if stats["missing"]:
+            print(f"  {stats['missing']} documentos sin archivo en disco (sin cambios)")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Nightly duplicate candidate report
+
+Compares every candidate with the others sharing a blocking key (birth
+date + kana, phone, kana name + birth year) and writes the likely duplicates to
+REPORTS_DIR/duplicates/candidate_duplicates_YYYYMMDD.csv.
+Intended to run once a night (cron / scheduled container).
+"""
+import sys
+sys.path.insert(0, '/app')
+
+from app.core.database import SessionLocal
+from app.services.dedup_service import dedup_service
+
+
+def main():
+    db = SessionLocal()
+
+    try:
+        print("=" * 50)
+        print("CANDIDATOS DUPLICADOS")
+        print("=" * 50)
+
+        report = dedup_service.scan(db)
+        summary = report.summary()
+        print(f"✓ {summary['candidates']} candidatos, {summary['comparisons']} comparaciones "
+              f"en {summary['blocks']} bloques")
+        if summary["skipped_blocks"]:
+            print(f"  {summary['skipped_blocks']} bloques demasiado grandes omitidos")
+
+        path = dedup_service.write_report(report)
+        print(f"✓ {summary['pairs']} pares en {summary['clusters']} grupos → {path}")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Candidate list views, sparse fields and child-table profile groups."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.candidates import list_candidates, update_candidate
+from app.core.query_stats import count_queries
+from app.models.models import (
+    Candidate, CandidateFamilyMember, CandidateQualification, CandidateSkill, CandidateSkillCode, CandidateStatus,
+    CandidateWorkHistory
+)
+from app.schemas.candidate import CandidateUpdate
+from app.services.candidate_profile import apply_profile, codes_from_mask
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://")
+    for model in (Candidate, CandidateFamilyMember, CandidateWorkHistory, CandidateQualification, CandidateSkill):
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        for index in range(3):
+            candidate = Candidate(rirekisho_id=f"UNS-{index}", full_name_kanji=f"候補{index}", mobile="090",
+                                  status=CandidateStatus.PENDING)
+            skills = ["welding", "forklift"] if index else ["welding"]
+            apply_profile(candidate, {"family_members": [{"name": "家族", "relation": "妻"}], "skills": skills,
+                                      "qualifications": ["JLPT N2", " "], "language_skills": ["英語"],
+                                      "work_history": [{"company": "前職"}]})
+            session.add(candidate)
+        session.commit()
+        yield session
+
+
+def _list(db, **params):
+    arguments = dict(page=1, page_size=20, status_filter=None, search=None, view="summary", fields=None,
+                     skills=None)
+    arguments.update(params)
+    with count_queries() as statements:
+        response = asyncio.run(list_candidates(current_user=None, db=db, **arguments))
+    select = next(sql for sql in statements if "LIMIT" in sql)
+    return json.loads(response.body), select.split(" FROM ")[0].count(",") + 1
+
+
+def test_summary_view_loads_only_its_columns(db) -> None:
+    page, columns = _list(db)
+    assert page["total"] == 3
+    assert page["items"][0]["full_name_kanji"] == "候補0"
+    assert "family_members" not in page["items"][0]
+    assert columns <= 13
+
+    page, full_columns = _list(db, view="full")
+    assert page["items"][0]["family_members"][0]["relation"] == "妻"
+    assert page["items"][0]["qualifications"] == ["JLPT N2"]
+    assert full_columns > 5 * columns
+
+
+def test_sparse_fields(db) -> None:
+    page, columns = _list(db, fields="full_name_kanji, skills")
+    assert page["items"][0] == {"id": 1, "full_name_kanji": "候補0", "skills": ["welding"]}
+    assert columns == 2
+
+    with pytest.raises(HTTPException) as error:
+        _list(db, fields="full_name_kanji,password")
+    assert error.value.status_code == 400
+
+
+def test_skill_filter_and_mask(db) -> None:
+    page, _ = _list(db, skills=[CandidateSkillCode.WELDING, CandidateSkillCode.FORKLIFT])
+    assert [item["rirekisho_id"] for item in page["items"]] == ["UNS-1", "UNS-2"]
+
+    candidate = db.get(Candidate, 2)
+    assert codes_from_mask(candidate.skills_mask) == [CandidateSkillCode.FORKLIFT, CandidateSkillCode.WELDING]
+
+
+def test_update_replaces_existing_profile_groups(db) -> None:
+    update = CandidateUpdate(
+        family_members=[{"name": "新", "relation": "子"}, {"name": "家族", "relation": "妻"}],
+        work_history=[{"company": "A社"}, {"company": "前職"}],
+        qualifications=["フォークリフト", "JLPT N2"],
+        skills=["forklift"],
+    )
+    candidate = asyncio.run(update_candidate(candidate_id=2, candidate_update=update, current_user=None, db=db))
+
+    assert [(member.position, member.name) for member in candidate.family_members] == [(1, "新"), (2, "家族")]
+    assert [entry.company for entry in candidate.work_history] == ["A社", "前職"]
+    assert candidate.qualifications == ["フォークリフト", "JLPT N2"]
+    assert candidate.language_skills == ["英語"]
+    assert candidate.skills == [CandidateSkillCode.FORKLIFT]
+    assert db.query(CandidateFamilyMember).filter_by(candidate_id=2).count() == 2
@@ -0,0 +1,49 @@
+"""API tests for stored file derivatives (WebP sizes, strong ETags)."""
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.api import files
+from app.services.blob_store import BlobStore
+from app.services.derivative_service import DerivativeService
+
+
+@pytest.fixture()
+def stored_photo(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"))
+    derivatives = DerivativeService(str(tmp_path / "derivatives"), workers=1)
+    derivatives.blob_store = store
+    monkeypatch.setattr(files, "blob_store", store)
+    monkeypatch.setattr(files, "derivative_service", derivatives)
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1000), (200, 30, 30)).save(buffer, "PNG")
+    buffer.seek(0)
+    blob = store.put(buffer)
+    yield blob
+    derivatives.shutdown()
+
+
+def test_thumbnail_rendered_on_demand_and_revalidated(client, stored_photo):
+    url = f"/api/files/{stored_photo.sha256}"
+
+    response = client.get(url, params={"size": "thumb"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert Image.open(io.BytesIO(response.content)).size == (160, 80)
+
+    again = client.get(url, params={"size": "thumb"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+
+    medium = client.get(url, params={"width": 500})
+    assert Image.open(io.BytesIO(medium.content)).size == (800, 400)
+    assert medium.headers["etag"] != etag
+
+    assert client.get("/api/files/" + "0" * 64, params={"size": "thumb"}).status_code == 404
+    assert client.get("/api/files/not-a-hash").status_code == 404
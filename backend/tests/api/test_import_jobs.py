@@ -0,0 +1,45 @@
+"""Import job progress endpoints."""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.api import import_export
+from app.services.job_service import JobRegistry, job_registry
+
+
+def test_import_job_status_and_event_stream(client: TestClient) -> None:
+    job = job_registry.create("import_employees", total=10)
+    job_registry.advance(job.id, processed=10, created=7, updated=3)
+    job_registry.complete(job.id, {"imported": 10})
+
+    response = client.get(f"/api/import/jobs/{job.id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["progress"] == 1.0
+
+    with client.stream("GET", f"/api/import/jobs/{job.id}/events") as stream:
+        body = "".join(stream.iter_text())
+    assert body.startswith("event: done\n")
+    assert '"imported": 10' in body
+
+
+def test_unknown_import_job_returns_404(client: TestClient) -> None:
+    assert client.get("/api/import/jobs/missing").status_code == 404
+    employee_job = job_registry.create("employee_import")
+    assert client.get(f"/api/import/jobs/{employee_job.id}").status_code == 404
+
+
+def test_job_progress_is_served_by_another_worker(client: TestClient, tmp_path, monkeypatch) -> None:
+    owner, other_worker = JobRegistry(str(tmp_path)), JobRegistry(str(tmp_path))
+    job = owner.create("import_employees", total=4)
+    owner.advance(job.id, processed=2)
+    monkeypatch.setattr(import_export, "job_registry", other_worker)
+
+    response = client.get(f"/api/import/jobs/{job.id}")
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["progress"]) == ("running", 0.5)
+
+    owner.complete(job.id, {"imported": 4})
+    with client.stream("GET", f"/api/import/jobs/{job.id}/events") as stream:
+        assert "".join(stream.iter_text()).startswith("event: done\n")
+    assert client.get("/api/import/jobs/../../etc/passwd").status_code == 404
@@ -1,12 +1,44 @@
 """Pytest fixtures."""
 from __future__ import annotations
 
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 
+from app.core.database import Base
+from app.core.query_stats import count_queries
 from app.main import app
 
 
 @pytest.fixture()
 def client() -> TestClient:
     return TestClient(app)
+
+
+@pytest.fixture()
+def db():
+    """Session on an in-memory SQLite schema with foreign keys enforced (as on PostgreSQL)"""
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture()
+def assert_max_queries():
+    """``with assert_max_queries(3): client.get(...)`` fails when more statements run"""
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries executed, expected at most {limit}:\n" + "\n".join(statements)
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,50 @@
+"""Database URL helpers."""
+from __future__ import annotations
+
+import pytest
+from fastapi import Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import ReplicaRouter, to_async_url, wants_primary
+from app.core.db_pool import PoolMetrics, instrument_engine, instrumented_pool
+
+
+def test_to_async_url_swaps_in_async_drivers() -> None:
+    assert to_async_url("postgresql://u:p@db:5432/uns") == "postgresql+asyncpg://u:p@db:5432/uns"
+    assert to_async_url("postgresql+psycopg2://u:p@db/uns") == "postgresql+asyncpg://u:p@db/uns"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path) -> None:
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool(QueuePool, metrics),
+        pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    instrument_engine(engine, metrics)
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    status = metrics.snapshot()
+    assert (status["checkouts"], status["pool_timeouts"], status["in_use"]) == (1, 1, 1)
+    held.close()
+    assert metrics.snapshot()["in_use"] == 0
+
+
+def test_replica_router_falls_back_to_primary(tmp_path) -> None:
+    assert ReplicaRouter(None, 10, 5).replica_ok() is False
+
+    replica = ReplicaRouter(f"sqlite:///{tmp_path / 'replica.db'}", max_lag=10, check_interval=5)
+    assert replica.replica_ok() is True
+    assert str(replica.session().get_bind().url).endswith("replica.db")
+
+    unreachable = ReplicaRouter("postgresql://u:p@127.0.0.1:1/uns", max_lag=10, check_interval=60)
+    assert unreachable.replica_ok() is False and unreachable.lag is None
+
+    request = Request({"type": "http", "headers": [(b"x-read-your-writes", b"1")]})
+    assert wants_primary(request) is True
+    assert wants_primary(Request({"type": "http", "headers": []})) is False
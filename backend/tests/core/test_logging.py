@@ -0,0 +1,61 @@
+"""Background log writer, backpressure and request sampling."""
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.core.logging import BatchingSink, RotatingFile, request_sample_rate
+
+
+class _Message(str):
+    def __new__(cls, text: str, level: int = 20):
+        message = super().__new__(cls, text)
+        message.record = {"level": SimpleNamespace(no=level)}
+        return message
+
+
+def test_batching_sink_batches_writes_and_drops_info_when_full() -> None:
+    writes = []
+    release = threading.Event()
+
+    def write(data: str) -> None:
+        release.wait(5)
+        writes.append(data)
+
+    sink = BatchingSink("test", write, max_queue=2, batch_size=1, flush_seconds=0.01, block_seconds=0.01)
+    sink(_Message("first\n"))  # taken by the writer, which then blocks
+    while sink._buffer:
+        time.sleep(0.001)
+    for index in range(3):
+        sink(_Message(f"info-{index}\n"))
+    sink(_Message("error\n", level=40))  # waits block_seconds, then dropped as well
+    assert sink.dropped == 2
+
+    release.set()
+    sink.stop()
+    assert writes == ["first\n", "info-0\ninfo-1\n"]
+
+    sink(_Message("late\n"))  # after shutdown records are written directly
+    assert writes[-1] == "late\n"
+
+
+def test_rotating_file_keeps_backups(tmp_path) -> None:
+    log = RotatingFile(tmp_path / "app.log", max_bytes=10, backup_count=2)
+    for index in range(4):
+        log.write(f"line-{index}-xxxx\n")
+    log.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["app.log.1", "app.log.2"]
+    assert (tmp_path / "app.log.1").read_text() == "line-3-xxxx\n"
+
+
+def test_request_sample_rate_keeps_errors_and_slow_requests(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.1)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATES", {"/api/health": 0.0})
+    monkeypatch.setattr(settings, "LOG_SLOW_REQUEST_MS", 500)
+
+    assert request_sample_rate("/api/employees/", 200, 0.01) == 0.1
+    assert request_sample_rate("/api/health", 200, 0.01) == 0.0
+    assert request_sample_rate("/api/health", 503, 0.01) == 1.0
+    assert request_sample_rate("/api/health", 200, 0.6) == 1.0
@@ -0,0 +1,41 @@
+"""Metrics registry and Prometheus exposition."""
+from __future__ import annotations
+
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_exposition_merges_worker_snapshots(tmp_path) -> None:
+    registry = MetricsRegistry(str(tmp_path))
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, route="/a")
+        requests.inc(route="/a")
+
+    # Another live worker (the parent process) and a dead one
+    other = MetricsRegistry()
+    other.counter("requests_total", "Requests", ("route",)).inc(2, route="/a")
+    (tmp_path / f"worker-{os.getppid()}.json").write_text(json.dumps(other.snapshot()))
+    (tmp_path / "worker-999999999.json").write_text(json.dumps(other.snapshot()))
+
+    text = registry.exposition()
+    assert 'requests_total{route="/a"} 5' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert not (tmp_path / "worker-999999999.json").exists()
+
+
+def test_prometheus_endpoint_reports_route_templates(client: TestClient) -> None:
+    client.get("/api/monitoring/health")
+    response = client.get("/api/monitoring/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/monitoring/health",status="200"}' in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
@@ -0,0 +1,52 @@
+"""Pure ASGI request middleware: headers, streaming and exception mapping."""
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import UNSException
+from app.core.middleware import RequestMiddleware
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                yield f"chunk-{index}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("kaput")
+
+    @app.get("/uns")
+    async def uns():
+        raise UNSException("Empleado no encontrado")
+
+    app.add_middleware(RequestMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_streaming_response_passes_through_with_headers() -> None:
+    response = _client().get("/stream")
+    assert response.status_code == 200
+    assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "x-process-time" in response.headers and "x-db-queries" in response.headers
+
+
+def test_exceptions_become_json_errors_with_security_headers() -> None:
+    client = _client()
+
+    response = client.get("/boom")
+    assert response.status_code == 500
+    assert response.json()["detail"]["details"] == "kaput"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+    response = client.get("/uns")
+    assert response.status_code >= 400
+    assert response.headers["x-content-type-options"] == "nosniff"
@@ -0,0 +1,34 @@
+"""Per-request query counting and the max-queries helper."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.query_stats import normalize_sql, track_queries
+
+
+def test_track_queries_counts_and_flags_slow_statements(monkeypatch) -> None:
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+
+    with track_queries() as stats, engine.connect() as conn:
+        for value in range(3):
+            conn.execute(text("SELECT :v"), {"v": value})
+    assert (stats.count, stats.slow) == (3, 3) and stats.seconds > 0
+
+    assert normalize_sql("SELECT *\n  FROM employees WHERE id IN (?, ?, ?) AND name = 'x' LIMIT 20") == (
+        "SELECT * FROM employees WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+
+
+def test_assert_max_queries_reports_extra_statements(assert_max_queries) -> None:
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with assert_max_queries(2):
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        with pytest.raises(AssertionError, match="3 queries executed"):
+            with assert_max_queries(2):
+                for value in range(3):
+                    conn.execute(text("SELECT :v"), {"v": value})
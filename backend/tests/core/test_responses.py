@@ -0,0 +1,54 @@
+"""Fast list rendering and negotiated compression."""
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ConfigDict, EmailStr
+
+from app.core.middleware import CompressionMiddleware, _accepted_encodings
+from app.core.responses import ORJSONResponse, list_response, page_response
+
+
+class _Row(BaseModel):
+    id: int
+    email: Optional[EmailStr] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+def test_page_and_list_responses_render_orm_rows() -> None:
+    rows = [SimpleNamespace(id=index, email=f"w{index}@uns.jp") for index in range(3)]
+
+    page = json.loads(page_response(_Row, rows, total=45, page=2, page_size=20).body)
+    assert page["items"][0] == {"id": 0, "email": "w0@uns.jp"}
+    assert (page["total"], page["page"], page["total_pages"]) == (45, 2, 3)
+
+    assert json.loads(list_response(_Row, rows[:1]).body) == [{"id": 0, "email": "w0@uns.jp"}]
+    assert ORJSONResponse({"rate": Decimal("1.50"), 1: "x"}).body == b'{"rate":"1.50","1":"x"}'
+
+
+def test_compression_is_negotiated() -> None:
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return {"items": ["x" * 50] * 100}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    client = TestClient(app)
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["items"][0] == "x" * 50
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+    assert _accepted_encodings("br;q=0, gzip;q=0.8, deflate") == {"gzip", "deflate"}
@@ -0,0 +1,41 @@
+"""Unit tests for timer card archival helpers."""
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.archive_service import TIMER_CARD_COLUMNS, ArchiveService
+from app.utils.dates import add_months, month_bounds
+
+
+def test_month_bounds_handles_december():
+    assert month_bounds(2025, 12) == (date(2025, 12, 1), date(2026, 1, 1))
+    assert month_bounds(2025, 2) == (date(2025, 2, 1), date(2025, 3, 1))
+
+
+def test_archive_cutoff_keeps_hot_window(tmp_path):
+    service = ArchiveService(archive_dir=str(tmp_path))
+    cutoff = service.archive_cutoff(date(2025, 2, 15))
+    assert cutoff == add_months(2025, 2, -settings.TIMER_CARD_HOT_MONTHS)
+
+
+def test_load_month_reads_cold_storage(tmp_path):
+    service = ArchiveService(archive_dir=str(tmp_path), archive_format="csv.gz")
+    path = service.archive_path(2024, 1)
+    path.parent.mkdir(parents=True)
+
+    frame = pd.DataFrame([
+        {"id": 1, "employee_id": 10, "factory_id": "Factory-01", "work_date": "2024-01-05",
+         "regular_hours": 8.0, "overtime_hours": 1.5, "night_hours": 0.0, "holiday_hours": 0.0,
+         "is_approved": True},
+        {"id": 2, "employee_id": 11, "factory_id": "Factory-02", "work_date": "2024-01-05",
+         "regular_hours": 8.0, "overtime_hours": 0.0, "night_hours": 0.0, "holiday_hours": 0.0,
+         "is_approved": True},
+    ]).reindex(columns=TIMER_CARD_COLUMNS)
+    frame.to_csv(path, index=False, compression="gzip")
+
+    loaded = service.load_month(2024, 1, factory_id="Factory-01")
+    assert list(loaded["id"]) == [1]
+    assert service.load_month(2024, 2).empty
@@ -0,0 +1,101 @@
+"""Unit tests for content-addressed document storage and garbage collection."""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import update
+from starlette.datastructures import Headers
+
+from app.api import candidates as candidates_api
+from app.core.exceptions import ValidationError
+from app.models.models import Blob, Candidate, Document, DocumentType, Employee, TimerCardUpload
+from app.services import onboarding_service as onboarding_module
+from app.services.blob_store import BlobStore
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"), grace_hours=1)
+    monkeypatch.setattr(onboarding_module, "blob_store", store)
+    monkeypatch.setattr(candidates_api, "blob_store", store)
+    return store
+
+
+def _age(path: str) -> None:
+    old = (datetime.now() - timedelta(hours=2)).timestamp()
+    os.utime(path, (old, old))
+
+
+def test_identical_uploads_are_stored_once(store):
+    first = store.put(io.BytesIO(b"scan" * 1000))
+    second = store.put(io.BytesIO(b"scan" * 1000))
+    assert first.created and not second.created
+    assert first.path == second.path == str(store.path_for(first.sha256))
+    assert first.path.endswith(f"/{first.sha256[:2]}/{first.sha256[2:4]}/{first.sha256}")
+    assert len([path for path in store.root.rglob("*") if path.is_file()]) == 1
+
+    with pytest.raises(ValidationError):
+        store.put(io.BytesIO(b"x" * 11), max_size=10)
+    assert list((store.root / "tmp").iterdir()) == []
+
+
+def test_promotion_shares_blobs_and_gc_keeps_referenced(store, db):
+    candidate = Candidate(rirekisho_id="UNS-1")
+    employee = Employee(hakenmoto_id=1, full_name_kanji="社員", jikyu=1000)
+    db.add_all([candidate, employee])
+    db.flush()
+    kept = store.put(io.BytesIO(b"rirekisho"))
+    store.add_reference(db, kept, "application/pdf")
+    db.add(Document(candidate_id=candidate.id, document_type=DocumentType.RIREKISHO, file_name="a.pdf",
+                    file_path=kept.path, blob_sha256=kept.sha256))
+    db.commit()
+
+    onboarding_module.OnboardingService().copy_documents(db, {candidate.id: employee.id}, user_id=None)
+    db.commit()
+    assert db.get(Blob, kept.sha256).ref_count == 2
+
+    dropped = store.put(io.BytesIO(b"old upload"))
+    store.add_reference(db, dropped)
+    stray = store.put(io.BytesIO(b"aborted upload"))  # never referenced
+    scan = store.put(io.BytesIO(b"timer card scan"))
+    store.add_reference(db, scan, "image/png")
+    db.add(TimerCardUpload(blob_sha256=scan.sha256, file_name="october.png"))
+    db.commit()
+    store.release(db, dropped.sha256)
+    db.execute(update(Blob).values(updated_at=datetime.now(timezone.utc) - timedelta(hours=2)))
+    db.commit()
+    for blob in (kept, dropped, stray, scan):
+        _age(blob.path)
+
+    stats = store.collect_garbage(db)
+    assert (stats["rows"], stats["files"]) == (1, 2)
+    assert os.path.exists(kept.path) and os.path.exists(scan.path)
+    assert not os.path.exists(dropped.path) and not os.path.exists(stray.path)
+    assert sorted(sha256 for (sha256,) in db.query(Blob.sha256)) == sorted([kept.sha256, scan.sha256])
+
+
+def test_first_upload_and_legacy_adoption_create_the_blob_row_first(store, db, tmp_path):
+    candidate = Candidate(rirekisho_id="UNS-2")
+    db.add(candidate)
+    legacy = tmp_path / "legacy.pdf"
+    legacy.write_bytes(b"old contract")
+    db.add(Document(candidate=candidate, document_type=DocumentType.CONTRACT, file_name="legacy.pdf",
+                    file_path=str(legacy), mime_type="application/pdf"))
+    db.commit()
+
+    upload = UploadFile(io.BytesIO(b"new scan"), filename="scan.pdf",
+                        headers=Headers({"content-type": "application/pdf"}))
+    response = asyncio.run(candidates_api.upload_document(
+        candidate.id, file=upload, document_type="other", current_user=SimpleNamespace(id=None), db=db
+    ))
+    uploaded = db.get(Document, response.document_id)
+    assert db.get(Blob, uploaded.blob_sha256).ref_count == 1
+
+    assert store.adopt_documents(db)["documents"] == 1
+    assert db.query(Blob).count() == 2
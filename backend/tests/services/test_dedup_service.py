@@ -0,0 +1,77 @@
+"""Unit tests for duplicate candidate normalization, blocking and scoring."""
+from __future__ import annotations
+
+import csv
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.models import Candidate
+from app.services.dedup_service import (
+    DedupRecord, DedupService, blocking_keys, normalize_kana, normalize_phone, normalize_roman, score_pair
+)
+
+PEOPLE = [
+    # same person three times: kana/romaji variants, one typo'd birth date
+    ("UNS-1", "グエン ヴァン アン", "NGUYEN VAN AN", date(1995, 4, 3), "090-1234-5678"),
+    ("UNS-2", "ぐえん ばん あん", "Nguyễn Văn An", date(1995, 4, 3), None),
+    ("UNS-3", "ｸﾞｴﾝ ｳﾞｧﾝ ｱﾝ", "An Nguyen Van", date(1995, 3, 4), "+81 90 1234 5678"),
+    # same birth date, different person
+    ("UNS-4", "グエン ティ ハー", "NGUYEN THI HA", date(1995, 4, 3), "080-0000-0000"),
+    ("UNS-5", "シルバ マリア", "SILVA MARIA", date(1988, 1, 20), None),
+]
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://")
+    Candidate.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Candidate(rirekisho_id=rid, full_name_kana=kana, full_name_roman=roman, date_of_birth=dob, mobile=mobile)
+            for rid, kana, roman, dob, mobile in PEOPLE
+        ])
+        session.commit()
+        yield session
+
+
+def test_normalization():
+    assert normalize_kana("ぐえん　ゔぁん・あん") == normalize_kana("ｸﾞｴﾝ ｳﾞｧﾝ ｱﾝ") == "グエンヴアンアン"
+    assert normalize_roman("NGUYỄN Văn  An") == normalize_roman("An Nguyen Van") == "an nguyen van"
+    assert normalize_phone("+81 90-1234-5678") == normalize_phone("０９０（１２３４）５６７８") == "09012345678"
+    assert normalize_phone("123") is None
+
+
+def test_scoring_and_blocking():
+    first, second, third, other, _ = (DedupRecord.from_values(None, rid, None, kana, roman, dob, None, mobile)
+                                      for rid, kana, roman, dob, mobile in PEOPLE)
+    assert set(blocking_keys(first)) & set(blocking_keys(second))
+    assert score_pair(first, second)[0] >= 0.8
+    assert score_pair(first, third)[1] == ["name", "similar_date_of_birth", "phone"]
+    assert score_pair(first, other)[0] < 0.7
+
+
+def test_find_duplicates_on_create(db):
+    record = DedupRecord.from_values(full_name_kana="グエン・バン・アン", date_of_birth="1995/04/03")
+    matches = DedupService().find_duplicates(db, record)
+    assert [pair.b.rirekisho_id for pair in matches] == ["UNS-2", "UNS-1"]  # UNS-2 has the same kana
+
+    phone_only = DedupRecord.from_values(full_name_roman="nguyen van an", mobile="09012345678")
+    # indexed lookup covers digits / hyphenated spellings; "+81 90 ..." (UNS-3) is left to the nightly report
+    assert [pair.b.rirekisho_id for pair in DedupService().find_duplicates(db, phone_only)] == ["UNS-1"]
+
+
+def test_batch_report_clusters(db, tmp_path):
+    service = DedupService()
+    report = service.scan(db)
+    assert report.candidates == 5
+    assert report.clusters == [[1, 2, 3]]
+    assert report.comparisons < 10  # 5 * 4 / 2 without blocking
+
+    path = service.write_report(report, str(tmp_path))
+    with open(path, encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    # UNS-2 and UNS-3 share no block; the cluster joins them through UNS-1
+    assert {row["cluster"] for row in rows} == {"1"} and len(rows) == 2
@@ -0,0 +1,61 @@
+"""Unit tests for the streaming employee importer."""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from openpyxl import Workbook
+
+from app.models.models import Employee, Factory
+from app.services.employee_import_service import EmployeeImportService, FactoryNameIndex
+
+
+@pytest.fixture()
+def db(db):
+    db.add(Factory(factory_id="Factory-01", name="高雄工業 本社工場"))
+    db.commit()
+    return db
+
+
+def _workbook(path, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["現在", "社員№", "派遣先", "氏名", "時給", "生年月日", "入社日"])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def test_factory_index_matches_partial_names():
+    index = FactoryNameIndex([("Factory-01", "高雄工業 本社工場"), ("Factory-02", "加藤木材")])
+    assert index.resolve("高雄工業") == "Factory-01"
+    assert index.resolve("加藤木材") == "Factory-02"
+    assert index.resolve("unknown") is None
+
+
+def test_import_creates_then_updates_in_batches(db, tmp_path):
+    path = _workbook(tmp_path / "employees.xlsx", [
+        ["在職中", 1001, "高雄工業", "山田 太郎", 1200, datetime(1990, 4, 1), 44060],
+        ["退社", None, None, "佐藤 花子", "-", None, None],
+        [None, "abc", None, "無効 行", 1000, None, None],
+        [None, 2001, None, None, 1100, None, None],
+    ])
+    service = EmployeeImportService(batch_size=2)
+
+    result = service.import_file(db, path, "employees.xlsx")
+    assert (result.created, result.updated, result.failed) == (2, 0, 2)
+    assert [error["row"] for error in result.errors] == [4, 5]
+
+    taro = db.query(Employee).filter(Employee.hakenmoto_id == 1001).one()
+    assert taro.factory_id == "Factory-01"
+    assert taro.date_of_birth == date(1990, 4, 1)
+    assert taro.hire_date == date(2020, 8, 17)  # raw Excel serial
+    hanako = db.query(Employee).filter(Employee.hakenmoto_id == 1002).one()
+    assert hanako.full_name_kanji == "佐藤 花子" and hanako.is_active is False
+
+    path = _workbook(tmp_path / "update.xlsx", [["在職中", 1001, None, None, 1300, None, None]])
+    result = service.import_file(db, path, "update.xlsx")
+    assert (result.created, result.updated) == (0, 1)
+    db.refresh(taro)
+    assert taro.jikyu == 1300 and taro.full_name_kanji == "山田 太郎"
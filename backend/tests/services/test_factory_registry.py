@@ -0,0 +1,71 @@
+"""Unit tests for the compiled factory rules registry."""
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.models.models import Factory
+from app.services.factory_registry import FactoryRegistry, compile_rules
+
+DETAILED_CONFIG = {
+    "factory_id": "Factory-01",
+    "working_hours": {"shifts": [
+        {"shift_id": "day", "shift_name": "日勤", "start_time": "08:00", "end_time": "17:00",
+         "break_minutes": 60, "jikyu_tanka": 1500},
+    ]},
+    "overtime_rules": {"overtime_25": {"rate": 0.3}, "overtime_35": {"rate": 0.4}},
+    "bonuses": {
+        "attendance_bonus": {"enabled": True, "amount": 10000, "conditions": {"full_month": True}},
+        "gasoline_allowance": {"enabled": True, "amount_per_day": 500},
+    },
+}
+
+
+def test_compile_detailed_and_contract_configs():
+    rules = compile_rules("Factory-01", DETAILED_CONFIG)
+    assert rules.billing_rate == 1500 and rules.shift("day").break_minutes == 60
+    assert (rules.overtime_rate, rules.holiday_rate, rules.night_rate) == (0.3, 0.4, 0.25)
+    assert rules.bonuses(20) == (10000, 10000)
+    assert rules.bonuses(19) == (0, 9500)
+
+    contract = compile_rules("Factory-02", {"client_company": {"name": "加藤木材"}, "job": {"hourly_rate": 1700}})
+    assert contract.billing_rate == 1700 and contract.name == "加藤木材" and contract.shifts == ()
+
+    with pytest.raises(ValidationError):
+        compile_rules("Factory-03", {"working_hours": {"shifts": [{"start_time": "8am"}]}})
+
+
+def test_registry_hot_reloads_changed_files_and_rows(db, tmp_path):
+    config_file = tmp_path / "Factory-01.json"
+    config_file.write_text(json.dumps(DETAILED_CONFIG), encoding="utf-8")
+    registry = FactoryRegistry(config_dir=str(tmp_path), reload_seconds=0)
+
+    assert registry.get(db, "Factory-01").billing_rate == 1500
+    assert registry.refresh(db) == []  # nothing changed, nothing recompiled
+
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    config["working_hours"]["shifts"][0]["jikyu_tanka"] = 1600
+    config_file.write_text(json.dumps(config), encoding="utf-8")
+    os.utime(config_file, ns=(0, config_file.stat().st_mtime_ns + 1_000_000))
+    assert registry.get(db, "Factory-01").billing_rate == 1600
+
+    # A broken edit keeps the last good rules and records the error
+    config_file.write_text(json.dumps({"working_hours": {"shifts": [{"jikyu_tanka": "x"}]}}), encoding="utf-8")
+    os.utime(config_file, ns=(0, config_file.stat().st_mtime_ns + 2_000_000))
+    assert registry.get(db, "Factory-01").billing_rate == 1600
+    assert "Factory-01" in registry.errors
+
+    # The DB row takes precedence over the file
+    factory = Factory(factory_id="Factory-01", name="高雄工業", config={"job": {"hourly_rate": 1800}})
+    db.add(factory)
+    db.commit()
+    rules = registry.get(db, "Factory-01")
+    assert (rules.billing_rate, rules.source, rules.name) == (1800, "db", "高雄工業")
+
+    factory.config = {"job": {"hourly_rate": 1900}}
+    db.commit()
+    registry.invalidate("Factory-01")
+    assert registry.get(db, "Factory-01").billing_rate == 1900
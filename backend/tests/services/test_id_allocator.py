@@ -0,0 +1,113 @@
+"""Unit tests for business id allocation (counter fallback, retries, concurrency)."""
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.models.models import Candidate, Employee
+from app.services.id_allocator import IdAllocator
+
+
+def _engine(url: str):
+    engine = create_engine(url, connect_args={"timeout": 30})
+
+    # pysqlite's deferred BEGIN makes concurrent writers fail on lock upgrade
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = _engine(f"sqlite:///{tmp_path / 'ids.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_ids_continue_after_existing_rows(engine):
+    allocator = IdAllocator(backoff_seconds=0)
+    with Session(engine) as db:
+        db.add(Candidate(rirekisho_id="UNS-1500"))
+        db.add(Employee(hakenmoto_id=41, full_name_kanji="既存", jikyu=1200))
+        db.commit()
+
+        assert allocator.next(db, "rirekisho_id") == "UNS-1501"
+        assert allocator.reserve(db, "hakenmoto_id", 3) == [42, 43, 44]
+        allocator.advance_past(db, "hakenmoto_id", 100)
+        assert allocator.next(db, "hakenmoto_id") == 101
+
+
+def test_advance_past_accounts_for_unused_sequence_value():
+    statements = []
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        execute=lambda statement, params: statements.append((str(statement), params)),
+    )
+    IdAllocator().advance_past(db, "hakenmoto_id", 42)
+
+    (sql, params), = statements
+    # seeded with setval(seq, max + 1, false): last_value itself is still unused
+    assert "CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM hakenmoto_id_seq" in sql
+    assert params == {"sequence": "hakenmoto_id_seq", "value": 42}
+
+
+def test_insert_retries_collisions(engine):
+    allocator = IdAllocator(backoff_seconds=0)
+    with Session(engine) as db:
+        assert allocator.next(db, "hakenmoto_id") == 1
+        db.add(Employee(hakenmoto_id=2, full_name_kanji="手入力", jikyu=1200))  # written behind the allocator's back
+        db.add(Employee(hakenmoto_id=3, full_name_kanji="手入力", jikyu=1200))
+        db.commit()
+
+        employee = allocator.insert(
+            db, "hakenmoto_id", lambda value: Employee(hakenmoto_id=value, full_name_kanji="新", jikyu=1200)
+        )
+        db.commit()
+        assert employee.hakenmoto_id == 4
+
+        with pytest.raises(IntegrityError):  # other constraint errors are not retried
+            allocator.insert(db, "hakenmoto_id", lambda value: Employee(hakenmoto_id=value))
+
+
+def test_parallel_onboarding_has_no_duplicates(engine):
+    allocator = IdAllocator(backoff_seconds=0.001)
+    make_session = sessionmaker(bind=engine)
+    errors = []
+
+    def onboard(worker: int) -> None:
+        try:
+            for index in range(10):
+                with make_session() as db:
+                    candidate = allocator.insert(db, "rirekisho_id", lambda value: Candidate(rirekisho_id=value))
+                    allocator.insert(db, "hakenmoto_id", lambda value: Employee(
+                        hakenmoto_id=value, rirekisho_id=candidate.rirekisho_id, full_name_kanji=f"{worker}-{index}",
+                        jikyu=1200,
+                    ))
+                    db.commit()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=onboard, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with Session(engine) as db:
+        assert db.query(func.count(func.distinct(Employee.hakenmoto_id))).scalar() == 80
+        assert db.query(func.count(func.distinct(Candidate.rirekisho_id))).scalar() == 80
+        assert sorted(value for (value,) in db.query(Employee.hakenmoto_id)) == list(range(1, 81))
@@ -0,0 +1,86 @@
+"""Unit tests for the staged import pipeline."""
+from __future__ import annotations
+
+from datetime import date, time
+
+import json
+
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.models import Employee, Factory, TimerCard
+from app.services.id_allocator import id_allocator
+from app.services.import_service import ImportService
+
+
+@pytest.fixture()
+def db(db):
+    db.add(Factory(factory_id="Factory-01", name="高雄工業 本社工場"))
+    db.add(Employee(hakenmoto_id=500, full_name_kanji="既存 社員", jikyu=1100, phone="090-0000-0000"))
+    db.commit()
+    return db
+
+
+def test_employee_import_validates_in_staging_and_merges(db, tmp_path):
+    path = tmp_path / "employees.xlsx"
+    pd.DataFrame([
+        {"派遣元ID": 500, "氏名": "既存 社員", "生年月日": "1990-01-02", "性別": "男性", "携帯電話": None},
+        {"派遣元ID": 501, "氏名": "新規 社員", "生年月日": "1995-05-06", "性別": "女", "携帯電話": "080-1111-2222"},
+        {"派遣元ID": 501, "氏名": "重複 社員", "生年月日": "1995-05-06", "性別": "女", "携帯電話": None},
+        {"派遣元ID": "x", "氏名": None, "生年月日": "someday", "性別": "?", "携帯電話": None},
+    ]).to_excel(path, index=False)
+    id_allocator.advance_past(db, "hakenmoto_id")  # sequence at 500, before the file's explicit ids
+    db.commit()
+
+    results = ImportService().import_employees_from_excel(db, str(path))
+
+    assert (results["created"], results["updated"], results["failed"]) == (1, 1, 2)
+    errors = {error["row"]: error["error"] for error in results["errors"]}
+    assert errors[4] == "Duplicate 派遣元ID in file"
+    assert "派遣元ID must be a number" in errors[5] and "性別 must be 男性 or 女性" in errors[5]
+
+    existing = db.query(Employee).filter(Employee.hakenmoto_id == 500).one()
+    assert existing.date_of_birth == date(1990, 1, 2)
+    assert existing.phone == "090-0000-0000" and existing.jikyu == 1100
+    created = db.query(Employee).filter(Employee.hakenmoto_id == 501).one()
+    assert created.full_name_kanji == "新規 社員" and created.jikyu == 0
+    assert id_allocator.next(db, "hakenmoto_id") == 502
+
+
+def test_timer_card_import_resolves_employees_and_hours(db, tmp_path):
+    path = tmp_path / "timer.xlsx"
+    pd.DataFrame([
+        {"日付": "2025-10-01", "社員ID": 500, "出勤時刻": "08:00", "退勤時刻": "19:00", "休憩": 60},
+        {"日付": "2025-11-01", "社員ID": 500, "出勤時刻": "08:00", "退勤時刻": "17:00", "休憩": 60},
+        {"日付": "2025-10-02", "社員ID": 999, "出勤時刻": "08:00", "退勤時刻": "17:00", "休憩": 60},
+    ]).to_excel(path, index=False)
+
+    results = ImportService().import_timer_cards_from_excel(db, str(path), "Factory-01", 2025, 10)
+
+    assert (results["created"], results["failed"]) == (1, 2)
+    card = db.query(TimerCard).one()
+    assert card.clock_in == time(8, 0)
+    assert float(card.regular_hours) == 8.0 and float(card.overtime_hours) == 2.0
+
+
+def test_factory_config_staging_matches_jsonb_target(db, tmp_path, monkeypatch):
+    config = {"factory_id": "Factory-02", "client_company": {"name": "高雄工業"}, "plant": {"name": "岡山工場"},
+              "assignment": {}, "job": {}}
+    (tmp_path / "factory.json").write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+    staged = {}
+    run_pipeline = ImportService._run_pipeline
+
+    def capture(self, db, staging, *args, **kwargs):
+        staged["table"] = staging
+        return run_pipeline(self, db, staging, *args, **kwargs)
+
+    monkeypatch.setattr(ImportService, "_run_pipeline", capture)
+    results = ImportService().import_factory_configs_from_json(db, str(tmp_path))
+
+    assert results["created"] == 1
+    assert db.query(Factory).filter_by(factory_id="Factory-02").one().config["plant"]["name"] == "岡山工場"
+    # PostgreSQL cannot COALESCE json with jsonb (factories.config is JSONB)
+    dialect = postgresql.dialect()
+    assert staged["table"].c.config.type.compile(dialect=dialect) == "JSONB"
+    assert Factory.__table__.c.config.type.compile(dialect=dialect) == "JSONB"
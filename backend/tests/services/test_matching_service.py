@@ -0,0 +1,85 @@
+"""Unit tests for job requirements and vectorized candidate matching."""
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationError
+from app.models.models import Candidate, CandidateSkill, CandidateSkillCode as Skill, CandidateStatus, Factory
+from app.services import matching_service
+from app.services.candidate_profile import apply_profile
+from app.services.factory_registry import FactoryRegistry, compile_requirements
+from app.services.matching_service import MatchingEngine
+
+LATHE_JOB = {
+    "factory_id": "Factory-01",
+    "plant": {"name": "恵那工場", "address": "岐阜県恵那市武並町新竹折８９番地"},
+    "job": {"description": "ＮＣ旋盤、マシニングセンター等の工作機械を使い製品を加工"},
+}
+FORKLIFT_JOB = {
+    "factory_id": "Factory-02",
+    "plant": {"address": "愛知県名古屋市"},
+    "job": {"description": "", "requirements": {
+        "skills": ["packing"], "required_skills": ["forklift_license"], "jlpt": "N3", "max_commute_minutes": 45,
+    }},
+}
+
+
+@pytest.fixture()
+def db(tmp_path, monkeypatch):
+    for config in (LATHE_JOB, FORKLIFT_JOB):
+        (tmp_path / f"{config['factory_id']}.json").write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.setattr(matching_service, "factory_registry", FactoryRegistry(str(tmp_path), reload_seconds=0))
+
+    engine = create_engine("sqlite://")
+    for model in (Factory, Candidate, CandidateSkill):
+        model.__table__.create(engine)
+    people = [
+        ("UNS-1", ["nc_lathe", "lathe"], "N4", 30, "岐阜県恵那市", CandidateStatus.PENDING),
+        ("UNS-2", ["lathe"], "N2", None, "愛知県名古屋市", CandidateStatus.APPROVED),
+        ("UNS-3", ["forklift_license", "packing"], "N2", 40, "愛知県豊田市", CandidateStatus.PENDING),
+        ("UNS-4", ["forklift_license", "packing"], "N4", 20, "愛知県豊田市", CandidateStatus.PENDING),
+        ("UNS-5", ["nc_lathe", "lathe"], "N1", 10, "岐阜県", CandidateStatus.HIRED),
+    ]
+    with Session(engine) as session:
+        for rirekisho_id, skills, level, commute, address, state in people:
+            candidate = Candidate(rirekisho_id=rirekisho_id, japanese_level=level, commute_time_oneway=commute,
+                                  current_address=address, status=state)
+            apply_profile(candidate, {"skills": skills})
+            session.add(candidate)
+        session.commit()
+        yield session
+
+
+def test_requirements_from_description_and_config():
+    inferred = compile_requirements(LATHE_JOB)
+    assert inferred.inferred and inferred.prefecture == "岐阜県"
+    assert inferred.skills_mask == Skill.NC_LATHE.bit | Skill.LATHE.bit
+
+    explicit = compile_requirements(FORKLIFT_JOB)
+    assert explicit.required_mask == Skill.FORKLIFT_LICENSE.bit
+    assert (explicit.max_jlpt_level, explicit.max_commute_minutes) == (3, 45)
+
+    with pytest.raises(ValidationError):
+        compile_requirements({"job": {"requirements": {"skills": ["juggling"]}}})
+
+
+def test_match_ranks_and_filters(db):
+    engine = MatchingEngine(reload_seconds=0)
+    lathe, forklift = engine.match(db, limit=5)
+
+    # UNS-1 has both skills and lives in 岐阜県, UNS-2 only lathe; UNS-5 is hired
+    assert [c["rirekisho_id"] for c in lathe["candidates"]][:2] == ["UNS-1", "UNS-2"]
+    assert "UNS-5" not in [c["rirekisho_id"] for c in lathe["candidates"]]
+    assert lathe["candidates"][0]["matched_skills"] == [Skill.NC_LATHE, Skill.LATHE]
+
+    # forklift licence required, JLPT N3 or better: only UNS-3
+    assert [c["rirekisho_id"] for c in forklift["candidates"]] == ["UNS-3"]
+    assert forklift["candidates"][0]["score"] == pytest.approx(0.6 + 0.25 * 0.8 + 0.15)
+
+    assert [s["factory_id"] for s in engine.match(db, factory_ids=["Factory-02"])] == ["Factory-02"]
+    with pytest.raises(KeyError):
+        engine.match(db, factory_ids=["Factory-99"])
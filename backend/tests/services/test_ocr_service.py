@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import base64
+import os
+import threading
+import time
 
 import pytest
 
@@ -46,3 +49,54 @@ async def test_process_from_base64(tmp_path):
     encoded = base64.b64encode(b"data").decode("utf-8")
     result = await service.process_from_base64(encoded, "image/png", "test")
     assert result["text"] == "dummy"
+
+
+class PagedService(OCRService):
+    """Fake 12-page PDF: rasterizing writes a marker file, OCR returns the page name"""
+
+    def __init__(self, cache_dir):  # type: ignore[override]
+        super().__init__(cache_dir=cache_dir)
+        self.rasterized = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def page_count(self, file_path: str) -> int:
+        return 12
+
+    def _rasterize_page(self, file_path, page, dpi, workdir):
+        self.rasterized.append(page)
+        path = os.path.join(workdir, f"page-{page}.png")
+        with open(path, "w") as handle:
+            handle.write(str(page))
+        return path
+
+    def _process_with_fallbacks(self, file_path, document_type, cache_key):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with open(file_path) as handle:
+            result = {"text": f"page {handle.read()}", "cache_key": cache_key}
+        with self._lock:
+            self.running -= 1
+        self._save_cache(cache_key, result)
+        return result
+
+
+@pytest.mark.asyncio
+async def test_pdf_pages_are_streamed_and_cached_per_page(tmp_path):
+    service = PagedService(tmp_path)
+    pdf = tmp_path / "bundle"
+    pdf.write_bytes(b"%PDF-1.7 fake")
+
+    pages = [page async for page in service.process_pages(str(pdf), "contract")]
+    assert sorted(page["page"] for page in pages) == list(range(1, 13))
+    assert all(page["text"] == f"page {page['page']}" and not page["cached"] for page in pages)
+    assert service.max_running <= service.workers
+    assert list(tmp_path.joinpath("tmp").iterdir()) == []  # page bitmaps removed
+
+    service.rasterized.clear()
+    result = await service.process_document(str(pdf), "contract")
+    assert service.rasterized == []  # every page served from the page cache
+    assert result["page_count"] == 12 and result["text"].startswith("page 1\n\fpage 2")
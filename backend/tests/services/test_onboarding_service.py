@@ -0,0 +1,58 @@
+"""Unit tests for transactional candidate approval and promotion."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func
+
+from app.core.query_stats import count_queries
+from app.models.models import Candidate, CandidateStatus, Document, DocumentType, Employee, Factory, User, UserRole
+from app.schemas.candidate import CandidateApprove
+from app.services.onboarding_service import OnboardingService
+
+
+@pytest.fixture()
+def db(db):
+    db.add(User(id=1, username="admin", email="admin@example.com", password_hash="x", role=UserRole.ADMIN))
+    db.add(Factory(factory_id="Factory-01", name="高雄工業 本社工場"))
+    for index in range(100):
+        candidate = Candidate(rirekisho_id=f"UNS-{index}", full_name_kanji=f"候補{index}" if index != 7 else None)
+        db.add(candidate)
+        db.flush()
+        for document_type in (DocumentType.RIREKISHO, DocumentType.ZAIRYU_CARD):
+            db.add(Document(candidate_id=candidate.id, document_type=document_type,
+                            file_name=f"{index}.pdf", file_path=f"/uploads/{index}.pdf"))
+    db.add(Employee(hakenmoto_id=500, rirekisho_id="UNS-3", full_name_kanji="既存", jikyu=1200))
+    db.commit()
+    return db
+
+
+def test_wave_is_one_transaction_with_bulk_document_copy(db):
+    ids = [candidate_id for (candidate_id,) in db.query(Candidate.id).order_by(Candidate.id)]
+    requests = [(candidate_id, CandidateApprove(jikyu=1300, factory_id="Factory-01")) for candidate_id in ids]
+    requests.append((999_999, CandidateApprove()))
+
+    with count_queries() as statements:
+        results = OnboardingService().approve(db, requests, user_id=1)
+
+    by_id = {result.candidate_id: result for result in results}
+    nameless, employed = by_id[ids[7]], by_id[ids[3]]
+    assert (nameless.status, nameless.error) == ("failed", "Candidate name is required to create an employee")
+    assert by_id[999_999].error == "Candidate not found"
+    assert employed.status == "hired" and employed.hakenmoto_id == 500 and employed.documents == 0
+
+    hired = [result for result in results if result.status == "hired"]
+    assert len(hired) == 99
+    assert db.query(Employee).count() == 99  # 98 new + the existing one
+    new_ids = sorted(result.hakenmoto_id for result in hired if result.hakenmoto_id != 500)
+    assert new_ids == list(range(501, 599))
+
+    # one INSERT ... SELECT for all copies, none for the failed candidate
+    assert sum(1 for sql in statements if sql.startswith("INSERT INTO documents")) == 1
+    assert db.query(func.count(Document.id)).filter(Document.employee_id.isnot(None)).scalar() == 196
+    assert by_id[ids[0]].documents == 2
+    copy = db.query(Document).filter(Document.employee_id == by_id[ids[0]].employee_id).first()
+    assert (copy.candidate_id, copy.uploaded_by, copy.file_path) == (None, 1, "/uploads/0.pdf")
+
+    # rolled back savepoint leaves the nameless candidate untouched
+    assert db.get(Candidate, ids[7]).status == CandidateStatus.PENDING
+    assert db.get(Candidate, ids[0]).status == CandidateStatus.HIRED
@@ -0,0 +1,43 @@
+"""Password hashing off the event loop with bounded admission."""
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.exceptions import ServiceBusyError, http_exception_from_uns
+from app.services.password_hasher import PasswordHasher
+
+
+def test_hash_and_verify_run_on_the_pool() -> None:
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), workers=2)
+
+    async def roundtrip():
+        hashed = await hasher.hash("secreto")
+        return await hasher.verify("secreto", hashed), await hasher.verify("otro", hashed)
+
+    assert asyncio.run(roundtrip()) == (True, False)
+    hasher.shutdown()
+
+
+def test_full_queue_is_rejected_with_retry_after() -> None:
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def burst():
+        blocked = [asyncio.ensure_future(hasher._run("verify", release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert hasher.pending == 2
+        with pytest.raises(ServiceBusyError) as busy:
+            await hasher.verify("secreto", "x")
+        release.set()
+        await asyncio.gather(*blocked)
+        return busy.value
+
+    error = asyncio.run(burst())
+    http_exc = http_exception_from_uns(error)
+    assert http_exc.status_code == 503 and int(http_exc.headers["Retry-After"]) >= 1
+    assert hasher.pending == 0
+    hasher.shutdown()
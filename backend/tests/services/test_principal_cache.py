@@ -0,0 +1,86 @@
+"""Authenticated principal cache: TTL, invalidation and the auth dependency."""
+from __future__ import annotations
+
+import asyncio
+
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.query_stats import count_queries
+from app.models.models import User, UserRole
+from app.services.auth_service import AuthService
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+def _principal(username: str = "tanaka", role: UserRole = UserRole.ADMIN) -> Principal:
+    return Principal(id=1, username=username, email=f"{username}@uns.jp", full_name=None, role=role, is_active=True)
+
+
+def test_cache_expires_evicts_and_shares_invalidations(tmp_path, monkeypatch) -> None:
+    cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+    cache.put("a", _principal("a"))
+    cache.put("b", _principal("b"))
+    cache.get("a")
+    cache.put("c", _principal("c"))  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") is not None
+
+    monkeypatch.setattr("app.services.principal_cache.time.monotonic", lambda: 10 ** 9)
+    assert cache.get("a") is None  # expired
+    monkeypatch.undo()
+
+    worker_1 = PrincipalCache(shared_dir=str(tmp_path))
+    worker_2 = PrincipalCache(shared_dir=str(tmp_path))
+    worker_2.put("a", _principal("a"))
+    worker_1.invalidate("a")
+    assert worker_2.get("a") is None
+
+
+def test_user_updates_invalidate_the_cached_principal() -> None:
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    with Session(engine) as db:
+        user = User(username="sato", email="sato@uns.jp", password_hash="x", role=UserRole.ADMIN)
+        db.add(user)
+        db.commit()
+
+        principal_cache.put("sato", Principal.from_user(user))
+        user.is_active = False
+        db.commit()
+        assert principal_cache.get("sato") is None
+
+
+def test_principal_recached_between_flush_and_commit_is_evicted(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    User.__table__.create(engine)
+    with Session(engine) as db, Session(engine) as other_request:
+        user = User(username="ito", email="ito@uns.jp", password_hash="x", role=UserRole.ADMIN)
+        db.add(user)
+        db.commit()
+
+        user.role = UserRole.EMPLOYEE
+        db.flush()
+        # a concurrent request still reads the committed row and caches it
+        old = other_request.query(User).filter_by(username="ito").one()
+        principal_cache.put("ito", Principal.from_user(old))
+        other_request.rollback()
+        assert principal_cache.get("ito").role == UserRole.ADMIN
+
+        db.commit()
+        assert principal_cache.get("ito") is None
+
+
+def test_current_user_is_served_from_cache_without_queries() -> None:
+    principal_cache.put("suzuki", _principal("suzuki"))
+    token = jwt.encode({"sub": "suzuki"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    async def resolve():
+        checker = AuthService.require_role("admin")
+        user = await AuthService.get_current_active_user(token, db=None)
+        return await checker(user)
+
+    with count_queries() as statements:
+        assert asyncio.run(resolve()).username == "suzuki"
+    assert statements == []
+    principal_cache.invalidate("suzuki")
@@ -0,0 +1,86 @@
+"""Unit tests for timer card table extraction (grid detection, batching, parsing)."""
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.services.timer_card_extractor import TimerCardExtractor, parse_hours, parse_time
+
+ROWS = [  # day, in, out, break, total; None = blank cell
+    ("1", "8:00", "17:00", "60", "8:00"),
+    ("2", None, None, None, None),  # day off
+    ("3", "8:3O", "25:1O", "60", "15.5"),
+    ("4", "9:00", "??", None, None),
+]
+
+
+def _sheet(rows=ROWS, row_height=40, widths=(60, 110, 110, 90, 90), top=80):
+    xs = np.cumsum((40,) + widths)
+    ys = [top + row_height * index for index in range(len(rows) + 2)]
+    sheet = np.full((ys[-1] + 40, int(xs[-1]) + 40), 255, dtype=np.uint8)
+    for y in ys:
+        cv2.line(sheet, (int(xs[0]), y), (int(xs[-1]), y), 0, 2)
+    for x in xs:
+        cv2.line(sheet, (int(x), ys[0]), (int(x), ys[-1]), 0, 2)
+    cv2.putText(sheet, "Tanaka 2025/10", (int(xs[0]), top - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    for row, texts in enumerate([("Day", "In", "Out", "Break", "Total")] + list(rows)):
+        for col, text in enumerate(texts):
+            if text:
+                cv2.putText(sheet, text, (int(xs[col]) + 8, ys[row] + 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
+    return sheet
+
+
+class FakeReader:
+    """Returns the drawn texts in reading order, like one batched tesseract call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def read(self, images, kind):
+        self.calls.append((kind, len(images)))
+        if kind == "text":
+            texts = ["Tanaka 2025/10", "Day", "In", "Out", "Break", "Total"]
+            return [(text, 0.9) for text in texts]
+        texts = [text for row in ROWS for text in row if text]
+        return [(text, 0.4 if text == "15.5" else 0.95) for text in texts]
+
+
+def test_sheet_rows_become_records_with_confidences():
+    reader = FakeReader()
+    records = TimerCardExtractor(reader=reader, workers=1).extract_sheet(_sheet())
+
+    # one batch for title + header, one for every non-blank body cell
+    assert reader.calls == [("text", 6), ("time", 14)]
+    assert [record["work_date"] for record in records] == ["2025-10-01", "2025-10-03", "2025-10-04"]
+    first, overnight, unreadable = records
+
+    assert first["employee_name"] == "Tanaka"
+    assert (first["clock_in"], first["clock_out"], first["break_minutes"], first["total_hours"]) == \
+        ("08:00", "17:00", 60, "8:00")
+    assert first["confidence"] == 0.95 and not first["needs_review"] and first["notes"] is None
+
+    assert (overnight["clock_in"], overnight["clock_out"], overnight["total_hours"]) == ("08:30", "25:10", "15:30")
+    assert overnight["needs_review"] and overnight["field_confidence"]["total"] == 0.4
+
+    assert unreadable["clock_out"] is None and unreadable["field_confidence"]["clock_out"] == 0.0
+    assert unreadable["needs_review"] and unreadable["notes"] == "要確認: clock_out"
+
+
+def test_page_without_table_is_rejected():
+    blank = np.full((400, 300), 255, dtype=np.uint8)
+    with pytest.raises(ValidationError):
+        TimerCardExtractor(reader=FakeReader(), workers=1).segment(blank)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("8:30", "08:30"), ("830", "08:30"), ("０８：３０", "08:30"), ("O8.3O", "08:30"),
+    ("29:00", "29:00"), ("30:00", None), ("8:75", None), ("", None),
+])
+def test_parse_time(text, expected):
+    assert parse_time(text) == expected
+
+
+def test_parse_hours():
+    assert (parse_hours("7.5"), parse_hours("7:45"), parse_hours("abc")) == ("7:30", "7:45", None)
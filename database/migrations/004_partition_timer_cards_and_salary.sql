@@ -0,0 +1,188 @@
+-- Migration 004: Native partitioning for timer_cards (monthly) and salary_calculations (yearly)
+--
+-- timer_cards is range-partitioned by work_date, one partition per month
+-- (timer_cards_YYYY_MM). salary_calculations is range-partitioned by year
+-- (salary_calculations_YYYY). A DEFAULT partition catches rows outside the
+-- created ranges; ensure_*_partition() moves those rows into the proper
+-- partition when it is created.
+--
+-- Closed months are exported to cold storage and detached by
+-- scripts/archive_timer_cards.py (app/services/archive_service.py).
+
+BEGIN;
+
+-- ============================================
+-- TIMER CARDS (monthly partitions)
+-- ============================================
+
+ALTER TABLE timer_cards RENAME TO timer_cards_legacy;
+DROP TRIGGER IF EXISTS update_timer_cards_updated_at ON timer_cards_legacy;
+DROP INDEX IF EXISTS idx_timer_cards_employee_date;
+
+CREATE TABLE timer_cards (
+    id INTEGER NOT NULL DEFAULT nextval('timer_cards_id_seq'),
+    employee_id INTEGER NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+    factory_id VARCHAR(20) REFERENCES factories(factory_id),
+    work_date DATE NOT NULL,
+    clock_in TIME,
+    clock_out TIME,
+    break_minutes INTEGER DEFAULT 0,
+    regular_hours DECIMAL(5,2) DEFAULT 0,
+    overtime_hours DECIMAL(5,2) DEFAULT 0,
+    night_hours DECIMAL(5,2) DEFAULT 0,
+    holiday_hours DECIMAL(5,2) DEFAULT 0,
+    shift_type shift_type,
+    notes TEXT,
+    is_approved BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, work_date)
+) PARTITION BY RANGE (work_date);
+
+ALTER SEQUENCE timer_cards_id_seq OWNED BY timer_cards.id;
+
+CREATE TABLE timer_cards_default PARTITION OF timer_cards DEFAULT;
+
+CREATE INDEX idx_timer_cards_employee_date ON timer_cards(employee_id, work_date);
+CREATE INDEX idx_timer_cards_factory_date ON timer_cards(factory_id, work_date);
+
+CREATE OR REPLACE FUNCTION ensure_timer_card_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', p_month)::date;
+    end_date DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    partition_name TEXT := format('timer_cards_%s', to_char(date_trunc('month', p_month), 'YYYY_MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE timer_cards INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    -- Rows that landed in the default partition must move before ATTACH
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM timer_cards_default WHERE work_date >= %L AND work_date < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_date, end_date, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE timer_cards ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month already present, plus a rolling window
+SELECT ensure_timer_card_partition(m)
+FROM (SELECT DISTINCT date_trunc('month', work_date)::date AS m FROM timer_cards_legacy) existing_months;
+
+SELECT ensure_timer_card_partition((date_trunc('month', CURRENT_DATE) + make_interval(months => offs))::date)
+FROM generate_series(-1, 3) AS offs;
+
+INSERT INTO timer_cards (
+    id, employee_id, factory_id, work_date, clock_in, clock_out, break_minutes,
+    regular_hours, overtime_hours, night_hours, holiday_hours, shift_type,
+    notes, is_approved, created_at, updated_at
+)
+SELECT
+    id, employee_id, factory_id, work_date, clock_in, clock_out, break_minutes,
+    regular_hours, overtime_hours, night_hours, holiday_hours, shift_type,
+    notes, is_approved, created_at, updated_at
+FROM timer_cards_legacy;
+
+DROP TABLE timer_cards_legacy;
+
+CREATE TRIGGER update_timer_cards_updated_at BEFORE UPDATE ON timer_cards FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================
+-- SALARY CALCULATIONS (yearly partitions)
+-- ============================================
+
+ALTER TABLE salary_calculations RENAME TO salary_calculations_legacy;
+DROP INDEX IF EXISTS idx_salary_calculations_employee_month;
+
+CREATE TABLE salary_calculations (
+    id INTEGER NOT NULL DEFAULT nextval('salary_calculations_id_seq'),
+    employee_id INTEGER NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+    month INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    total_regular_hours DECIMAL(5,2),
+    total_overtime_hours DECIMAL(5,2),
+    total_night_hours DECIMAL(5,2),
+    total_holiday_hours DECIMAL(5,2),
+    base_salary INTEGER,
+    overtime_pay INTEGER,
+    night_pay INTEGER,
+    holiday_pay INTEGER,
+    bonus INTEGER DEFAULT 0,
+    gasoline_allowance INTEGER DEFAULT 0,
+    apartment_deduction INTEGER DEFAULT 0,
+    other_deductions INTEGER DEFAULT 0,
+    gross_salary INTEGER,
+    net_salary INTEGER,
+    factory_payment INTEGER,
+    company_profit INTEGER,
+    is_paid BOOLEAN DEFAULT FALSE,
+    paid_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, year)
+) PARTITION BY RANGE (year);
+
+ALTER SEQUENCE salary_calculations_id_seq OWNED BY salary_calculations.id;
+
+CREATE TABLE salary_calculations_default PARTITION OF salary_calculations DEFAULT;
+
+CREATE INDEX idx_salary_calculations_employee_month ON salary_calculations(employee_id, year, month);
+CREATE INDEX idx_salary_calculations_year_month ON salary_calculations(year, month);
+
+CREATE OR REPLACE FUNCTION ensure_salary_partition(p_year INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := format('salary_calculations_%s', p_year);
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE salary_calculations INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM salary_calculations_default WHERE year = %s RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        p_year, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE salary_calculations ATTACH PARTITION %I FOR VALUES FROM (%s) TO (%s)',
+        partition_name, p_year, p_year + 1
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_salary_partition(y)
+FROM (SELECT DISTINCT year AS y FROM salary_calculations_legacy) existing_years;
+
+SELECT ensure_salary_partition(y)
+FROM generate_series(EXTRACT(YEAR FROM CURRENT_DATE)::int - 1, EXTRACT(YEAR FROM CURRENT_DATE)::int + 1) AS y;
+
+INSERT INTO salary_calculations (
+    id, employee_id, month, year, total_regular_hours, total_overtime_hours,
+    total_night_hours, total_holiday_hours, base_salary, overtime_pay, night_pay,
+    holiday_pay, bonus, gasoline_allowance, apartment_deduction, other_deductions,
+    gross_salary, net_salary, factory_payment, company_profit, is_paid, paid_at, created_at
+)
+SELECT
+    id, employee_id, month, year, total_regular_hours, total_overtime_hours,
+    total_night_hours, total_holiday_hours, base_salary, overtime_pay, night_pay,
+    holiday_pay, bonus, gasoline_allowance, apartment_deduction, other_deductions,
+    gross_salary, net_salary, factory_payment, company_profit, is_paid, paid_at, created_at
+FROM salary_calculations_legacy;
+
+DROP TABLE salary_calculations_legacy;
+
+COMMIT;
@@ -0,0 +1,181 @@
+-- Migration 005: Candidate family / work history / qualifications / skills as child tables
+--
+-- The numbered rirekisho columns on candidates (family_*_1..5,
+-- work_history_*_7, qualification_1..3, language_skill_1..2) and the
+-- 19 exp_* / licence flag columns move into child tables. Skills are kept
+-- as one candidate_skills row per skill (primary key (skill, candidate_id),
+-- so "forklift AND welding" is answered from the index) plus the
+-- candidates.skills_mask bitmap used for vectorized scoring. Bit N is the
+-- N-th member of CandidateSkillCode (app/models/models.py); keep
+-- skill_codes below in the same order.
+--
+-- Legacy columns are copied only if they exist (databases created before
+-- scripts/migrate_candidates_rirekisho.py do not have all of them).
+
+BEGIN;
+
+-- ============================================
+-- CHILD TABLES
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS candidate_family_members (
+    id SERIAL PRIMARY KEY,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name VARCHAR(100),
+    relation VARCHAR(50),
+    age INTEGER,
+    residence VARCHAR(50),
+    separate_address TEXT,
+    UNIQUE (candidate_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS candidate_work_history (
+    id SERIAL PRIMARY KEY,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    company VARCHAR(200),
+    entry_company VARCHAR(200),
+    exit_company VARCHAR(200),
+    UNIQUE (candidate_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS candidate_qualifications (
+    id SERIAL PRIMARY KEY,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('qualification', 'language')),
+    position INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    UNIQUE (candidate_id, kind, position)
+);
+CREATE INDEX IF NOT EXISTS idx_candidate_qualifications_kind_name ON candidate_qualifications(kind, name);
+
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    skill VARCHAR(40) NOT NULL,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    PRIMARY KEY (skill, candidate_id)
+);
+CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate_id ON candidate_skills(candidate_id);
+
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS skills_mask INTEGER NOT NULL DEFAULT 0;
+
+-- ============================================
+-- COPY LEGACY COLUMNS
+-- ============================================
+
+CREATE OR REPLACE FUNCTION pg_temp.candidate_column_exists(TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'candidates' AND column_name = $1
+    );
+$$ LANGUAGE sql;
+
+DO $$
+DECLARE
+    -- CandidateSkillCode order: legacy column -> code
+    skill_columns TEXT[] := ARRAY[
+        'exp_nc_lathe', 'exp_lathe', 'exp_press', 'exp_forklift', 'exp_packing', 'exp_welding',
+        'exp_car_assembly', 'exp_car_line', 'exp_car_inspection', 'exp_electronic_inspection',
+        'exp_food_processing', 'exp_casting', 'exp_line_leader', 'exp_painting',
+        'forklift_license', 'tama_kake', 'mobile_crane_under_5t', 'mobile_crane_over_5t', 'gas_welding'
+    ];
+    skill_codes TEXT[] := ARRAY[
+        'nc_lathe', 'lathe', 'press', 'forklift', 'packing', 'welding',
+        'car_assembly', 'car_line', 'car_inspection', 'electronic_inspection',
+        'food_processing', 'casting', 'line_leader', 'painting',
+        'forklift_license', 'tama_kake', 'mobile_crane_under_5t', 'mobile_crane_over_5t', 'gas_welding'
+    ];
+    -- same values as app.services.candidate_profile.FALSY_FLAGS
+    falsy TEXT[] := ARRAY['', '無', 'なし', '無し', '×', '✕', '-', 'no', '0', 'false', 'n'];
+    i INTEGER;
+BEGIN
+    FOR i IN 1..5 LOOP
+        IF pg_temp.candidate_column_exists('family_name_' || i) THEN
+            EXECUTE format(
+                'INSERT INTO candidate_family_members (candidate_id, position, name, relation, age, residence, separate_address)
+                 SELECT id, %1$s, family_name_%1$s, family_relation_%1$s, family_age_%1$s,
+                        family_residence_%1$s, family_separate_address_%1$s
+                 FROM candidates
+                 WHERE COALESCE(family_name_%1$s, family_relation_%1$s) IS NOT NULL
+                 ON CONFLICT DO NOTHING', i);
+        END IF;
+    END LOOP;
+
+    IF pg_temp.candidate_column_exists('work_history_company_7') THEN
+        INSERT INTO candidate_work_history (candidate_id, position, company, entry_company, exit_company)
+        SELECT id, 1, work_history_company_7, work_history_entry_company_7, work_history_exit_company_7
+        FROM candidates
+        WHERE COALESCE(work_history_company_7, work_history_entry_company_7, work_history_exit_company_7) IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    FOR i IN 1..3 LOOP
+        IF pg_temp.candidate_column_exists('qualification_' || i) THEN
+            EXECUTE format(
+                'INSERT INTO candidate_qualifications (candidate_id, kind, position, name)
+                 SELECT id, ''qualification'', %1$s, btrim(qualification_%1$s)
+                 FROM candidates WHERE btrim(qualification_%1$s) <> ''''
+                 ON CONFLICT DO NOTHING', i);
+        END IF;
+    END LOOP;
+
+    FOR i IN 1..2 LOOP
+        IF pg_temp.candidate_column_exists('language_skill_' || i) THEN
+            EXECUTE format(
+                'INSERT INTO candidate_qualifications (candidate_id, kind, position, name)
+                 SELECT id, ''language'', %1$s, btrim(language_skill_%1$s)
+                 FROM candidates WHERE btrim(language_skill_%1$s) <> ''''
+                 ON CONFLICT DO NOTHING', i);
+        END IF;
+    END LOOP;
+
+    FOR i IN 1..array_length(skill_columns, 1) LOOP
+        IF pg_temp.candidate_column_exists(skill_columns[i]) THEN
+            EXECUTE format(
+                'INSERT INTO candidate_skills (skill, candidate_id)
+                 SELECT %L, id FROM candidates
+                 WHERE %I IS NOT NULL AND lower(btrim(%I)) <> ALL (%L::TEXT[])
+                 ON CONFLICT DO NOTHING',
+                skill_codes[i], skill_columns[i], skill_columns[i], falsy);
+        END IF;
+    END LOOP;
+
+    UPDATE candidates c
+    SET skills_mask = s.mask
+    FROM (
+        SELECT candidate_id, SUM(1 << (array_position(skill_codes, skill) - 1))::INTEGER AS mask
+        FROM candidate_skills
+        GROUP BY candidate_id
+    ) s
+    WHERE c.id = s.candidate_id;
+END $$;
+
+-- ============================================
+-- DROP LEGACY COLUMNS
+-- ============================================
+
+ALTER TABLE candidates
+    DROP COLUMN IF EXISTS family_name_1, DROP COLUMN IF EXISTS family_relation_1, DROP COLUMN IF EXISTS family_age_1,
+    DROP COLUMN IF EXISTS family_residence_1, DROP COLUMN IF EXISTS family_separate_address_1,
+    DROP COLUMN IF EXISTS family_name_2, DROP COLUMN IF EXISTS family_relation_2, DROP COLUMN IF EXISTS family_age_2,
+    DROP COLUMN IF EXISTS family_residence_2, DROP COLUMN IF EXISTS family_separate_address_2,
+    DROP COLUMN IF EXISTS family_name_3, DROP COLUMN IF EXISTS family_relation_3, DROP COLUMN IF EXISTS family_age_3,
+    DROP COLUMN IF EXISTS family_residence_3, DROP COLUMN IF EXISTS family_separate_address_3,
+    DROP COLUMN IF EXISTS family_name_4, DROP COLUMN IF EXISTS family_relation_4, DROP COLUMN IF EXISTS family_age_4,
+    DROP COLUMN IF EXISTS family_residence_4, DROP COLUMN IF EXISTS family_separate_address_4,
+    DROP COLUMN IF EXISTS family_name_5, DROP COLUMN IF EXISTS family_relation_5, DROP COLUMN IF EXISTS family_age_5,
+    DROP COLUMN IF EXISTS family_residence_5, DROP COLUMN IF EXISTS family_separate_address_5,
+    DROP COLUMN IF EXISTS work_history_company_7, DROP COLUMN IF EXISTS work_history_entry_company_7,
+    DROP COLUMN IF EXISTS work_history_exit_company_7,
+    DROP COLUMN IF EXISTS qualification_1, DROP COLUMN IF EXISTS qualification_2, DROP COLUMN IF EXISTS qualification_3,
+    DROP COLUMN IF EXISTS language_skill_1, DROP COLUMN IF EXISTS language_skill_2,
+    DROP COLUMN IF EXISTS exp_nc_lathe, DROP COLUMN IF EXISTS exp_lathe, DROP COLUMN IF EXISTS exp_press,
+    DROP COLUMN IF EXISTS exp_forklift, DROP COLUMN IF EXISTS exp_packing, DROP COLUMN IF EXISTS exp_welding,
+    DROP COLUMN IF EXISTS exp_car_assembly, DROP COLUMN IF EXISTS exp_car_line, DROP COLUMN IF EXISTS exp_car_inspection,
+    DROP COLUMN IF EXISTS exp_electronic_inspection, DROP COLUMN IF EXISTS exp_food_processing,
+    DROP COLUMN IF EXISTS exp_casting, DROP COLUMN IF EXISTS exp_line_leader, DROP COLUMN IF EXISTS exp_painting,
+    DROP COLUMN IF EXISTS forklift_license, DROP COLUMN IF EXISTS tama_kake, DROP COLUMN IF EXISTS mobile_crane_under_5t,
+    DROP COLUMN IF EXISTS mobile_crane_over_5t, DROP COLUMN IF EXISTS gas_welding;
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- Migration 006: Indexes for duplicate candidate lookups
+--
+-- A new candidate is compared with the existing rows sharing its birth date
+-- or phone (app/services/dedup_service.py); these lookups must not scan
+-- the whole table.
+
+CREATE INDEX IF NOT EXISTS idx_candidates_date_of_birth ON candidates(date_of_birth);
+CREATE INDEX IF NOT EXISTS idx_candidates_phone ON candidates(phone);
+CREATE INDEX IF NOT EXISTS idx_candidates_mobile ON candidates(mobile);
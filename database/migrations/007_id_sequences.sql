@@ -0,0 +1,28 @@
+-- Migration 007: Sequences for business ids (app/services/id_allocator.py)
+--
+-- rirekisho_id (UNS-<n>) and hakenmoto_id were computed as "last row + 1",
+-- which costs a query per insert and lets concurrent inserts pick the same
+-- value. Both now come from sequences, started after the highest id in use.
+-- id_sequences holds the equivalent counters on databases without
+-- sequences (SQLite); PostgreSQL does not use it.
+
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS rirekisho_id_seq;
+CREATE SEQUENCE IF NOT EXISTS hakenmoto_id_seq;
+
+-- RIREKISHO_ID_START defaults to 1000
+SELECT setval('rirekisho_id_seq', GREATEST(
+    COALESCE((SELECT MAX(substring(rirekisho_id FROM 5)::INTEGER)
+              FROM candidates WHERE rirekisho_id ~ '^UNS-[0-9]+$'), 0) + 1,
+    1000
+), false);
+
+SELECT setval('hakenmoto_id_seq', COALESCE((SELECT MAX(hakenmoto_id) FROM employees), 0) + 1, false);
+
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name VARCHAR(50) PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- Migration 008: Content-addressed document storage (app/services/blob_store.py)
+--
+-- Uploads are stored once per content under UPLOAD_DIR/blobs/ab/cd/<sha256>.
+-- blobs.ref_count counts the documents pointing at each blob; blobs nothing
+-- references are removed by scripts/gc_blobs.py. Documents uploaded before
+-- this migration keep blob_sha256 NULL until
+-- scripts/migrate_documents_to_blobs.py moves their files into the store.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    mime_type VARCHAR(100),
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(updated_at) WHERE ref_count = 0;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS blob_sha256 VARCHAR(64) REFERENCES blobs(sha256);
+CREATE INDEX IF NOT EXISTS idx_documents_blob_sha256 ON documents(blob_sha256);
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- Migration 009: Photo documents
+--
+-- Photos are uploaded as documents of type 'photo' (stored in the blob
+-- store, app/services/blob_store.py); the upload sets photo_url to
+-- /api/files/<sha256>, which serves WebP thumbnails and previews
+-- (?size=thumb|medium, app/services/derivative_service.py).
+
+ALTER TYPE document_type ADD VALUE IF NOT EXISTS 'photo' BEFORE 'other';
@@ -0,0 +1,22 @@
+-- Migration 010: Timer card uploads
+--
+-- Timer card scans are stored in the blob store (migration 008). Each upload
+-- gets a timer_card_uploads row referencing its blob, so scripts/gc_blobs.py
+-- keeps the scan (the payroll source of the timer cards) like any document;
+-- blobs.ref_count counts documents and timer_card_uploads together.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS timer_card_uploads (
+    id SERIAL PRIMARY KEY,
+    blob_sha256 VARCHAR(64) NOT NULL REFERENCES blobs(sha256),
+    file_name VARCHAR(255) NOT NULL,
+    factory_id VARCHAR(20) REFERENCES factories(factory_id),
+    records_found INTEGER,
+    uploaded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    uploaded_by INTEGER REFERENCES users(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_timer_card_uploads_blob_sha256 ON timer_card_uploads(blob_sha256);
+
+COMMIT;
@@ -277,7 +277,11 @@ const PendingApproval: React.FC = () => {
                   <div className="flex-shrink-0">
                     {candidate.photo_url ? (
                       <img
-                        src={candidate.photo_url}
+                        src={
+                          candidate.photo_url.startsWith('/api/files/')
+                            ? `${candidate.photo_url}?size=thumb`
+                            : candidate.photo_url
+                        }
                         alt={candidate.full_name_kanji || '候補者'}
                         className="w-16 h-16 rounded-full object-cover border-2 border-gray-200"
                       />